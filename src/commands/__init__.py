@@ -1,9 +1,10 @@
 """Модуль команд shell-эмулятора."""
 
-from .filesystem import FileSystemCommands
-from .archive import ArchiveCommands
-from .advanced import AdvancedCommands
 from ..logger import ShellLogger
+from .advanced import AdvancedCommands
+from .archive import ArchiveCommands
+from .filesystem import FileSystemCommands
+from .registry import CommandRegistry, CommandSpec, OptionSpec
 
 
 class ShellCommands(FileSystemCommands, ArchiveCommands, AdvancedCommands):
@@ -24,4 +25,4 @@ class ShellCommands(FileSystemCommands, ArchiveCommands, AdvancedCommands):
         FileSystemCommands.__init__(self, logger)
 
 
-__all__ = ['ShellCommands']
+__all__ = ['ShellCommands', 'CommandRegistry', 'CommandSpec', 'OptionSpec']
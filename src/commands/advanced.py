@@ -1,56 +1,74 @@
-"""Продвинутые команды: grep, history, undo."""
+"""Продвинутые команды: grep, index, history, undo, stats."""
 
 import os
 import shutil
-import re
-from typing import Pattern
+import stat
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional, Type
 
+from ..constants import (
+    ERROR_INDEX_NOT_FOUND,
+    ERROR_NOT_A_DIRECTORY,
+    ERROR_PATH_NOT_FOUND,
+    GREP_POOL_KIND,
+    GREP_QUEUE_SIZE,
+    GREP_WORKERS,
+    INDEX_FILE,
+    MAX_HISTORY_SIZE,
+    METRICS_PERCENTILES,
+    SEPARATOR_LINE,
+    SEPARATOR_SHORT,
+)
+from ..trash import format_size
 from .base import BaseCommands
-from ..constants import ERROR_PATH_NOT_FOUND, SEPARATOR_SHORT
+from .search import Matcher, compile_matcher, line_matches, search_file
+from .trigram import TrigramIndex
+from .walker import walk
+
+GREP_POOL_KINDS: Dict[str, Type] = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
 
 
 class AdvancedCommands(BaseCommands):
     """Класс с продвинутыми командами."""
 
     def grep(self, pattern: str, path: str, recursive: bool = False,
-             ignore_case: bool = False) -> None:
+             ignore_case: bool = False, workers: Optional[int] = None,
+             pool: str = GREP_POOL_KIND) -> None:
         """
         Команда grep - поиск по содержимому файлов.
 
+        Если для каталога или его родителя построен индекс (команда index),
+        grep -r читает только файлы, которые могут содержать совпадение.
+
         Args:
             pattern: Шаблон для поиска
             path: Путь для поиска
             recursive: Рекурсивный поиск
             ignore_case: Игнорировать регистр
+            workers: Размер пула для рекурсивного поиска
+            pool: Тип пула: 'thread' или 'process'
         """
         try:
             search_path = os.path.abspath(os.path.join(self.current_dir, path))
 
-            if not os.path.exists(search_path):
+            if not self.fs_cache.exists(search_path):
                 self.logger.log_error(f"{ERROR_PATH_NOT_FOUND}: {search_path}")
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {search_path}")
                 return
 
-            flags = re.IGNORECASE if ignore_case else 0
-            regex = re.compile(pattern, flags)
+            matcher = compile_matcher(pattern, ignore_case)
 
             found = False
-
-            if os.path.isfile(search_path):
-                found = self._grep_file(search_path, regex)
-            elif os.path.isdir(search_path):
-                if recursive:
-                    for root, dirs, files in os.walk(search_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            if self._grep_file(file_path, regex):
-                                found = True
-                else:
-                    for item in os.listdir(search_path):
-                        file_path = os.path.join(search_path, item)
-                        if os.path.isfile(file_path):
-                            if self._grep_file(file_path, regex):
-                                found = True
+            for line in self._grep_output(search_path, pattern, matcher, recursive,
+                                          workers or GREP_WORKERS, pool, ignore_case):
+                print(line)
+                found = True
 
             if not found:
                 print(f"No matches found for pattern: {pattern}")
@@ -61,36 +79,223 @@ class AdvancedCommands(BaseCommands):
             self.logger.log_error(f"grep failed: {e}")
             print(f"Error: {e}")
 
-    def _grep_file(self, file_path: str, regex: Pattern) -> bool:
+    def iter_grep(self, pattern: str, path: Optional[str] = None, recursive: bool = False,
+                  ignore_case: bool = False, workers: Optional[int] = None,
+                  pool: str = GREP_POOL_KIND,
+                  lines: Optional[Iterator[str]] = None) -> Iterator[str]:
+        """
+        Стадия конвейера grep: строки с совпадениями.
+
+        Без path фильтруются строки предыдущей стадии, с path - как grep,
+        но строки отдаются лениво: закрытие генератора останавливает поиск.
+
+        Args:
+            pattern: Шаблон для поиска
+            path: Путь для поиска (None - читать lines)
+            recursive: Рекурсивный поиск
+            ignore_case: Игнорировать регистр
+            workers: Размер пула для рекурсивного поиска
+            pool: Тип пула: 'thread' или 'process'
+            lines: Строки предыдущей стадии
+
+        Yields:
+            Строки вывода
+
+        Raises:
+            FileNotFoundError: Путь не существует
+            ValueError: Нет ни path, ни входных строк
+        """
+        matcher = compile_matcher(pattern, ignore_case)
+        if path is None:
+            if lines is None:
+                raise ValueError("grep requires path when not reading from a pipe")
+            for line in lines:
+                if line_matches(line, matcher):
+                    yield line
+            return
+
+        search_path = os.path.abspath(os.path.join(self.current_dir, path))
+        if not self.fs_cache.exists(search_path):
+            raise FileNotFoundError(f"{ERROR_PATH_NOT_FOUND}: {search_path}")
+        yield from self._grep_output(search_path, pattern, matcher, recursive,
+                                     workers or GREP_WORKERS, pool, ignore_case)
+
+    def _grep_output(self, search_path: str, pattern: str, matcher: Matcher,
+                     recursive: bool, workers: int, pool: str,
+                     ignore_case: bool = False) -> Iterator[str]:
+        """
+        Строки вывода grep для файла или каталога.
+
+        Args:
+            search_path: Абсолютный путь для поиска
+            pattern: Исходный шаблон (для выборки из индекса)
+            matcher: Литерал или регулярное выражение из compile_matcher
+            recursive: Рекурсивный поиск
+            workers: Количество воркеров
+            pool: Тип пула: 'thread' или 'process'
+            ignore_case: Игнорируется ли регистр (для выборки из индекса)
+
+        Yields:
+            Строки вывода
+        """
+        if self.fs_cache.isfile(search_path):
+            yield from self._grep_file(search_path, matcher)
+        elif self.fs_cache.isdir(search_path):
+            if recursive:
+                yield from self._grep_parallel(search_path, pattern, matcher, workers, pool,
+                                               ignore_case)
+            else:
+                for item, item_stat in self.fs_cache.listdir_stat(search_path):
+                    if stat.S_ISREG(item_stat.st_mode):
+                        yield from self._grep_file(os.path.join(search_path, item), matcher)
+
+    def _grep_parallel(self, root: str, pattern: str, matcher: Matcher,
+                       workers: int, pool: str, ignore_case: bool = False) -> Iterator[str]:
+        """
+        Рекурсивный поиск через пул воркеров.
+
+        Обход дерева наполняет ограниченную очередь задач: когда в работе
+        GREP_QUEUE_SIZE файлов, обход ждёт самую старую задачу. Результаты
+        выдаются в порядке обхода, поэтому вывод не зависит от числа воркеров.
+        При наличии триграммного индекса файлы, в которых шаблона заведомо
+        нет, не читаются; порядок вывода от этого не меняется. Если
+        потребитель закрывает генератор (head в конвейере), задачи из очереди
+        отменяются.
+
+        Args:
+            root: Корневая директория поиска
+            pattern: Исходный шаблон (для выборки из индекса)
+            matcher: Литерал или регулярное выражение из compile_matcher
+            workers: Количество воркеров
+            pool: Тип пула: 'thread' или 'process'
+            ignore_case: Игнорируется ли регистр (для выборки из индекса)
+
+        Yields:
+            Строки вывода
+        """
+        if pool not in GREP_POOL_KINDS:
+            raise ValueError(f"Unknown pool type: {pool}")
+        executor_class = GREP_POOL_KINDS[pool]
+
+        files_count = 0
+        bytes_count = 0
+        pending: Deque[Future] = deque()
+        started = time.perf_counter()
+
+        index_root = TrigramIndex.locate(root)
+        index = TrigramIndex(index_root) if index_root is not None else None
+        if index is not None:
+            files: Iterator[str] = index.candidates(root, pattern, ignore_case)
+        else:
+            # Нечитаемые каталоги пропускаются, как в os.walk
+            files = (item.path for item in walk(root, include=lambda item: item.is_file(),
+                                                dirs=False, onerror=lambda error: None))
+
+        try:
+            with executor_class(max_workers=workers) as executor:
+                try:
+                    for file_path in files:
+                        pending.append(executor.submit(search_file, file_path, matcher))
+                        if len(pending) >= GREP_QUEUE_SIZE:
+                            lines, size = pending.popleft().result()
+                            files_count += 1
+                            bytes_count += size
+                            yield from lines
+
+                    while pending:
+                        lines, size = pending.popleft().result()
+                        files_count += 1
+                        bytes_count += size
+                        yield from lines
+                finally:
+                    for future in pending:
+                        future.cancel()
+        finally:
+            if index is not None:
+                index.close()
+            self.metrics.add(files=files_count, read=bytes_count)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        stats = (f"Searched {files_count} files, {bytes_count} bytes in {elapsed:.3f}s "
+                 f"({files_count / elapsed:.1f} files/s, "
+                 f"{bytes_count / elapsed / 1024 / 1024:.2f} MiB/s, "
+                 f"{workers} {pool} workers)")
+        if index is not None:
+            stats += f", {index.skipped} files skipped by index"
+        print(stats, file=sys.stderr)
+        self.logger.log_success(f"grep stats: {stats}")
+
+    def _grep_file(self, file_path: str, matcher: Matcher) -> List[str]:
         """
         Вспомогательная функция для поиска в файле.
 
         Args:
             file_path: Путь к файлу
-            regex: Скомпилированное регулярное выражение
+            matcher: Литерал или регулярное выражение из compile_matcher
 
         Returns:
-            True если найдены совпадения, False иначе
+            Строки вывода с совпадениями
+        """
+        lines, size = search_file(file_path, matcher)
+        self.metrics.add(files=1, read=size)
+        return lines
+
+    def build_index(self, path: Optional[str] = None, drop: bool = False) -> None:
+        """
+        Команда index - построение или обновление триграммного индекса каталога.
+
+        Повторный запуск читает только новые и изменённые (по stat) файлы
+        и удаляет из индекса исчезнувшие.
+
+        Args:
+            path: Индексируемый каталог (по умолчанию текущий)
+            drop: Удалить индекс вместо обновления
         """
-        found = False
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    if regex.search(line):
-                        print(f"{file_path}:{line_num}: {line.rstrip()}")
-                        found = True
-        except Exception:
-            pass
-        return found
+            target = os.path.abspath(os.path.join(self.current_dir, path or os.curdir))
+
+            if not os.path.isdir(target):
+                self.logger.log_error(f"{ERROR_NOT_A_DIRECTORY}: {target}")
+                print(f"Error: {ERROR_NOT_A_DIRECTORY}: {target}")
+                return
+
+            if drop:
+                db_path = os.path.join(target, INDEX_FILE)
+                if not os.path.exists(db_path):
+                    self.logger.log_error(f"{ERROR_INDEX_NOT_FOUND}: {target}")
+                    print(f"Error: {ERROR_INDEX_NOT_FOUND}: {target}")
+                    return
+                os.remove(db_path)
+                self.fs_cache.invalidate(db_path)
+                print(f"Removed index: {db_path}")
+                self.logger.log_success(f"index --drop {target}")
+                return
+
+            started = time.perf_counter()
+            index = TrigramIndex(target)
+            try:
+                stats = index.update()
+            finally:
+                index.close()
+                self.fs_cache.invalidate(os.path.join(target, INDEX_FILE))
+            elapsed = time.perf_counter() - started
+
+            self.metrics.add(files=stats.updated)
+            print(f"Indexed {stats.files} files in {elapsed:.3f}s "
+                  f"({stats.updated} read, {stats.removed} removed)")
+            self.logger.log_success(f"index {target}")
+
+        except Exception as e:
+            self.logger.log_error(f"index failed: {e}")
+            print(f"Error: {e}")
 
     def show_history(self) -> None:
         """Команда history - показать историю команд."""
         try:
-            print("Command History (last 100 commands):")
+            print(f"Command History (last {MAX_HISTORY_SIZE} commands):")
             print(SEPARATOR_SHORT)
-            for i, cmd in enumerate(self.history[-100:], 1):
-                if '|' not in cmd or not cmd.startswith(('cp|', 'mv|', 'rm|')):
-                    print(f"{i}: {cmd}")
+            for i, cmd in enumerate(self.history[-MAX_HISTORY_SIZE:], 1):
+                print(f"{i}: {cmd}")
 
             self.logger.log_success("history")
 
@@ -98,52 +303,88 @@ class AdvancedCommands(BaseCommands):
             self.logger.log_error(f"history failed: {e}")
             print(f"Error: {e}")
 
+    def show_stats(self, export: Optional[str] = None, reset: bool = False) -> None:
+        """
+        Команда stats - агрегаты метрик команд за сессию.
+
+        Args:
+            export: Путь к JSON-файлу для выгрузки метрик
+            reset: Очистить метрики после вывода
+        """
+        try:
+            summary = self.metrics.summary()
+            header = f"{'Command':<10} {'Count':>6} {'Errors':>6} " + ' '.join(
+                f"{f'p{p} ms':>9}" for p in METRICS_PERCENTILES) + \
+                f" {'CPU ms':>9} {'Files':>8} {'Read':>9} {'Written':>9}"
+            lines = [header, SEPARATOR_LINE]
+            for command, stats in summary.items():
+                lines.append(
+                    f"{command:<10} {stats['count']:>6} {stats['errors']:>6} " + ' '.join(
+                        f"{stats[f'p{p}_ms']:>9.2f}" for p in METRICS_PERCENTILES) +
+                    f" {stats['cpu_ms_avg']:>9.2f} {stats['files']:>8} "
+                    f"{format_size(stats['bytes_read']):>9} "
+                    f"{format_size(stats['bytes_written']):>9}")
+            if not summary:
+                lines.append("No commands measured yet")
+            sys.stdout.write('\n'.join(lines) + '\n')
+
+            if export:
+                export_path = os.path.abspath(os.path.join(self.current_dir, export))
+                self.metrics.export(export_path)
+                print(f"Metrics written to {export_path}")
+            if reset:
+                self.metrics.reset()
+
+            self.logger.log_success(f"stats{' --export ' + export if export else ''}")
+
+        except Exception as e:
+            self.logger.log_error(f"stats failed: {e}")
+            print(f"Error: {e}")
+
     def undo(self) -> None:
         """Команда undo - отмена последней операции."""
         try:
-            for i in range(len(self.history) - 1, -1, -1):
-                cmd = self.history[i]
-                if '|' in cmd:
-                    parts = cmd.split('|')
-                    cmd_type = parts[0]
-
-                    if cmd_type == 'cp':
-                        dst = parts[2]
-                        if os.path.exists(dst):
-                            if os.path.isdir(dst):
-                                shutil.rmtree(dst)
-                            else:
-                                os.remove(dst)
-                            print(f"Undone: removed copied file/folder {dst}")
-                            self.logger.log_success(f"undo cp: removed {dst}")
-                        else:
-                            print(f"Cannot undo: {dst} not found")
-
-                    elif cmd_type == 'mv':
-                        src = parts[1]
-                        dst = parts[2]
-                        if os.path.exists(dst):
-                            shutil.move(dst, src)
-                            print(f"Undone: moved back {dst} -> {src}")
-                            self.logger.log_success(f"undo mv: {dst} -> {src}")
-                        else:
-                            print(f"Cannot undo: {dst} not found")
-
-                    elif cmd_type == 'rm':
-                        original = parts[1]
-                        trash = parts[2]
-                        if os.path.exists(trash):
-                            shutil.move(trash, original)
-                            print(f"Undone: restored {original}")
-                            self.logger.log_success(f"undo rm: restored {original}")
-                        else:
-                            print(f"Cannot undo: {trash} not found in trash")
-
-                    self.history.pop(i)
-                    self.save_history()
-                    return
+            record = self.undo_journal.pop()
+            if record is None:
+                print("Nothing to undo")
+                return
+
+            if record.op == 'cp':
+                if os.path.exists(record.dst):
+                    if os.path.isdir(record.dst):
+                        shutil.rmtree(record.dst)
+                    else:
+                        os.remove(record.dst)
+                    self.fs_cache.invalidate(record.dst, recursive=True)
+                    print(f"Undone: removed copied file/folder {record.dst}")
+                    self.logger.log_success(f"undo cp: removed {record.dst}")
+                else:
+                    print(f"Cannot undo: {record.dst} not found")
+
+            elif record.op == 'mv':
+                if os.path.exists(record.dst):
+                    shutil.move(record.dst, record.src)
+                    self.fs_cache.invalidate(record.dst, recursive=True)
+                    self.fs_cache.invalidate(record.src, recursive=True)
+                    print(f"Undone: moved back {record.dst} -> {record.src}")
+                    self.logger.log_success(f"undo mv: {record.dst} -> {record.src}")
+                else:
+                    print(f"Cannot undo: {record.dst} not found")
 
-            print("Nothing to undo")
+            elif record.op == 'rm':
+                if self.trash.get(record.dst) is not None:
+                    self.trash.restore(record.dst)
+                    self.fs_cache.invalidate(record.src, recursive=True)
+                    print(f"Undone: restored {record.src}")
+                    self.logger.log_success(f"undo rm: restored {record.src}")
+                elif os.path.exists(record.dst):
+                    # Запись из журнала до появления индекса корзины: dst - путь
+                    shutil.move(record.dst, record.src)
+                    self.fs_cache.invalidate(record.src, recursive=True)
+                    print(f"Undone: restored {record.src}")
+                    self.logger.log_success(f"undo rm: restored {record.src}")
+                else:
+                    print(f"Cannot undo: {record.dst} not found in trash")
 
         except Exception as e:
             self.logger.log_error(f"undo failed: {e}")
@@ -1,29 +1,58 @@
 """Команды для работы с архивами."""
 
 import os
-import zipfile
+import stat
+import sys
 import tarfile
+import zipfile
+from contextlib import nullcontext
+from datetime import datetime
+from typing import BinaryIO, ContextManager, Iterator, List, Optional, Sequence, Tuple, Union
 
-from .base import BaseCommands
 from ..constants import (
+    ARCHIVE_CODECS,
+    ARCHIVE_DEFAULT_CODEC,
+    ARCHIVE_WORKERS,
     ERROR_PATH_NOT_FOUND,
+    SEPARATOR_LINE,
     SUCCESS_CREATED_ARCHIVE,
-    SUCCESS_EXTRACTED_ARCHIVE
+    SUCCESS_EXTRACTED_ARCHIVE,
+    UNZIP_WORKERS,
+)
+from .base import BaseCommands
+from .compress import ZIP_CODECS, ParallelBlockWriter, block_compressor, zip_members_parallel
+from .extract import ParallelUnzipper, member_matches, select_members
+from .snapshot import (
+    Manifest,
+    apply_deletions,
+    diff_states,
+    manifest_path,
+    resolve_chain,
+    scan_state,
 )
+from .walker import walk
 
 
 class ArchiveCommands(BaseCommands):
     """Класс с командами для работы с архивами."""
 
-    def zip_folder(self, folder: str, archive_name: str) -> None:
+    def zip_folder(self, folder: str, archive_name: str, workers: Optional[int] = None,
+                   codec: str = ARCHIVE_DEFAULT_CODEC, level: Optional[int] = None) -> None:
         """
         Команда zip - создание ZIP архива.
 
+        Файлы сжимаются параллельно и записываются в архив в порядке обхода.
+        Уже сжатые файлы (.gz, .zip, .jpg, .png и т.п.) сохраняются без сжатия.
+
         Args:
             folder: Путь к папке для архивирования
             archive_name: Имя создаваемого архива
+            workers: Количество потоков сжатия (по умолчанию ARCHIVE_WORKERS)
+            codec: Кодек: 'stored', 'deflate', 'bzip2', 'lzma' или 'xz'
+            level: Уровень сжатия 1-9 (None - по умолчанию для кодека)
         """
         try:
+            self._check_codec(codec, level)
             folder_path = os.path.abspath(os.path.join(self.current_dir, folder))
             archive_path = os.path.abspath(os.path.join(self.current_dir, archive_name))
 
@@ -32,29 +61,74 @@ class ArchiveCommands(BaseCommands):
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {folder_path}")
                 return
 
-            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                if os.path.isfile(folder_path):
-                    zipf.write(folder_path, os.path.basename(folder_path))
-                else:
-                    for root, dirs, files in os.walk(folder_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, os.path.dirname(folder_path))
-                            zipf.write(file_path, arcname)
+            compress_type = ZIP_CODECS[codec]
+            try:
+                with open(archive_path, 'wb') as f:
+                    infos = zip_members_parallel(f, self._zip_members(folder_path, archive_path),
+                                                 workers or ARCHIVE_WORKERS, compress_type, level)
+            finally:
+                self.fs_cache.invalidate(archive_path)
 
+            self.metrics.add(files=len(infos), read=sum(info.file_size for info in infos),
+                             written=os.path.getsize(archive_path))
             print(f"{SUCCESS_CREATED_ARCHIVE}: {archive_path}")
-            self.logger.log_success(f"zip {folder_path} {archive_path}")
+            self.logger.log_success(f"zip --codec={codec} {folder_path} {archive_path}")
 
         except Exception as e:
             self.logger.log_error(f"zip failed: {e}")
             print(f"Error: {e}")
 
-    def unzip_archive(self, archive_name: str) -> None:
+    @staticmethod
+    def _check_codec(codec: str, level: Optional[int]) -> None:
+        """
+        Проверка кодека и уровня сжатия.
+
+        Args:
+            codec: Имя кодека
+            level: Уровень сжатия
+
+        Raises:
+            ValueError: Неизвестный кодек или уровень вне 1-9
+        """
+        if codec not in ARCHIVE_CODECS:
+            raise ValueError(f"Unknown codec: {codec} (choose from {', '.join(ARCHIVE_CODECS)})")
+        if level is not None and not 1 <= level <= 9:
+            raise ValueError(f"Compression level must be 1-9, got {level}")
+
+    @staticmethod
+    def _zip_members(folder_path: str, archive_path: str) -> Iterator[Tuple[str, str]]:
+        """
+        Файлы для архивирования и их имена в архиве.
+
+        Сам создаваемый архив, если он лежит внутри папки, пропускается.
+
+        Args:
+            folder_path: Файл или папка для архивирования
+            archive_path: Путь к создаваемому архиву
+
+        Yields:
+            Пары (путь к файлу, имя в архиве)
+        """
+        if os.path.isfile(folder_path):
+            yield folder_path, os.path.basename(folder_path)
+            return
+        arcroot = os.path.basename(folder_path)
+        for item in walk(folder_path, include=lambda item: item.is_file(),
+                         exclude=lambda item: item.path == archive_path, dirs=False):
+            yield item.path, os.path.join(arcroot, item.rel)
+
+    def unzip_archive(self, archive_name: str, workers: Optional[int] = None,
+                      members: Sequence[str] = ()) -> None:
         """
         Команда unzip - распаковка ZIP архива.
 
+        Файлы распаковываются параллельно (см. ParallelUnzipper) с той же
+        защитой путей, что и в ZipFile.extractall.
+
         Args:
             archive_name: Имя архива для распаковки
+            workers: Количество потоков (по умолчанию UNZIP_WORKERS)
+            members: Имена или glob-шаблоны извлекаемых элементов (пусто - все)
         """
         try:
             archive_path = os.path.abspath(os.path.join(self.current_dir, archive_name))
@@ -64,9 +138,14 @@ class ArchiveCommands(BaseCommands):
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {archive_path}")
                 return
 
-            with zipfile.ZipFile(archive_path, 'r') as zipf:
-                zipf.extractall(self.current_dir)
+            unzipper = ParallelUnzipper(archive_path, workers or UNZIP_WORKERS)
+            try:
+                count = unzipper.extract(self.current_dir, members)
+            finally:
+                self.fs_cache.invalidate(self.current_dir, recursive=True)
 
+            self.metrics.add(files=count, read=os.path.getsize(archive_path),
+                             written=unzipper.bytes_extracted)
             print(f"{SUCCESS_EXTRACTED_ARCHIVE}: {archive_path}")
             self.logger.log_success(f"unzip {archive_path}")
 
@@ -74,15 +153,32 @@ class ArchiveCommands(BaseCommands):
             self.logger.log_error(f"unzip failed: {e}")
             print(f"Error: {e}")
 
-    def tar_folder(self, folder: str, archive_name: str) -> None:
+    def tar_folder(self, folder: str, archive_name: str, workers: Optional[int] = None,
+                   codec: str = ARCHIVE_DEFAULT_CODEC, level: Optional[int] = None,
+                   incremental: Optional[str] = None, use_hash: bool = False,
+                   snapshot: bool = False) -> None:
         """
-        Команда tar - создание TAR.GZ архива.
+        Команда tar - создание TAR архива (по умолчанию TAR.GZ).
+
+        Поток tar сжимается блоками параллельно (см. ParallelBlockWriter),
+        результат - обычный .tar.gz/.tar.bz2/.tar.xz из нескольких сжатых потоков.
+        С incremental в архив попадают только файлы, изменившиеся с базового
+        снимка, а рядом с архивом сохраняется манифест снимка с записанными
+        удалениями. Полный архив сохраняет манифест только с snapshot, чтобы
+        служить базой для приращений.
 
         Args:
             folder: Путь к папке для архивирования
             archive_name: Имя создаваемого архива
+            workers: Количество потоков сжатия (по умолчанию ARCHIVE_WORKERS)
+            codec: Кодек: 'stored' (несжатый tar), 'deflate' (gzip), 'bzip2', 'lzma' или 'xz'
+            level: Уровень сжатия 1-9 (None - по умолчанию для кодека)
+            incremental: Базовый архив, относительно которого собирается приращение
+            use_hash: Сравнивать содержимое по SHA-256, а не только по stat
+            snapshot: Сохранить манифест снимка для полного архива
         """
         try:
+            self._check_codec(codec, level)
             folder_path = os.path.abspath(os.path.join(self.current_dir, folder))
             archive_path = os.path.abspath(os.path.join(self.current_dir, archive_name))
 
@@ -91,22 +187,83 @@ class ArchiveCommands(BaseCommands):
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {folder_path}")
                 return
 
-            with tarfile.open(archive_path, 'w:gz') as tar:
-                tar.add(folder_path, arcname=os.path.basename(folder_path))
+            arcroot = os.path.basename(folder_path)
+            base_path = None
+            base = None
+            if incremental:
+                base_path = os.path.abspath(os.path.join(self.current_dir, incremental))
+                base = Manifest.load(manifest_path(base_path))
+            state = scan_state(folder_path, arcroot, use_hash, base.entries if base else None,
+                               exclude=lambda item: item.path == archive_path)
+            changed = list(state)
+            deleted: List[str] = []
+            if base is not None:
+                changed, deleted = diff_states(base.entries, state, use_hash)
+
+            # Упаковываются пути снимка: дерево обходится один раз
+            try:
+                with open(archive_path, 'wb') as f, \
+                        self._tar_output(f, codec, level, workers or ARCHIVE_WORKERS) as out, \
+                        tarfile.open(fileobj=out, mode='w|') as tar:
+                    parent = os.path.dirname(folder_path)
+                    for name in changed:
+                        tar.add(os.path.join(parent, name), arcname=name, recursive=False)
 
+                if base_path is not None:
+                    relative_base = os.path.relpath(base_path, os.path.dirname(archive_path))
+                    Manifest(relative_base, state, deleted).save(manifest_path(archive_path))
+                elif snapshot:
+                    Manifest(None, state, deleted).save(manifest_path(archive_path))
+            finally:
+                self.fs_cache.invalidate(archive_path)
+                self.fs_cache.invalidate(manifest_path(archive_path))
+            packed = [state[name] for name in changed]
+            self.metrics.add(files=len(packed),
+                             read=sum(entry.size for entry in packed if not entry.is_dir),
+                             written=os.path.getsize(archive_path))
+
+            if base_path is not None:
+                print(f"Incremental: {len(changed)} changed, {len(deleted)} deleted "
+                      f"since {base_path}")
             print(f"{SUCCESS_CREATED_ARCHIVE}: {archive_path}")
-            self.logger.log_success(f"tar {folder_path} {archive_path}")
+            self.logger.log_success(f"tar --codec={codec} {folder_path} {archive_path}")
 
         except Exception as e:
             self.logger.log_error(f"tar failed: {e}")
             print(f"Error: {e}")
 
-    def untar_archive(self, archive_name: str) -> None:
+    @staticmethod
+    def _tar_output(f: BinaryIO, codec: str, level: Optional[int],
+                    workers: int) -> ContextManager[Union[BinaryIO, ParallelBlockWriter]]:
         """
-        Команда untar - распаковка TAR.GZ архива.
+        Поток, в который tarfile пишет архив.
+
+        Args:
+            f: Файл архива
+            codec: Имя кодека
+            level: Уровень сжатия
+            workers: Количество потоков сжатия
+
+        Returns:
+            Сам файл для 'stored' или параллельный компрессор поверх него
+        """
+        if codec == 'stored':
+            return nullcontext(f)
+        return ParallelBlockWriter(f, workers, block_compressor(codec, level))
+
+    def untar_archive(self, archive_name: str, chain: bool = False,
+                      members: Sequence[str] = ()) -> None:
+        """
+        Команда untar - распаковка TAR архива.
+
+        Сжатие (gzip, bzip2, xz или без сжатия) определяется по содержимому.
+        С chain восстанавливается вся цепочка снимков: полный архив, затем
+        каждое приращение с применением записанных в манифесте удалений.
 
         Args:
             archive_name: Имя архива для распаковки
+            chain: Восстановить цепочку базовых архивов по манифестам
+            members: Имена или glob-шаблоны извлекаемых элементов (пусто - все)
         """
         try:
             archive_path = os.path.abspath(os.path.join(self.current_dir, archive_name))
@@ -116,12 +273,111 @@ class ArchiveCommands(BaseCommands):
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {archive_path}")
                 return
 
-            with tarfile.open(archive_path, 'r:gz') as tar:
-                tar.extractall(self.current_dir, filter='data')
+            archives = resolve_chain(archive_path) if chain else [archive_path]
+            try:
+                for path in archives:
+                    with tarfile.open(path, 'r:*') as tar:
+                        selected = None
+                        if members and chain:
+                            # Шаблон может не встречаться в отдельных приращениях цепочки
+                            selected = [info for info in tar.getmembers()
+                                        if member_matches(info.name, members)]
+                        elif members:
+                            selected = select_members(tar.getmembers(), members,
+                                                      lambda info: info.name)
+                        tar.extractall(self.current_dir, members=selected, filter='data')
+                        extracted = selected if selected is not None else tar.getmembers()
+                    self.metrics.add(files=len(extracted), read=os.path.getsize(path),
+                                     written=sum(info.size for info in extracted if info.isfile()))
+                    if chain:
+                        deleted = Manifest.load(manifest_path(path)).deleted
+                        if members:
+                            deleted = [name for name in deleted if member_matches(name, members)]
+                        apply_deletions(deleted, self.current_dir)
+            finally:
+                self.fs_cache.invalidate(self.current_dir, recursive=True)
 
             print(f"{SUCCESS_EXTRACTED_ARCHIVE}: {archive_path}")
-            self.logger.log_success(f"untar {archive_path}")
+            self.logger.log_success(f"untar {'--chain ' if chain else ''}{archive_path}")
 
         except Exception as e:
             self.logger.log_error(f"untar failed: {e}")
             print(f"Error: {e}")
+
+    def list_zip(self, archive_name: str, members: Sequence[str] = ()) -> None:
+        """
+        Команда zipls - содержимое ZIP архива.
+
+        Читается только центральный каталог, данные не распаковываются.
+
+        Args:
+            archive_name: Имя архива
+            members: Имена или glob-шаблоны элементов (пусто - все)
+        """
+        try:
+            archive_path = os.path.abspath(os.path.join(self.current_dir, archive_name))
+
+            if not os.path.exists(archive_path):
+                self.logger.log_error(f"{ERROR_PATH_NOT_FOUND}: {archive_path}")
+                print(f"Error: {ERROR_PATH_NOT_FOUND}: {archive_path}")
+                return
+
+            with zipfile.ZipFile(archive_path) as zipf:
+                infos = select_members(zipf.infolist(), members, lambda info: info.filename)
+
+            lines = [f"{'Size':>12} {'Compressed':>12} {'Modified':<19} Name", SEPARATOR_LINE]
+            for info in infos:
+                modified = datetime(*info.date_time).strftime('%Y-%m-%d %H:%M:%S')
+                lines.append(f"{info.file_size:>12} {info.compress_size:>12} {modified:<19} "
+                             f"{info.filename}")
+            lines.append(SEPARATOR_LINE)
+            lines.append(f"{sum(info.file_size for info in infos):>12} "
+                         f"{sum(info.compress_size for info in infos):>12} "
+                         f"{'':<19} {len(infos)} members")
+            sys.stdout.write('\n'.join(lines) + '\n')
+
+            self.logger.log_success(f"zipls {archive_path}")
+
+        except Exception as e:
+            self.logger.log_error(f"zipls failed: {e}")
+            print(f"Error: {e}")
+
+    def list_tar(self, archive_name: str, members: Sequence[str] = ()) -> None:
+        """
+        Команда tarls - содержимое TAR архива.
+
+        Читаются только заголовки: данные несжатого архива пропускаются
+        через seek, сжатый поток распаковывается без записи на диск.
+
+        Args:
+            archive_name: Имя архива
+            members: Имена или glob-шаблоны элементов (пусто - все)
+        """
+        try:
+            archive_path = os.path.abspath(os.path.join(self.current_dir, archive_name))
+
+            if not os.path.exists(archive_path):
+                self.logger.log_error(f"{ERROR_PATH_NOT_FOUND}: {archive_path}")
+                print(f"Error: {ERROR_PATH_NOT_FOUND}: {archive_path}")
+                return
+
+            with tarfile.open(archive_path, 'r:*') as tar:
+                infos = select_members(tar.getmembers(), members, lambda info: info.name)
+
+            lines = []
+            for info in infos:
+                kind = 'd' if info.isdir() else 'l' if info.issym() else '-'
+                mode = kind + stat.filemode(info.mode)[1:]
+                modified = datetime.fromtimestamp(info.mtime).strftime('%Y-%m-%d %H:%M:%S')
+                link = f" -> {info.linkname}" if info.issym() else ''
+                lines.append(f"{mode} {info.size:>12} {modified:<19} {info.name}{link}")
+            lines.append(SEPARATOR_LINE)
+            lines.append(f"{'':<10} {sum(info.size for info in infos):>12} {'':<19} "
+                         f"{len(infos)} members")
+            sys.stdout.write('\n'.join(lines) + '\n')
+
+            self.logger.log_success(f"tarls {archive_path}")
+
+        except Exception as e:
+            self.logger.log_error(f"tarls failed: {e}")
+            print(f"Error: {e}")
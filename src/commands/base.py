@@ -3,8 +3,19 @@
 import os
 from typing import List
 
+from ..constants import (
+    HISTORY_COMPACT_THRESHOLD,
+    HISTORY_FILE,
+    MAX_HISTORY_SIZE,
+    TRASH_DIR,
+    UNDO_FILE,
+)
+from ..fscache import FsCache
+from ..journal import AppendJournal
 from ..logger import ShellLogger
-from ..constants import HISTORY_FILE, TRASH_DIR, MAX_HISTORY_SIZE
+from ..metrics import MetricsCollector
+from ..trash import TrashManager
+from ..undo import UndoJournal
 
 
 class BaseCommands:
@@ -20,10 +31,16 @@ class BaseCommands:
         self.logger = logger
         self.current_dir: str = os.getcwd()
         self.history: List[str] = []
-        self.history_file: str = HISTORY_FILE
+        self.history_file: str = os.path.abspath(HISTORY_FILE)
+        self._history_journal = AppendJournal(self.history_file)
+        self.undo_journal = UndoJournal(os.path.abspath(UNDO_FILE))
         self.trash_dir: str = TRASH_DIR
         self._initialize_dirs()
+        self.trash = TrashManager(os.path.abspath(self.trash_dir))
+        self.metrics = MetricsCollector()
+        self.fs_cache: FsCache = FsCache()
         self.load_history()
+        self.load_undo_journal()
 
     def _initialize_dirs(self) -> None:
         """Создание необходимых директорий."""
@@ -31,20 +48,45 @@ class BaseCommands:
             os.makedirs(self.trash_dir)
 
     def load_history(self) -> None:
-        """Загрузка истории команд из файла."""
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.history = [line.strip() for line in f.readlines()]
-            except Exception as e:
-                self.logger.log_error(f"Failed to load history: {e}")
+        """
+        Загрузка истории команд из журнала.
+
+        Журнал читается с конца, пока не набрано MAX_HISTORY_SIZE записей;
+        для порога сжатия записи файла считаются целиком.
+        """
+        try:
+            records: List[str] = []
+            for record in self._history_journal.iter_reverse():
+                records.append(record)
+                if len(records) >= MAX_HISTORY_SIZE:
+                    break
+            records.reverse()
+            self.history = records
+            self._history_journal.records = self._history_journal.count()
+        except Exception as e:
+            self.logger.log_error(f"Failed to load history: {e}")
 
     def save_history(self) -> None:
-        """Сохранение истории команд в файл."""
+        """Сжатие журнала: перезапись файла последними MAX_HISTORY_SIZE записями."""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                for cmd in self.history[-MAX_HISTORY_SIZE:]:
-                    f.write(cmd + '\n')
+            self._history_journal.rewrite(self.history[-MAX_HISTORY_SIZE:])
+        except Exception as e:
+            self.logger.log_error(f"Failed to save history: {e}")
+
+    def _append_history_record(self, record: str) -> None:
+        """
+        Дозапись одной записи в журнал истории.
+
+        Сжатие выполняется, только когда журнал превысил порог
+        HISTORY_COMPACT_THRESHOLD, поэтому стоимость записи - O(1).
+
+        Args:
+            record: Запись для журнала
+        """
+        try:
+            self._history_journal.append(record)
+            if self._history_journal.records > HISTORY_COMPACT_THRESHOLD:
+                self.save_history()
         except Exception as e:
             self.logger.log_error(f"Failed to save history: {e}")
 
@@ -57,8 +99,53 @@ class BaseCommands:
         """
         self.history.append(command)
         if len(self.history) > MAX_HISTORY_SIZE:
-            self.history = self.history[-MAX_HISTORY_SIZE:]
-        self.save_history()
+            del self.history[:len(self.history) - MAX_HISTORY_SIZE]
+        self._append_history_record(command)
+
+    def load_undo_journal(self) -> None:
+        """Загрузка журнала отменяемых операций из файла."""
+        try:
+            self.undo_journal.load()
+        except Exception as e:
+            self.logger.log_error(f"Failed to load undo journal: {e}")
+
+    def add_undo_record(self, op: str, src: str, dst: str) -> None:
+        """
+        Добавление отменяемой операции в журнал undo.
+
+        Args:
+            op: Тип операции: 'cp', 'mv' или 'rm'
+            src: Исходный путь
+            dst: Путь назначения (для rm - id записи в корзине)
+        """
+        try:
+            self.undo_journal.push(op, src, dst)
+        except Exception as e:
+            self.logger.log_error(f"Failed to save undo journal: {e}")
+
+    def begin_batch(self) -> None:
+        """Начало пакетного режима: записи истории и undo копятся в памяти."""
+        self._history_journal.begin_batch()
+        self.undo_journal.begin_batch()
+
+    def end_batch(self) -> None:
+        """Завершение пакетного режима: накопленные записи пишутся разом."""
+        try:
+            self._history_journal.flush()
+            self.undo_journal.flush()
+        except Exception as e:
+            self.logger.log_error(f"Failed to save history: {e}")
+
+    def close(self) -> None:
+        """Закрытие файлов истории, undo, индекса корзины и кэша метаданных."""
+        try:
+            self._history_journal.close()
+            self.undo_journal.close()
+            self.trash.close()
+        except Exception as e:
+            self.logger.log_error(f"Failed to save history: {e}")
+        finally:
+            self.fs_cache.close()
 
     def resolve_path(self, path: str) -> str:
         """
@@ -0,0 +1,301 @@
+"""Параллельное сжатие для команд zip и tar."""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    Deque,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from ..constants import ARCHIVE_MAX_PARALLEL_MEMBER, COMPRESS_BLOCK_SIZE, COMPRESSED_EXTENSIONS
+
+if TYPE_CHECKING:
+    from _typeshed import ReadableBuffer
+
+# Недокументированные атрибуты ZipFile, которые правит write_compressed_member
+ZIPFILE_WRITE_STATE = ('start_dir', 'filelist', 'NameToInfo')
+
+# Методы сжатия ZIP по имени кодека
+ZIP_CODECS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+    'xz': zipfile.ZIP_LZMA,
+}
+
+
+class CompressedMember(NamedTuple):
+    """
+    Сжатый в рабочем потоке элемент ZIP-архива.
+
+    Attributes:
+        info: Описание элемента (CRC, размеры, метод сжатия)
+        data: Локальный заголовок и сжатые данные, готовые к записи в архив
+    """
+
+    info: zipfile.ZipInfo
+    data: bytes
+
+
+def is_compressed_file(file_path: str) -> bool:
+    """
+    Проверка, что файл уже сжат (архив, изображение, видео) по расширению.
+
+    Такие файлы сохраняются без сжатия: повторное сжатие тратит процессор
+    и почти не уменьшает размер.
+
+    Args:
+        file_path: Путь или имя файла
+
+    Returns:
+        True, если расширение входит в COMPRESSED_EXTENSIONS
+    """
+    return os.path.splitext(file_path)[1].lower() in COMPRESSED_EXTENSIONS
+
+
+def member_compress_type(file_path: str, compress_type: int) -> int:
+    """
+    Метод сжатия для конкретного файла.
+
+    Args:
+        file_path: Путь к файлу
+        compress_type: Метод сжатия архива
+
+    Returns:
+        ZIP_STORED для уже сжатых файлов, иначе compress_type
+    """
+    return zipfile.ZIP_STORED if is_compressed_file(file_path) else compress_type
+
+
+def compress_member(file_path: str, arcname: str, compress_type: int,
+                    level: Optional[int]) -> CompressedMember:
+    """
+    Сжатие файла в одноэлементный архив в памяти (выполняется в рабочем потоке).
+
+    Элемент пишется обычным ZipFile.write, поэтому заголовок и данные те же,
+    что записал бы последовательный zip. zlib, bz2 и lzma освобождают GIL на
+    время сжатия, и потоки работают на разных ядрах.
+
+    Args:
+        file_path: Путь к файлу
+        arcname: Имя элемента в архиве
+        compress_type: Метод сжатия ZIP
+        level: Уровень сжатия (None - по умолчанию для метода)
+
+    Returns:
+        Описание элемента и его байты без центрального каталога
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as part:
+        part.write(file_path, arcname, compress_type=compress_type, compresslevel=level)
+        end = buffer.tell()
+        info = part.infolist()[0]
+    return CompressedMember(info, buffer.getvalue()[:end])
+
+
+def write_compressed_member(zipf: zipfile.ZipFile, fileobj: BinaryIO,
+                            member: CompressedMember) -> None:
+    """
+    Добавление заранее сжатого элемента в архив.
+
+    Локальный заголовок не зависит от положения элемента в файле, поэтому
+    байты дописываются как есть; описание элемента с новым смещением
+    попадает в центральный каталог, который ZipFile запишет при закрытии.
+
+    Публичного способа добавить уже сжатые данные в zipfile нет, поэтому
+    функция пишет в fileobj мимо ZipFile и правит его недокументированное
+    состояние: start_dir (конец последнего элемента), filelist, NameToInfo
+    и ZipInfo.header_offset. Это зависимость от внутреннего устройства
+    zipfile: zip_members_parallel проверяет наличие атрибутов, а тесты -
+    побайтовое совпадение с последовательным ZipFile.write.
+
+    Args:
+        zipf: Архив, открытый на запись поверх fileobj
+        fileobj: Файл архива
+        member: Сжатый элемент
+    """
+    fileobj.seek(zipf.start_dir)
+    member.info.header_offset = zipf.start_dir
+    fileobj.write(member.data)
+    zipf.filelist.append(member.info)
+    zipf.NameToInfo[member.info.filename] = member.info
+    zipf.start_dir = fileobj.tell()
+
+
+def zip_members_parallel(fileobj: BinaryIO, members: Iterable[Tuple[str, str]],
+                         workers: int, compress_type: int = zipfile.ZIP_DEFLATED,
+                         level: Optional[int] = None) -> List[zipfile.ZipInfo]:
+    """
+    Параллельное сжатие элементов ZIP-архива с записью в исходном порядке.
+
+    Файлы сжимаются пулом потоков, главный поток записывает готовые элементы
+    по очереди. Очередь ограничена, поэтому в памяти одновременно не больше
+    2 * workers сжатых файлов. Файлы крупнее ARCHIVE_MAX_PARALLEL_MEMBER
+    записываются обычным ZipFile.write в главном потоке, чтобы не держать
+    их целиком в памяти. Уже сжатые файлы (см. is_compressed_file) сохраняются
+    методом ZIP_STORED. Если у ZipFile нет атрибутов, на которые опирается
+    write_compressed_member (другая версия zipfile), все элементы пишутся
+    последовательно.
+
+    Args:
+        fileobj: Файл архива, открытый на запись (с произвольным доступом)
+        members: Пары (путь к файлу, имя в архиве)
+        workers: Количество потоков
+        compress_type: Метод сжатия ZIP
+        level: Уровень сжатия (None - по умолчанию для метода)
+
+    Returns:
+        Элементы архива в порядке записи
+    """
+    pending: Deque[Tuple[str, str, Optional[Future]]] = deque()
+
+    with zipfile.ZipFile(fileobj, 'w', compress_type) as zipf:
+        parallel = all(hasattr(zipf, name) for name in ZIPFILE_WRITE_STATE)
+
+        def write_next() -> None:
+            file_path, arcname, future = pending.popleft()
+            if future is None:
+                zipf.write(file_path, arcname, compresslevel=level,
+                           compress_type=member_compress_type(file_path, compress_type))
+            else:
+                write_compressed_member(zipf, fileobj, future.result())
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for file_path, arcname in members:
+                future = None
+                if parallel and os.path.getsize(file_path) <= ARCHIVE_MAX_PARALLEL_MEMBER:
+                    future = executor.submit(compress_member, file_path, arcname,
+                                             member_compress_type(file_path, compress_type),
+                                             level)
+                pending.append((file_path, arcname, future))
+                if len(pending) >= 2 * workers:
+                    write_next()
+
+            while pending:
+                write_next()
+
+        infos = zipf.infolist()
+    return infos
+
+
+def block_compressor(codec: str, level: Optional[int] = None) -> Callable[[bytes], bytes]:
+    """
+    Функция сжатия одного блока потока tar в самостоятельный сжатый поток.
+
+    Для gzip, bzip2 и xz последовательность таких потоков - корректный файл
+    соответствующего формата.
+
+    Args:
+        codec: 'deflate' (gzip), 'bzip2', 'lzma' или 'xz'
+        level: Уровень сжатия (None - 9 для gzip и bzip2, 6 для xz, как в tarfile)
+
+    Returns:
+        Функция сжатия блока
+
+    Raises:
+        ValueError: Неизвестный кодек
+    """
+    if codec == 'deflate':
+        return partial(gzip.compress, compresslevel=9 if level is None else level, mtime=0)
+    if codec == 'bzip2':
+        return partial(bz2.compress, compresslevel=9 if level is None else level)
+    if codec in ('lzma', 'xz'):
+        return partial(lzma.compress, format=lzma.FORMAT_XZ, preset=6 if level is None else level)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+class ParallelBlockWriter(io.BufferedIOBase):
+    """
+    Поток только для записи, сжимающий данные блоками параллельно (как pigz).
+
+    Каждый блок COMPRESS_BLOCK_SIZE сжимается в рабочем потоке в отдельный
+    поток gzip/bzip2/xz, результаты пишутся в исходном порядке. Такой файл
+    читается gunzip/bunzip2/unxz и tarfile, как обычный.
+    """
+
+    def __init__(self, fileobj: BinaryIO, workers: int,
+                 compress: Callable[[bytes], bytes] = block_compressor('deflate'),
+                 block_size: int = COMPRESS_BLOCK_SIZE) -> None:
+        """
+        Инициализация.
+
+        Args:
+            fileobj: Файл, в который пишется сжатый поток
+            workers: Количество потоков
+            compress: Функция сжатия блока (см. block_compressor)
+            block_size: Размер несжатого блока
+        """
+        self.fileobj = fileobj
+        self.compress = compress
+        self.block_size = block_size
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending: Deque[Future] = deque()
+        self._buffer = bytearray()
+        self._blocks = 0
+
+    def writable(self) -> bool:
+        """Поток открыт на запись."""
+        return True
+
+    def write(self, data: 'ReadableBuffer') -> int:
+        """
+        Приём несжатых данных.
+
+        Args:
+            data: Данные
+
+        Returns:
+            Количество принятых байт
+        """
+        if self.closed:
+            raise ValueError("write to closed ParallelBlockWriter")
+        with memoryview(data) as view:
+            self._buffer += view
+            size = view.nbytes
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return size
+
+    def _submit(self, block: bytes) -> None:
+        """
+        Отправка блока на сжатие с ограничением очереди.
+
+        Args:
+            block: Несжатый блок
+        """
+        self._blocks += 1
+        self._pending.append(self._executor.submit(self.compress, block))
+        if len(self._pending) >= 2 * self.workers:
+            self.fileobj.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        """Сжатие остатка, запись всех членов и остановка пула (файл не закрывается)."""
+        if self.closed:
+            return
+        try:
+            # Пустой поток всё равно должен быть корректным сжатым файлом
+            if self._buffer or not self._blocks:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self.fileobj.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown()
+            super().close()
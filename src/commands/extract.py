@@ -0,0 +1,198 @@
+"""Параллельная распаковка ZIP-архивов и выборка элементов архивов."""
+
+import fnmatch
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from ..constants import ERROR_NO_MEMBERS_MATCH, UNZIP_BUFFER_SIZE
+
+# Символы, недопустимые в именах файлов Windows, заменяются на '_'
+_WINDOWS_ILLEGAL_CHARS = str.maketrans(':<>|"?*', '_' * 7)
+
+Member = TypeVar('Member')
+
+
+def member_matches(name: str, patterns: Iterable[str]) -> bool:
+    """
+    Проверка имени элемента по шаблонам.
+
+    Шаблон совпадает с именем по правилам fnmatch (с учётом регистра)
+    или является каталогом, в котором лежит элемент.
+
+    Args:
+        name: Имя элемента в архиве
+        patterns: Имена или glob-шаблоны
+
+    Returns:
+        True, если хотя бы один шаблон подходит
+    """
+    name = name.rstrip('/')
+    for pattern in patterns:
+        pattern = pattern.rstrip('/')
+        if fnmatch.fnmatchcase(name, pattern) or name.startswith(pattern + '/'):
+            return True
+    return False
+
+
+def select_members(members: Sequence[Member], patterns: Sequence[str],
+                   name: Callable[[Member], str]) -> List[Member]:
+    """
+    Выборка элементов архива по шаблонам.
+
+    Args:
+        members: Элементы архива
+        patterns: Имена или glob-шаблоны (пустой список - все элементы)
+        name: Функция получения имени элемента
+
+    Returns:
+        Подходящие элементы в порядке архива
+
+    Raises:
+        ValueError: Какой-то шаблон не совпал ни с одним элементом
+    """
+    if not patterns:
+        return list(members)
+    selected = [member for member in members if member_matches(name(member), patterns)]
+    unmatched = [pattern for pattern in patterns
+                 if not any(member_matches(name(member), [pattern]) for member in selected)]
+    if unmatched:
+        raise ValueError(f"{ERROR_NO_MEMBERS_MATCH}: {', '.join(unmatched)}")
+    return selected
+
+
+def _sanitize_windows_name(arcname: str, pathsep: str) -> str:
+    """
+    Замена недопустимых в Windows символов и точек в конце компонентов пути.
+
+    Args:
+        arcname: Путь элемента с разделителями pathsep
+        pathsep: Разделитель компонентов
+
+    Returns:
+        Путь без недопустимых символов и пустых компонентов
+    """
+    parts = (part.rstrip('.') for part in arcname.translate(_WINDOWS_ILLEGAL_CHARS).split(pathsep))
+    return pathsep.join(part for part in parts if part)
+
+
+def safe_member_path(member: zipfile.ZipInfo, target_dir: str) -> Optional[str]:
+    """
+    Путь распаковки элемента с той же защитой, что в ZipFile.extract.
+
+    Буква диска, пустые компоненты, '.' и '..' отбрасываются, поэтому элемент
+    не может оказаться вне target_dir.
+
+    Args:
+        member: Элемент архива
+        target_dir: Каталог распаковки
+
+    Returns:
+        Путь внутри target_dir или None, если от имени ничего не осталось
+    """
+    arcname = member.filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    invalid_path_parts = ('', os.path.curdir, os.path.pardir)
+    arcname = os.path.sep.join(part for part in arcname.split(os.path.sep)
+                               if part not in invalid_path_parts)
+    if os.path.sep == '\\':
+        arcname = _sanitize_windows_name(arcname, os.path.sep)
+    if not arcname:
+        return None
+    return os.path.normpath(os.path.join(target_dir, arcname))
+
+
+class ParallelUnzipper:
+    """
+    Распаковка ZIP-архива пулом потоков.
+
+    Центральный каталог читается один раз, все каталоги создаются заранее,
+    затем файлы распаковываются параллельно из одного объекта ZipFile.
+    Чтение его элементов разделяет общий дескриптор: каждый открытый
+    элемент помнит свою позицию, а ZipFile переставляет дескриптор и
+    читает под своей блокировкой, поэтому распаковка (zlib, bz2 и lzma
+    освобождают GIL) идёт параллельно. Открытие и закрытие элементов
+    меняют счётчик ссылок ZipFile без блокировки, поэтому они
+    выполняются под блокировкой распаковщика. Данные копируются через
+    буфер UNZIP_BUFFER_SIZE, поэтому большие элементы не загружаются
+    в память целиком.
+    """
+
+    def __init__(self, archive_path: str, workers: int,
+                 buffer_size: int = UNZIP_BUFFER_SIZE) -> None:
+        """
+        Инициализация.
+
+        Args:
+            archive_path: Путь к архиву
+            workers: Количество потоков
+            buffer_size: Размер буфера копирования
+        """
+        self.archive_path = archive_path
+        self.workers = workers
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self.bytes_extracted = 0
+
+    def extract(self, target_dir: str, patterns: Sequence[str] = ()) -> int:
+        """
+        Распаковка элементов архива.
+
+        Если несколько элементов попадают в один путь (одинаковые имена),
+        распаковывается только последний из них - как при последовательной
+        распаковке, где он перезаписал бы предыдущие.
+
+        Args:
+            target_dir: Каталог распаковки
+            patterns: Имена или glob-шаблоны элементов (пустой список - все)
+
+        Returns:
+            Количество распакованных файлов
+        """
+        with zipfile.ZipFile(self.archive_path) as zipf:
+            members = select_members(zipf.infolist(), patterns, lambda member: member.filename)
+
+            files: Dict[str, zipfile.ZipInfo] = {}
+            directories = set()
+            for member in members:
+                path = safe_member_path(member, target_dir)
+                if path is None:
+                    continue
+                if member.is_dir():
+                    directories.add(path)
+                else:
+                    directories.add(os.path.dirname(path))
+                    files[path] = member
+
+            for directory in sorted(directories):
+                os.makedirs(directory, exist_ok=True)
+            self.bytes_extracted = sum(member.file_size for member in files.values())
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # list() пробрасывает первое исключение из рабочих потоков
+                list(executor.map(lambda item: self._extract_member(zipf, *item), files.items()))
+
+        return len(files)
+
+    def _extract_member(self, zipf: zipfile.ZipFile, path: str, member: zipfile.ZipInfo) -> None:
+        """
+        Распаковка одного файла через буфер фиксированного размера.
+
+        Args:
+            zipf: Общий объект архива
+            path: Путь назначения
+            member: Элемент архива
+        """
+        with self._lock:
+            source = zipf.open(member)
+        try:
+            with open(path, 'wb') as target:
+                shutil.copyfileobj(source, target, self.buffer_size)
+        finally:
+            with self._lock:
+                source.close()
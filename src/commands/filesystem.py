@@ -1,60 +1,78 @@
 """Команды для работы с файловой системой."""
 
+import codecs
+import io
+import itertools
 import os
 import shutil
 import stat
+import sys
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Generator, Iterator, List, Optional, Sequence
 
-from .base import BaseCommands
 from ..constants import (
-    ERROR_PATH_NOT_FOUND, ERROR_NOT_A_DIRECTORY, ERROR_NOT_A_FILE,
-    ERROR_SOURCE_NOT_FOUND, ERROR_USE_RECURSIVE, ERROR_CANNOT_REMOVE_ROOT,
-    SUCCESS_COPIED, SUCCESS_MOVED, SUCCESS_REMOVED, SEPARATOR_LINE
+    CAT_CHUNK_SIZE,
+    CP_PROGRESS_INTERVAL,
+    CP_WORKERS,
+    ERROR_CANNOT_REMOVE_ROOT,
+    ERROR_NOT_A_DIRECTORY,
+    ERROR_NOT_A_FILE,
+    ERROR_PATH_NOT_FOUND,
+    ERROR_SOURCE_NOT_FOUND,
+    ERROR_TRASH_ENTRY_NOT_FOUND,
+    ERROR_USE_RECURSIVE,
+    HEAD_DEFAULT_LINES,
+    LS_DEFAULT_SORT,
+    LS_SORT_KEYS,
+    PIPE_BUFFER_SIZE,
+    SEPARATOR_LINE,
+    SUCCESS_COPIED,
+    SUCCESS_MOVED,
+    SUCCESS_REMOVED,
 )
+from ..trash import format_size, tree_size
+from .base import BaseCommands
+from .fastcopy import ProgressCallback, copy_tree
 
 
 class FileSystemCommands(BaseCommands):
     """Класс с командами для работы с файловой системой."""
 
-    def ls(self, path: Optional[str] = None, detailed: bool = False) -> None:
+    def ls(self, path: Optional[str] = None, detailed: bool = False,
+           sort: str = LS_DEFAULT_SORT, show_all: bool = False) -> None:
         """
         Команда ls - список файлов и каталогов.
 
+        Каталог читается одним проходом os.scandir: тип записи берётся из
+        DirEntry, stat выполняется не более одного раза на запись и только
+        когда он нужен (ls -l или сортировка по size/mtime). Повторный ls
+        неизменённого каталога берёт список из fs_cache. Весь вывод
+        собирается в буфер и пишется одним вызовом write.
+
         Args:
             path: Путь к директории (по умолчанию текущая)
             detailed: Показывать ли подробную информацию
+            sort: Ключ сортировки: 'name', 'size' или 'mtime' (size и mtime - по убыванию)
+            show_all: Показывать ли скрытые записи (имена с '.')
         """
         try:
             target_path = path if path else self.current_dir
             target_path = os.path.abspath(os.path.expanduser(target_path))
 
-            if not os.path.exists(target_path):
+            if not self.fs_cache.exists(target_path):
                 self.logger.log_error(f"{ERROR_PATH_NOT_FOUND}: {target_path}")
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {target_path}")
                 return
 
-            if not os.path.isdir(target_path):
+            if not self.fs_cache.isdir(target_path):
                 self.logger.log_error(f"{ERROR_NOT_A_DIRECTORY}: {target_path}")
                 print(f"Error: {ERROR_NOT_A_DIRECTORY}: {target_path}")
                 return
 
-            items = os.listdir(target_path)
-
-            if detailed:
-                print(f"{'Name':<30} {'Size':<15} {'Modified':<20} {'Permissions':<12}")
-                print(SEPARATOR_LINE)
-                for item in sorted(items):
-                    item_path = os.path.join(target_path, item)
-                    stats = os.stat(item_path)
-                    size = stats.st_size
-                    modified = datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                    perms = stat.filemode(stats.st_mode)
-                    item_type = '[DIR]' if os.path.isdir(item_path) else ''
-                    print(f"{item:<30} {size:<15} {modified:<20} {perms:<12} {item_type}")
-            else:
-                for item in sorted(items, key=str.lower):
-                    print(item)
+            lines = self._listing_lines(target_path, detailed, sort, show_all)
+            if lines:
+                sys.stdout.write('\n'.join(lines) + '\n')
 
             self.logger.log_success(f"ls {'-l' if detailed else ''} {target_path}")
 
@@ -62,6 +80,78 @@ class FileSystemCommands(BaseCommands):
             self.logger.log_error(f"ls failed: {e}")
             print(f"Error: {e}")
 
+    def iter_ls(self, path: Optional[str] = None, detailed: bool = False,
+                sort: str = LS_DEFAULT_SORT, show_all: bool = False) -> Iterator[str]:
+        """
+        Стадия конвейера ls: строки списка каталога.
+
+        Args:
+            path: Путь к директории (по умолчанию текущая)
+            detailed: Показывать ли подробную информацию
+            sort: Ключ сортировки: 'name', 'size' или 'mtime'
+            show_all: Показывать ли скрытые записи (имена с '.')
+
+        Yields:
+            Строки вывода ls
+
+        Raises:
+            FileNotFoundError: Путь не существует
+            NotADirectoryError: Путь не является каталогом
+        """
+        target_path = os.path.abspath(os.path.expanduser(path if path else self.current_dir))
+        if not self.fs_cache.exists(target_path):
+            raise FileNotFoundError(f"{ERROR_PATH_NOT_FOUND}: {target_path}")
+        if not self.fs_cache.isdir(target_path):
+            raise NotADirectoryError(f"{ERROR_NOT_A_DIRECTORY}: {target_path}")
+        yield from self._listing_lines(target_path, detailed, sort, show_all)
+
+    def _listing_lines(self, target_path: str, detailed: bool, sort: str,
+                       show_all: bool = False) -> List[str]:
+        """
+        Форматирование списка каталога для ls.
+
+        Args:
+            target_path: Абсолютный путь к каталогу
+            detailed: Подробный формат
+            sort: Ключ сортировки
+            show_all: Показывать ли записи, чьи имена начинаются с '.'
+
+        Returns:
+            Строки вывода
+        """
+        if sort not in LS_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort} (choose from {', '.join(LS_SORT_KEYS)})")
+
+        if not detailed and sort == 'name':
+            names = sorted((name for name in self.fs_cache.listdir(target_path)
+                            if show_all or not name.startswith('.')),
+                           key=lambda name: (name.lower(), name))
+            self.metrics.add(files=len(names))
+            return names
+
+        entries = [entry for entry in self.fs_cache.listdir_stat(target_path)
+                   if show_all or not entry[0].startswith('.')]
+        entries.sort(key=lambda item: (item[0].lower(), item[0]))
+        if sort == 'size':
+            entries.sort(key=lambda item: item[1].st_size, reverse=True)
+        elif sort == 'mtime':
+            entries.sort(key=lambda item: item[1].st_mtime, reverse=True)
+
+        if detailed:
+            lines = [f"{'Name':<30} {'Size':<15} {'Modified':<20} {'Permissions':<12}",
+                     SEPARATOR_LINE]
+            for name, stats in entries:
+                modified = datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                perms = stat.filemode(stats.st_mode)
+                item_type = '[DIR]' if stat.S_ISDIR(stats.st_mode) else ''
+                lines.append(f"{name:<30} {stats.st_size:<15} {modified:<20} {perms:<12} "
+                             f"{item_type}")
+        else:
+            lines = [name for name, _ in entries]
+
+        self.metrics.add(files=len(entries))
+        return lines
+
     def cd(self, path: str) -> None:
         """
         Команда cd - смена текущего каталога.
@@ -72,12 +162,12 @@ class FileSystemCommands(BaseCommands):
         try:
             resolved_path = self.resolve_path(path)
 
-            if not os.path.exists(resolved_path):
+            if not self.fs_cache.exists(resolved_path):
                 self.logger.log_error(f"{ERROR_PATH_NOT_FOUND}: {resolved_path}")
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {resolved_path}")
                 return
 
-            if not os.path.isdir(resolved_path):
+            if not self.fs_cache.isdir(resolved_path):
                 self.logger.log_error(f"{ERROR_NOT_A_DIRECTORY}: {resolved_path}")
                 print(f"Error: {ERROR_NOT_A_DIRECTORY}: {resolved_path}")
                 return
@@ -101,19 +191,18 @@ class FileSystemCommands(BaseCommands):
         try:
             full_path = os.path.abspath(os.path.join(self.current_dir, file_path))
 
-            if not os.path.exists(full_path):
+            if not self.fs_cache.exists(full_path):
                 self.logger.log_error(f"{ERROR_PATH_NOT_FOUND}: {full_path}")
                 print(f"Error: {ERROR_PATH_NOT_FOUND}: {full_path}")
                 return
 
-            if os.path.isdir(full_path):
+            if self.fs_cache.isdir(full_path):
                 self.logger.log_error(f"{ERROR_NOT_A_FILE}: {full_path}")
                 print(f"Error: {ERROR_NOT_A_FILE}: {full_path}")
                 return
 
-            with open(full_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                print(content)
+            size = self._stream_file(full_path)
+            self.metrics.add(files=1, read=size, written=size)
 
             self.logger.log_success(f"cat {full_path}")
 
@@ -121,37 +210,225 @@ class FileSystemCommands(BaseCommands):
             self.logger.log_error(f"cat failed: {e}")
             print(f"Error: {e}")
 
-    def cp(self, source: str, destination: str, recursive: bool = False) -> None:
+    def iter_cat(self, file_path: str) -> Iterator[str]:
+        """
+        Стадия конвейера cat: строки файла без перевода строки.
+
+        Файл читается буфером PIPE_BUFFER_SIZE, поэтому память не зависит
+        от размера файла; закрытие генератора закрывает файл.
+
+        Args:
+            file_path: Путь к файлу
+
+        Yields:
+            Строки файла
+
+        Raises:
+            FileNotFoundError: Файл не существует
+            IsADirectoryError: Путь является каталогом
+        """
+        full_path = os.path.abspath(os.path.join(self.current_dir, file_path))
+        if not self.fs_cache.exists(full_path):
+            raise FileNotFoundError(f"{ERROR_PATH_NOT_FOUND}: {full_path}")
+        if self.fs_cache.isdir(full_path):
+            raise IsADirectoryError(f"{ERROR_NOT_A_FILE}: {full_path}")
+
+        size = 0
+        try:
+            with open(full_path, 'rb', buffering=PIPE_BUFFER_SIZE) as f:
+                for raw in f:
+                    size += len(raw)
+                    yield raw.rstrip(b'\r\n').decode('utf-8', errors='replace')
+        finally:
+            self.metrics.add(files=1, read=size)
+
+    def head(self, file_path: str, count: int = HEAD_DEFAULT_LINES) -> None:
+        """
+        Команда head - первые строки файла.
+
+        Читается только начало файла, а не весь файл.
+
+        Args:
+            file_path: Путь к файлу
+            count: Количество строк
+        """
+        try:
+            lines = self.iter_head(count, file_path=file_path)
+            try:
+                for line in lines:
+                    print(line)
+            finally:
+                lines.close()
+
+            self.logger.log_success(f"head -n {count} {file_path}")
+
+        except Exception as e:
+            self.logger.log_error(f"head failed: {e}")
+            print(f"Error: {e}")
+
+    def iter_head(self, count: int = HEAD_DEFAULT_LINES, file_path: Optional[str] = None,
+                  lines: Optional[Iterator[str]] = None) -> Generator[str, None, None]:
+        """
+        Стадия конвейера head: первые count строк.
+
+        После count строк генератор завершается, не запрашивая следующую
+        строку, - конвейер закрывает предыдущие стадии и они прекращают работу.
+
+        Args:
+            count: Количество строк
+            file_path: Файл (если указан, lines не читаются)
+            lines: Строки предыдущей стадии
+
+        Yields:
+            Первые count строк
+
+        Raises:
+            ValueError: Отрицательное count или нет ни файла, ни входных строк
+        """
+        if count < 0:
+            raise ValueError(f"Invalid line count: {count}")
+        source: Iterator[str]
+        if file_path is not None:
+            source = self.iter_cat(file_path)
+        elif lines is not None:
+            source = lines
+        else:
+            raise ValueError("head requires file when not reading from a pipe")
+        try:
+            yield from itertools.islice(source, count)
+        finally:
+            if file_path is not None:
+                source.close()  # type: ignore[attr-defined]
+
+    def _stream_file(self, full_path: str) -> int:
+        """
+        Потоковый вывод файла в stdout с постоянным расходом памяти.
+
+        Если stdout - файл или канал, данные передаются ядром через
+        os.sendfile без копирования в процесс. Иначе (терминал, перехваченный
+        поток) файл копируется кусками CAT_CHUNK_SIZE в бинарный буфер stdout.
+
+        Args:
+            full_path: Абсолютный путь к файлу
+
+        Returns:
+            Размер файла в байтах
+        """
+        sys.stdout.flush()
+        with open(full_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            out_fd = self._stdout_fd()
+            sent = 0
+            last = b''
+            if out_fd is not None:
+                try:
+                    while sent < size:
+                        count = os.sendfile(out_fd, f.fileno(), sent,
+                                            min(CAT_CHUNK_SIZE, size - sent))
+                        if count == 0:
+                            break
+                        sent += count
+                except OSError:
+                    pass
+            if sent:
+                last = os.pread(f.fileno(), 1, sent - 1)
+                f.seek(sent)
+            last = self._copy_chunks(f) or last
+
+        if last and last != b'\n':
+            sys.stdout.write('\n')
+        sys.stdout.flush()
+        return size
+
+    @staticmethod
+    def _stdout_fd() -> Optional[int]:
+        """
+        Дескриптор stdout, пригодный для os.sendfile.
+
+        Returns:
+            Дескриптор файла или канала, None для терминала и потоков без дескриптора
+        """
+        if not hasattr(os, 'sendfile'):
+            return None
+        try:
+            fd = sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+        if os.isatty(fd):
+            return None
+        return fd
+
+    @staticmethod
+    def _copy_chunks(f: io.BufferedReader) -> bytes:
+        """
+        Копирование остатка файла в stdout через буфер фиксированного размера.
+
+        Args:
+            f: Файл, открытый в бинарном режиме
+
+        Returns:
+            Последний записанный байт или b'' если ничего не записано
+        """
+        out = getattr(sys.stdout, 'buffer', None)
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        chunk = bytearray(CAT_CHUNK_SIZE)
+        view = memoryview(chunk)
+        last = b''
+        while True:
+            count = f.readinto(chunk)
+            if not count:
+                break
+            if out is not None:
+                out.write(view[:count])
+            else:
+                sys.stdout.write(decoder.decode(view[:count]))
+            last = bytes(view[count - 1:count])
+        if out is not None:
+            out.flush()
+        else:
+            sys.stdout.write(decoder.decode(b'', final=True))
+        return last
+
+    def cp(self, source: str, destination: str, recursive: bool = False,
+           workers: Optional[int] = None) -> None:
         """
         Команда cp - копирование файлов/каталогов.
 
+        Каталоги копируются параллельно (см. fastcopy.copy_tree), прогресс
+        выводится в stderr.
+
         Args:
             source: Путь к источнику
             destination: Путь назначения
             recursive: Рекурсивное копирование
+            workers: Количество потоков для cp -r (по умолчанию CP_WORKERS)
         """
         try:
             src = os.path.abspath(os.path.join(self.current_dir, source))
             dst = os.path.abspath(os.path.join(self.current_dir, destination))
 
-            if not os.path.exists(src):
+            if not self.fs_cache.exists(src):
                 self.logger.log_error(f"{ERROR_SOURCE_NOT_FOUND}: {src}")
                 print(f"Error: {ERROR_SOURCE_NOT_FOUND}: {src}")
                 return
 
-            if os.path.isdir(src):
+            if self.fs_cache.isdir(src):
                 if not recursive:
                     self.logger.log_error(ERROR_USE_RECURSIVE)
                     print(f"Error: {ERROR_USE_RECURSIVE}")
                     return
-                shutil.copytree(src, dst)
+                self._copy_tree(src, dst, workers or CP_WORKERS)
             else:
-                if os.path.isdir(dst):
+                if self.fs_cache.isdir(dst):
                     dst = os.path.join(dst, os.path.basename(src))
-                shutil.copy2(src, dst)
+                try:
+                    shutil.copy2(src, dst)
+                finally:
+                    self.fs_cache.invalidate(dst)
+                size = os.path.getsize(dst)
+                self.metrics.add(files=1, read=size, written=size)
 
-            undo_info = f"cp|{src}|{dst}"
-            self.history.append(undo_info)
+            self.add_undo_record('cp', src, dst)
 
             print(f"{SUCCESS_COPIED}: {src} -> {dst}")
             self.logger.log_success(f"cp {'-r' if recursive else ''} {src} {dst}")
@@ -160,6 +437,52 @@ class FileSystemCommands(BaseCommands):
             self.logger.log_error(f"cp failed: {e}")
             print(f"Error: {e}")
 
+    def _copy_tree(self, src: str, dst: str, workers: int) -> None:
+        """
+        Параллельное копирование каталога с выводом прогресса и итоговой статистики.
+
+        Args:
+            src: Исходный каталог
+            dst: Каталог назначения
+            workers: Количество потоков
+        """
+        started = time.perf_counter()
+        try:
+            files_count, bytes_count = copy_tree(src, dst, workers, self._copy_progress())
+        finally:
+            self.fs_cache.invalidate(dst, recursive=True)
+        self.metrics.add(files=files_count, read=bytes_count, written=bytes_count)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        stats = (f"Copied {files_count} files, {bytes_count} bytes in {elapsed:.3f}s "
+                 f"({bytes_count / elapsed / 1024 / 1024:.2f} MiB/s, {workers} workers)")
+        print(stats, file=sys.stderr)
+        self.logger.log_success(f"cp stats: {stats}")
+
+    @staticmethod
+    def _copy_progress() -> Optional[ProgressCallback]:
+        """
+        Обработчик прогресса cp -r: строка в stderr, обновляемая не чаще CP_PROGRESS_INTERVAL.
+
+        Returns:
+            Обработчик или None, если stderr не терминал
+        """
+        if not sys.stderr.isatty():
+            return None
+
+        last_update = [0.0]
+
+        def report(files_done: int, files_total: int, bytes_done: int, bytes_total: int) -> None:
+            now = time.monotonic()
+            if files_done < files_total and now - last_update[0] < CP_PROGRESS_INTERVAL:
+                return
+            last_update[0] = now
+            end = '\n' if files_done == files_total else ''
+            print(f"\r{files_done}/{files_total} files, "
+                  f"{bytes_done / 1024 / 1024:.1f}/{bytes_total / 1024 / 1024:.1f} MiB",
+                  end=end, file=sys.stderr, flush=True)
+
+        return report
+
     def mv(self, source: str, destination: str) -> None:
         """
         Команда mv - перемещение/переименование.
@@ -177,10 +500,14 @@ class FileSystemCommands(BaseCommands):
                 print(f"Error: {ERROR_SOURCE_NOT_FOUND}: {src}")
                 return
 
-            undo_info = f"mv|{src}|{dst}"
-            self.history.append(undo_info)
+            self.add_undo_record('mv', src, dst)
 
-            shutil.move(src, dst)
+            try:
+                shutil.move(src, dst)
+            finally:
+                self.fs_cache.invalidate(src, recursive=True)
+                self.fs_cache.invalidate(dst, recursive=True)
+            self.metrics.add(files=1)
             print(f"{SUCCESS_MOVED}: {src} -> {dst}")
             self.logger.log_success(f"mv {src} {dst}")
 
@@ -192,6 +519,10 @@ class FileSystemCommands(BaseCommands):
         """
         Команда rm - удаление файлов/каталогов.
 
+        Объект переименовывается в корзину на той же файловой системе.
+        Если такой корзины нет, перед копированием в основную корзину
+        выводится предупреждение с размером и запрашивается подтверждение.
+
         Args:
             path: Путь к файлу/директории
             recursive: Рекурсивное удаление
@@ -220,19 +551,22 @@ class FileSystemCommands(BaseCommands):
                     print("Cancelled")
                     return
 
-            trash_dir_path = os.path.join(self.current_dir, self.trash_dir)
-            if not os.path.exists(trash_dir_path):
-                os.makedirs(trash_dir_path)
-
-            trash_path = os.path.join(self.trash_dir, os.path.basename(target))
-            if os.path.exists(trash_path):
-                import time
-                timestamp = int(time.time())
-                trash_path = f"{trash_path}.{timestamp}"
-            shutil.move(target, trash_path)
+            store, same_device = self.trash.store_for(target)
+            if not same_device:
+                size = tree_size(target)
+                print(f"Warning: no trash on the filesystem of '{target}', "
+                      f"{format_size(size)} will be copied to {store.root}")
+                confirm = input("Continue? (y/n): ")
+                if confirm.lower() != 'y':
+                    print("Cancelled")
+                    return
 
-            undo_info = f"rm|{target}|{trash_path}"
-            self.history.append(undo_info)
+            try:
+                entry = self.trash.add(target)
+            finally:
+                self.fs_cache.invalidate(target, recursive=True)
+            self.add_undo_record('rm', target, entry.id)
+            self.metrics.add(files=1)
 
             print(f"{SUCCESS_REMOVED}: {target}")
             self.logger.log_success(f"rm {'-r' if recursive else ''} {target}")
@@ -241,6 +575,53 @@ class FileSystemCommands(BaseCommands):
             self.logger.log_error(f"rm failed: {e}")
             print(f"Error: {e}")
 
+    def manage_trash(self, action: str = 'list', ids: Sequence[str] = (),
+                     days: Optional[float] = None, max_size: Optional[int] = None) -> None:
+        """
+        Команда trash - просмотр и очистка корзины.
+
+        Args:
+            action: 'list', 'purge' (ids или вся корзина) или 'expire'
+            ids: Идентификаторы записей для purge
+            days: Для expire - удалить записи старше указанного числа дней
+            max_size: Для expire - квота размера корзины в байтах
+        """
+        try:
+            if action == 'list':
+                entries = self.trash.entries()
+                lines = [f"{'ID':<12} {'Deleted':<19} {'Size':>8} Original", SEPARATOR_LINE]
+                for entry in entries:
+                    deleted = datetime.fromtimestamp(entry.deleted_at).strftime('%Y-%m-%d %H:%M:%S')
+                    kind = '/' if entry.is_dir else ''
+                    size = format_size(self.trash.entry_size(entry))
+                    lines.append(f"{entry.id:<12} {deleted:<19} {size:>8} {entry.original}{kind}")
+                lines.append(SEPARATOR_LINE)
+                lines.append(f"{len(entries)} entries, {format_size(self.trash.usage())} on disk")
+                sys.stdout.write('\n'.join(lines) + '\n')
+
+            elif action == 'purge':
+                try:
+                    count, freed = self.trash.purge(ids or None)
+                except KeyError as e:
+                    raise ValueError(f"{ERROR_TRASH_ENTRY_NOT_FOUND}: {e.args[0]}") from None
+                print(f"Purged {count} entries, freed {format_size(freed)}")
+
+            elif action == 'expire':
+                if days is None and max_size is None:
+                    raise ValueError("expire requires --days or --max-size")
+                max_age = days * 86400 if days is not None else None
+                count, freed = self.trash.expire(max_age, max_size)
+                print(f"Expired {count} entries, freed {format_size(freed)}")
+
+            else:
+                raise ValueError(f"Unknown trash action: {action}")
+
+            self.logger.log_success(f"trash {action}")
+
+        except Exception as e:
+            self.logger.log_error(f"trash failed: {e}")
+            print(f"Error: {e}")
+
     def pwd(self) -> None:
         """Команда pwd - показать текущую директорию."""
         print(self.current_dir)
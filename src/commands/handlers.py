@@ -0,0 +1,279 @@
+"""Встроенные команды shell-эмулятора и их регистрация в реестре."""
+
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from ..constants import (
+    ARCHIVE_CODECS,
+    ARCHIVE_DEFAULT_CODEC,
+    GREP_POOL_KIND,
+    HEAD_DEFAULT_LINES,
+    LS_DEFAULT_SORT,
+    LS_SORT_KEYS,
+)
+from ..trash import parse_size
+from .registry import CommandRegistry, CommandSpec, OptionSpec
+
+if TYPE_CHECKING:
+    from ..shell import Shell
+
+DETAILED = OptionSpec('detailed', short='l', long='long', help='Detailed listing')
+RECURSIVE = OptionSpec('recursive', short='r', long='recursive', help='Recurse into directories')
+IGNORE_CASE = OptionSpec('ignore_case', short='i', long='ignore-case', help='Ignore case')
+ALL = OptionSpec('all', short='a', long='all', help='Show entries starting with .')
+JOBS = OptionSpec('jobs', short='j', long='jobs', takes_value=True, type=int,
+                  help='Worker pool size')
+POOL = OptionSpec('pool', long='pool', takes_value=True, choices=('thread', 'process'),
+                  help='Worker pool type for grep -r')
+CODEC = OptionSpec('codec', short='c', long='codec', takes_value=True, choices=ARCHIVE_CODECS,
+                   help='Compression codec')
+LEVEL = OptionSpec('level', long='level', takes_value=True, type=int,
+                   choices=tuple(str(level) for level in range(1, 10)), help='Compression level')
+INCREMENTAL = OptionSpec('incremental', short='g', long='incremental', takes_value=True,
+                         help='Pack only changes since the base archive')
+HASH = OptionSpec('hash', long='hash', help='Detect changes by content hash')
+SNAPSHOT = OptionSpec('snapshot', long='snapshot',
+                      help='Save a snapshot manifest so the archive can be an incremental base')
+CHAIN = OptionSpec('chain', long='chain', help='Restore base archives and increments')
+SORT = OptionSpec('sort', long='sort', takes_value=True, choices=LS_SORT_KEYS,
+                  help='Sort key for ls')
+DAYS = OptionSpec('days', long='days', takes_value=True, type=float,
+                  help='Expire trash entries older than N days')
+MAX_SIZE = OptionSpec('max_size', long='max-size', takes_value=True, type=parse_size,
+                      help='Trash size quota, e.g. 500M')
+EXPORT = OptionSpec('export', long='export', takes_value=True,
+                    help='Write session metrics to a JSON file')
+RESET = OptionSpec('reset', long='reset', help='Clear collected metrics')
+DROP = OptionSpec('drop', long='drop', help='Remove the index')
+LINES = OptionSpec('lines', short='n', long='lines', takes_value=True, type=int,
+                   help='Number of lines')
+
+
+def _ls(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды ls."""
+    shell.commands.ls(args[0] if args else None, options.get('detailed', False),
+                      sort=options.get('sort', LS_DEFAULT_SORT),
+                      show_all=options.get('all', False))
+
+
+def _ls_stream(shell: 'Shell', args: List[str], options: Dict[str, Any],
+               lines: Optional[Iterator[str]]) -> Iterator[str]:
+    """Стадия конвейера ls."""
+    return shell.commands.iter_ls(args[0] if args else None, options.get('detailed', False),
+                                  sort=options.get('sort', LS_DEFAULT_SORT),
+                                  show_all=options.get('all', False))
+
+
+def _cd(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды cd."""
+    shell.commands.cd(args[0])
+
+
+def _cat(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды cat."""
+    shell.commands.cat(args[0])
+
+
+def _cat_stream(shell: 'Shell', args: List[str], options: Dict[str, Any],
+                lines: Optional[Iterator[str]]) -> Iterator[str]:
+    """Стадия конвейера cat."""
+    return shell.commands.iter_cat(args[0])
+
+
+def _head_args(args: List[str], options: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+    """
+    Количество строк и файл head: '-n N', 'head N файл' или 'head N' в конвейере.
+
+    Returns:
+        Кортеж (количество строк, файл или None)
+    """
+    rest = list(args)
+    count = options.get('lines')
+    if count is None and rest and rest[0].isdigit():
+        count = int(rest.pop(0))
+    return (count if count is not None else HEAD_DEFAULT_LINES), (rest[0] if rest else None)
+
+
+def _head(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды head."""
+    count, file_path = _head_args(args, options)
+    if file_path is None:
+        error = "head requires file when not reading from a pipe"
+        print(f"Error: {error}")
+        shell.logger.log_error(error)
+        return
+    shell.commands.head(file_path, count)
+
+
+def _head_stream(shell: 'Shell', args: List[str], options: Dict[str, Any],
+                 lines: Optional[Iterator[str]]) -> Iterator[str]:
+    """Стадия конвейера head."""
+    count, file_path = _head_args(args, options)
+    return shell.commands.iter_head(count, file_path=file_path, lines=lines)
+
+
+def _cp(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды cp."""
+    shell.commands.cp(args[0], args[1], options.get('recursive', False),
+                      workers=options.get('jobs'))
+
+
+def _mv(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды mv."""
+    shell.commands.mv(args[0], args[1])
+
+
+def _rm(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды rm."""
+    shell.commands.rm(args[0], options.get('recursive', False))
+
+
+def _trash(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды trash."""
+    shell.commands.manage_trash(args[0] if args else 'list', args[1:],
+                                days=options.get('days'), max_size=options.get('max_size'))
+
+
+def _zip(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды zip."""
+    shell.commands.zip_folder(args[0], args[1], workers=options.get('jobs'),
+                              codec=options.get('codec', ARCHIVE_DEFAULT_CODEC),
+                              level=options.get('level'))
+
+
+def _unzip(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды unzip."""
+    shell.commands.unzip_archive(args[0], workers=options.get('jobs'), members=args[1:])
+
+
+def _tar(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды tar."""
+    shell.commands.tar_folder(args[0], args[1], workers=options.get('jobs'),
+                              codec=options.get('codec', ARCHIVE_DEFAULT_CODEC),
+                              level=options.get('level'),
+                              incremental=options.get('incremental'),
+                              use_hash=options.get('hash', False),
+                              snapshot=options.get('snapshot', False))
+
+
+def _untar(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды untar."""
+    shell.commands.untar_archive(args[0], chain=options.get('chain', False), members=args[1:])
+
+
+def _zipls(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды zipls."""
+    shell.commands.list_zip(args[0], members=args[1:])
+
+
+def _tarls(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды tarls."""
+    shell.commands.list_tar(args[0], members=args[1:])
+
+
+def _grep(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды grep."""
+    shell.commands.grep(args[0], args[1],
+                        options.get('recursive', False),
+                        options.get('ignore_case', False),
+                        workers=options.get('jobs'),
+                        pool=options.get('pool', GREP_POOL_KIND))
+
+
+def _grep_stream(shell: 'Shell', args: List[str], options: Dict[str, Any],
+                 lines: Optional[Iterator[str]]) -> Iterator[str]:
+    """Стадия конвейера grep."""
+    return shell.commands.iter_grep(args[0], args[1] if len(args) > 1 else None,
+                                    options.get('recursive', False),
+                                    options.get('ignore_case', False),
+                                    workers=options.get('jobs'),
+                                    pool=options.get('pool', GREP_POOL_KIND),
+                                    lines=lines)
+
+
+def _index(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды index."""
+    shell.commands.build_index(args[0] if args else None, drop=options.get('drop', False))
+
+
+def _history(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды history."""
+    shell.commands.show_history()
+
+
+def _undo(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды undo."""
+    shell.commands.undo()
+
+
+def _stats(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды stats."""
+    shell.commands.show_stats(export=options.get('export'), reset=options.get('reset', False))
+
+
+def _pwd(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды pwd."""
+    shell.commands.pwd()
+
+
+def _exit(shell: 'Shell', args: List[str], options: Dict[str, Any]) -> None:
+    """Обработчик команды exit."""
+    print("bb!")
+    shell.running = False
+
+
+BUILTIN_COMMANDS = (
+    CommandSpec('ls', _ls, optional_args=('path',), options=(DETAILED, ALL, SORT),
+                description='List directory contents', stream=_ls_stream),
+    CommandSpec('cd', _cd, args=('path',), description='Change directory'),
+    CommandSpec('cat', _cat, args=('file',), description='Print file contents',
+                stream=_cat_stream),
+    CommandSpec('head', _head, args=('file',), options=(LINES,), pipe_args=(),
+                description='Print the first lines of a file or pipe (head N or -n N)',
+                stream=_head_stream),
+    CommandSpec('cp', _cp, args=('source', 'destination'), options=(RECURSIVE, JOBS),
+                description='Copy files and directories'),
+    CommandSpec('mv', _mv, args=('source', 'destination'),
+                description='Move or rename files and directories'),
+    CommandSpec('rm', _rm, args=('path',), options=(RECURSIVE,),
+                description='Move files and directories to trash'),
+    CommandSpec('trash', _trash, optional_args=('action', 'id...'), options=(DAYS, MAX_SIZE),
+                description='List, purge or expire trash (action: list, purge, expire)'),
+    CommandSpec('zip', _zip, args=('folder', 'archive'), options=(JOBS, CODEC, LEVEL),
+                description='Create ZIP archive'),
+    CommandSpec('unzip', _unzip, args=('archive',), optional_args=('member...',), options=(JOBS,),
+                description='Extract ZIP archive or selected members'),
+    CommandSpec('tar', _tar, args=('folder', 'archive'),
+                options=(JOBS, CODEC, LEVEL, INCREMENTAL, HASH, SNAPSHOT),
+                description='Create TAR archive (gzip by default)'),
+    CommandSpec('untar', _untar, args=('archive',), optional_args=('member...',), options=(CHAIN,),
+                description='Extract TAR archive or selected members (compression auto-detected)'),
+    CommandSpec('zipls', _zipls, args=('archive',), optional_args=('member...',),
+                description='List ZIP archive members'),
+    CommandSpec('tarls', _tarls, args=('archive',), optional_args=('member...',),
+                description='List TAR archive members'),
+    CommandSpec('grep', _grep, args=('pattern', 'path'),
+                options=(RECURSIVE, IGNORE_CASE, JOBS, POOL),
+                description='Search file contents or filter piped lines',
+                stream=_grep_stream, pipe_args=('pattern',)),
+    CommandSpec('index', _index, optional_args=('path',), options=(DROP,),
+                description='Build or update the trigram index used by grep -r'),
+    CommandSpec('history', _history, record_history=False, description='Show command history'),
+    CommandSpec('undo', _undo, record_history=False, description='Undo last cp/mv/rm'),
+    CommandSpec('stats', _stats, options=(EXPORT, RESET), record_history=False,
+                description='Show per-command timing and I/O statistics'),
+    CommandSpec('pwd', _pwd, description='Print working directory'),
+    CommandSpec('exit', _exit, description='Exit the shell'),
+)
+
+
+def create_default_registry() -> CommandRegistry:
+    """
+    Создание реестра со встроенными командами.
+
+    Returns:
+        Реестр, в который плагины могут добавлять свои команды
+    """
+    registry = CommandRegistry()
+    for spec in BUILTIN_COMMANDS:
+        registry.register(spec)
+    return registry
@@ -0,0 +1,204 @@
+"""Реестр команд shell-эмулятора."""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from ..shell import Shell
+
+# Обработчик команды: (shell, позиционные аргументы, опции)
+Handler = Callable[['Shell', List[str], Dict[str, Any]], None]
+
+# Обработчик стадии конвейера: (shell, аргументы, опции, строки предыдущей стадии или None)
+StreamHandler = Callable[['Shell', List[str], Dict[str, Any], Optional[Iterator[str]]],
+                         Iterator[str]]
+
+
+@dataclass(frozen=True)
+class OptionSpec:
+    """
+    Описание опции команды.
+
+    Attributes:
+        dest: Ключ в словаре опций, который получает обработчик
+        short: Короткая форма без дефиса, например 'r'
+        long: Длинная форма без дефисов, например 'recursive'
+        help: Описание опции
+        takes_value: Принимает ли опция значение ('-j 4', '--jobs=4')
+        type: Преобразование значения опции
+        choices: Допустимые значения (пустой кортеж - любые)
+    """
+
+    dest: str
+    short: Optional[str] = None
+    long: Optional[str] = None
+    help: str = ''
+    takes_value: bool = False
+    type: Callable[[str], Any] = str
+    choices: Tuple[str, ...] = ()
+
+    @property
+    def flag(self) -> str:
+        """Основная форма опции для справки: '-r', '--recursive' или '-j N'."""
+        flag = f"-{self.short}" if self.short else f"--{self.long}"
+        if self.takes_value:
+            flag += f" {self.dest.upper()}"
+        return flag
+
+
+@dataclass(frozen=True)
+class CommandSpec:
+    """
+    Описание команды: обработчик, арность, опции и справка.
+
+    Attributes:
+        name: Имя команды
+        handler: Обработчик команды
+        args: Имена обязательных позиционных аргументов
+        optional_args: Имена необязательных позиционных аргументов
+        options: Опции команды
+        description: Краткое описание
+        record_history: Добавлять ли команду в историю
+        stream: Обработчик для конвейера (None - команду нельзя использовать с '|')
+        pipe_args: Обязательные аргументы, когда команда читает из конвейера
+            (None - те же, что args)
+    """
+
+    name: str
+    handler: Handler
+    args: Tuple[str, ...] = ()
+    optional_args: Tuple[str, ...] = ()
+    options: Tuple[OptionSpec, ...] = field(default=())
+    description: str = ''
+    record_history: bool = True
+    stream: Optional[StreamHandler] = None
+    pipe_args: Optional[Tuple[str, ...]] = None
+
+    @property
+    def usage(self) -> str:
+        """Строка использования, построенная из описания команды."""
+        parts = [self.name]
+        parts.extend(f"<{arg}>" for arg in self.args)
+        parts.extend(f"[{arg}]" for arg in self.optional_args)
+        parts.extend(f"[{option.flag}]" for option in self.options)
+        return ' '.join(parts)
+
+    def validate(self, args: List[str], piped: bool = False) -> Optional[str]:
+        """
+        Проверка количества позиционных аргументов.
+
+        Args:
+            args: Позиционные аргументы
+            piped: Команда читает вывод предыдущей стадии конвейера
+
+        Returns:
+            Текст ошибки или None, если аргументов достаточно
+        """
+        required = self.pipe_args if piped and self.pipe_args is not None else self.args
+        if len(args) >= len(required):
+            return None
+        return f"{self.name} requires {' and '.join(required)}. Usage: {self.usage}"
+
+    def find_short(self, name: str) -> Optional[OptionSpec]:
+        """
+        Поиск опции по короткой форме.
+
+        Args:
+            name: Буква опции без дефиса
+
+        Returns:
+            Описание опции или None
+        """
+        for option in self.options:
+            if option.short == name:
+                return option
+        return None
+
+    def find_long(self, name: str) -> Optional[OptionSpec]:
+        """
+        Поиск опции по длинной форме.
+
+        Args:
+            name: Имя опции без дефисов
+
+        Returns:
+            Описание опции или None
+        """
+        for option in self.options:
+            if option.long == name:
+                return option
+        return None
+
+
+class CommandRegistry:
+    """Словарь команд: диспетчеризация выполняется одним поиском по имени."""
+
+    def __init__(self) -> None:
+        """Инициализация пустого реестра."""
+        self._commands: Dict[str, CommandSpec] = {}
+        self.version = 0
+
+    def register(self, spec: CommandSpec) -> CommandSpec:
+        """
+        Регистрация команды.
+
+        Args:
+            spec: Описание команды
+
+        Returns:
+            Зарегистрированное описание
+
+        Raises:
+            ValueError: Если команда с таким именем уже зарегистрирована
+        """
+        if spec.name in self._commands:
+            raise ValueError(f"Command already registered: {spec.name}")
+        self._commands[spec.name] = spec
+        self.version += 1
+        return spec
+
+    def command(self, name: str, **kwargs: Any) -> Callable[[Handler], Handler]:
+        """
+        Декоратор для регистрации обработчика как команды.
+
+        Args:
+            name: Имя команды
+            **kwargs: Остальные поля CommandSpec
+
+        Returns:
+            Декоратор, возвращающий исходный обработчик
+        """
+        def decorator(handler: Handler) -> Handler:
+            self.register(CommandSpec(name, handler, **kwargs))
+            return handler
+        return decorator
+
+    def unregister(self, name: str) -> None:
+        """
+        Удаление команды из реестра.
+
+        Args:
+            name: Имя команды
+        """
+        self._commands.pop(name, None)
+        self.version += 1
+
+    def get(self, name: str) -> Optional[CommandSpec]:
+        """
+        Поиск команды по имени.
+
+        Args:
+            name: Имя команды
+
+        Returns:
+            Описание команды или None
+        """
+        return self._commands.get(name)
+
+    def __contains__(self, name: object) -> bool:
+        """Проверка, зарегистрирована ли команда."""
+        return name in self._commands
+
+    def __iter__(self) -> Iterator[CommandSpec]:
+        """Итерация по зарегистрированным командам."""
+        return iter(self._commands.values())
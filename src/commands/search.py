@@ -0,0 +1,364 @@
+"""Поиск в файлах для grep: mmap, литеральный быстрый путь, бинарные файлы."""
+
+import mmap
+import os
+import re
+from typing import Iterator, List, NamedTuple, Optional, Pattern, Tuple, Union
+
+from ..constants import GREP_BINARY_CHECK_SIZE, GREP_NEWLINE_COUNT_CHUNK
+
+
+class TextMatcher(NamedTuple):
+    """
+    Регулярное выражение, проверяемое на декодированных строках.
+
+    Attributes:
+        regex: Скомпилированный str-шаблон
+        literal: Обязательный литерал в UTF-8: строки без него не декодируются
+            (None - проверяется каждая строка)
+    """
+
+    regex: Pattern[str]
+    literal: Optional[bytes]
+
+
+# Литерал (bytes) для быстрого пути, bytes-регулярное выражение над всем буфером
+# или регулярное выражение над декодированными строками
+Matcher = Union[bytes, Pattern[bytes], TextMatcher]
+
+REGEX_METACHARACTERS: frozenset = frozenset('.^$*+?{}[]\\|()')
+
+# Экранирования, которые в str-шаблоне относятся к символам Unicode, а не к байтам
+UNICODE_ESCAPES: frozenset = frozenset('wWsSdDbB')
+
+QUANTIFIER = re.compile(r'\*|\+|\?|\{(\d*)(?:,(\d*))?\}')
+
+
+def _skip_quantifier(pattern: str, pos: int) -> Tuple[int, int]:
+    """
+    Пропуск квантификатора после атома регулярного выражения.
+
+    Returns:
+        Кортеж (позиция после квантификатора, минимум повторений атома;
+        1 без квантификатора, -1 для '+' и {m,} с m >= 1)
+    """
+    match = QUANTIFIER.match(pattern, pos)
+    if match is None:
+        return pos, 1
+    token = match.group(0)
+    end = match.end()
+    if end < len(pattern) and pattern[end] in '?+':
+        end += 1  # ленивый или захватывающий квантификатор
+    if token in ('*', '?') or (token.startswith('{') and not match.group(1)):
+        return end, 0
+    if token.startswith('{') and int(match.group(1)) == 0:
+        return end, 0
+    return end, -1
+
+
+def _skip_class(pattern: str, pos: int) -> int:
+    """Позиция после класса символов [...], начинающегося в pos."""
+    pos += 1
+    if pos < len(pattern) and pattern[pos] == '^':
+        pos += 1
+    if pos < len(pattern) and pattern[pos] == ']':
+        pos += 1
+    while pos < len(pattern) and pattern[pos] != ']':
+        pos += 2 if pattern[pos] == '\\' else 1
+    return pos + 1
+
+
+def _skip_group(pattern: str, pos: int) -> int:
+    """Позиция после группы (...), начинающейся в pos."""
+    depth = 0
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char == '\\':
+            pos += 2
+            continue
+        if char == '[':
+            pos = _skip_class(pattern, pos)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    return pos
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Литеральные подстроки, входящие в любое совпадение регулярного выражения.
+
+    Разбор консервативный: группы, классы символов и необязательные атомы
+    разрывают литерал, а шаблоны с альтернативой или флагами (?...) не
+    сужаются вовсе. Лишний кандидат только замедляет поиск, пропущенный -
+    теряет совпадение, поэтому при сомнении литерал отбрасывается.
+
+    Args:
+        pattern: Шаблон grep
+
+    Returns:
+        Обязательные литералы (пустой список - сузить нельзя)
+    """
+    if '|' in pattern or '(?' in pattern:
+        return []
+
+    literals: List[str] = []
+    current: List[str] = []
+
+    def flush() -> None:
+        if current:
+            literals.append(''.join(current))
+            current.clear()
+
+    pos = 0
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char == '\\' and pos + 1 < len(pattern) and not pattern[pos + 1].isalnum():
+            literal: Optional[str] = pattern[pos + 1]
+            pos += 2
+        elif char == '\\':
+            literal = None  # \d, \w, \b, обратные ссылки
+            pos += 2
+        elif char == '[':
+            literal = None
+            pos = _skip_class(pattern, pos)
+        elif char == '(':
+            literal = None
+            pos = _skip_group(pattern, pos)
+        elif char in '.^$':
+            literal = None
+            pos += 1
+        else:
+            literal = char
+            pos += 1
+
+        pos, minimum = _skip_quantifier(pattern, pos)
+        if literal is None or minimum == 0:
+            flush()
+        elif minimum == 1:
+            current.append(literal)
+        else:
+            # "ab+c": обязательны "ab" и "bc"
+            current.append(literal)
+            flush()
+            current.append(literal)
+    flush()
+    return literals
+
+
+def _is_bytes_safe(pattern: str) -> bool:
+    """
+    Совпадает ли смысл ASCII-шаблона над байтами UTF-8 и над символами.
+
+    '.' и отрицательный класс [^...] в bytes-шаблоне поглощают один байт
+    многобайтного символа, а \\w, \\s, \\d и \\b знают только ASCII, поэтому
+    такие шаблоны проверяются на декодированных строках. Разбор
+    консервативный: точка внутри класса тоже отправляет шаблон
+    на декодированные строки.
+    """
+    if not pattern.isascii():
+        return False
+    pos = 0
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char == '\\':
+            if pattern[pos + 1:pos + 2] in UNICODE_ESCAPES:
+                return False
+            pos += 2
+            continue
+        if char == '.' or (char == '[' and pattern[pos + 1:pos + 2] == '^'):
+            return False
+        pos += 1
+    return True
+
+
+def compile_matcher(pattern: str, ignore_case: bool = False) -> Matcher:
+    """
+    Подготовка шаблона к поиску.
+
+    ASCII-шаблон без метасимволов и без игнорирования регистра ищется
+    побайтово через bytes.find. Остальные ASCII-шаблоны, в том числе с -i,
+    компилируются в bytes-регулярное выражение и ищутся по всему буферу
+    без декодирования; с -i регистр сравнивается только у ASCII-букв.
+    Не-ASCII шаблоны и шаблоны с '.', [^...], \\w, \\s, \\d, \\b проверяются
+    str-регулярным выражением на декодированных строках: так они работают
+    с не-ASCII текстом. Если в таком шаблоне есть обязательный литерал,
+    строки без него отсеиваются побайтово.
+
+    Args:
+        pattern: Шаблон для поиска
+        ignore_case: Игнорировать регистр
+
+    Returns:
+        Литерал bytes, bytes-регулярное выражение или TextMatcher
+    """
+    if (not ignore_case and pattern.isascii() and '\n' not in pattern
+            and not REGEX_METACHARACTERS & set(pattern)):
+        return pattern.encode('ascii')
+
+    flags = re.IGNORECASE if ignore_case else 0
+    if _is_bytes_safe(pattern):
+        try:
+            return re.compile(pattern.encode('ascii'), flags | re.MULTILINE)
+        except re.error:
+            pass  # например, флаг (?u) недопустим в bytes-шаблоне
+
+    regex = re.compile(pattern, flags)
+    literal = None
+    if not ignore_case:
+        literals = required_literals(pattern)
+        if literals:
+            literal = max(literals, key=len).encode('utf-8')
+    return TextMatcher(regex, literal)
+
+
+def line_matches(line: str, matcher: Matcher) -> bool:
+    """
+    Проверка одной строки (вход grep из конвейера).
+
+    Args:
+        line: Строка без перевода строки
+        matcher: Результат compile_matcher
+
+    Returns:
+        True если строка содержит совпадение
+    """
+    if isinstance(matcher, TextMatcher):
+        return matcher.regex.search(line) is not None
+    if isinstance(matcher, bytes):
+        return matcher.decode('ascii') in line
+    return matcher.search(line.encode('utf-8')) is not None
+
+
+def _count_newlines(buf: Union[bytes, mmap.mmap], start: int, end: int) -> int:
+    """
+    Подсчёт переводов строк в диапазоне буфера кусками фиксированного размера.
+
+    Args:
+        buf: Буфер файла
+        start: Начало диапазона
+        end: Конец диапазона
+
+    Returns:
+        Количество символов '\\n'
+    """
+    count = 0
+    while start < end:
+        stop = min(start + GREP_NEWLINE_COUNT_CHUNK, end)
+        count += buf[start:stop].count(b'\n')
+        start = stop
+    return count
+
+
+def iter_matching_lines(buf: Union[bytes, mmap.mmap],
+                        matcher: Matcher) -> Iterator[Tuple[int, int, int]]:
+    """
+    Поиск совпадений по всему буферу с вычислением строк только вокруг попаданий.
+
+    Литерал и bytes-регулярное выражение ищутся по всему буферу; совпадение
+    регулярного выражения, захватившее перевод строки, перепроверяется на
+    одной строке. Для TextMatcher декодируются только строки, содержащие
+    его обязательный литерал, а без литерала - все строки.
+
+    Args:
+        buf: Буфер файла
+        matcher: Результат compile_matcher
+
+    Yields:
+        Кортежи (номер строки, начало строки, конец строки)
+    """
+    size = len(buf)
+    pos = 0
+    line_num = 1
+    counted = 0
+    literal = matcher.literal if isinstance(matcher, TextMatcher) else None
+    if isinstance(matcher, bytes):
+        literal = matcher
+
+    while pos < size:
+        match_end = -1
+        if isinstance(matcher, (bytes, TextMatcher)):
+            hit = pos if literal is None else buf.find(literal, pos)
+            if hit < 0:
+                return
+        else:
+            found = matcher.search(buf, pos)
+            if found is None:
+                return
+            hit, match_end = found.span()
+
+        line_start = buf.rfind(b'\n', pos, hit) + 1
+        if line_start == 0:
+            line_start = pos
+        if line_start >= size:
+            return
+        line_end = buf.find(b'\n', hit)
+        if line_end < 0:
+            line_end = size
+
+        if isinstance(matcher, TextMatcher):
+            matched = matcher.regex.search(
+                buf[line_start:line_end].decode('utf-8', errors='ignore')) is not None
+        elif isinstance(matcher, bytes):
+            matched = True
+        else:
+            matched = (match_end <= line_end
+                       or matcher.search(buf[line_start:line_end]) is not None)
+        if matched:
+            line_num += _count_newlines(buf, counted, line_start)
+            counted = line_start
+            yield line_num, line_start, line_end
+
+        pos = line_end + 1
+
+
+def search_file(file_path: str, matcher: Matcher) -> Tuple[List[str], int]:
+    """
+    Поиск шаблона в одном файле.
+
+    Файл отображается в память целиком, текст декодируется только для строк
+    с совпадениями. Файлы с нулевыми байтами в начале считаются бинарными:
+    для них, как в GNU grep, выводится только "Binary file ... matches".
+    Функция уровня модуля, чтобы её можно было передать в пул процессов.
+
+    Args:
+        file_path: Путь к файлу
+        matcher: Результат compile_matcher
+
+    Returns:
+        Кортеж (строки вывода, размер файла в байтах)
+    """
+    lines: List[str] = []
+    size = 0
+    try:
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return lines, size
+
+            try:
+                buf: Union[bytes, mmap.mmap] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                buf = f.read()
+
+            try:
+                if b'\0' in buf[:GREP_BINARY_CHECK_SIZE]:
+                    for _ in iter_matching_lines(buf, matcher):
+                        lines.append(f"Binary file {file_path} matches")
+                        break
+                    return lines, size
+
+                for line_num, start, end in iter_matching_lines(buf, matcher):
+                    text = buf[start:end].decode('utf-8', errors='ignore')
+                    lines.append(f"{file_path}:{line_num}: {text.rstrip()}")
+            finally:
+                if isinstance(buf, mmap.mmap):
+                    buf.close()
+    except Exception:
+        pass
+    return lines, size
@@ -0,0 +1,246 @@
+"""Манифесты снимков для инкрементальных TAR-архивов."""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..constants import SNAPSHOT_HASH_CHUNK, SNAPSHOT_MANIFEST_SUFFIX, SNAPSHOT_MANIFEST_VERSION
+from .walker import Predicate, walk
+
+
+class FileState(NamedTuple):
+    """
+    Состояние файла или каталога в снимке.
+
+    Attributes:
+        size: Размер в байтах
+        mtime_ns: Время изменения в наносекундах
+        inode: Номер inode
+        is_dir: Каталог ли это
+        hash: SHA-256 содержимого (только с --hash, для каталогов None)
+    """
+
+    size: int
+    mtime_ns: int
+    inode: int
+    is_dir: bool = False
+    hash: Optional[str] = None
+
+
+class Manifest(NamedTuple):
+    """
+    Манифест архива: полное состояние дерева на момент архивации.
+
+    Attributes:
+        base: Путь к базовому архиву относительно каталога манифеста (None для полного)
+        entries: Состояние каждого пути (имена как в архиве)
+        deleted: Пути, удалённые со времени базового снимка
+    """
+
+    base: Optional[str]
+    entries: Dict[str, FileState]
+    deleted: List[str]
+
+    def save(self, path: str) -> None:
+        """
+        Атомарная запись манифеста.
+
+        Args:
+            path: Путь к файлу манифеста
+        """
+        data = {
+            'version': SNAPSHOT_MANIFEST_VERSION,
+            'base': self.base,
+            'entries': {name: list(state) for name, state in self.entries.items()},
+            'deleted': self.deleted,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'Manifest':
+        """
+        Чтение манифеста.
+
+        Args:
+            path: Путь к файлу манифеста
+
+        Returns:
+            Манифест
+
+        Raises:
+            ValueError: Файл отсутствует или имеет неизвестную версию
+        """
+        if not os.path.exists(path):
+            raise ValueError(f"Snapshot manifest not found: {path}")
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != SNAPSHOT_MANIFEST_VERSION:
+            raise ValueError(f"Unsupported snapshot manifest version: {path}")
+        entries = {name: FileState(*state) for name, state in data['entries'].items()}
+        return cls(data['base'], entries, data['deleted'])
+
+
+def manifest_path(archive_path: str) -> str:
+    """
+    Путь к манифесту, лежащему рядом с архивом.
+
+    Args:
+        archive_path: Путь к архиву
+
+    Returns:
+        Путь к манифесту
+    """
+    return archive_path + SNAPSHOT_MANIFEST_SUFFIX
+
+
+def file_hash(path: str) -> str:
+    """
+    SHA-256 содержимого файла с чтением блоками.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        Шестнадцатеричный дайджест
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(SNAPSHOT_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_state(folder_path: str, arcroot: str, use_hash: bool = False,
+               previous: Optional[Dict[str, FileState]] = None,
+               exclude: Optional[Predicate] = None) -> Dict[str, FileState]:
+    """
+    Снимок дерева: один stat на запись через walk(), ссылки не разыменовываются.
+
+    С use_hash хэшируются только файлы, чьи size/mtime/inode отличаются
+    от previous: для остальных хэш берётся из предыдущего снимка. Пути
+    идут в порядке обхода: каталог раньше своего содержимого.
+
+    Args:
+        folder_path: Файл или каталог для архивации
+        arcroot: Имя корня в архиве
+        use_hash: Вычислять ли SHA-256 файлов
+        previous: Состояние базового снимка
+        exclude: Условие исключения записи и её поддерева
+
+    Returns:
+        Словарь путь в архиве -> состояние
+    """
+    previous = previous or {}
+    states: Dict[str, FileState] = {}
+
+    def record(name: str, path: str, st: os.stat_result) -> None:
+        is_dir = stat.S_ISDIR(st.st_mode)
+        digest = None
+        if use_hash and stat.S_ISREG(st.st_mode):
+            old = previous.get(name)
+            if old and old.hash and (old.size, old.mtime_ns, old.inode) == (
+                    st.st_size, st.st_mtime_ns, st.st_ino):
+                digest = old.hash
+            else:
+                digest = file_hash(path)
+        size = 0 if is_dir else st.st_size
+        states[name] = FileState(size, st.st_mtime_ns, st.st_ino, is_dir, digest)
+
+    record(arcroot, folder_path, os.lstat(folder_path))
+    for item in walk(folder_path, exclude=exclude, prefetch_stat=True):
+        record(f"{arcroot}/{item.rel}".replace(os.sep, '/'), item.path, item.stat())
+    return states
+
+
+def diff_states(base: Dict[str, FileState], current: Dict[str, FileState],
+                use_hash: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Сравнение снимков.
+
+    Файл считается изменённым, если изменились размер, mtime или inode;
+    с use_hash файл с изменившимся stat, но прежним содержимым, не упаковывается.
+    Каталоги попадают в изменения только как новые.
+
+    Args:
+        base: Базовый снимок
+        current: Текущий снимок
+        use_hash: Сравнивать ли хэши содержимого
+
+    Returns:
+        Кортеж (изменённые и новые пути, удалённые пути), оба отсортированы
+    """
+    changed = []
+    for name, state in current.items():
+        old = base.get(name)
+        if old is None or old.is_dir != state.is_dir:
+            changed.append(name)
+        elif state.is_dir:
+            continue
+        elif use_hash and old.hash and state.hash:
+            if old.hash != state.hash:
+                changed.append(name)
+        elif (old.size, old.mtime_ns, old.inode) != (state.size, state.mtime_ns, state.inode):
+            changed.append(name)
+    deleted = [name for name in base if name not in current]
+    return sorted(changed), sorted(deleted)
+
+
+def resolve_chain(archive_path: str) -> List[str]:
+    """
+    Цепочка архивов от полного до указанного по ссылкам base в манифестах.
+
+    Args:
+        archive_path: Путь к последнему архиву цепочки
+
+    Returns:
+        Пути к архивам, начиная с полного
+
+    Raises:
+        ValueError: Нет манифеста или цепочка зациклена
+    """
+    chain = [os.path.abspath(archive_path)]
+    while True:
+        manifest = Manifest.load(manifest_path(chain[-1]))
+        if manifest.base is None:
+            break
+        base = os.path.abspath(os.path.join(os.path.dirname(chain[-1]), manifest.base))
+        if base in chain:
+            raise ValueError(f"Snapshot chain loops at {base}")
+        chain.append(base)
+    chain.reverse()
+    return chain
+
+
+def apply_deletions(deleted: List[str], target_dir: str) -> int:
+    """
+    Удаление путей, отмеченных в манифесте как удалённые.
+
+    Пути вне target_dir игнорируются, как и в фильтре 'data' для tarfile.
+
+    Args:
+        deleted: Пути в архиве
+        target_dir: Каталог распаковки
+
+    Returns:
+        Количество удалённых путей
+    """
+    root = os.path.abspath(target_dir)
+    removed = 0
+    for name in deleted:
+        path = os.path.abspath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root or path == root:
+            continue
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+        else:
+            continue
+        removed += 1
+    return removed
@@ -0,0 +1,310 @@
+"""Триграммный индекс содержимого файлов для grep -r (в духе Google Code Search)."""
+
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+from ..constants import (
+    GREP_BINARY_CHECK_SIZE,
+    INDEX_CHUNK_SIZE,
+    INDEX_FILE,
+    INDEX_MAX_FILE_SIZE,
+    INDEX_MAX_QUERY_TRIGRAMS,
+    INDEX_RACY_NS,
+    INDEX_VERSION,
+)
+from .search import required_literals
+from .walker import WalkEntry, walk
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, '
+    'size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, inode INTEGER, '
+    'indexed_ns INTEGER, complete INTEGER)',
+    'CREATE TABLE IF NOT EXISTS postings (trigram INTEGER NOT NULL, file_id INTEGER NOT NULL, '
+    'PRIMARY KEY (trigram, file_id)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id)',
+)
+
+
+class IndexedFile(NamedTuple):
+    """
+    Файл в индексе.
+
+    Attributes:
+        id: Идентификатор в таблице files
+        size: Размер на момент индексации
+        mtime_ns: Время изменения
+        ctime_ns: Время изменения метаданных
+        inode: Номер inode
+        indexed_ns: Время начала чтения файла
+        complete: Записаны ли триграммы (False для больших и бинарных файлов)
+    """
+
+    id: int
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    inode: int
+    indexed_ns: int
+    complete: bool
+
+
+class IndexStats(NamedTuple):
+    """
+    Итог обновления индекса.
+
+    Attributes:
+        files: Файлов в индексе
+        updated: Прочитано новых и изменённых файлов
+        removed: Удалено исчезнувших файлов
+    """
+
+    files: int
+    updated: int
+    removed: int
+
+
+def pattern_trigrams(pattern: str, ignore_case: bool = False) -> Set[int]:
+    """
+    Триграммы, которые обязан содержать файл с совпадением.
+
+    Триграммы в индексе хранятся в нижнем регистре только для ASCII-букв.
+    Поэтому с -i годятся лишь ASCII-литералы: другой регистр не-ASCII
+    литерала ("ПРИВЕТ" и "привет") даёт другие байты, и файл с совпадением
+    был бы пропущен.
+
+    Args:
+        pattern: Шаблон grep
+        ignore_case: Игнорируется ли регистр при поиске
+
+    Returns:
+        Множество триграмм (пустое - сузить нельзя)
+    """
+    trigrams: Set[int] = set()
+    for literal in required_literals(pattern):
+        if ignore_case and not literal.isascii():
+            continue
+        data = literal.encode('utf-8').lower()
+        trigrams.update((a << 16) | (b << 8) | c for a, b, c in zip(data, data[1:], data[2:]))
+    return trigrams
+
+
+def file_trigrams(path: str) -> Optional[Set[int]]:
+    """
+    Триграммы содержимого файла в нижнем регистре, чтение блоками.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        Множество триграмм или None для бинарного файла
+    """
+    found: Set[Tuple[int, int, int]] = set()
+    tail = b''
+    with open(path, 'rb') as f:
+        first = True
+        while True:
+            chunk = f.read(INDEX_CHUNK_SIZE)
+            if not chunk:
+                break
+            if first and b'\0' in chunk[:GREP_BINARY_CHECK_SIZE]:
+                return None
+            first = False
+            data = tail + chunk.lower()
+            found.update(zip(data, data[1:], data[2:]))
+            tail = data[-2:]
+    return {(a << 16) | (b << 8) | c for a, b, c in found}
+
+
+def is_fresh(record: IndexedFile, st: os.stat_result) -> bool:
+    """
+    Соответствует ли запись индекса текущему содержимому файла.
+
+    Кроме совпадения size/mtime/ctime/inode требуется, чтобы ctime был
+    раньше начала чтения хотя бы на INDEX_RACY_NS: иначе запись в файл
+    в том же такте часов файловой системы не изменила бы метки времени.
+
+    Args:
+        record: Запись индекса
+        st: Текущий stat файла
+
+    Returns:
+        True, если индексу можно доверять
+    """
+    return ((record.size, record.mtime_ns, record.ctime_ns, record.inode) ==
+            (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+            and record.ctime_ns < record.indexed_ns - INDEX_RACY_NS)
+
+
+class TrigramIndex:
+    """
+    Индекс триграмм содержимого файлов каталога в базе SQLite.
+
+    Для каждого файла хранятся stat на момент чтения и множество триграмм.
+    grep берёт из индекса файлы, содержащие все триграммы шаблона, и читает
+    только их; новые, изменённые и не проиндексированные целиком файлы
+    читаются всегда, поэтому устаревший индекс не теряет совпадений.
+    """
+
+    def __init__(self, root: str) -> None:
+        """
+        Открытие (или создание) индекса каталога.
+
+        Args:
+            root: Индексируемый каталог
+        """
+        self.root = os.path.abspath(root)
+        self.db_path = os.path.join(self.root, INDEX_FILE)
+        self.skipped = 0
+        self._db = sqlite3.connect(self.db_path)
+        if self._db.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+            self._db.executescript('DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS files;')
+            self._db.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    @staticmethod
+    def locate(path: str) -> Optional[str]:
+        """
+        Поиск индекса в каталоге или его родителях.
+
+        Args:
+            path: Каталог поиска
+
+        Returns:
+            Каталог с индексом или None
+        """
+        path = os.path.abspath(path)
+        while True:
+            if os.path.isfile(os.path.join(path, INDEX_FILE)):
+                return path
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    def _is_own_file(self, item: WalkEntry) -> bool:
+        """Файл самой базы (и её журнал) не индексируется и не ищется."""
+        return item.path.startswith(self.db_path)
+
+    def _records(self, prefix: str = '') -> Dict[str, IndexedFile]:
+        """
+        Записи индекса под относительным путём prefix.
+
+        Выборка по диапазону ключа: пути под 'a/b' лежат в ['a/b/', 'a/b0'),
+        так как '0' следует за '/' в ASCII.
+        """
+        query = 'SELECT path, id, size, mtime_ns, ctime_ns, inode, indexed_ns, complete FROM files'
+        params: Tuple[str, ...] = ()
+        if prefix:
+            query += ' WHERE path >= ? AND path < ?'
+            params = (prefix + os.sep, prefix + chr(ord(os.sep) + 1))
+        return {row[0]: IndexedFile(*row[1:]) for row in self._db.execute(query, params)}
+
+    def update(self) -> IndexStats:
+        """
+        Инкрементальное обновление: читаются только новые и изменённые файлы.
+
+        Returns:
+            Итог обновления
+        """
+        records = self._records()
+        seen: Set[str] = set()
+        updated = 0
+        with self._db:
+            for item in walk(self.root,
+                             include=lambda item: item.is_file() and not item.is_symlink(),
+                             exclude=self._is_own_file, dirs=False, prefetch_stat=True,
+                             onerror=lambda error: None):
+                seen.add(item.rel)
+                record = records.get(item.rel)
+                st = item.stat()
+                if record is not None and is_fresh(record, st):
+                    continue
+                self._index_file(item, st, record)
+                updated += 1
+
+            removed = [records[rel].id for rel in records.keys() - seen]
+            self._db.executemany('DELETE FROM postings WHERE file_id = ?', ((i,) for i in removed))
+            self._db.executemany('DELETE FROM files WHERE id = ?', ((i,) for i in removed))
+        return IndexStats(len(seen), updated, len(removed))
+
+    def _index_file(self, item: WalkEntry, st: os.stat_result,
+                    record: Optional[IndexedFile]) -> None:
+        """
+        Запись триграмм одного файла.
+
+        Время начала чтения берётся до открытия файла, stat - из обхода:
+        изменение во время чтения даст новый ctime, и запись не будет свежей.
+        """
+        indexed_ns = time.time_ns()
+        trigrams: Optional[Set[int]] = None
+        if st.st_size <= INDEX_MAX_FILE_SIZE:
+            try:
+                trigrams = file_trigrams(item.path)
+            except OSError:
+                trigrams = None
+
+        values = (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino, indexed_ns,
+                  trigrams is not None)
+        if record is None:
+            cursor = self._db.execute(
+                'INSERT INTO files (path, size, mtime_ns, ctime_ns, inode, indexed_ns, complete) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', (item.rel,) + values)
+            file_id = cursor.lastrowid
+        else:
+            file_id = record.id
+            self._db.execute('DELETE FROM postings WHERE file_id = ?', (file_id,))
+            self._db.execute(
+                'UPDATE files SET size = ?, mtime_ns = ?, ctime_ns = ?, inode = ?, '
+                'indexed_ns = ?, complete = ? WHERE id = ?', values + (file_id,))
+        if trigrams:
+            self._db.executemany('INSERT INTO postings (trigram, file_id) VALUES (?, ?)',
+                                 ((trigram, file_id) for trigram in trigrams))
+
+    def _matching(self, trigrams: Set[int]) -> Set[int]:
+        """Идентификаторы файлов, содержащих все триграммы."""
+        selected = sorted(trigrams)[:INDEX_MAX_QUERY_TRIGRAMS]
+        placeholders = ', '.join('?' * len(selected))
+        rows = self._db.execute(
+            f'SELECT file_id FROM postings WHERE trigram IN ({placeholders}) '
+            f'GROUP BY file_id HAVING COUNT(*) = ?', selected + [len(selected)])
+        return {row[0] for row in rows}
+
+    def candidates(self, root: str, pattern: str, ignore_case: bool = False) -> Iterator[str]:
+        """
+        Файлы под root, которые могут содержать совпадение с шаблоном.
+
+        Дерево обходится только по stat; файл пропускается, лишь если запись
+        индекса свежая, полная и не содержит всех триграмм шаблона. Число
+        пропущенных файлов накапливается в skipped.
+
+        Args:
+            root: Каталог поиска (сам индексируемый каталог или вложенный)
+            pattern: Шаблон grep
+            ignore_case: Игнорируется ли регистр при поиске
+
+        Yields:
+            Пути к файлам в порядке обхода
+        """
+        self.skipped = 0
+        trigrams = pattern_trigrams(pattern, ignore_case)
+        prefix = os.path.relpath(os.path.abspath(root), self.root)
+        prefix = '' if prefix == os.curdir else prefix
+        records = self._records(prefix) if trigrams else {}
+        matching = self._matching(trigrams) if trigrams else set()
+
+        for item in walk(root, include=lambda item: item.is_file(), exclude=self._is_own_file,
+                         dirs=False, prefetch_stat=True, onerror=lambda error: None):
+            record = records.get(os.path.join(prefix, item.rel) if prefix else item.rel)
+            if (record is not None and record.complete and record.id not in matching
+                    and not item.is_symlink() and is_fresh(record, item.stat())):
+                self.skipped += 1
+                continue
+            yield item.path
+
+    def close(self) -> None:
+        """Закрытие базы."""
+        self._db.close()
@@ -0,0 +1,186 @@
+"""Общий обход деревьев каталогов для рекурсивных команд (grep -r, cp -r, zip, tar, rm)."""
+
+import os
+import stat
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, FrozenSet, Iterator, List, Optional, Tuple
+
+from ..constants import WALK_WORKERS
+
+
+class WalkEntry:
+    """
+    Запись дерева, найденная обходом.
+
+    Оборачивает os.DirEntry: тип записи и stat берутся из кэша DirEntry,
+    поэтому на запись выполняется не более одного системного вызова stat.
+
+    Attributes:
+        path: Полный путь
+        rel: Путь относительно корня обхода
+        name: Имя записи
+        depth: Глубина (1 - записи самого корня)
+    """
+
+    __slots__ = ('path', 'rel', 'name', 'depth', '_entry', '_follow')
+
+    def __init__(self, entry: 'os.DirEntry[str]', rel: str, depth: int,
+                 follow_symlinks: bool) -> None:
+        """
+        Инициализация.
+
+        Args:
+            entry: Запись os.scandir
+            rel: Путь относительно корня обхода
+            depth: Глубина
+            follow_symlinks: Разыменовывать ли ссылки в is_dir и stat
+        """
+        self.path = entry.path
+        self.rel = rel
+        self.name = entry.name
+        self.depth = depth
+        self._entry = entry
+        self._follow = follow_symlinks
+
+    def is_dir(self) -> bool:
+        """Каталог ли это (ссылка - только если обход идёт по ссылкам)."""
+        return self._entry.is_dir(follow_symlinks=self._follow)
+
+    def is_file(self) -> bool:
+        """Обычный ли это файл; ссылка на файл тоже считается файлом."""
+        return self._entry.is_file()
+
+    def is_symlink(self) -> bool:
+        """Символическая ли это ссылка."""
+        return self._entry.is_symlink()
+
+    def stat(self) -> os.stat_result:
+        """stat записи (кэшируется в DirEntry)."""
+        return self._entry.stat(follow_symlinks=self._follow)
+
+
+# Условие отбора записей обхода
+Predicate = Callable[[WalkEntry], bool]
+
+# (st_dev, st_ino) каталога и его предков до корня обхода
+Ancestors = FrozenSet[Tuple[int, int]]
+
+
+def _scan_dir(path: str, rel: str, depth: int, follow_symlinks: bool,
+              prefetch_stat: bool) -> List[WalkEntry]:
+    """
+    Чтение одного каталога (выполняется в рабочем потоке).
+
+    Для каталогов stat запрашивается всегда (нужен для обнаружения петель),
+    для остальных записей - только с prefetch_stat. Ошибки stat здесь
+    игнорируются: они повторятся, когда запись запросит stat сама.
+
+    Returns:
+        Записи каталога в порядке имён
+    """
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    items = []
+    for entry in entries:
+        item = WalkEntry(entry, os.path.join(rel, entry.name) if rel else entry.name,
+                         depth, follow_symlinks)
+        if prefetch_stat or item.is_dir():
+            try:
+                item.stat()
+            except OSError:
+                pass
+        items.append(item)
+    return items
+
+
+def walk(root: str, include: Optional[Predicate] = None, exclude: Optional[Predicate] = None,
+         follow_symlinks: bool = False, dirs: bool = True, prefetch_stat: bool = False,
+         workers: int = WALK_WORKERS,
+         onerror: Optional[Callable[[OSError], None]] = None) -> Iterator[WalkEntry]:
+    """
+    Итеративный обход дерева через os.scandir.
+
+    Каталоги читаются пулом потоков (не более 2 * workers одновременно),
+    результаты выдаются в порядке постановки в очередь: записи каталога -
+    по именам, каталог - раньше своего содержимого. Рекурсии нет, в памяти
+    хранятся только ещё не прочитанные каталоги и идентификаторы их предков.
+
+    exclude проверяется для каждой записи во время спуска: исключённый
+    каталог не читается. include отбирает только файлы. Каталог, чей
+    (st_dev, st_ino) совпадает с одним из его предков (петля ссылок),
+    пропускается; каталог, доступный по нескольким путям без петли
+    (например, по ссылке на соседний каталог), обходится по каждому из них.
+    Сам корень не выдаётся; если корень не каталог, обход пуст.
+
+    Args:
+        root: Корень обхода
+        include: Условие для файлов (None - все)
+        exclude: Условие исключения записи и её поддерева
+        follow_symlinks: Заходить ли в каталоги по символическим ссылкам
+        dirs: Выдавать ли записи каталогов
+        prefetch_stat: Запрашивать stat всех записей в рабочих потоках
+        workers: Количество потоков чтения каталогов (1 - без пула)
+        onerror: Обработчик ошибок чтения каталога (None - исключение)
+
+    Yields:
+        Записи дерева
+
+    Raises:
+        OSError: Ошибка чтения каталога, если не задан onerror
+    """
+    root_stat = os.stat(root) if follow_symlinks else os.lstat(root)
+    if not stat.S_ISDIR(root_stat.st_mode):
+        return
+
+    root_ancestors: Ancestors = frozenset([(root_stat.st_dev, root_stat.st_ino)])
+    pending: List[Tuple[str, str, int, Ancestors]] = [(root, '', 1, root_ancestors)]
+    running: Deque[Tuple[Future, Ancestors]] = deque()
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        while pending or running:
+            try:
+                if executor is None:
+                    path, rel, depth, ancestors = pending.pop()
+                    items = _scan_dir(path, rel, depth, follow_symlinks, prefetch_stat)
+                else:
+                    while pending and len(running) < 2 * workers:
+                        path, rel, depth, dir_ancestors = pending.pop()
+                        running.append((executor.submit(_scan_dir, path, rel, depth,
+                                                        follow_symlinks, prefetch_stat),
+                                        dir_ancestors))
+                    future, ancestors = running.popleft()
+                    items = future.result()
+            except OSError as e:
+                if onerror is None:
+                    raise
+                onerror(e)
+                continue
+
+            subdirs = []
+            for item in items:
+                if exclude is not None and exclude(item):
+                    continue
+                if item.is_dir():
+                    try:
+                        item_stat = item.stat()
+                    except OSError as e:
+                        if onerror is None:
+                            raise
+                        onerror(e)
+                        continue
+                    key = (item_stat.st_dev, item_stat.st_ino)
+                    if key in ancestors:
+                        continue
+                    subdirs.append((item.path, item.rel, item.depth + 1, ancestors | {key}))
+                    if dirs:
+                        yield item
+                elif include is None or include(item):
+                    yield item
+            pending.extend(reversed(subdirs))
+    finally:
+        for future, _ in running:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=True)
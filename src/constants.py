@@ -1,17 +1,122 @@
 """Константы для shell-эмулятора."""
 
+import os
+
 # Файлы системы
 LOG_FILE: str = 'shell.log'
 HISTORY_FILE: str = '.history'
+UNDO_FILE: str = '.undo'
 TRASH_DIR: str = '.trash'
 
+# Корзина: индекс удалённых объектов и каталог с их данными
+TRASH_INDEX_FILE: str = 'index.jsonl'
+TRASH_ITEMS_DIR: str = 'items'
+TRASH_ROOTS_FILE: str = 'roots'
+TRASH_HASH_CHUNK: int = 1024 * 1024
+TRASH_COMPACT_SLACK: int = 256
+
 # Ограничения
 MAX_HISTORY_SIZE: int = 100
 
+MAX_UNDO_SIZE: int = 100
+
+# Журналы истории и undo: сжатие при превышении порога записей
+HISTORY_COMPACT_THRESHOLD: int = 4 * MAX_HISTORY_SIZE
+UNDO_COMPACT_THRESHOLD: int = 4 * MAX_UNDO_SIZE
+JOURNAL_READ_BLOCK: int = 8 * 1024
+
+# Кэш метаданных файловой системы (stat и списки каталогов)
+FS_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+FS_CACHE_TTL: float = 1.0
+FS_CACHE_MAX_WATCHES: int = 2048
+FS_CACHE_EVENT_BUFFER: int = 64 * 1024
+
+# Размер LRU-кэша разобранных командных строк
+PARSE_CACHE_SIZE: int = 256
+
+# Обход деревьев каталогов (grep -r, cp -r, zip, tar, rm)
+WALK_WORKERS: int = min(16, (os.cpu_count() or 1) + 4)
+
+# Параллельный поиск (grep -r)
+GREP_WORKERS: int = min(32, (os.cpu_count() or 1) + 4)
+GREP_QUEUE_SIZE: int = 256
+GREP_POOL_KIND: str = 'thread'
+GREP_BINARY_CHECK_SIZE: int = 32 * 1024
+GREP_NEWLINE_COUNT_CHUNK: int = 1024 * 1024
+
+# Потоковый вывод (cat)
+CAT_CHUNK_SIZE: int = 256 * 1024
+
+# Конвейеры команд ('|'): размер буфера чтения строк и число строк head по умолчанию
+PIPE_BUFFER_SIZE: int = 64 * 1024
+HEAD_DEFAULT_LINES: int = 10
+
+# Перенаправление вывода в файл ('>', '>>', '2>'): размер буфера записи
+REDIRECT_BUFFER_SIZE: int = 1024 * 1024
+
+# Ключи сортировки ls
+LS_SORT_KEYS: tuple = ('name', 'size', 'mtime')
+LS_DEFAULT_SORT: str = 'name'
+
+# Триграммный индекс содержимого для grep -r (команда index)
+INDEX_FILE: str = '.trigram-index.db'
+INDEX_VERSION: int = 1
+INDEX_CHUNK_SIZE: int = 1024 * 1024
+INDEX_MAX_FILE_SIZE: int = 64 * 1024 * 1024
+INDEX_RACY_NS: int = 2 * 10 ** 9
+INDEX_MAX_QUERY_TRIGRAMS: int = 64
+
+# Параллельное копирование (cp -r)
+CP_WORKERS: int = min(32, (os.cpu_count() or 1) + 4)
+CP_BUFFER_SIZE: int = 1024 * 1024
+CP_QUEUE_SIZE: int = 256
+CP_PROGRESS_INTERVAL: float = 0.2
+
+# Параллельное сжатие (zip, tar)
+ARCHIVE_WORKERS: int = os.cpu_count() or 1
+ARCHIVE_MAX_PARALLEL_MEMBER: int = 16 * 1024 * 1024
+COMPRESS_BLOCK_SIZE: int = 1024 * 1024
+
+# Параллельная распаковка (unzip)
+UNZIP_WORKERS: int = min(32, (os.cpu_count() or 1) + 4)
+UNZIP_BUFFER_SIZE: int = 1024 * 1024
+
+# Манифесты снимков инкрементальных tar-архивов
+SNAPSHOT_MANIFEST_SUFFIX: str = '.manifest.json'
+SNAPSHOT_MANIFEST_VERSION: int = 1
+SNAPSHOT_HASH_CHUNK: int = 1024 * 1024
+
+# Кодеки архивов и уже сжатые форматы, которые сохраняются без сжатия
+ARCHIVE_CODECS: tuple = ('stored', 'deflate', 'bzip2', 'lzma', 'xz')
+ARCHIVE_DEFAULT_CODEC: str = 'deflate'
+COMPRESSED_EXTENSIONS: frozenset = frozenset({
+    '.gz', '.tgz', '.bz2', '.xz', '.txz', '.lz', '.lzma', '.zst', '.zip', '.7z', '.rar',
+    '.jar', '.whl', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp3', '.mp4', '.mkv',
+    '.avi', '.mov', '.ogg', '.flac', '.docx', '.xlsx', '.pptx',
+})
+
+# Метрики команд: сколько измерений хранить и какие перцентили показывать
+METRICS_MAX_SAMPLES: int = 10000
+METRICS_PERCENTILES: tuple = (50, 95, 99)
+
 # Форматы логов
 LOG_FORMAT: str = '[%(asctime)s] %(message)s'
 LOG_DATE_FORMAT: str = '%Y-%m-%d %H:%M:%S'
 
+# Асинхронное логирование: ограниченная очередь и политика при переполнении
+LOG_ASYNC: bool = True
+LOG_QUEUE_SIZE: int = 10000
+LOG_OVERFLOW_POLICIES: tuple = ('block', 'drop')
+LOG_OVERFLOW_POLICY: str = 'block'
+
+# Стиль лога ('text' - строки, 'json' - JSON-запись на команду) и ротация
+LOG_STYLES: tuple = ('text', 'json')
+LOG_STYLE: str = 'text'
+LOG_MAX_BYTES: int = 10 * 1024 * 1024
+LOG_ROTATE_INTERVAL: float = 0
+LOG_BACKUP_COUNT: int = 5
+LOG_COMPRESS_ROTATED: bool = True
+
 # Сообщения об ошибках
 ERROR_PATH_NOT_FOUND: str = "Path not found"
 ERROR_NOT_A_DIRECTORY: str = "Not a directory"
@@ -20,6 +125,13 @@ ERROR_SOURCE_NOT_FOUND: str = "Source not found"
 ERROR_USE_RECURSIVE: str = "Use -r option to copy/remove directories"
 ERROR_CANNOT_REMOVE_ROOT: str = "Cannot remove root or parent directory"
 ERROR_UNKNOWN_COMMAND: str = "Unknown command"
+ERROR_NO_MEMBERS_MATCH: str = "No archive members match"
+ERROR_TRASH_ENTRY_NOT_FOUND: str = "No such trash entry"
+ERROR_INDEX_NOT_FOUND: str = "No index in directory"
+ERROR_NOT_PIPEABLE: str = "Command cannot be used in a pipeline"
+ERROR_EMPTY_PIPELINE_STAGE: str = "Empty command in pipeline"
+ERROR_REDIRECT_TARGET: str = "Missing file name after"
+ERROR_REDIRECT_NOT_LAST: str = "Output redirection is only allowed in the last pipeline stage"
 
 # Сообщения об успехе
 SUCCESS_COPIED: str = "Copied"
@@ -0,0 +1,414 @@
+"""Кэш метаданных файловой системы с инвалидацией через inotify."""
+
+import ctypes
+import ctypes.util
+import os
+import stat
+import struct
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, cast
+
+from .constants import FS_CACHE_EVENT_BUFFER, FS_CACHE_MAX_BYTES, FS_CACHE_MAX_WATCHES, FS_CACHE_TTL
+
+# Флаги inotify из <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+# Записи каталога: имя и stat (с разыменованием ссылок)
+StatListing = List[Tuple[str, os.stat_result]]
+
+# Ключ записи кэша: (вид записи, путь)
+CacheKey = Tuple[str, str]
+
+
+class Inotify:
+    """Минимальная обёртка над inotify(7) через ctypes."""
+
+    def __init__(self) -> None:
+        """
+        Создание неблокирующего дескриптора inotify.
+
+        Raises:
+            OSError: inotify недоступен (не Linux, исчерпан лимит экземпляров)
+        """
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd: int = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        # Дескриптор закрывается и без close, когда объект собран сборщиком мусора
+        self._finalizer = weakref.finalize(self, os.close, self.fd)
+
+    def add_watch(self, path: str) -> int:
+        """
+        Наблюдение за каталогом.
+
+        Args:
+            path: Путь к каталогу
+
+        Returns:
+            Дескриптор наблюдения
+
+        Raises:
+            OSError: Каталог не существует или исчерпан лимит наблюдений
+        """
+        wd = int(self._add_watch(self.fd, os.fsencode(path), WATCH_MASK))
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        """Снятие наблюдения (ошибки игнорируются: каталог мог исчезнуть)."""
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """
+        Неблокирующее чтение накопившихся событий.
+
+        Returns:
+            Список (дескриптор наблюдения, маска, имя записи или '')
+        """
+        events: List[Tuple[int, int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, FS_CACHE_EVENT_BUFFER)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self) -> None:
+        """Закрытие дескриптора (повторный вызов ничего не делает)."""
+        self._finalizer()
+
+
+class FsCache:
+    """
+    LRU-кэш stat и списков каталогов с ограничением по памяти.
+
+    Запись действительна FS_CACHE_TTL секунд, если раньше inotify не
+    сообщил об изменении каталога, в котором она лежит; перед каждым
+    обращением очередь событий вычитывается одним неблокирующим read.
+    Срок жизни действует и с inotify: переименование или удаление предка
+    наблюдаемого каталога событий в нём не порождает. Без inotify и при
+    исчерпании лимита наблюдений остаётся только срок жизни. Команды,
+    меняющие файловую систему, дополнительно вызывают invalidate().
+
+    Символические ссылки не кэшируются: изменение цели ссылки не порождает
+    событий в каталоге самой ссылки.
+    """
+
+    def __init__(self, max_bytes: int = FS_CACHE_MAX_BYTES, ttl: float = FS_CACHE_TTL,
+                 use_inotify: bool = True) -> None:
+        """
+        Инициализация.
+
+        Args:
+            max_bytes: Ограничение оценки занимаемой памяти
+            ttl: Время жизни записей в секундах
+            use_inotify: Использовать ли inotify
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[CacheKey, Tuple[object, float, int]]' = OrderedDict()
+        self._bytes = 0
+        self._watches: Dict[str, int] = {}
+        self._watch_paths: Dict[int, str] = {}
+        self._inotify: Optional[Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+    @property
+    def size(self) -> int:
+        """Оценка занимаемой памяти в байтах."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        """Количество записей."""
+        return len(self._entries)
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        """
+        stat с разыменованием ссылок.
+
+        Args:
+            path: Абсолютный путь
+
+        Returns:
+            Результат stat или None, если путь не существует
+        """
+        key = ('stat', path)
+        found, value = self._get(key)
+        if found:
+            return value  # type: ignore[return-value]
+
+        # Наблюдение ставится до stat: изменение между ними не потеряется
+        cacheable = self._watch([os.path.dirname(path)])
+        try:
+            st = os.lstat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            if cacheable:
+                self._store(key, None, len(path))
+            return None
+        except OSError:
+            return None
+
+        if stat.S_ISLNK(st.st_mode):
+            try:
+                return os.stat(path)
+            except OSError:
+                return None
+        if stat.S_ISDIR(st.st_mode) and cacheable:
+            # mtime каталога меняется при изменении его содержимого
+            cacheable = self._watch([path])
+            try:
+                st = os.lstat(path)
+            except OSError:
+                return None
+        if cacheable:
+            self._store(key, st, len(path))
+        return st
+
+    def exists(self, path: str) -> bool:
+        """Аналог os.path.exists."""
+        return self.stat(path) is not None
+
+    def isdir(self, path: str) -> bool:
+        """Аналог os.path.isdir."""
+        st = self.stat(path)
+        return st is not None and stat.S_ISDIR(st.st_mode)
+
+    def isfile(self, path: str) -> bool:
+        """Аналог os.path.isfile."""
+        st = self.stat(path)
+        return st is not None and stat.S_ISREG(st.st_mode)
+
+    def listdir(self, path: str) -> List[str]:
+        """
+        Имена записей каталога.
+
+        Args:
+            path: Абсолютный путь к каталогу
+
+        Returns:
+            Новый список имён в порядке os.listdir
+
+        Raises:
+            OSError: Ошибка чтения каталога
+        """
+        key = ('list', path)
+        found, value = self._get(key)
+        if found:
+            return list(cast(List[str], value))
+
+        cacheable = self._watch([path])
+        names = os.listdir(path)
+        if cacheable:
+            self._store(key, list(names), len(path) + sum(len(n) + 50 for n in names))
+        return names
+
+    def listdir_stat(self, path: str) -> StatListing:
+        """
+        Записи каталога со stat одним проходом os.scandir.
+
+        Для висячей ссылки берётся stat самой ссылки; записи, stat которых
+        не удался (удалены во время чтения), пропускаются.
+
+        Args:
+            path: Абсолютный путь к каталогу
+
+        Returns:
+            Новый список пар (имя, stat) в порядке scandir
+
+        Raises:
+            OSError: Ошибка чтения каталога
+        """
+        key = ('list+stat', path)
+        found, value = self._get(key)
+        if found:
+            return list(cast(StatListing, value))
+
+        cacheable = self._watch([path])
+        subdirs = []
+        listing: StatListing = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    try:
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                listing.append((entry.name, entry_stat))
+                if entry.is_symlink():
+                    cacheable = False
+                elif entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+
+        if cacheable and subdirs:
+            # mtime подкаталогов меняется при изменении их содержимого
+            cacheable = self._watch(subdirs)
+        if cacheable:
+            size = len(path) + sum(len(name) + 150 for name, _ in listing)
+            self._store(key, list(listing), size)
+        return listing
+
+    def invalidate(self, path: str, recursive: bool = False) -> None:
+        """
+        Сброс записей после изменения пути.
+
+        Сбрасываются stat и список самого пути, stat и список родителя
+        (меняются его содержимое и mtime) и список каталога над родителем.
+
+        Args:
+            path: Изменённый путь
+            recursive: Сбросить также всё, что лежит под path
+        """
+        parent = os.path.dirname(path)
+        for target in (path, parent):
+            for kind in ('stat', 'list', 'list+stat'):
+                self._drop((kind, target))
+        self._drop(('list+stat', os.path.dirname(parent)))
+        if recursive:
+            prefix = path.rstrip(os.sep) + os.sep
+            for key in [key for key in self._entries if key[1].startswith(prefix)]:
+                self._drop(key)
+            for watched in [p for p in self._watches if p == path or p.startswith(prefix)]:
+                self._unwatch(watched)
+
+    def poll(self) -> None:
+        """Применение накопившихся событий inotify."""
+        if self._inotify is None:
+            return
+        for wd, mask, name in self._inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                self.clear()
+                continue
+            directory = self._watch_paths.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(directory, None)
+                self._watch_paths.pop(wd, None)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                self.invalidate(directory, recursive=True)
+                continue
+            target = os.path.join(directory, name) if name else directory
+            moved_dir = mask & IN_ISDIR and mask & (IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE)
+            self.invalidate(target, recursive=bool(moved_dir))
+
+    def clear(self) -> None:
+        """Очистка кэша и снятие наблюдений."""
+        self._entries.clear()
+        self._bytes = 0
+        for path in list(self._watches):
+            self._unwatch(path)
+
+    def close(self) -> None:
+        """Освобождение дескриптора inotify."""
+        self.clear()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _get(self, key: CacheKey) -> Tuple[bool, object]:
+        """Поиск записи с учётом событий и срока жизни."""
+        self.poll()
+        item = self._entries.get(key)
+        if item is not None:
+            value, expires, _ = item
+            if time.monotonic() < expires:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            self._drop(key)
+        self.misses += 1
+        return False, None
+
+    def _watch(self, directories: List[str]) -> bool:
+        """
+        Постановка каталогов под наблюдение.
+
+        Без inotify и при исчерпании лимита наблюдений каталоги не
+        наблюдаются, и запись живёт только до истечения ttl.
+
+        Returns:
+            Можно ли кэшировать запись: False, если каталог наблюдать
+            нельзя (не существует)
+        """
+        if self._inotify is None:
+            return True
+        for directory in directories:
+            if directory in self._watches or len(self._watches) >= FS_CACHE_MAX_WATCHES:
+                continue
+            try:
+                wd = self._inotify.add_watch(directory)
+            except OSError:
+                return False
+            self._watches[directory] = wd
+            self._watch_paths[wd] = directory
+        return True
+
+    def _store(self, key: CacheKey, value: object, size: int) -> None:
+        """Добавление записи сроком на ttl с вытеснением самых старых при превышении max_bytes."""
+        size += 200
+        if size > self.max_bytes // 4:
+            return
+        self._drop(key)
+        self._entries[key] = (value, time.monotonic() + self.ttl, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def _drop(self, key: CacheKey) -> None:
+        """Удаление записи, если она есть."""
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def _unwatch(self, path: str) -> None:
+        """Снятие наблюдения с каталога."""
+        wd = self._watches.pop(path, None)
+        if wd is not None:
+            self._watch_paths.pop(wd, None)
+            if self._inotify is not None:
+                self._inotify.rm_watch(wd)
@@ -0,0 +1,153 @@
+"""Модуль журнала с дозаписью для истории команд."""
+
+import os
+from typing import Iterable, Iterator, List, Optional
+
+from .constants import JOURNAL_READ_BLOCK
+
+
+class AppendJournal:
+    """
+    Текстовый журнал, в который записи только дописываются.
+
+    Каждая запись - одна строка, добавляемая одним системным вызовом write.
+    Файл перезаписывается целиком только при явном сжатии (rewrite).
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Инициализация журнала.
+
+        Args:
+            path: Путь к файлу журнала; относительный путь фиксируется
+                относительно текущей директории, чтобы сжатие после cd
+                перезаписывало тот же файл
+        """
+        self.path = os.path.abspath(path)
+        self.records: int = 0
+        self._fd: Optional[int] = None
+        self._batch: Optional[List[str]] = None
+
+    def append(self, record: str) -> None:
+        """
+        Дозапись одной записи в конец журнала.
+
+        Args:
+            record: Текст записи без перевода строки
+        """
+        line = record.replace('\n', ' ') + '\n'
+        self.records += 1
+        if self._batch is not None:
+            self._batch.append(line)
+            return
+        self._write(line)
+
+    def begin_batch(self) -> None:
+        """Начало пакетного режима: записи копятся в памяти до flush."""
+        if self._batch is None:
+            self._batch = []
+
+    def flush(self) -> None:
+        """Запись накопленных в пакетном режиме записей одним вызовом write."""
+        if self._batch:
+            self._write(''.join(self._batch))
+        self._batch = None
+
+    def _write(self, data: str) -> None:
+        """
+        Дозапись данных в файл одним системным вызовом.
+
+        Args:
+            data: Одна или несколько строк с переводами строк
+        """
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        view = memoryview(data.encode('utf-8'))
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    def iter_reverse(self) -> Iterator[str]:
+        """
+        Чтение записей с конца файла блоками фиксированного размера.
+
+        Вызывающий код прекращает итерацию, когда прочитал достаточно,
+        поэтому начало длинного журнала не читается.
+
+        Yields:
+            Записи от последней к первой
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0:
+                step = min(JOURNAL_READ_BLOCK, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + tail).split(b'\n')
+                tail = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        yield line.decode('utf-8', errors='replace')
+            if tail:
+                yield tail.decode('utf-8', errors='replace')
+
+    def iter_forward(self) -> Iterator[str]:
+        """
+        Чтение всех записей от первой к последней.
+
+        Yields:
+            Записи в порядке добавления
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if line:
+                    yield line
+
+    def count(self) -> int:
+        """
+        Подсчёт записей в файле без их декодирования.
+
+        Returns:
+            Количество непустых строк журнала
+        """
+        if not os.path.exists(self.path):
+            return 0
+
+        with open(self.path, 'rb') as f:
+            return sum(1 for line in f if line != b'\n')
+
+    def rewrite(self, records: Iterable[str]) -> None:
+        """
+        Атомарная перезапись журнала (сжатие).
+
+        Args:
+            records: Записи, которые должны остаться в журнале
+        """
+        # Записи незавершённого пакета уже входят в переданные records
+        if self._batch is not None:
+            self._batch = []
+        self.close()
+        tmp_path = f"{self.path}.tmp"
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(record.replace('\n', ' ') + '\n')
+                count += 1
+        os.replace(tmp_path, self.path)
+        self.records = count
+
+    def close(self) -> None:
+        """Запись накопленного пакета и закрытие дескриптора журнала."""
+        if self._batch:
+            self._write(''.join(self._batch))
+            self._batch = []
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
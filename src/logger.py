@@ -1,34 +1,423 @@
 """Модуль для логирования команд shell-эмулятора."""
 
+import atexit
+import gzip
+import io
+import json
 import logging
+import os
+import queue
+import shutil
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
 
-from .constants import LOG_FILE, LOG_FORMAT, LOG_DATE_FORMAT
+from .constants import (
+    LOG_ASYNC,
+    LOG_BACKUP_COUNT,
+    LOG_COMPRESS_ROTATED,
+    LOG_DATE_FORMAT,
+    LOG_FILE,
+    LOG_FORMAT,
+    LOG_MAX_BYTES,
+    LOG_OVERFLOW_POLICIES,
+    LOG_OVERFLOW_POLICY,
+    LOG_QUEUE_SIZE,
+    LOG_ROTATE_INTERVAL,
+    LOG_STYLE,
+    LOG_STYLES,
+)
+
+# Очередь записей между командами и фоновым потоком записи
+LogQueue = queue.Queue[logging.LogRecord]
+
+
+def rotated_path(log_file: str, index: int, compress: bool) -> str:
+    """
+    Имя ротированного сегмента лога: shell.log.1, shell.log.2.gz и т.д.
+
+    Args:
+        log_file: Путь к текущему файлу лога
+        index: Номер сегмента (1 - самый новый)
+        compress: Сжат ли сегмент gzip
+
+    Returns:
+        Путь к сегменту
+    """
+    return f"{log_file}.{index}{'.gz' if compress else ''}"
+
+
+@dataclass
+class Operation:
+    """
+    Выполняемая команда для структурированного лога.
+
+    Attributes:
+        cwd: Текущая директория на момент запуска
+        command: Имя команды (None, если строку не удалось разобрать)
+        args: Позиционные аргументы
+        started_at: Время запуска (Unix time)
+        started: Отметка time.perf_counter() для измерения длительности
+        bytes_processed: Объём данных, прочитанных или записанных командой
+        error: Последняя ошибка команды
+    """
+
+    cwd: str
+    command: Optional[str] = None
+    args: List[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    started: float = field(default_factory=time.perf_counter)
+    bytes_processed: int = 0
+    error: Optional[str] = None
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        Поля записи JSON-лога.
+
+        Returns:
+            Словарь time, command, args, cwd, status, duration_ms, bytes_processed, error
+        """
+        return {
+            'time': datetime.fromtimestamp(self.started_at).astimezone().isoformat(
+                timespec='milliseconds'),
+            'command': self.command,
+            'args': self.args,
+            'cwd': self.cwd,
+            'status': 'error' if self.error else 'ok',
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'bytes_processed': self.bytes_processed,
+            'error': self.error,
+        }
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Форматирование записей лога в одну строку JSON.
+
+    Запись операции (атрибут operation) выводится со всеми полями,
+    прочие записи - как {"time", "status", "error"/"message"}.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Строка JSON для записи.
+
+        Args:
+            record: Запись лога
+
+        Returns:
+            JSON без перевода строки
+        """
+        data = getattr(record, 'operation', None)
+        if data is None:
+            status = 'error' if record.levelno >= logging.ERROR else 'ok'
+            data = {
+                'time': datetime.fromtimestamp(record.created).astimezone().isoformat(
+                    timespec='milliseconds'),
+                'status': status,
+                'error' if status == 'error' else 'message': record.getMessage(),
+            }
+        return json.dumps(data, ensure_ascii=False)
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    Файловый обработчик с ротацией по размеру или времени.
+
+    В асинхронном режиме буфер не сбрасывается после каждой записи:
+    это делает BatchingQueueListener, когда очередь опустела, или close.
+    Ротированные сегменты сдвигаются (shell.log.1 -> shell.log.2) и
+    при compress сжимаются gzip.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES,
+                 rotate_interval: float = LOG_ROTATE_INTERVAL,
+                 backup_count: int = LOG_BACKUP_COUNT, compress: bool = LOG_COMPRESS_ROTATED,
+                 flush_each: bool = False) -> None:
+        """
+        Инициализация.
+
+        Args:
+            filename: Путь к файлу лога
+            max_bytes: Размер файла, после которого он ротируется (0 - без ограничения)
+            rotate_interval: Период ротации в секундах (0 - без ротации по времени)
+            backup_count: Сколько ротированных сегментов хранить
+            compress: Сжимать ли ротированные сегменты gzip
+            flush_each: Сбрасывать ли буфер после каждой записи (синхронный режим)
+        """
+        super().__init__(filename, encoding='utf-8', delay=True)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.flush_each = flush_each
+        self._size = 0
+        self._rollover_at = 0.0
+
+    def _open(self) -> io.TextIOWrapper:
+        """Открытие файла с запоминанием его размера и времени следующей ротации."""
+        stream = super()._open()
+        self._size = stream.tell()
+        if self.rotate_interval:
+            started = os.path.getmtime(self.baseFilename) if self._size else time.time()
+            self._rollover_at = started + self.rotate_interval
+        return stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Запись отформатированной строки в буфер файла.
+
+        Args:
+            record: Запись лога
+        """
+        try:
+            line = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            size = len(line.encode('utf-8'))
+            if self._size and ((self.max_bytes and self._size + size > self.max_bytes)
+                               or (self.rotate_interval and time.time() >= self._rollover_at)):
+                self.rotate()
+                self.stream = self._open()
+            self.stream.write(line)
+            self._size += size
+            if self.flush_each:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def rotate(self) -> None:
+        """Закрытие текущего файла и сдвиг сегментов: shell.log -> shell.log.1(.gz)."""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if self.backup_count < 1:
+            os.remove(self.baseFilename)
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            older = rotated_path(self.baseFilename, index, self.compress)
+            if os.path.exists(older):
+                os.replace(older, rotated_path(self.baseFilename, index + 1, self.compress))
+
+        first = rotated_path(self.baseFilename, 1, False)
+        os.replace(self.baseFilename, first)
+        if self.compress:
+            with open(first, 'rb') as source, gzip.open(first + '.gz', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            # Время изменения сегмента - время его последней записи (по нему
+            # logquery пропускает сегменты целиком)
+            shutil.copystat(first, first + '.gz')
+            os.remove(first)
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    Фоновый поток, пишущий записи из очереди пачками.
+
+    Буфер файла сбрасывается один раз, когда очередь опустела, а не после
+    каждой записи.
+    """
+
+    queue: LogQueue
+
+    # Запись, по которой фоновый поток завершается (сравнивается по ссылке)
+    _sentinel = logging.makeLogRecord({'msg': 'stop listener'})
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        """
+        Следующая запись; перед ожиданием новых записей буфер сбрасывается.
+
+        Args:
+            block: Ждать ли появления записи
+
+        Returns:
+            Запись лога или sentinel остановки
+        """
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+    def enqueue_sentinel(self) -> None:
+        """Постановка sentinel в очередь (с ожиданием, если очередь заполнена)."""
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Обработчик, передающий записи в ограниченную очередь.
+
+    При переполнении очереди политика 'block' ждёт освобождения места,
+    'drop' отбрасывает запись и увеличивает счётчик dropped.
+    """
+
+    queue: LogQueue
+
+    def __init__(self, log_queue: LogQueue, policy: str = LOG_OVERFLOW_POLICY) -> None:
+        """
+        Инициализация.
+
+        Args:
+            log_queue: Очередь записей
+            policy: 'block' или 'drop'
+
+        Raises:
+            ValueError: Неизвестная политика
+        """
+        if policy not in LOG_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy: {policy}")
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Запись передаётся без форматирования: его выполняет фоновый поток.
+
+        Args:
+            record: Запись лога
+
+        Returns:
+            Та же запись
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Постановка записи в очередь согласно политике переполнения.
+
+        Args:
+            record: Запись лога
+        """
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
 class ShellLogger:
     """Класс для логирования команд и ошибок shell-эмулятора."""
 
-    def __init__(self, log_file: str = LOG_FILE) -> None:
+    # Последний созданный логгер: все экземпляры пишут через один logging.Logger
+    _current: Optional['ShellLogger'] = None
+
+    def __init__(self, log_file: str = LOG_FILE, async_mode: bool = LOG_ASYNC,
+                 queue_size: int = LOG_QUEUE_SIZE, overflow: str = LOG_OVERFLOW_POLICY,
+                 style: str = LOG_STYLE, max_bytes: int = LOG_MAX_BYTES,
+                 rotate_interval: float = LOG_ROTATE_INTERVAL,
+                 backup_count: int = LOG_BACKUP_COUNT,
+                 compress: bool = LOG_COMPRESS_ROTATED) -> None:
         """
         Инициализация логгера.
 
+        В асинхронном режиме команды только кладут записи в очередь,
+        форматирование и запись в файл выполняет фоновый поток.
+
+        В стиле 'text' пишутся строки "[время] SUCCESS: ...", в стиле 'json' -
+        одна JSON-запись на команду (см. begin_operation/end_operation).
+
         Args:
             log_file: Путь к файлу логов
+            async_mode: Писать ли лог в фоновом потоке
+            queue_size: Размер очереди записей в асинхронном режиме
+            overflow: Политика при переполнении очереди: 'block' или 'drop'
+            style: Формат лога: 'text' или 'json'
+            max_bytes: Размер файла для ротации (0 - без ротации по размеру)
+            rotate_interval: Период ротации в секундах (0 - без ротации по времени)
+            backup_count: Сколько ротированных сегментов хранить
+            compress: Сжимать ли ротированные сегменты gzip
+
+        Raises:
+            ValueError: Неизвестный стиль лога
         """
+        if style not in LOG_STYLES:
+            raise ValueError(f"Unknown log style: {style}")
         self.log_file = log_file
+        self.style = style
+        self.error_count = 0
+        self.operation: Optional[Operation] = None
         self.logger = logging.getLogger('ShellLogger')
         self.logger.setLevel(logging.INFO)
 
+        if ShellLogger._current is not None:
+            ShellLogger._current.close()
+        ShellLogger._current = self
+        for old_handler in self.logger.handlers:
+            old_handler.close()
         self.logger.handlers.clear()
 
-        handler = logging.FileHandler(log_file, encoding='utf-8')
-        handler.setLevel(logging.INFO)
+        self._file_handler = BufferedFileHandler(log_file, max_bytes, rotate_interval,
+                                                 backup_count, compress, flush_each=not async_mode)
+        self._file_handler.setFormatter(self._formatter())
+        self.listener: Optional[BatchingQueueListener] = None
+        self._queue_handler: Optional[BoundedQueueHandler] = None
 
-        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
-        handler.setFormatter(formatter)
+        handler: logging.Handler
+        if async_mode:
+            queue_handler = BoundedQueueHandler(queue.Queue(queue_size), overflow)
+            self._queue_handler = queue_handler
+            self.listener = BatchingQueueListener(queue_handler.queue, self._file_handler)
+            self.listener.start()
+            atexit.register(self.close)
+            handler = queue_handler
+        else:
+            handler = self._file_handler
 
+        handler.setLevel(logging.INFO)
+        self._handler = handler
         self.logger.addHandler(handler)
 
+    def _formatter(self) -> logging.Formatter:
+        """Форматтер для выбранного стиля лога."""
+        if self.style == 'json':
+            return JsonLinesFormatter()
+        return logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+
+    @property
+    def dropped(self) -> int:
+        """Количество записей, отброшенных из-за переполнения очереди."""
+        return self._queue_handler.dropped if self._queue_handler is not None else 0
+
+    def begin_operation(self, cwd: str) -> Operation:
+        """
+        Начало выполнения командной строки.
+
+        Args:
+            cwd: Текущая директория
+
+        Returns:
+            Запись операции (имя и аргументы заполняются после разбора строки)
+        """
+        self.operation = Operation(cwd)
+        return self.operation
+
+    def add_bytes(self, count: int) -> None:
+        """
+        Учёт данных, обработанных текущей командой.
+
+        Args:
+            count: Количество байт
+        """
+        if self.operation is not None:
+            self.operation.bytes_processed += count
+
+    def end_operation(self) -> None:
+        """Завершение команды: в стиле 'json' пишется запись операции."""
+        operation, self.operation = self.operation, None
+        if self.style != 'json' or operation is None:
+            return
+        if operation.command is None and operation.error is None:
+            return
+        self.logger.info('', extra={'operation': operation.to_record()})
+
     def log_command(self, command: str) -> None:
         """
         Логирование выполненной команды.
@@ -36,7 +425,8 @@ class ShellLogger:
         Args:
             command: Строка с командой
         """
-        self.logger.info(command)
+        if self.style == 'text':
+            self.logger.info(command)
 
     def log_error(self, error_message: str) -> None:
         """
@@ -45,6 +435,11 @@ class ShellLogger:
         Args:
             error_message: Текст ошибки
         """
+        self.error_count += 1
+        if self.operation is not None:
+            self.operation.error = error_message
+            if self.style == 'json':
+                return
         self.logger.error(f"ERROR: {error_message}")
 
     def log_success(self, message: str) -> None:
@@ -54,4 +449,36 @@ class ShellLogger:
         Args:
             message: Сообщение об успехе
         """
-        self.logger.info(f"SUCCESS: {message}")
+        if self.style == 'text':
+            self.logger.info(f"SUCCESS: {message}")
+
+    def flush(self) -> None:
+        """Ожидание записи всех поставленных в очередь записей и сброс буфера."""
+        if self.listener is not None:
+            self.listener.queue.join()
+        self._file_handler.flush()
+
+    def close(self) -> None:
+        """
+        Остановка фонового потока с записью оставшихся записей и закрытие файла.
+
+        Записи, сделанные после close, пишутся в файл синхронно. Обработчик
+        выхода снимается, чтобы закрытый логгер не удерживался atexit.
+        """
+        if self.listener is None:
+            self._file_handler.close()
+            return
+
+        atexit.unregister(self.close)
+        self.listener.stop()
+        self.listener = None
+        if self.dropped:
+            self._file_handler.handle(self.logger.makeRecord(
+                self.logger.name, logging.WARNING, __file__, 0,
+                f"WARNING: {self.dropped} log records dropped (queue full)", (), None))
+        self._file_handler.close()
+        self._file_handler.flush_each = True
+
+        self.logger.removeHandler(self._handler)
+        self._handler = self._file_handler
+        self.logger.addHandler(self._handler)
@@ -0,0 +1,199 @@
+"""Выборка записей из структурированного (JSON-lines) лога shell-эмулятора.
+
+Пример: python -m src.logquery --since "2026-01-01 10:00" --command cp
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .constants import LOG_BACKUP_COUNT, LOG_FILE
+
+
+def parse_time(text: str) -> datetime:
+    """
+    Разбор времени в формате ISO 8601; время без зоны считается локальным.
+
+    Args:
+        text: '2026-01-01', '2026-01-01 10:00', '2026-01-01T10:00:00+03:00'
+
+    Returns:
+        Время с часовым поясом
+    """
+    return datetime.fromisoformat(text).astimezone()
+
+
+def segments(log_file: str) -> List[str]:
+    """
+    Сегменты лога от самого старого к текущему файлу.
+
+    Args:
+        log_file: Путь к текущему файлу лога
+
+    Returns:
+        Существующие пути: shell.log.N(.gz), ..., shell.log.1(.gz), shell.log
+    """
+    paths = []
+    index = 1
+    while True:
+        found = [path for path in (f"{log_file}.{index}.gz", f"{log_file}.{index}")
+                 if os.path.exists(path)]
+        if not found and index > LOG_BACKUP_COUNT:
+            break
+        paths.extend(found)
+        index += 1
+    paths.reverse()
+    if os.path.exists(log_file):
+        paths.append(log_file)
+    return paths
+
+
+def _record(line: bytes) -> Optional[Dict[str, Any]]:
+    """Запись операции из строки лога (None для строк не в формате JSON)."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) and 'time' in data else None
+
+
+def _record_time(line: bytes) -> Optional[datetime]:
+    """Время записи из строки лога."""
+    data = _record(line)
+    return parse_time(data['time']) if data is not None else None
+
+
+def seek_since(f: io.BufferedIOBase, since: datetime) -> None:
+    """
+    Бинарный поиск первой записи не раньше since в несжатом файле.
+
+    Записи пишутся в порядке времени, поэтому читаются только
+    O(log n) строк, а не весь файл. Строка не в формате JSON (запись
+    текстового лога или оборванная строка) времени не несёт: сравнивается
+    первая следующая строка, которая разбирается. Чтение вперёд
+    останавливается на high - дальше всё уже не раньше since.
+
+    Args:
+        f: Файл, открытый в двоичном режиме
+        since: Нижняя граница времени
+    """
+    low, high = 0, f.seek(0, os.SEEK_END)
+    while low < high:
+        middle = (low + high) // 2
+        _align(f, middle)
+        moment = None
+        while moment is None and f.tell() < high:
+            line = f.readline()
+            if not line:
+                break
+            moment = _record_time(line)
+        if moment is None or moment >= since:
+            high = middle
+        else:
+            # Все смещения до конца этой записи ведут к ней же или к следующей
+            low = f.tell()
+    _align(f, low)
+
+
+def _align(f: io.BufferedIOBase, offset: int) -> None:
+    """Переход к началу первой строки, начинающейся не раньше offset."""
+    if offset == 0:
+        f.seek(0)
+        return
+    f.seek(offset - 1)
+    f.readline()
+
+
+def query(log_file: str = LOG_FILE, since: Optional[datetime] = None,
+          until: Optional[datetime] = None, commands: Sequence[str] = (),
+          status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Потоковая выборка записей из текущего файла и ротированных сегментов.
+
+    Сегменты, изменённые раньше since, пропускаются без чтения; в несжатом
+    файле начало диапазона находится бинарным поиском; чтение прекращается
+    на первой записи позже until.
+
+    Args:
+        log_file: Путь к текущему файлу лога
+        since: Нижняя граница времени (включительно)
+        until: Верхняя граница времени (включительно)
+        commands: Имена команд (пусто - все)
+        status: 'ok' или 'error' (None - любые)
+
+    Yields:
+        Записи лога в порядке времени
+    """
+    for path in segments(log_file):
+        modified = datetime.fromtimestamp(os.path.getmtime(path)).astimezone()
+        if since is not None and modified < since:
+            continue
+        compressed = path.endswith('.gz')
+        with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as f:
+            if since is not None and not compressed:
+                seek_since(f, since)
+            for line in f:
+                data = _record(line)
+                if data is None:
+                    continue
+                moment = parse_time(data['time'])
+                if since is not None and moment < since:
+                    continue
+                if until is not None and moment > until:
+                    return
+                if commands and data.get('command') not in commands:
+                    continue
+                if status is not None and data.get('status') != status:
+                    continue
+                yield data
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """
+    Создание парсера аргументов командной строки.
+
+    Returns:
+        Парсер аргументов
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m src.logquery',
+        description='Filter the JSON-lines shell log by time range, command and status.'
+    )
+    parser.add_argument('log_file', nargs='?', default=LOG_FILE,
+                        help='Log file (default: shell.log)')
+    parser.add_argument('--since', type=parse_time, help='Start time, ISO 8601')
+    parser.add_argument('--until', type=parse_time, help='End time, ISO 8601')
+    parser.add_argument('--command', action='append', default=[], help='Command name (repeatable)')
+    parser.add_argument('--status', choices=('ok', 'error'), help='Operation status')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Вывод подходящих записей по одной JSON-строке.
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv[1:])
+
+    Returns:
+        Код возврата процесса
+    """
+    args = build_arg_parser().parse_args(argv)
+    try:
+        for data in query(args.log_file, args.since, args.until, args.command, args.status):
+            sys.stdout.write(json.dumps(data, ensure_ascii=False) + '\n')
+    except BrokenPipeError:
+        pass
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
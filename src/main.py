@@ -1,13 +1,73 @@
 """Точка входа в shell-эмулятор."""
 
+import argparse
+import sys
+from typing import List, Optional
+
+from .constants import LOG_STYLE, LOG_STYLES
+from .logger import ShellLogger
+from .parser import split_commands
 from .shell import Shell
 
 
-def main() -> None:
-    """Главная функция запуска shell-эмулятора."""
-    shell = Shell()
-    shell.run()
+def build_arg_parser() -> argparse.ArgumentParser:
+    """
+    Создание парсера аргументов командной строки.
+
+    Returns:
+        Парсер аргументов
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m src.main',
+        description='Shell emulator. Without arguments starts the interactive mode.'
+    )
+    parser.add_argument('script', nargs='?',
+                        help='Script file with one command per line')
+    parser.add_argument('-c', dest='command',
+                        help="Commands to run, separated by ';' or newlines")
+    parser.add_argument('-e', '--stop-on-error', action='store_true',
+                        help='Stop at the first failed command')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='Do not print the timing report to stderr')
+    parser.add_argument('--log-format', choices=LOG_STYLES, default=LOG_STYLE,
+                        help='Log format: text lines or one JSON record per command')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Главная функция запуска shell-эмулятора.
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv[1:])
+
+    Returns:
+        Код возврата процесса
+    """
+    args = build_arg_parser().parse_args(argv)
+
+    if args.command is None and args.script is None:
+        shell = Shell(logger=ShellLogger(style=args.log_format))
+        shell.run()
+        return 0
+
+    if args.command is not None:
+        text = args.command
+    else:
+        try:
+            with open(args.script, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+
+    shell = Shell(logger=ShellLogger(style=args.log_format))
+    try:
+        return shell.run_batch(split_commands(text), report=not args.quiet,
+                               stop_on_error=args.stop_on_error)
+    finally:
+        shell.close()
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
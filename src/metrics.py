@@ -0,0 +1,191 @@
+"""Модуль метрик: время, CPU, память и объём данных каждой команды."""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Sequence
+
+from .constants import METRICS_MAX_SAMPLES, METRICS_PERCENTILES
+
+if sys.platform != 'win32':  # В Windows пиковая память не измеряется
+    import resource
+
+
+class CommandSample(NamedTuple):
+    """
+    Измерения одного выполнения команды.
+
+    Attributes:
+        command: Имя команды
+        started_at: Время запуска (Unix time)
+        wall_ms: Время выполнения
+        cpu_ms: Процессорное время процесса (user + system)
+        rss_delta_kb: Прирост пикового RSS процесса (0, если пик не вырос)
+        files: Количество обработанных файлов
+        bytes_read: Прочитано байт
+        bytes_written: Записано байт
+        ok: Завершилась ли команда без ошибок
+    """
+
+    command: str
+    started_at: float
+    wall_ms: float
+    cpu_ms: float
+    rss_delta_kb: int
+    files: int
+    bytes_read: int
+    bytes_written: int
+    ok: bool
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """
+    Перцентиль методом ближайшего ранга.
+
+    Args:
+        values: Отсортированные значения
+        p: Перцентиль от 0 до 100
+
+    Returns:
+        Значение перцентиля (0 для пустой последовательности)
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _peak_rss_kb() -> int:
+    """Пиковый RSS процесса в КиБ (ru_maxrss в Linux - КиБ, в macOS - байты)."""
+    if sys.platform == 'win32':
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class MetricsCollector:
+    """
+    Сбор метрик команд за сессию.
+
+    measure() оборачивает выполнение команды и замеряет время, CPU и память;
+    сами команды сообщают количество файлов и байт через add(). Хранятся
+    последние METRICS_MAX_SAMPLES измерений.
+    """
+
+    def __init__(self, max_samples: int = METRICS_MAX_SAMPLES) -> None:
+        """
+        Инициализация.
+
+        Args:
+            max_samples: Сколько последних измерений хранить
+        """
+        self.samples: Deque[CommandSample] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._files = 0
+        self._read = 0
+        self._written = 0
+
+    def add(self, files: int = 0, read: int = 0, written: int = 0) -> None:
+        """
+        Учёт данных, обработанных текущей командой (потокобезопасно).
+
+        Args:
+            files: Количество файлов
+            read: Прочитано байт
+            written: Записано байт
+        """
+        with self._lock:
+            self._files += files
+            self._read += read
+            self._written += written
+
+    @contextmanager
+    def measure(self, command: str) -> Iterator[Dict[str, Any]]:
+        """
+        Замер выполнения команды.
+
+        Args:
+            command: Имя команды
+
+        Yields:
+            Словарь результата: вызывающий код может записать в него 'ok'
+            (по умолчанию - успех, если не было исключения), после выхода
+            в нём лежит 'sample'
+        """
+        with self._lock:
+            self._files = self._read = self._written = 0
+        result: Dict[str, Any] = {'ok': True}
+        started_at = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        rss_start = _peak_rss_kb()
+        ok = False
+        try:
+            yield result
+            ok = bool(result['ok'])
+        finally:
+            with self._lock:
+                sample = CommandSample(
+                    command, started_at,
+                    (time.perf_counter() - wall_start) * 1000,
+                    (time.process_time() - cpu_start) * 1000,
+                    max(0, _peak_rss_kb() - rss_start),
+                    self._files, self._read, self._written, ok)
+            self.samples.append(sample)
+            result['sample'] = sample
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Агрегаты по командам.
+
+        Returns:
+            Имя команды -> count, errors, p50/p95/p99 времени (мс), среднее CPU (мс),
+            максимальный прирост RSS, суммы файлов и байт
+        """
+        grouped: Dict[str, List[CommandSample]] = {}
+        for sample in self.samples:
+            grouped.setdefault(sample.command, []).append(sample)
+
+        result = {}
+        for command, samples in sorted(grouped.items()):
+            wall = sorted(sample.wall_ms for sample in samples)
+            stats: Dict[str, Any] = {
+                'count': len(samples),
+                'errors': sum(1 for sample in samples if not sample.ok),
+            }
+            for p in METRICS_PERCENTILES:
+                stats[f'p{p}_ms'] = round(percentile(wall, p), 3)
+            stats['cpu_ms_avg'] = round(sum(sample.cpu_ms for sample in samples) / len(samples), 3)
+            stats['rss_delta_kb_max'] = max(sample.rss_delta_kb for sample in samples)
+            stats['files'] = sum(sample.files for sample in samples)
+            stats['bytes_read'] = sum(sample.bytes_read for sample in samples)
+            stats['bytes_written'] = sum(sample.bytes_written for sample in samples)
+            result[command] = stats
+        return result
+
+    def export(self, path: str) -> None:
+        """
+        Атомарная запись агрегатов и измерений в JSON-файл.
+
+        Args:
+            path: Путь к файлу метрик
+        """
+        data = {
+            'generated': datetime.now().astimezone().isoformat(timespec='seconds'),
+            'commands': self.summary(),
+            'samples': [sample._asdict() for sample in self.samples],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        """Очистка накопленных измерений."""
+        self.samples.clear()
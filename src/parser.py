@@ -0,0 +1,389 @@
+"""Модуль разбора командной строки shell-эмулятора."""
+
+import shlex
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .commands.registry import CommandRegistry, CommandSpec, OptionSpec
+from .constants import (
+    ERROR_EMPTY_PIPELINE_STAGE,
+    ERROR_REDIRECT_NOT_LAST,
+    ERROR_REDIRECT_TARGET,
+    PARSE_CACHE_SIZE,
+)
+
+
+class ParseError(ValueError):
+    """Ошибка разбора командной строки."""
+
+
+class ParsedCommand(NamedTuple):
+    """
+    Результат разбора строки.
+
+    Кортеж неизменяемый, поэтому его безопасно хранить в кэше.
+
+    Attributes:
+        command: Имя команды или None для пустой строки
+        args: Позиционные аргументы
+        options: Пары (ключ опции, значение)
+    """
+
+    command: Optional[str]
+    args: Tuple[str, ...]
+    options: Tuple[Tuple[str, Any], ...]
+
+
+class Redirection(NamedTuple):
+    """
+    Перенаправления вывода команды.
+
+    Attributes:
+        stdout: Файл для stdout ('>' или '>>') или None
+        stdout_append: Дописывать в конец ('>>')
+        stderr: Файл для stderr ('2>' или '2>>') или None
+        stderr_append: Дописывать в конец ('2>>')
+    """
+
+    stdout: Optional[str] = None
+    stdout_append: bool = False
+    stderr: Optional[str] = None
+    stderr_append: bool = False
+
+
+class CommandParser:
+    """
+    Разбор строки: кавычки в стиле shlex, склеенные короткие флаги ('-ri'),
+    длинные опции ('--recursive', '--jobs=4') и разделитель '--'.
+
+    Опции каждой команды берутся из её описания в реестре. Результаты
+    кэшируются в LRU по исходной строке, поэтому повторные команды из
+    скриптов и истории не разбираются заново.
+    """
+
+    def __init__(self, registry: CommandRegistry, cache_size: int = PARSE_CACHE_SIZE) -> None:
+        """
+        Инициализация парсера.
+
+        Args:
+            registry: Реестр команд с описаниями опций
+            cache_size: Размер LRU-кэша разобранных строк
+        """
+        self.registry = registry
+        self._parse_cached = lru_cache(maxsize=cache_size)(self._parse)
+
+    def parse(self, line: str) -> Tuple[Optional[str], List[str], Dict[str, Any]]:
+        """
+        Разбор строки с использованием кэша.
+
+        Args:
+            line: Исходная строка
+
+        Returns:
+            Кортеж (команда, аргументы, опции)
+
+        Raises:
+            ParseError: Незакрытая кавычка, неизвестная опция или неверное значение
+        """
+        # Версия реестра входит в ключ: регистрация команды сбрасывает старые разборы
+        parsed = self._parse_cached(line, self.registry.version)
+        return parsed.command, list(parsed.args), dict(parsed.options)
+
+    def parse_pipeline(self, line: str) -> List[Tuple[Optional[str], List[str], Dict[str, Any]]]:
+        """
+        Разбор строки конвейера 'команда | команда | ...'.
+
+        Каждая стадия разбирается отдельно и попадает в общий LRU-кэш.
+
+        Args:
+            line: Исходная строка
+
+        Returns:
+            Список кортежей (команда, аргументы, опции), по одному на стадию
+
+        Raises:
+            ParseError: Пустая стадия или ошибка разбора одной из стадий
+        """
+        stages = split_pipeline(line)
+        if len(stages) == 1:
+            return [self.parse(line)]
+        parsed = [self.parse(stage) for stage in stages]
+        if any(command is None for command, _, _ in parsed):
+            raise ParseError(ERROR_EMPTY_PIPELINE_STAGE)
+        return parsed
+
+    def cache_info(self) -> Any:
+        """Статистика LRU-кэша разобранных строк."""
+        return self._parse_cached.cache_info()
+
+    def _parse(self, line: str, registry_version: int) -> ParsedCommand:
+        """
+        Разбор строки без кэша.
+
+        Args:
+            line: Исходная строка
+            registry_version: Версия реестра (только для ключа кэша)
+
+        Returns:
+            Результат разбора
+        """
+        try:
+            tokens = shlex.split(line)
+        except ValueError as e:
+            raise ParseError(str(e)) from e
+
+        if not tokens:
+            return ParsedCommand(None, (), ())
+
+        command = tokens[0]
+        spec = self.registry.get(command)
+        args, options = parse_arguments(spec, command, tokens[1:])
+        return ParsedCommand(command, tuple(args), tuple(options.items()))
+
+
+def split_commands(text: str) -> List[str]:
+    """
+    Разбиение текста скрипта на команды по переводам строк и ';' вне кавычек.
+
+    Пустые команды и строки-комментарии ('#' в начале) пропускаются.
+
+    Args:
+        text: Текст скрипта или аргумента -c
+
+    Returns:
+        Список командных строк
+    """
+    commands: List[str] = []
+    current: List[str] = []
+    quote: Optional[str] = None
+    escaped = False
+
+    for char in text + '\n':
+        if escaped:
+            escaped = False
+        elif char == '\\' and quote != "'":
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in ';\n':
+            line = ''.join(current).strip()
+            if line and not line.startswith('#'):
+                commands.append(line)
+            current = []
+            continue
+        current.append(char)
+
+    return commands
+
+
+def split_pipeline(line: str) -> List[str]:
+    """
+    Разбиение строки на стадии конвейера по '|' вне кавычек.
+
+    Экранированный '\\|' и '|' в кавычках остаются частью аргумента.
+
+    Args:
+        line: Командная строка
+
+    Returns:
+        Стадии конвейера (одна, если '|' в строке нет)
+    """
+    stages: List[str] = []
+    current: List[str] = []
+    quote: Optional[str] = None
+    escaped = False
+
+    for char in line:
+        if escaped:
+            escaped = False
+        elif char == '\\' and quote != "'":
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '|':
+            stages.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+
+    stages.append(''.join(current).strip())
+    return stages
+
+
+def split_redirections(line: str) -> Tuple[str, Redirection]:
+    """
+    Выделение перенаправлений '>', '>>', '2>' и '2>>' вне кавычек.
+
+    Имя файла может идти сразу за оператором ('>out.txt') или через
+    пробел и может быть в кавычках. При нескольких перенаправлениях
+    одного потока действует последнее, как в POSIX shell.
+
+    Args:
+        line: Командная строка
+
+    Returns:
+        Кортеж (строка без перенаправлений, перенаправления)
+
+    Raises:
+        ParseError: Нет имени файла или за перенаправлением stdout следует '|'
+    """
+    targets: Dict[str, Tuple[str, bool]] = {}
+    current: List[str] = []
+    quote: Optional[str] = None
+    escaped = False
+    i = 0
+
+    while i < len(line):
+        char = line[i]
+        i += 1
+        if escaped:
+            escaped = False
+        elif char == '\\' and quote != "'":
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '|' and 'stdout' in targets:
+            raise ParseError(ERROR_REDIRECT_NOT_LAST)
+        elif char == '>':
+            stream = 'stdout'
+            operator = '>'
+            # '2>' - только отдельное слово, 'file2>x' - это stdout
+            if current and current[-1] == '2' and (len(current) == 1 or current[-2].isspace()):
+                current.pop()
+                stream = 'stderr'
+                operator = '2>'
+            append = line.startswith('>', i)
+            if append:
+                i += 1
+                operator += '>'
+            while i < len(line) and line[i].isspace():
+                i += 1
+            start = i
+            word_quote: Optional[str] = None
+            while i < len(line):
+                if word_quote:
+                    if line[i] == word_quote:
+                        word_quote = None
+                elif line[i] in '"\'':
+                    word_quote = line[i]
+                elif line[i] == '\\':
+                    i += 1
+                elif line[i].isspace() or line[i] in '|>':
+                    break
+                i += 1
+            try:
+                words = shlex.split(line[start:i])
+            except ValueError as e:
+                raise ParseError(str(e)) from e
+            if not words:
+                raise ParseError(f"{ERROR_REDIRECT_TARGET} '{operator}'")
+            targets[stream] = (words[0], append)
+            current.append(' ')
+            continue
+        current.append(char)
+
+    stdout, stdout_append = targets.get('stdout', (None, False))
+    stderr, stderr_append = targets.get('stderr', (None, False))
+    return ''.join(current).strip(), Redirection(stdout, stdout_append, stderr, stderr_append)
+
+
+def parse_arguments(spec: Optional[CommandSpec], command: str,
+                    tokens: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Разделение токенов на позиционные аргументы и опции.
+
+    Args:
+        spec: Описание команды (None для неизвестной команды - всё считается аргументами)
+        command: Имя команды для сообщений об ошибках
+        tokens: Токены после имени команды
+
+    Returns:
+        Кортеж (аргументы, опции)
+
+    Raises:
+        ParseError: Неизвестная опция или неверное значение
+    """
+    args: List[str] = []
+    options: Dict[str, Any] = {}
+
+    if spec is None:
+        return list(tokens), options
+
+    i = 0
+    only_args = False
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+
+        if only_args or token == '-' or not token.startswith('-'):
+            args.append(token)
+        elif token == '--':
+            only_args = True
+        elif token.startswith('--'):
+            name, has_value, value = token[2:].partition('=')
+            option = spec.find_long(name)
+            if option is None:
+                raise ParseError(f"{command}: unknown option --{name}")
+            if option.takes_value:
+                if not has_value:
+                    if i >= len(tokens):
+                        raise ParseError(f"{command}: option --{name} requires a value")
+                    value = tokens[i]
+                    i += 1
+                options[option.dest] = _convert(command, option, value)
+            elif has_value:
+                raise ParseError(f"{command}: option --{name} does not take a value")
+            else:
+                options[option.dest] = True
+        else:
+            cluster = token[1:]
+            for j, letter in enumerate(cluster):
+                option = spec.find_short(letter)
+                if option is None:
+                    raise ParseError(f"{command}: unknown option -{letter}")
+                if not option.takes_value:
+                    options[option.dest] = True
+                    continue
+                value = cluster[j + 1:]
+                if not value:
+                    if i >= len(tokens):
+                        raise ParseError(f"{command}: option -{letter} requires a value")
+                    value = tokens[i]
+                    i += 1
+                options[option.dest] = _convert(command, option, value)
+                break
+
+    return args, options
+
+
+def _convert(command: str, option: OptionSpec, value: str) -> Any:
+    """
+    Проверка и преобразование значения опции.
+
+    Args:
+        command: Имя команды для сообщений об ошибках
+        option: Описание опции
+        value: Строковое значение
+
+    Returns:
+        Преобразованное значение
+
+    Raises:
+        ParseError: Значение не входит в choices или не преобразуется
+    """
+    if option.choices and value not in option.choices:
+        raise ParseError(f"{command}: invalid value for {option.flag.split()[0]}: {value} "
+                         f"(choose from {', '.join(option.choices)})")
+    try:
+        return option.type(value)
+    except (TypeError, ValueError) as e:
+        raise ParseError(f"{command}: invalid value for {option.flag.split()[0]}: {value}") from e
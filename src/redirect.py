@@ -0,0 +1,65 @@
+"""Перенаправление вывода команд в файлы ('>', '>>', '2>')."""
+
+import io
+import os
+import sys
+from contextlib import ExitStack, contextmanager, redirect_stderr, redirect_stdout
+from typing import Iterator, List, TextIO
+
+from .constants import REDIRECT_BUFFER_SIZE
+from .parser import Redirection
+
+
+def open_writer(path: str, append: bool = False) -> TextIO:
+    """
+    Открытие файла вывода с большим буфером записи.
+
+    Текстовая обёртка пишет в BufferedWriter размера REDIRECT_BUFFER_SIZE,
+    поэтому построчный print не превращается в системный вызов на строку.
+    Команды, пишущие байты, используют атрибут buffer, а cat передаёт
+    данные ядром через os.sendfile в fileno() файла.
+
+    Args:
+        path: Абсолютный путь к файлу
+        append: Дописывать в конец вместо перезаписи
+
+    Returns:
+        Текстовый поток для подстановки в sys.stdout или sys.stderr
+    """
+    binary = open(path, 'ab' if append else 'wb', buffering=REDIRECT_BUFFER_SIZE)
+    try:
+        return io.TextIOWrapper(binary, encoding='utf-8', errors='replace')
+    except Exception:
+        binary.close()
+        raise
+
+
+@contextmanager
+def redirect_output(redirection: Redirection, cwd: str) -> Iterator[List[str]]:
+    """
+    Подмена sys.stdout и sys.stderr на файлы на время выполнения команды.
+
+    Файлы сбрасываются на диск и закрываются при выходе из контекста,
+    в том числе при ошибке команды.
+
+    Args:
+        redirection: Перенаправления из split_redirections
+        cwd: Каталог, относительно которого разрешаются имена файлов
+
+    Yields:
+        Абсолютные пути открытых файлов
+    """
+    paths: List[str] = []
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with ExitStack() as stack:
+        for target, append, redirect in (
+                (redirection.stdout, redirection.stdout_append, redirect_stdout),
+                (redirection.stderr, redirection.stderr_append, redirect_stderr)):
+            if target is None:
+                continue
+            path = os.path.abspath(os.path.join(cwd, os.path.expanduser(target)))
+            writer = stack.enter_context(open_writer(path, append))
+            stack.enter_context(redirect(writer))
+            paths.append(path)
+        yield paths
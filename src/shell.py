@@ -1,22 +1,44 @@
 """Главный модуль shell-эмулятора."""
 
-from typing import Optional, Tuple, List, Dict
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from .logger import ShellLogger
 from .commands import ShellCommands
-from .constants import HEADER_SEPARATOR, ERROR_UNKNOWN_COMMAND, PROMPT_EXIT
+from .commands.handlers import create_default_registry
+from .commands.registry import CommandRegistry, CommandSpec
+from .constants import (
+    ERROR_NOT_PIPEABLE,
+    ERROR_UNKNOWN_COMMAND,
+    HEADER_SEPARATOR,
+    PROMPT_EXIT,
+    SEPARATOR_SHORT,
+)
+from .logger import Operation, ShellLogger
+from .parser import CommandParser, ParseError, Redirection, split_redirections
+from .redirect import redirect_output
 
 
 class Shell:
     """Класс shell-эмулятора."""
 
-    def __init__(self) -> None:
-        """Инициализация shell."""
-        self.logger = ShellLogger()
+    def __init__(self, registry: Optional[CommandRegistry] = None,
+                 logger: Optional[ShellLogger] = None) -> None:
+        """
+        Инициализация shell.
+
+        Args:
+            registry: Реестр команд (по умолчанию - встроенные команды)
+            logger: Логгер (по умолчанию - ShellLogger с настройками из constants)
+        """
+        self.logger = logger if logger is not None else ShellLogger()
         self.commands = ShellCommands(self.logger)
+        self.registry = registry if registry is not None else create_default_registry()
+        self.parser = CommandParser(self.registry)
         self.running = True
 
-    def parse_command(self, user_input: str) -> Tuple[Optional[str], List[str], Dict[str, bool]]:
+    def parse_command(self, user_input: str) -> Tuple[Optional[str], List[str], Dict[str, Any]]:
         """
         Парсинг введённой команды.
 
@@ -25,130 +47,238 @@ class Shell:
 
         Returns:
             Кортеж (команда, аргументы, опции)
+
+        Raises:
+            ParseError: Если строку не удалось разобрать
         """
-        parts = user_input.strip().split()
-        if not parts:
-            return None, [], {}
-
-        command = parts[0]
-        args = []
-        options = {}
-
-        i = 1
-        while i < len(parts):
-            if parts[i].startswith('-'):
-                option = parts[i]
-                if option == '-l':
-                    options['detailed'] = True
-                elif option == '-r':
-                    options['recursive'] = True
-                elif option == '-i':
-                    options['ignore_case'] = True
-            else:
-                args.append(parts[i])
-            i += 1
-
-        return command, args, options
-
-    def execute_command(self, user_input: str) -> None:
+        return self.parser.parse(user_input)
+
+    def execute_command(self, user_input: str) -> bool:
         """
         Выполнение команды.
 
         Args:
             user_input: Введённая пользователем строка
+
+        Returns:
+            True если команда выполнилась без ошибок, False иначе
+        """
+        operation = self.logger.begin_operation(self.commands.current_dir)
+        try:
+            return self._execute(user_input, operation)
+        finally:
+            self.logger.end_operation()
+
+    def _execute(self, user_input: str, operation: Operation) -> bool:
+        """
+        Разбор и выполнение команды в рамках операции лога.
+
+        Args:
+            user_input: Введённая пользователем строка
+            operation: Запись операции, в которую заносятся имя и аргументы
+
+        Returns:
+            True если команда выполнилась без ошибок, False иначе
         """
-        command, args, options = self.parse_command(user_input)
+        errors_before = self.logger.error_count
+
+        try:
+            command_line = user_input
+            redirection = Redirection()
+            if '>' in user_input:
+                command_line, redirection = split_redirections(user_input)
+            if '|' in command_line:
+                stages = self.parser.parse_pipeline(command_line)
+                if len(stages) > 1:
+                    return self._execute_pipeline(user_input, stages, operation, redirection)
+            command, args, options = self.parse_command(command_line)
+        except ParseError as e:
+            print(f"Error: {e}")
+            self.logger.log_error(str(e))
+            return False
 
         if not command:
-            return
+            return True
 
+        operation.command = command
+        operation.args = args
         self.logger.log_command(user_input)
 
-        if command not in ['history', 'undo']:
+        spec = self.registry.get(command)
+
+        if spec is None or spec.record_history:
             self.commands.add_to_history(user_input)
 
-        if command == 'ls':
-            path = args[0] if args else None
-            self.commands.ls(path, options.get('detailed', False))
-
-        elif command == 'cd':
-            if not args:
-                print("Error: cd requires a path argument")
-                return
-            self.commands.cd(args[0])
-
-        elif command == 'cat':
-            if not args:
-                print("Error: cat requires a file path")
-                return
-            self.commands.cat(args[0])
-
-        elif command == 'cp':
-            if len(args) < 2:
-                print("Error: cp requires source and destination")
-                return
-            self.commands.cp(args[0], args[1], options.get('recursive', False))
-
-        elif command == 'mv':
-            if len(args) < 2:
-                print("Error: mv requires source and destination")
-                return
-            self.commands.mv(args[0], args[1])
-
-        elif command == 'rm':
-            if not args:
-                print("Error: rm requires a path")
-                return
-            self.commands.rm(args[0], options.get('recursive', False))
-
-        elif command == 'zip':
-            if len(args) < 2:
-                print("Error: zip requires folder and archive name")
-                return
-            self.commands.zip_folder(args[0], args[1])
-
-        elif command == 'unzip':
-            if not args:
-                print("Error: unzip requires archive name")
-                return
-            self.commands.unzip_archive(args[0])
-
-        elif command == 'tar':
-            if len(args) < 2:
-                print("Error: tar requires folder and archive name")
-                return
-            self.commands.tar_folder(args[0], args[1])
-
-        elif command == 'untar':
-            if not args:
-                print("Error: untar requires archive name")
-                return
-            self.commands.untar_archive(args[0])
-
-        elif command == 'grep':
-            if len(args) < 2:
-                print("Error: grep requires pattern and path")
-                return
-            self.commands.grep(args[0], args[1],
-                               options.get('recursive', False),
-                               options.get('ignore_case', False))
-
-        elif command == 'history':
-            self.commands.show_history()
-
-        elif command == 'undo':
-            self.commands.undo()
-
-        elif command == 'pwd':
-            self.commands.pwd()
-
-        elif command == 'exit':
-            print("bb!")
-            self.running = False
-
-        else:
+        if spec is None:
             print(f"{ERROR_UNKNOWN_COMMAND}: {command}")
             self.logger.log_error(f"{ERROR_UNKNOWN_COMMAND}: {command}")
+            return False
+
+        error = spec.validate(args)
+        if error:
+            print(f"Error: {error}")
+            self.logger.log_error(error)
+            return False
+
+        with self.commands.metrics.measure(command) as result:
+            try:
+                with self._redirected(redirection):
+                    spec.handler(self, args, options)
+            except OSError as e:
+                print(f"Error: {e}")
+                self.logger.log_error(f"{command} failed: {e}")
+            result['ok'] = self.logger.error_count == errors_before
+        sample = result['sample']
+        self.logger.add_bytes(max(sample.bytes_read, sample.bytes_written))
+        return bool(result['ok'])
+
+    @contextmanager
+    def _redirected(self, redirection: Redirection) -> Iterator[None]:
+        """
+        Выполнение блока с перенаправленным выводом.
+
+        После закрытия файлов их записи в кэше метаданных сбрасываются.
+
+        Args:
+            redirection: Перенаправления команды (пустые - вывод не меняется)
+        """
+        if redirection.stdout is None and redirection.stderr is None:
+            yield
+            return
+        opened: List[str] = []
+        try:
+            with redirect_output(redirection, self.commands.current_dir) as paths:
+                opened = paths
+                yield
+        finally:
+            for path in opened:
+                self.commands.fs_cache.invalidate(path)
+
+    def _execute_pipeline(self, user_input: str,
+                          stages: List[Tuple[Optional[str], List[str], Dict[str, Any]]],
+                          operation: Operation,
+                          redirection: Optional[Redirection] = None) -> bool:
+        """
+        Выполнение конвейера 'команда | команда | ...'.
+
+        Каждая стадия - ленивый итератор строк, который читает итератор
+        предыдущей стадии; в stdout пишется вывод последней. Строки проходят
+        через конвейер по одной, поэтому память не зависит от объёма данных.
+        Когда последняя стадия завершается (head набрал строки), все стадии
+        закрываются от последней к первой и прекращают чтение.
+
+        Args:
+            user_input: Исходная строка
+            stages: Разобранные стадии (команда, аргументы, опции)
+            operation: Запись операции лога
+            redirection: Перенаправления вывода последней стадии (None - без них)
+
+        Returns:
+            True если конвейер выполнился без ошибок, False иначе
+        """
+        errors_before = self.logger.error_count
+        names = [command or '' for command, _, _ in stages]
+        operation.command = '|'.join(names)
+        operation.args = [arg for _, args, _ in stages for arg in args]
+        self.logger.log_command(user_input)
+        self.commands.add_to_history(user_input)
+
+        resolved: List[Tuple[CommandSpec, List[str], Dict[str, Any]]] = []
+        for position, (command, args, options) in enumerate(stages):
+            spec = self.registry.get(command or '')
+            if spec is None:
+                print(f"{ERROR_UNKNOWN_COMMAND}: {command}")
+                self.logger.log_error(f"{ERROR_UNKNOWN_COMMAND}: {command}")
+                return False
+            if spec.stream is None:
+                print(f"Error: {ERROR_NOT_PIPEABLE}: {command}")
+                self.logger.log_error(f"{ERROR_NOT_PIPEABLE}: {command}")
+                return False
+            error = spec.validate(args, piped=position > 0)
+            if error:
+                print(f"Error: {error}")
+                self.logger.log_error(error)
+                return False
+            resolved.append((spec, args, options))
+
+        with self.commands.metrics.measure(operation.command) as result:
+            streams: List[Iterator[str]] = []
+            stream: Optional[Iterator[str]] = None
+            try:
+                with self._redirected(redirection or Redirection()):
+                    for spec, args, options in resolved:
+                        stream = spec.stream(self, args, options, stream)  # type: ignore[misc]
+                        streams.append(stream)
+                    write = sys.stdout.write
+                    for line in streams[-1]:
+                        write(line + '\n')
+                self.logger.log_success(f"pipeline {user_input}")
+            except Exception as e:
+                self.logger.log_error(f"pipeline failed: {e}")
+                print(f"Error: {e}")
+            finally:
+                for stream in reversed(streams):
+                    close = getattr(stream, 'close', None)
+                    if close is not None:
+                        close()
+            result['ok'] = self.logger.error_count == errors_before
+        sample = result['sample']
+        self.logger.add_bytes(max(sample.bytes_read, sample.bytes_written))
+        return bool(result['ok'])
+
+    def run_batch(self, commands: List[str], report: bool = True,
+                  stop_on_error: bool = False) -> int:
+        """
+        Неинтерактивное выполнение списка команд.
+
+        Приглашение не выводится, записи истории и undo копятся в памяти и
+        пишутся в файлы одним вызовом после выполнения всех команд.
+
+        Args:
+            commands: Командные строки
+            report: Выводить ли в stderr отчёт о времени выполнения
+            stop_on_error: Остановиться на первой команде с ошибкой
+
+        Returns:
+            Код возврата: 0 если все команды успешны, 1 иначе
+        """
+        timings: List[Tuple[str, float, bool]] = []
+        started = time.perf_counter()
+        self.commands.begin_batch()
+        try:
+            for user_input in commands:
+                if not self.running:
+                    break
+                command_started = time.perf_counter()
+                try:
+                    ok = self.execute_command(user_input)
+                except Exception as e:
+                    print(f"Error: {e}")
+                    self.logger.log_error(str(e))
+                    ok = False
+                timings.append((user_input, time.perf_counter() - command_started, ok))
+                if not ok and stop_on_error:
+                    break
+        finally:
+            self.commands.end_batch()
+
+        total = time.perf_counter() - started
+        failed = sum(1 for _, _, ok in timings if not ok)
+        if report:
+            print(SEPARATOR_SHORT, file=sys.stderr)
+            for user_input, elapsed, ok in timings:
+                status = 'ok' if ok else 'FAIL'
+                print(f"{elapsed * 1000:10.2f} ms  {status:<4}  {user_input}", file=sys.stderr)
+            print(SEPARATOR_SHORT, file=sys.stderr)
+            print(f"{len(timings)} commands, {failed} failed, total {total * 1000:.2f} ms",
+                  file=sys.stderr)
+
+        return 1 if failed else 0
+
+    def close(self) -> None:
+        """Запись журналов и лога на диск перед выходом."""
+        self.commands.close()
+        self.logger.close()
 
     def run(self) -> None:
         """Главный цикл shell."""
@@ -157,19 +287,22 @@ class Shell:
         print(PROMPT_EXIT)
         print(HEADER_SEPARATOR)
 
-        while self.running:
-            try:
-                prompt = f"{self.commands.current_dir}> "
-                user_input = input(prompt)
-
-                if user_input.strip():
-                    self.execute_command(user_input)
-
-            except KeyboardInterrupt:
-                print(f"\n{PROMPT_EXIT}")
-            except EOFError:
-                print("\nbb!")
-                break
-            except Exception as e:
-                print(f"Error: {e}")
-                self.logger.log_error(str(e))
+        try:
+            while self.running:
+                try:
+                    prompt = f"{self.commands.current_dir}> "
+                    user_input = input(prompt)
+
+                    if user_input.strip():
+                        self.execute_command(user_input)
+
+                except KeyboardInterrupt:
+                    print(f"\n{PROMPT_EXIT}")
+                except EOFError:
+                    print("\nbb!")
+                    break
+                except Exception as e:
+                    print(f"Error: {e}")
+                    self.logger.log_error(str(e))
+        finally:
+            self.close()
@@ -0,0 +1,709 @@
+"""Модуль корзины: индекс удалённых объектов и хранилище с дедупликацией."""
+
+import errno
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import stat
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .constants import (
+    TRASH_COMPACT_SLACK,
+    TRASH_DIR,
+    TRASH_HASH_CHUNK,
+    TRASH_INDEX_FILE,
+    TRASH_ITEMS_DIR,
+    TRASH_ROOTS_FILE,
+)
+from .journal import AppendJournal
+
+# Множители суффиксов размера для parse_size
+SIZE_UNITS: Dict[str, int] = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+class TrashEntry(NamedTuple):
+    """
+    Запись индекса корзины.
+
+    Attributes:
+        id: Уникальный идентификатор записи
+        original: Абсолютный путь, откуда объект был удалён
+        deleted_at: Время удаления (Unix time)
+        location: Путь к данным относительно корня корзины
+        is_dir: Каталог ли это
+        size: Размер файла (для каталогов None - считается по запросу)
+        digest: SHA-256 содержимого файла, если уже вычислен
+        mode: st_mode обычного файла на момент удаления (None - не сохранялся)
+        mtime_ns: Время изменения обычного файла в наносекундах
+    """
+
+    id: str
+    original: str
+    deleted_at: float
+    location: str
+    is_dir: bool
+    size: Optional[int]
+    digest: Optional[str]
+    mode: Optional[int] = None
+    mtime_ns: Optional[int] = None
+
+
+def parse_size(text: str) -> int:
+    """
+    Разбор размера с необязательным суффиксом: '500', '10K', '1.5G'.
+
+    Args:
+        text: Строка размера
+
+    Returns:
+        Размер в байтах
+
+    Raises:
+        ValueError: Строка не является размером
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size: int) -> str:
+    """
+    Размер в человекочитаемом виде: '512B', '1.5M'.
+
+    Args:
+        size: Размер в байтах
+
+    Returns:
+        Строка размера
+    """
+    value = float(size)
+    for unit in ('B', 'K', 'M', 'G'):
+        if value < 1024:
+            return f"{value:.0f}{unit}" if unit == 'B' else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}T"
+
+
+def _file_digest(path: str) -> str:
+    """
+    SHA-256 содержимого файла с чтением блоками.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        Шестнадцатеричный дайджест
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(TRASH_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tree_size(path: str) -> int:
+    """
+    Суммарный размер файлов в дереве (ссылки не разыменовываются).
+
+    Args:
+        path: Файл или каталог
+
+    Returns:
+        Размер в байтах
+    """
+    # Импорт здесь: пакет команд сам импортирует корзину
+    from .commands.walker import walk
+
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        return st.st_size
+    return sum(item.stat().st_size for item in walk(path, dirs=False, prefetch_stat=True))
+
+
+def device_of(path: str) -> int:
+    """
+    Номер устройства, на котором лежит путь (ссылки не разыменовываются).
+
+    Args:
+        path: Путь
+
+    Returns:
+        st_dev
+    """
+    return os.lstat(path).st_dev
+
+
+def find_mount_root(path: str) -> str:
+    """
+    Точка монтирования файловой системы, на которой лежит путь.
+
+    Подъём по родительским каталогам, пока номер устройства не меняется.
+
+    Args:
+        path: Абсолютный путь к существующему каталогу
+
+    Returns:
+        Самый верхний каталог на том же устройстве
+    """
+    device = device_of(path)
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path or device_of(parent) != device:
+            return path
+        path = parent
+
+
+class TrashStore:
+    """
+    Корзина с индексом и дедупликацией файлов по содержимому.
+
+    Каждый удалённый объект получает уникальный id и хранится в
+    items/<id>, поэтому имена в корзине не конфликтуют. Индекс - журнал
+    JSON-записей ["add", ...], ["hash", id, digest] и ["del", id],
+    загружаемый при первом обращении.
+
+    Если в корзине уже есть файл того же размера, у нового файла и у
+    кандидатов вычисляется SHA-256 (хэш кандидата сохраняется в индексе);
+    при совпадении данные не копируются, а новая запись ссылается на уже
+    хранящийся файл. Без совпадения по размеру хэш не считается. Права и
+    время изменения каждого файла хранятся в его записи и возвращаются при
+    восстановлении, поэтому дубликат не получает метаданные первой копии.
+    """
+
+    def __init__(self, root: str) -> None:
+        """
+        Инициализация корзины.
+
+        Args:
+            root: Абсолютный путь к каталогу корзины
+        """
+        self.root = root
+        self._journal = AppendJournal(os.path.join(root, TRASH_INDEX_FILE))
+        self._entries: Dict[str, TrashEntry] = {}
+        self._by_size: Dict[int, List[str]] = {}
+        self._refs: Dict[str, int] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        """Чтение индекса (один раз за время жизни объекта)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        os.makedirs(os.path.join(self.root, TRASH_ITEMS_DIR), exist_ok=True)
+        scanned = 0
+        for line in self._journal.iter_forward():
+            scanned += 1
+            data = json.loads(line)
+            if data[0] == 'add':
+                self._insert(TrashEntry(*data[1:]))
+            elif data[0] == 'hash' and data[1] in self._entries:
+                self._entries[data[1]] = self._entries[data[1]]._replace(digest=data[2])
+            elif data[0] == 'del':
+                self._discard(data[1])
+        self._journal.records = scanned
+
+    def _insert(self, entry: TrashEntry) -> None:
+        """Добавление записи в индексы в памяти."""
+        self._entries[entry.id] = entry
+        self._refs[entry.location] = self._refs.get(entry.location, 0) + 1
+        if entry.size is not None and not entry.is_dir:
+            self._by_size.setdefault(entry.size, []).append(entry.id)
+
+    def _discard(self, entry_id: str) -> Optional[TrashEntry]:
+        """Удаление записи из индексов в памяти."""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        self._refs[entry.location] -= 1
+        if not self._refs[entry.location]:
+            del self._refs[entry.location]
+        if entry.size is not None and not entry.is_dir:
+            ids = self._by_size.get(entry.size, [])
+            if entry_id in ids:
+                ids.remove(entry_id)
+        return entry
+
+    def _append(self, record: list) -> None:
+        """
+        Дозапись в индекс со сжатием, когда мёртвых записей стало много.
+
+        Args:
+            record: Запись индекса
+        """
+        self._journal.append(json.dumps(record, ensure_ascii=False))
+        if self._journal.records > len(self._entries) + TRASH_COMPACT_SLACK:
+            self._journal.rewrite(json.dumps(['add', *entry], ensure_ascii=False)
+                                  for entry in self._entries.values())
+
+    def _new_id(self) -> str:
+        """Новый идентификатор, не совпадающий с существующими."""
+        while True:
+            entry_id = secrets.token_hex(6)
+            if entry_id not in self._entries:
+                return entry_id
+
+    def _entry_digest(self, entry: TrashEntry) -> str:
+        """
+        Хэш хранящегося файла с сохранением в индекс.
+
+        Args:
+            entry: Запись файла
+
+        Returns:
+            SHA-256 содержимого
+        """
+        if entry.digest is None:
+            digest = _file_digest(os.path.join(self.root, entry.location))
+            same_size = self._by_size.get(entry.size, []) if entry.size is not None else []
+            for other_id in same_size:
+                other = self._entries[other_id]
+                if other.location == entry.location:
+                    self._entries[other_id] = other._replace(digest=digest)
+                    self._append(['hash', other_id, digest])
+            return digest
+        return entry.digest
+
+    def _shared(self, entry: TrashEntry) -> bool:
+        """Ссылаются ли на данные записи другие записи (дубликаты)."""
+        return self._refs.get(entry.location, 0) > 1
+
+    def _find_duplicate(self, path: str, size: int) -> Tuple[Optional[TrashEntry], Optional[str]]:
+        """
+        Поиск в корзине файла с тем же содержимым.
+
+        Args:
+            path: Путь к удаляемому файлу
+            size: Его размер
+
+        Returns:
+            Кортеж (найденная запись или None, хэш файла или None, если не считался)
+        """
+        candidates = self._by_size.get(size)
+        if not candidates:
+            return None, None
+        digest = _file_digest(path)
+        seen: Set[str] = set()
+        for entry_id in list(candidates):
+            entry = self._entries[entry_id]
+            if entry.location in seen:
+                continue
+            seen.add(entry.location)
+            if self._entry_digest(entry) == digest:
+                return entry, digest
+        return None, digest
+
+    def add(self, path: str) -> TrashEntry:
+        """
+        Перемещение объекта в корзину.
+
+        На той же файловой системе это один os.rename; между устройствами
+        объект копируется (выбор корзины - задача TrashManager).
+
+        Args:
+            path: Абсолютный путь к файлу или каталогу
+
+        Returns:
+            Запись индекса
+        """
+        self._load()
+        st = os.lstat(path)
+        entry_id = self._new_id()
+        is_dir = stat.S_ISDIR(st.st_mode)
+        size = None if is_dir else st.st_size
+        digest = None
+        mode: Optional[int] = None
+        mtime_ns: Optional[int] = None
+
+        if stat.S_ISREG(st.st_mode):
+            mode, mtime_ns = st.st_mode, st.st_mtime_ns
+            duplicate, digest = self._find_duplicate(path, st.st_size)
+            if duplicate is not None:
+                os.remove(path)
+                entry = TrashEntry(entry_id, path, time.time(), duplicate.location,
+                                   False, size, digest, mode, mtime_ns)
+                self._insert(entry)
+                self._append(['add', *entry])
+                return entry
+
+        location = os.path.join(TRASH_ITEMS_DIR, entry_id)
+        destination = os.path.join(self.root, location)
+        try:
+            os.rename(path, destination)
+        except OSError as e:
+            # Корзина на другой файловой системе: копирование и удаление
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(path, destination)
+        entry = TrashEntry(entry_id, path, time.time(), location, is_dir, size, digest,
+                           mode, mtime_ns)
+        self._insert(entry)
+        self._append(['add', *entry])
+        return entry
+
+    def get(self, entry_id: str) -> Optional[TrashEntry]:
+        """
+        Поиск записи по id.
+
+        Args:
+            entry_id: Идентификатор
+
+        Returns:
+            Запись или None
+        """
+        self._load()
+        return self._entries.get(entry_id)
+
+    def entries(self) -> List[TrashEntry]:
+        """Все записи от самой старой к самой новой."""
+        self._load()
+        return sorted(self._entries.values(), key=lambda entry: entry.deleted_at)
+
+    def entry_size(self, entry: TrashEntry) -> int:
+        """
+        Размер данных записи (для каталогов считается обходом).
+
+        Args:
+            entry: Запись
+
+        Returns:
+            Размер в байтах
+        """
+        if entry.size is not None:
+            return entry.size
+        path = os.path.join(self.root, entry.location)
+        return tree_size(path) if os.path.lexists(path) else 0
+
+    def restore(self, entry_id: str) -> TrashEntry:
+        """
+        Возврат объекта на исходное место.
+
+        Данные, на которые ссылаются другие записи (дубликаты), копируются,
+        иначе перемещаются. Общие данные несут метаданные того файла, что
+        попал в корзину первым, поэтому файлу возвращаются его собственные
+        права и время изменения из записи.
+
+        Args:
+            entry_id: Идентификатор записи
+
+        Returns:
+            Восстановленная запись
+
+        Raises:
+            KeyError: Записи нет в корзине
+            FileExistsError: Исходный путь уже занят
+        """
+        self._load()
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            raise KeyError(entry_id)
+        if os.path.lexists(entry.original):
+            raise FileExistsError(f"Cannot restore, path exists: {entry.original}")
+
+        source = os.path.join(self.root, entry.location)
+        os.makedirs(os.path.dirname(entry.original), exist_ok=True)
+        if self._shared(entry):
+            shutil.copy2(source, entry.original)
+        else:
+            shutil.move(source, entry.original)
+        if entry.mode is not None and entry.mtime_ns is not None:
+            os.chmod(entry.original, stat.S_IMODE(entry.mode))
+            atime_ns = os.stat(entry.original).st_atime_ns
+            os.utime(entry.original, ns=(atime_ns, entry.mtime_ns))
+        self._discard(entry_id)
+        self._append(['del', entry_id])
+        return entry
+
+    def purge(self, entry_ids: Optional[Iterable[str]] = None) -> Tuple[int, int]:
+        """
+        Окончательное удаление записей и освобождение места.
+
+        Args:
+            entry_ids: Идентификаторы (None - очистить всю корзину)
+
+        Returns:
+            Кортеж (количество удалённых записей, освобождённые байты)
+
+        Raises:
+            KeyError: Какого-то id нет в корзине
+        """
+        self._load()
+        ids = list(self._entries) if entry_ids is None else list(entry_ids)
+        missing = [entry_id for entry_id in ids if entry_id not in self._entries]
+        if missing:
+            raise KeyError(', '.join(missing))
+
+        freed = 0
+        for entry_id in ids:
+            entry = self._entries[entry_id]
+            if not self._shared(entry):
+                path = os.path.join(self.root, entry.location)
+                if os.path.lexists(path):
+                    freed += self.entry_size(entry)
+                    if entry.is_dir:
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+            self._discard(entry_id)
+            self._append(['del', entry_id])
+        return len(ids), freed
+
+    def usage(self) -> int:
+        """Место, занимаемое корзиной (общие данные дубликатов учитываются один раз)."""
+        self._load()
+        sizes: Dict[str, int] = {}
+        for entry in self._entries.values():
+            if entry.location not in sizes:
+                sizes[entry.location] = self.entry_size(entry)
+        return sum(sizes.values())
+
+    def expire(self, max_age: Optional[float] = None,
+               max_size: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Удаление старых записей по возрасту и/или квоте размера.
+
+        Сначала удаляются записи старше max_age, затем, пока корзина
+        больше max_size, - самые старые.
+
+        Args:
+            max_age: Максимальный возраст записи в секундах
+            max_size: Квота размера корзины в байтах
+
+        Returns:
+            Кортеж (количество удалённых записей, освобождённые байты)
+        """
+        removed, freed = 0, 0
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            old = [entry.id for entry in self.entries() if entry.deleted_at < cutoff]
+            removed, freed = self.purge(old)
+
+        if max_size is not None:
+            usage = self.usage()
+            for entry in self.entries():
+                if usage <= max_size:
+                    break
+                count, size = self.purge([entry.id])
+                removed += count
+                freed += size
+                usage -= size
+        return removed, freed
+
+    def close(self) -> None:
+        """Закрытие файла индекса."""
+        self._journal.close()
+
+
+class TrashManager:
+    """
+    Набор корзин: по одной на каждую файловую систему.
+
+    Объект удаляется в корзину на том же устройстве, поэтому удаление -
+    всегда один os.rename. Для файловой системы, отличной от основной
+    корзины, используется .trash в её точке монтирования; пути таких
+    корзин записываются в основную корзину, чтобы list, purge и undo
+    видели их после перезапуска. Если на устройстве корзину создать
+    нельзя (нет прав), store_for возвращает основную корзину с признаком
+    копирования между устройствами.
+    """
+
+    def __init__(self, home_root: str) -> None:
+        """
+        Инициализация.
+
+        Args:
+            home_root: Абсолютный путь к основной корзине
+        """
+        self.home = TrashStore(home_root)
+        self._roots = AppendJournal(os.path.join(home_root, TRASH_ROOTS_FILE))
+        self._stores: Dict[str, TrashStore] = {home_root: self.home}
+        self._by_device: Dict[int, Optional[TrashStore]] = {}
+        self._owner: Dict[str, TrashStore] = {}
+        self._roots_loaded = False
+
+    def _load_roots(self) -> None:
+        """Чтение списка корзин на других устройствах."""
+        if self._roots_loaded:
+            return
+        self._roots_loaded = True
+        for root in self._roots.iter_forward():
+            if root not in self._stores and os.path.isdir(root):
+                self._stores[root] = TrashStore(root)
+
+    def stores(self) -> List[TrashStore]:
+        """Все известные корзины, основная - первая."""
+        self._load_roots()
+        return list(self._stores.values())
+
+    def store_for(self, path: str) -> Tuple[TrashStore, bool]:
+        """
+        Выбор корзины для удаляемого пути.
+
+        Args:
+            path: Абсолютный путь к удаляемому объекту
+
+        Returns:
+            Кортеж (корзина, удаление ли это переименованием на том же устройстве)
+        """
+        device = device_of(path)
+        if device == device_of(self.home.root):
+            return self.home, True
+
+        if device not in self._by_device:
+            self._by_device[device] = self._mount_store(os.path.dirname(path), device)
+        store = self._by_device[device]
+        if store is None:
+            return self.home, False
+        return store, True
+
+    def _mount_store(self, directory: str, device: int) -> Optional[TrashStore]:
+        """
+        Корзина в точке монтирования устройства.
+
+        Args:
+            directory: Каталог на этом устройстве
+            device: Номер устройства
+
+        Returns:
+            Корзина или None, если создать её на устройстве нельзя
+        """
+        root = os.path.join(find_mount_root(directory), TRASH_DIR)
+        try:
+            os.makedirs(root, exist_ok=True)
+            if device_of(root) != device:
+                return None
+        except OSError:
+            return None
+
+        self._load_roots()
+        if root not in self._stores:
+            self._stores[root] = TrashStore(root)
+            self._roots.append(root)
+        return self._stores[root]
+
+    def add(self, path: str) -> TrashEntry:
+        """
+        Перемещение объекта в корзину его файловой системы.
+
+        Args:
+            path: Абсолютный путь
+
+        Returns:
+            Запись индекса
+        """
+        store, _ = self.store_for(path)
+        entry = store.add(path)
+        self._owner[entry.id] = store
+        return entry
+
+    def _find(self, entry_id: str) -> Optional[TrashStore]:
+        """Корзина, в которой лежит запись."""
+        store = self._owner.get(entry_id)
+        if store is not None and store.get(entry_id) is not None:
+            return store
+        for store in self.stores():
+            if store.get(entry_id) is not None:
+                self._owner[entry_id] = store
+                return store
+        return None
+
+    def get(self, entry_id: str) -> Optional[TrashEntry]:
+        """
+        Поиск записи по id во всех корзинах.
+
+        Args:
+            entry_id: Идентификатор
+
+        Returns:
+            Запись или None
+        """
+        store = self._find(entry_id)
+        return store.get(entry_id) if store is not None else None
+
+    def entries(self) -> List[TrashEntry]:
+        """Записи всех корзин от самой старой к самой новой."""
+        entries = []
+        for store in self.stores():
+            for entry in store.entries():
+                self._owner[entry.id] = store
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry.deleted_at)
+
+    def entry_size(self, entry: TrashEntry) -> int:
+        """Размер данных записи."""
+        store = self._find(entry.id)
+        return store.entry_size(entry) if store is not None else 0
+
+    def restore(self, entry_id: str) -> TrashEntry:
+        """
+        Возврат объекта на исходное место.
+
+        Args:
+            entry_id: Идентификатор записи
+
+        Returns:
+            Восстановленная запись
+
+        Raises:
+            KeyError: Записи нет ни в одной корзине
+            FileExistsError: Исходный путь уже занят
+        """
+        store = self._find(entry_id)
+        if store is None:
+            raise KeyError(entry_id)
+        return store.restore(entry_id)
+
+    def purge(self, entry_ids: Optional[Iterable[str]] = None) -> Tuple[int, int]:
+        """
+        Окончательное удаление записей.
+
+        Args:
+            entry_ids: Идентификаторы (None - очистить все корзины)
+
+        Returns:
+            Кортеж (количество удалённых записей, освобождённые байты)
+
+        Raises:
+            KeyError: Какого-то id нет ни в одной корзине
+        """
+        if entry_ids is None:
+            results = [store.purge() for store in self.stores()]
+        else:
+            ids = list(entry_ids)
+            missing = [entry_id for entry_id in ids if self._find(entry_id) is None]
+            if missing:
+                raise KeyError(', '.join(missing))
+            grouped: Dict[str, List[str]] = {}
+            for entry_id in ids:
+                grouped.setdefault(self._owner[entry_id].root, []).append(entry_id)
+            results = [self._stores[root].purge(group) for root, group in grouped.items()]
+        return sum(count for count, _ in results), sum(freed for _, freed in results)
+
+    def usage(self) -> int:
+        """Место, занимаемое всеми корзинами."""
+        return sum(store.usage() for store in self.stores())
+
+    def expire(self, max_age: Optional[float] = None,
+               max_size: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Удаление старых записей; квота размера действует для каждой корзины отдельно.
+
+        Args:
+            max_age: Максимальный возраст записи в секундах
+            max_size: Квота размера одной корзины в байтах
+
+        Returns:
+            Кортеж (количество удалённых записей, освобождённые байты)
+        """
+        results = [store.expire(max_age, max_size) for store in self.stores()]
+        return sum(count for count, _ in results), sum(freed for _, freed in results)
+
+    def close(self) -> None:
+        """Закрытие файлов индексов."""
+        self._roots.close()
+        for store in self._stores.values():
+            store.close()
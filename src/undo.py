@@ -0,0 +1,145 @@
+"""Модуль журнала отменяемых операций (undo)."""
+
+import json
+from typing import Iterator, List, NamedTuple, Optional
+
+from .constants import MAX_UNDO_SIZE, UNDO_COMPACT_THRESHOLD, UNDO_FILE
+from .journal import AppendJournal
+
+# Запись о снятии верхней операции со стека
+POP_RECORD: str = '["pop"]'
+
+
+class UndoRecord(NamedTuple):
+    """
+    Запись об отменяемой операции.
+
+    Attributes:
+        op: Тип операции: 'cp', 'mv' или 'rm'
+        src: Исходный путь (для rm - исходное расположение удалённого объекта)
+        dst: Путь назначения (для rm - id записи в индексе корзины)
+    """
+
+    op: str
+    src: str
+    dst: str
+
+
+class UndoJournal:
+    """
+    Стек отменяемых операций, хранящийся отдельно от истории команд.
+
+    В файле каждая операция - JSON-массив ["cp", src, dst], снятие со
+    стека - запись ["pop"]. Пути сериализуются JSON, поэтому символ '|'
+    и другие разделители в путях не портят записи.
+    """
+
+    def __init__(self, path: str = UNDO_FILE) -> None:
+        """
+        Инициализация журнала.
+
+        Args:
+            path: Путь к файлу журнала
+        """
+        self._journal = AppendJournal(path)
+        self._stack: List[UndoRecord] = []
+
+    def load(self) -> None:
+        """
+        Загрузка стека из файла.
+
+        Файл читается с конца: каждая запись ["pop"] отменяет ближайшую более
+        раннюю операцию, чтение останавливается после MAX_UNDO_SIZE операций.
+        """
+        records: List[UndoRecord] = []
+        pending_pops = 0
+        for line in self._journal.iter_reverse():
+            data = json.loads(line)
+            if data == ['pop']:
+                pending_pops += 1
+            elif pending_pops:
+                pending_pops -= 1
+            else:
+                records.append(UndoRecord(*data))
+                if len(records) >= MAX_UNDO_SIZE:
+                    break
+        records.reverse()
+        self._stack = records
+        self._journal.records = self._journal.count()
+
+    def push(self, op: str, src: str, dst: str) -> UndoRecord:
+        """
+        Добавление операции на вершину стека.
+
+        Args:
+            op: Тип операции
+            src: Исходный путь
+            dst: Путь назначения
+
+        Returns:
+            Добавленная запись
+        """
+        record = UndoRecord(op, src, dst)
+        self._stack.append(record)
+        if len(self._stack) > MAX_UNDO_SIZE:
+            del self._stack[0]
+        self._append(json.dumps(list(record), ensure_ascii=False))
+        return record
+
+    def pop(self) -> Optional[UndoRecord]:
+        """
+        Снятие последней операции со стека за O(1).
+
+        Returns:
+            Запись или None, если отменять нечего
+        """
+        if not self._stack:
+            return None
+        record = self._stack.pop()
+        self._append(POP_RECORD)
+        return record
+
+    def peek(self) -> Optional[UndoRecord]:
+        """
+        Последняя операция без снятия со стека.
+
+        Returns:
+            Запись или None, если стек пуст
+        """
+        return self._stack[-1] if self._stack else None
+
+    def compact(self) -> None:
+        """Перезапись файла текущим содержимым стека."""
+        self._journal.rewrite(json.dumps(list(record), ensure_ascii=False)
+                              for record in self._stack)
+
+    def begin_batch(self) -> None:
+        """Начало пакетного режима: записи в файл откладываются до flush."""
+        self._journal.begin_batch()
+
+    def flush(self) -> None:
+        """Запись отложенных записей одним вызовом write."""
+        self._journal.flush()
+
+    def close(self) -> None:
+        """Закрытие файла журнала."""
+        self._journal.close()
+
+    def _append(self, line: str) -> None:
+        """
+        Дозапись строки в файл со сжатием после порога UNDO_COMPACT_THRESHOLD.
+
+        Args:
+            line: Сериализованная запись
+        """
+        self._journal.append(line)
+        if self._journal.records > UNDO_COMPACT_THRESHOLD:
+            self.compact()
+
+    def __len__(self) -> int:
+        """Количество операций в стеке."""
+        return len(self._stack)
+
+    def __iter__(self) -> Iterator[UndoRecord]:
+        """Итерация по операциям от самой ранней к последней."""
+        return iter(self._stack)
@@ -1,12 +1,12 @@
 """Конфигурация pytest и общие фикстуры для тестирования shell-эмулятора."""
 
-import pytest
-import os
-import tempfile
 import shutil
+import tempfile
 from pathlib import Path
 from typing import Generator
 
+import pytest
+
 
 @pytest.fixture
 def temp_dir() -> Generator[Path, None, None]:
@@ -24,6 +24,21 @@ def temp_dir() -> Generator[Path, None, None]:
     shutil.rmtree(temp_path, ignore_errors=True)
 
 
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """
+    Переносит рабочую директорию каждого теста во временную папку.
+
+    Команды создают `.history` и `.trash` относительно текущей директории,
+    поэтому без этой фикстуры тесты засоряли бы корень репозитория.
+
+    Returns:
+        Path: Рабочая директория теста
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
 @pytest.fixture
 def sample_files(temp_dir: Path) -> dict[str, Path]:
     """
@@ -73,6 +88,7 @@ def mock_logger():
         Mock: Мок-объект ShellLogger
     """
     from unittest.mock import Mock
+
     from src.logger import ShellLogger
 
     logger = Mock(spec=ShellLogger)
@@ -0,0 +1,86 @@
+"""Тесты для пакетного режима shell-эмулятора."""
+
+import os
+from unittest.mock import patch
+
+from src.constants import HISTORY_FILE
+from src.main import main
+from src.parser import split_commands
+from src.shell import Shell
+
+
+class TestBatchMode:
+    """Тесты для неинтерактивного выполнения команд."""
+
+    def test_split_commands(self):
+        """Тест: команды разделяются ';' и переводами строк вне кавычек."""
+        text = "ls -l; pwd\n# comment\n\ngrep 'a;b' file.txt\ncat \"x;y\""
+
+        assert split_commands(text) == ['ls -l', 'pwd', "grep 'a;b' file.txt", 'cat "x;y"']
+
+    def test_command_string_success(self, temp_dir, capsys):
+        """Тест: -c выполняет команды и возвращает 0 при успехе."""
+        (temp_dir / "a.txt").write_text("hello\n", encoding='utf-8')
+        os.chdir(temp_dir)
+
+        status = main(['-c', 'cat a.txt; pwd'])
+
+        captured = capsys.readouterr()
+        assert status == 0
+        assert captured.out == f"hello\n{temp_dir}\n"
+        assert '2 commands, 0 failed' in captured.err
+
+    def test_failed_command_sets_status(self, temp_dir, capsys):
+        """Тест: ошибка команды даёт ненулевой код возврата."""
+        os.chdir(temp_dir)
+
+        status = main(['-c', 'cat missing.txt; pwd'])
+
+        captured = capsys.readouterr()
+        assert status == 1
+        assert 'FAIL' in captured.err
+        assert '2 commands, 1 failed' in captured.err
+
+    def test_stop_on_error(self, temp_dir, capsys):
+        """Тест: -e останавливает выполнение на первой ошибке."""
+        os.chdir(temp_dir)
+
+        status = main(['-e', '-q', '-c', 'nosuchcommand; pwd'])
+
+        captured = capsys.readouterr()
+        assert status == 1
+        assert str(temp_dir) not in captured.out
+        assert captured.err == ''
+
+    def test_script_file(self, temp_dir, capsys):
+        """Тест: выполнение команд из файла скрипта."""
+        script = temp_dir / "script.sh"
+        script.write_text("# setup\npwd\nexit\npwd\n", encoding='utf-8')
+        os.chdir(temp_dir)
+
+        status = main([str(script), '--quiet'])
+
+        captured = capsys.readouterr()
+        assert status == 0
+        # После exit команды не выполняются
+        assert captured.out.count(str(temp_dir)) == 1
+
+    def test_missing_script(self, temp_dir, capsys):
+        """Тест: несуществующий скрипт - код возврата 2."""
+        os.chdir(temp_dir)
+
+        assert main([str(temp_dir / "none.sh")]) == 2
+
+    def test_history_written_once_per_batch(self, temp_dir):
+        """Тест: записи истории в пакетном режиме пишутся одним вызовом."""
+        os.chdir(temp_dir)
+        shell = Shell()
+
+        with patch('os.write', wraps=os.write) as mock_write, \
+                patch('builtins.print'):
+            status = shell.run_batch(['pwd', 'pwd', 'pwd'], report=False)
+
+        assert status == 0
+        assert mock_write.call_count == 1
+        with open(HISTORY_FILE, encoding='utf-8') as f:
+            assert f.read() == "pwd\npwd\npwd\n"
@@ -1,10 +1,10 @@
 """Тесты для команды cat."""
 
-import pytest
 import os
-from unittest.mock import Mock, patch, mock_open
+from unittest.mock import Mock, patch
 
 from src.commands.filesystem import FileSystemCommands
+from src.constants import CAT_CHUNK_SIZE
 from src.logger import ShellLogger
 
 
@@ -17,51 +17,48 @@ class TestCatCommand:
         self.fs_commands = FileSystemCommands(self.logger)
         self.fs_commands.current_dir = "/test/dir"
 
-    def test_cat_simple_file(self):
+    def _write(self, temp_dir, name, content):
+        """Создание файла во временной директории и переход в неё."""
+        path = temp_dir / name
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content, encoding='utf-8')
+        self.fs_commands.current_dir = str(temp_dir)
+        return path
+
+    def test_cat_simple_file(self, temp_dir, capsys):
         """Тест: cat выводит содержимое файла."""
         file_content = "Hello, World!\nThis is a test file."
+        self._write(temp_dir, "file.txt", file_content)
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=False), \
-                patch('os.path.abspath', return_value="/test/dir/file.txt"), \
-                patch('os.path.join', return_value="/test/dir/file.txt"), \
-                patch('builtins.open', mock_open(read_data=file_content)), \
-                patch('builtins.print') as mock_print:
-            self.fs_commands.cat("file.txt")
+        self.fs_commands.cat("file.txt")
 
-            mock_print.assert_called_once_with(file_content)
-            self.logger.log_success.assert_called_once()
+        assert capsys.readouterr().out == file_content + "\n"
+        self.logger.log_success.assert_called_once()
 
-    def test_cat_empty_file(self):
+    def test_cat_empty_file(self, temp_dir, capsys):
         """Тест: cat для пустого файла."""
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=False), \
-                patch('os.path.abspath', return_value="/test/dir/empty.txt"), \
-                patch('os.path.join', return_value="/test/dir/empty.txt"), \
-                patch('builtins.open', mock_open(read_data="")), \
-                patch('builtins.print') as mock_print:
-            self.fs_commands.cat("empty.txt")
+        self._write(temp_dir, "empty.txt", "")
 
-            mock_print.assert_called_once_with("")
+        self.fs_commands.cat("empty.txt")
 
-    def test_cat_multiline_file(self):
+        assert capsys.readouterr().out == ""
+        self.logger.log_success.assert_called_once()
+
+    def test_cat_multiline_file(self, temp_dir, capsys):
         """Тест: cat для многострочного файла."""
-        content = "Line 1\nLine 2\nLine 3\nLine 4"
+        content = "Line 1\nLine 2\nLine 3\nLine 4\n"
+        self._write(temp_dir, "multiline.txt", content)
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=False), \
-                patch('os.path.abspath', return_value="/test/dir/multiline.txt"), \
-                patch('os.path.join', return_value="/test/dir/multiline.txt"), \
-                patch('builtins.open', mock_open(read_data=content)), \
-                patch('builtins.print') as mock_print:
-            self.fs_commands.cat("multiline.txt")
+        self.fs_commands.cat("multiline.txt")
 
-            # Весь файл должен вывестись целиком
-            mock_print.assert_called_once_with(content)
+        # Весь файл должен вывестись целиком, без лишнего перевода строки
+        assert capsys.readouterr().out == content
 
     def test_cat_nonexistent_file(self):
         """Тест: cat для несуществующего файла выдаёт ошибку."""
-        with patch('os.path.exists', return_value=False), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=False), \
                 patch('os.path.abspath', return_value="/test/dir/nonexistent.txt"), \
                 patch('os.path.join', return_value="/test/dir/nonexistent.txt"), \
                 patch('builtins.print') as mock_print:
@@ -73,8 +70,8 @@ class TestCatCommand:
 
     def test_cat_directory(self):
         """Тест: cat для директории выдаёт ошибку."""
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=True), \
                 patch('os.path.abspath', return_value="/test/dir/folder"), \
                 patch('os.path.join', return_value="/test/dir/folder"), \
                 patch('builtins.print') as mock_print:
@@ -84,16 +81,42 @@ class TestCatCommand:
             assert 'Error' in error_msg
             assert 'directory' in error_msg.lower()
 
-    def test_cat_utf8_file(self):
+    def test_cat_utf8_file(self, temp_dir, capsys):
         """Тест: cat для файла с UTF-8 содержимым."""
         content = "Привет, мир! 你好世界! 🎉"
+        self._write(temp_dir, "utf8.txt", content)
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=False), \
-                patch('os.path.abspath', return_value="/test/dir/utf8.txt"), \
-                patch('os.path.join', return_value="/test/dir/utf8.txt"), \
-                patch('builtins.open', mock_open(read_data=content)), \
-                patch('builtins.print') as mock_print:
-            self.fs_commands.cat("utf8.txt")
+        self.fs_commands.cat("utf8.txt")
+
+        assert capsys.readouterr().out == content + "\n"
+
+    def test_cat_large_file_streams_in_chunks(self, temp_dir, capsys):
+        """Тест: большой файл выводится кусками, а не одним чтением."""
+        content = b"x" * (CAT_CHUNK_SIZE * 3 + 17) + b"\n"
+        path = self._write(temp_dir, "big.txt", content)
+
+        with patch.object(FileSystemCommands, '_stdout_fd', return_value=None):
+            self.fs_commands.cat("big.txt")
+
+        assert capsys.readouterr().out.encode() == path.read_bytes()
+
+    def test_cat_uses_sendfile_for_file_stdout(self, temp_dir, capfd):
+        """Тест: если stdout - файл, данные передаются через os.sendfile."""
+        content = "sendfile line\n" * 1000
+        self._write(temp_dir, "data.txt", content)
+
+        with patch('os.sendfile', wraps=os.sendfile) as mock_sendfile:
+            self.fs_commands.cat("data.txt")
+
+        assert mock_sendfile.called
+        assert capfd.readouterr().out == content
+
+    def test_cat_sendfile_failure_falls_back_to_copy(self, temp_dir, capfd):
+        """Тест: при ошибке os.sendfile используется копирование через буфер."""
+        content = "fallback\n"
+        self._write(temp_dir, "data.txt", content)
+
+        with patch('os.sendfile', side_effect=OSError("not supported")):
+            self.fs_commands.cat("data.txt")
 
-            mock_print.assert_called_once_with(content)
+        assert capfd.readouterr().out == content
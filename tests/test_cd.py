@@ -1,7 +1,5 @@
 """Тесты для команды cd."""
 
-import pytest
-import os
 from unittest.mock import Mock, patch
 
 from src.commands.filesystem import FileSystemCommands
@@ -21,8 +19,8 @@ class TestCdCommand:
         """Тест: cd в подпапку."""
         target = "/home/user/Documents"
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=True), \
                 patch('os.path.abspath', return_value=target), \
                 patch('os.path.join', return_value=target), \
                 patch('os.chdir') as mock_chdir, \
@@ -37,8 +35,8 @@ class TestCdCommand:
         """Тест: cd .. переходит в родительскую папку."""
         parent = "/home"
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=True), \
                 patch('os.path.dirname', return_value=parent), \
                 patch('os.chdir') as mock_chdir, \
                 patch('builtins.print'):
@@ -51,8 +49,8 @@ class TestCdCommand:
         """Тест: cd ~ переходит в домашнюю папку."""
         home = "/home/user"
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=True), \
                 patch('os.path.expanduser', return_value=home), \
                 patch('os.chdir') as mock_chdir, \
                 patch('builtins.print'):
@@ -64,8 +62,8 @@ class TestCdCommand:
         """Тест: cd с абсолютным путём."""
         target = "/usr/local/bin"
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=True), \
                 patch('os.path.abspath', return_value=target), \
                 patch('os.chdir') as mock_chdir, \
                 patch('builtins.print'):
@@ -76,7 +74,7 @@ class TestCdCommand:
 
     def test_cd_nonexistent_directory(self):
         """Тест: cd в несуществующую папку выдаёт ошибку."""
-        with patch('os.path.exists', return_value=False), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=False), \
                 patch('os.path.abspath', return_value="/nonexistent"), \
                 patch('os.path.join', return_value="/nonexistent"), \
                 patch('builtins.print') as mock_print:
@@ -91,8 +89,8 @@ class TestCdCommand:
 
     def test_cd_to_file_not_directory(self):
         """Тест: cd к файлу (не папке) выдаёт ошибку."""
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=False), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=False), \
                 patch('os.path.abspath', return_value="/home/user/file.txt"), \
                 patch('os.path.join', return_value="/home/user/file.txt"), \
                 patch('builtins.print') as mock_print:
@@ -1,10 +1,12 @@
 """Тесты для команды cp."""
 
-import pytest
 import os
 import shutil
 from unittest.mock import Mock, patch
 
+import pytest
+
+from src.commands.fastcopy import copy_file, copy_tree
 from src.commands.filesystem import FileSystemCommands
 from src.logger import ShellLogger
 
@@ -24,17 +26,18 @@ class TestCpCommand:
         src = "/test/dir/source.txt"
         dst = "/test/dir/copy.txt"
 
-        with patch('os.path.exists', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
                 patch('os.path.abspath', side_effect=[src, dst]), \
                 patch('os.path.join', side_effect=[src, dst]), \
-                patch('os.path.isdir', return_value=False), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=False), \
                 patch('shutil.copy2') as mock_copy, \
+                patch('os.path.getsize', return_value=0), \
                 patch('builtins.print') as mock_print:
             self.fs_commands.cp("source.txt", "copy.txt")
 
             mock_copy.assert_called_once_with(src, dst)
-            assert len(self.fs_commands.history) == 1
-            assert self.fs_commands.history[0].startswith('cp|')
+            assert len(self.fs_commands.undo_journal) == 1
+            assert self.fs_commands.undo_journal.peek().op == 'cp'
             assert 'SUCCESS' in mock_print.call_args[0][0] or 'Copied' in mock_print.call_args[0][0]
 
     def test_cp_file_to_directory(self):
@@ -43,28 +46,29 @@ class TestCpCommand:
         dst_dir = "/test/dir/backup"
         dst_file = "/test/dir/backup/file.txt"
 
-        with patch('os.path.exists', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
                 patch('os.path.abspath', side_effect=[src, dst_dir]), \
                 patch('os.path.join', side_effect=[src, dst_dir, dst_file]), \
-                patch('os.path.isdir', side_effect=[False, True]), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', side_effect=[False, True]), \
                 patch('os.path.basename', return_value='file.txt'), \
                 patch('shutil.copy2') as mock_copy, \
+                patch('os.path.getsize', return_value=0), \
                 patch('builtins.print'):
             self.fs_commands.cp("file.txt", "backup")
 
             # Файл должен скопироваться внутрь директории
             mock_copy.assert_called_once_with(src, dst_file)
-            assert len(self.fs_commands.history) == 1
+            assert len(self.fs_commands.undo_journal) == 1
 
     def test_cp_directory_without_recursive(self):
         """Тест: копирование директории без -r выдаёт ошибку."""
         src = "/test/dir/folder"
         dst = "/test/dir/folder_copy"
 
-        with patch('os.path.exists', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
                 patch('os.path.abspath', side_effect=[src, dst]), \
                 patch('os.path.join', side_effect=[src, dst]), \
-                patch('os.path.isdir', side_effect=[True]), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', side_effect=[True]), \
                 patch('builtins.print') as mock_print:
             self.fs_commands.cp("folder", "folder_copy", recursive=False)
 
@@ -78,22 +82,23 @@ class TestCpCommand:
         src = "/test/dir/folder"
         dst = "/test/dir/folder_copy"
 
-        with patch('os.path.exists', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
                 patch('os.path.abspath', side_effect=[src, dst]), \
                 patch('os.path.join', side_effect=[src, dst]), \
-                patch('os.path.isdir', side_effect=[True]), \
-                patch('shutil.copytree') as mock_copytree, \
+                patch.object(self.fs_commands.fs_cache, 'isdir', side_effect=[True]), \
+                patch('src.commands.filesystem.copy_tree', return_value=(0, 0)) as mock_copy_tree, \
                 patch('builtins.print') as mock_print:
             self.fs_commands.cp("folder", "folder_copy", recursive=True)
 
-            mock_copytree.assert_called_once_with(src, dst)
-            assert len(self.fs_commands.history) == 1
+            mock_copy_tree.assert_called_once()
+            assert mock_copy_tree.call_args[0][:2] == (src, dst)
+            assert len(self.fs_commands.undo_journal) == 1
             success_msg = mock_print.call_args[0][0]
             assert 'Copied' in success_msg or 'SUCCESS' in success_msg
 
     def test_cp_nonexistent_source(self):
         """Тест: копирование несуществующего файла выдаёт ошибку."""
-        with patch('os.path.exists', return_value=False), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=False), \
                 patch('os.path.abspath', return_value="/test/dir/nonexistent.txt"), \
                 patch('os.path.join', return_value="/test/dir/nonexistent.txt"), \
                 patch('builtins.print') as mock_print:
@@ -101,7 +106,7 @@ class TestCpCommand:
 
             error_msg = mock_print.call_args[0][0]
             assert 'Error' in error_msg
-            assert len(self.fs_commands.history) == 0  # Не должно сохраниться в истории
+            assert len(self.fs_commands.undo_journal) == 0  # Не должно сохраниться в журнале undo
             self.logger.log_error.assert_called_once()
 
     def test_cp_creates_undo_entry(self):
@@ -109,17 +114,162 @@ class TestCpCommand:
         src = "/test/dir/original.txt"
         dst = "/test/dir/copy.txt"
 
-        with patch('os.path.exists', return_value=True), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
                 patch('os.path.abspath', side_effect=[src, dst]), \
                 patch('os.path.join', side_effect=[src, dst]), \
-                patch('os.path.isdir', return_value=False), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=False), \
                 patch('shutil.copy2'), \
+                patch('os.path.getsize', return_value=0), \
                 patch('builtins.print'):
             self.fs_commands.cp("original.txt", "copy.txt")
 
             # Проверяем формат записи для undo
-            assert len(self.fs_commands.history) == 1
-            undo_entry = self.fs_commands.history[0]
-            assert undo_entry.startswith('cp|')
-            assert src in undo_entry
-            assert dst in undo_entry
+            assert len(self.fs_commands.undo_journal) == 1
+            record = self.fs_commands.undo_journal.peek()
+            assert record.op == 'cp'
+            assert record.src == src
+            assert record.dst == dst
+
+
+class TestCopyTree:
+    """Тесты параллельного копирования каталогов на реальной файловой системе."""
+
+    def _make_tree(self, root):
+        """Создание тестового дерева каталогов."""
+        (root / "sub" / "deep").mkdir(parents=True)
+        (root / "empty").mkdir()
+        (root / "a.txt").write_text("alpha")
+        (root / "sub" / "b.bin").write_bytes(os.urandom(300 * 1024))
+        (root / "sub" / "deep" / "c.txt").write_text("gamma\n" * 1000)
+
+    def test_copy_tree_copies_all_files(self, tmp_path):
+        """Тест: все файлы и каталоги копируются с тем же содержимым."""
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        self._make_tree(src)
+
+        files, size = copy_tree(str(src), str(dst), workers=4)
+
+        assert files == 3
+        assert size == 5 + 300 * 1024 + 6000
+        assert (dst / "empty").is_dir()
+        for rel in ("a.txt", "sub/b.bin", "sub/deep/c.txt"):
+            assert (dst / rel).read_bytes() == (src / rel).read_bytes()
+
+    def test_copy_tree_preserves_metadata(self, tmp_path):
+        """Тест: права и время изменения сохраняются, как в copy2."""
+        src = tmp_path / "src"
+        dst = tmp_path / "dst"
+        self._make_tree(src)
+        os.chmod(src / "a.txt", 0o600)
+        os.utime(src / "a.txt", (1_000_000_000, 1_000_000_000))
+        os.utime(src / "sub", (1_100_000_000, 1_100_000_000))
+
+        copy_tree(str(src), str(dst), workers=2)
+
+        assert (dst / "a.txt").stat().st_mode & 0o777 == 0o600
+        assert (dst / "a.txt").stat().st_mtime == 1_000_000_000
+        assert (dst / "sub").stat().st_mtime == 1_100_000_000
+
+    def test_copy_tree_existing_destination(self, tmp_path):
+        """Тест: существующий каталог назначения - ошибка, как у copytree."""
+        src = tmp_path / "src"
+        self._make_tree(src)
+        (tmp_path / "dst").mkdir()
+
+        with pytest.raises(FileExistsError):
+            copy_tree(str(src), str(tmp_path / "dst"), workers=2)
+
+    def test_copy_tree_reports_progress(self, tmp_path):
+        """Тест: обработчик прогресса получает файлы и байты."""
+        src = tmp_path / "src"
+        self._make_tree(src)
+        calls = []
+
+        copy_tree(str(src), str(tmp_path / "dst"), workers=2,
+                  progress=lambda *args: calls.append(args))
+
+        assert len(calls) == 3
+        assert calls[-1] == (3, 3, 5 + 300 * 1024 + 6000, 5 + 300 * 1024 + 6000)
+
+    def test_copy_tree_skips_symlink_loop(self, tmp_path):
+        """Тест: петля символических ссылок не приводит к бесконечному обходу."""
+        src = tmp_path / "src"
+        (src / "sub").mkdir(parents=True)
+        (src / "sub" / "loop").symlink_to(src)
+
+        files, _ = copy_tree(str(src), str(tmp_path / "dst"), workers=2)
+
+        assert files == 0
+        assert os.listdir(tmp_path / "dst" / "sub") == []
+
+    def test_copy_tree_follows_symlink_to_sibling(self, tmp_path):
+        """Тест: каталог, доступный по ссылке, копируется и по ссылке."""
+        src = tmp_path / "src"
+        (src / "real").mkdir(parents=True)
+        (src / "real" / "f").write_text("data")
+        (src / "link").symlink_to("real")
+
+        files, _ = copy_tree(str(src), str(tmp_path / "dst"), workers=2)
+
+        assert files == 2
+        assert (tmp_path / "dst" / "real" / "f").read_text() == "data"
+        assert (tmp_path / "dst" / "link" / "f").read_text() == "data"
+        assert not (tmp_path / "dst" / "link").is_symlink()
+
+    @pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason="нет os.mkfifo")
+    def test_copy_file_rejects_fifo(self, tmp_path):
+        """Тест: FIFO отклоняется до открытия, копирование не блокируется."""
+        fifo = tmp_path / "pipe"
+        os.mkfifo(fifo)
+
+        with pytest.raises(shutil.SpecialFileError, match="named pipe"):
+            copy_file(str(fifo), str(tmp_path / "copy"))
+        assert not (tmp_path / "copy").exists()
+
+    @pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason="нет os.mkfifo")
+    def test_copy_tree_rejects_fifo(self, tmp_path):
+        """Тест: FIFO в дереве вызывает ошибку, а не зависание cp -r."""
+        src = tmp_path / "src"
+        src.mkdir()
+        os.mkfifo(src / "pipe")
+
+        with pytest.raises(shutil.SpecialFileError):
+            copy_tree(str(src), str(tmp_path / "dst"), workers=2)
+
+    def test_copy_tree_into_itself(self, tmp_path):
+        """Тест: каталог назначения внутри источника не копируется в себя."""
+        src = tmp_path / "src"
+        self._make_tree(src)
+
+        files, _ = copy_tree(str(src), str(src / "copy"), workers=2)
+
+        assert files == 3
+        assert not (src / "copy" / "copy").exists()
+
+    def test_copy_file_fallback_without_zero_copy(self, tmp_path):
+        """Тест: без copy_file_range и sendfile данные копируются через буфер."""
+        src = tmp_path / "src.bin"
+        data = os.urandom(100 * 1024)
+        src.write_bytes(data)
+
+        with patch('os.copy_file_range', side_effect=OSError, create=True), \
+                patch('os.sendfile', side_effect=OSError, create=True):
+            copied = copy_file(str(src), str(tmp_path / "dst.bin"))
+
+        assert copied == len(data)
+        assert (tmp_path / "dst.bin").read_bytes() == data
+
+    def test_cp_recursive_command(self, tmp_path, capsys):
+        """Тест: cp -r копирует каталог, пишет статистику в stderr и запись undo."""
+        self._make_tree(tmp_path / "src")
+        fs_commands = FileSystemCommands(Mock(spec=ShellLogger))
+        fs_commands.current_dir = str(tmp_path)
+
+        fs_commands.cp("src", "dst", recursive=True, workers=2)
+
+        captured = capsys.readouterr()
+        assert "Copied" in captured.out
+        assert "Copied 3 files" in captured.err
+        assert (tmp_path / "dst" / "sub" / "deep" / "c.txt").exists()
+        assert fs_commands.undo_journal.peek().op == 'cp'
@@ -0,0 +1,185 @@
+"""Тесты для кэша метаданных файловой системы."""
+
+import os
+import stat as stat_module
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands.filesystem import FileSystemCommands
+from src.fscache import FsCache
+from src.logger import ShellLogger
+
+
+class TestFsCache:
+    """Тесты FsCache."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.cache = FsCache()
+
+    def teardown_method(self):
+        """Освобождение дескриптора inotify."""
+        self.cache.close()
+
+    def test_stat_hits(self, tmp_path):
+        """Тест: повторный stat берётся из кэша без системного вызова."""
+        (tmp_path / "a.txt").write_text("a")
+        path = str(tmp_path / "a.txt")
+
+        assert self.cache.isfile(path)
+        with patch('os.lstat') as mock_lstat:
+            assert self.cache.isfile(path)
+            assert self.cache.exists(path)
+            assert not self.cache.isdir(path)
+        mock_lstat.assert_not_called()
+        assert self.cache.hits == 3
+
+    def test_external_changes_invalidate(self, tmp_path):
+        """Тест: изменения другим процессом видны сразу (inotify)."""
+        if self.cache._inotify is None:
+            pytest.skip("inotify is not available")
+        path = str(tmp_path / "new.txt")
+
+        assert not self.cache.exists(path)
+        assert self.cache.listdir(str(tmp_path)) == []
+        (tmp_path / "new.txt").write_text("x")
+        assert self.cache.exists(path)
+        assert self.cache.listdir(str(tmp_path)) == ["new.txt"]
+
+        size = self.cache.stat(path).st_size
+        (tmp_path / "new.txt").write_text("longer")
+        assert self.cache.stat(path).st_size != size
+
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.txt").write_text("b")
+        listing = dict(self.cache.listdir_stat(str(tmp_path)))
+        (tmp_path / "sub" / "c.txt").write_text("c")
+        updated = dict(self.cache.listdir_stat(str(tmp_path)))
+        # Изменение содержимого подкаталога меняет его mtime в списке родителя
+        assert updated["sub"] is not listing["sub"]
+
+    def test_ttl_fallback(self, tmp_path):
+        """Тест: без inotify записи живут ttl секунд."""
+        cache = FsCache(ttl=0.05, use_inotify=False)
+        path = str(tmp_path / "late.txt")
+
+        assert not cache.exists(path)
+        (tmp_path / "late.txt").write_text("x")
+        assert not cache.exists(path)
+        time.sleep(0.06)
+        assert cache.exists(path)
+        cache.close()
+
+    def test_ttl_with_inotify(self, tmp_path):
+        """Тест: с inotify записи тоже истекают (переименование предка событий не даёт)."""
+        cache = FsCache(ttl=0.05)
+        if cache._inotify is None:
+            cache.close()
+            pytest.skip("inotify is not available")
+        (tmp_path / "d" / "e").mkdir(parents=True)
+        (tmp_path / "d" / "e" / "f.txt").write_text("x")
+        path = str(tmp_path / "d" / "e" / "f.txt")
+
+        assert cache.exists(path)
+        os.rename(tmp_path / "d", tmp_path / "moved")
+        time.sleep(0.06)
+        assert not cache.exists(path)
+        cache.close()
+
+    def test_lru_eviction(self, tmp_path):
+        """Тест: при превышении лимита памяти вытесняются самые старые записи."""
+        cache = FsCache(max_bytes=4000, use_inotify=False)
+        paths = [str(tmp_path / f"f{i:03d}") for i in range(50)]
+        for path in paths:
+            cache.stat(path)
+
+        assert cache.size <= 4000
+        assert 0 < len(cache) < 50
+        misses = cache.misses
+        cache.stat(paths[-1])
+        cache.stat(paths[0])
+        assert cache.misses == misses + 1
+        cache.close()
+
+    def test_invalidate_recursive(self, tmp_path):
+        """Тест: recursive сбрасывает записи всего поддерева."""
+        cache = FsCache(ttl=60, use_inotify=False)
+        (tmp_path / "d" / "e").mkdir(parents=True)
+        inner = str(tmp_path / "d" / "e" / "f.txt")
+        cache.stat(inner)
+        cache.listdir(str(tmp_path / "d" / "e"))
+        (tmp_path / "d" / "e" / "f.txt").write_text("x")
+
+        cache.invalidate(str(tmp_path / "d"))
+        assert not cache.exists(inner)
+        cache.invalidate(str(tmp_path / "d"), recursive=True)
+        assert cache.exists(inner)
+        assert cache.listdir(str(tmp_path / "d" / "e")) == ["f.txt"]
+        cache.close()
+
+    def test_symlinks_not_cached(self, tmp_path):
+        """Тест: ссылка разыменовывается при каждом обращении."""
+        (tmp_path / "a").write_text("a")
+        (tmp_path / "link").symlink_to(tmp_path / "a")
+        link = str(tmp_path / "link")
+
+        assert self.cache.isfile(link)
+        (tmp_path / "a").unlink()
+        (tmp_path / "a").mkdir()
+        assert self.cache.isdir(link)
+
+    def test_listing_is_a_copy(self, tmp_path):
+        """Тест: изменение возвращённого списка не портит кэш."""
+        (tmp_path / "a").write_text("a")
+        listing = self.cache.listdir(str(tmp_path))
+        listing.clear()
+        assert self.cache.listdir(str(tmp_path)) == ["a"]
+
+    def test_listdir_stat_dangling_symlink(self, tmp_path):
+        """Тест: висячая ссылка получает stat самой ссылки, а не ломает список."""
+        (tmp_path / "a").write_text("a")
+        (tmp_path / "dangling").symlink_to(tmp_path / "missing")
+
+        listing = dict(self.cache.listdir_stat(str(tmp_path)))
+
+        assert sorted(listing) == ["a", "dangling"]
+        assert stat_module.S_ISLNK(listing["dangling"].st_mode)
+
+
+class TestCommandsInvalidate:
+    """Тесты инвалидации кэша командами."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.fs_commands = FileSystemCommands(self.logger)
+
+    def test_mutations_visible_without_inotify(self, tmp_path, capsys):
+        """Тест: cp, mv и rm сбрасывают кэш, даже если inotify нет."""
+        cache = FsCache(ttl=60, use_inotify=False)
+        self.fs_commands.fs_cache = cache
+        work = tmp_path / "work"
+        work.mkdir()
+        self.fs_commands.current_dir = str(work)
+        (work / "a.txt").write_text("a")
+
+        self.fs_commands.ls(str(work))
+        self.fs_commands.cp("a.txt", "b.txt")
+        self.fs_commands.mv("a.txt", "c.txt")
+        capsys.readouterr()
+        self.fs_commands.ls(str(work))
+        assert capsys.readouterr().out.split() == ["b.txt", "c.txt"]
+
+        with patch('builtins.input', return_value='y'):
+            self.fs_commands.rm("b.txt")
+        self.fs_commands.cat("b.txt")
+        assert "not found" in capsys.readouterr().out
+        cache.close()
+
+    def test_close_releases_cache(self):
+        """Тест: close команд закрывает кэш и его дескриптор inotify."""
+        cache = self.fs_commands.fs_cache
+        self.fs_commands.close()
+        assert cache._inotify is None
@@ -1,11 +1,13 @@
 """Тесты для команды grep."""
 
-import pytest
-import os
 import re
-from unittest.mock import Mock, patch, mock_open
+from unittest.mock import Mock, patch
+
+import pytest
 
 from src.commands.advanced import AdvancedCommands
+from src.commands.search import compile_matcher
+from src.commands.walker import walk
 from src.logger import ShellLogger
 
 
@@ -18,75 +20,71 @@ class TestGrepCommand:
         self.advanced_commands = AdvancedCommands(self.logger)
         self.advanced_commands.current_dir = "/test/dir"
 
-    def test_grep_find_pattern_in_file(self):
+    def _write(self, temp_dir, name, content):
+        """Создание файла во временной директории и переход в неё."""
+        path = temp_dir / name
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content, encoding='utf-8')
+        self.advanced_commands.current_dir = str(temp_dir)
+        return path
+
+    def test_grep_find_pattern_in_file(self, temp_dir):
         """Тест: grep находит паттерн в файле."""
-        file_content = "Line 1: Hello\nLine 2: World\nLine 3: Hello again"
+        self._write(temp_dir, "test.txt", "Line 1: Hello\nLine 2: World\nLine 3: Hello again")
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', return_value="/test/dir/test.txt"), \
-                patch('os.path.join', return_value="/test/dir/test.txt"), \
-                patch('os.path.isfile', return_value=True), \
-                patch('builtins.open', mock_open(read_data=file_content)), \
-                patch('builtins.print') as mock_print:
+        with patch('builtins.print') as mock_print:
             self.advanced_commands.grep("Hello", "test.txt")
 
             # Должны вывестись строки с "Hello"
             calls = [str(call) for call in mock_print.call_args_list]
             assert any('Hello' in call for call in calls)
             # Должны быть номера строк
-            assert any(':1:' in call or 'Line 1' in call for call in calls)
+            assert any(':1:' in call for call in calls)
+            assert any(':3: Line 3: Hello again' in call for call in calls)
+            assert not any('World' in call for call in calls)
 
-    def test_grep_case_insensitive(self):
+    def test_grep_case_insensitive(self, temp_dir):
         """Тест: grep с опцией -i игнорирует регистр."""
-        file_content = "hello world\nHELLO WORLD\nHeLLo WoRLd"
+        self._write(temp_dir, "test.txt", "hello world\nHELLO WORLD\nHeLLo WoRLd")
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', return_value="/test/dir/test.txt"), \
-                patch('os.path.join', return_value="/test/dir/test.txt"), \
-                patch('os.path.isfile', return_value=True), \
-                patch('builtins.open', mock_open(read_data=file_content)), \
-                patch('builtins.print') as mock_print:
+        with patch('builtins.print') as mock_print:
             self.advanced_commands.grep("HELLO", "test.txt", ignore_case=True)
 
             # Все три строки должны совпасть
             assert mock_print.call_count >= 3
 
-    def test_grep_no_matches(self):
+    def test_grep_no_matches(self, temp_dir):
         """Тест: grep не находит совпадений."""
-        file_content = "Line 1\nLine 2\nLine 3"
+        self._write(temp_dir, "test.txt", "Line 1\nLine 2\nLine 3")
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', return_value="/test/dir/test.txt"), \
-                patch('os.path.join', return_value="/test/dir/test.txt"), \
-                patch('os.path.isfile', return_value=True), \
-                patch('builtins.open', mock_open(read_data=file_content)), \
-                patch('builtins.print') as mock_print:
+        with patch('builtins.print') as mock_print:
             self.advanced_commands.grep("NotFound", "test.txt")
 
             # Должно вывестись сообщение "No matches found"
             calls = [str(call) for call in mock_print.call_args_list]
             assert any('No matches' in call for call in calls)
 
-    def test_grep_recursive_in_directory(self):
+    def test_grep_recursive_in_directory(self, temp_dir):
         """Тест: grep -r ищет рекурсивно в директории."""
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', return_value="/test/dir/folder"), \
-                patch('os.path.join', side_effect=lambda *args: '/'.join(args)), \
-                patch('os.path.isfile', return_value=False), \
-                patch('os.path.isdir', return_value=True), \
-                patch('os.walk', return_value=[
-                    ("/test/dir/folder", [], ["file1.txt", "file2.txt"])
-                ]), \
-                patch('builtins.open', mock_open(read_data="test pattern")), \
-                patch('builtins.print') as mock_print:
+        folder = temp_dir / "folder" / "nested"
+        folder.mkdir(parents=True)
+        (temp_dir / "folder" / "file1.txt").write_text("test pattern", encoding='utf-8')
+        (folder / "file2.txt").write_text("test pattern", encoding='utf-8')
+        self.advanced_commands.current_dir = str(temp_dir)
+
+        with patch('builtins.print') as mock_print:
             self.advanced_commands.grep("pattern", "folder", recursive=True)
 
             # Должны проверяться файлы рекурсивно
-            assert mock_print.call_count >= 1
+            calls = [str(call) for call in mock_print.call_args_list]
+            assert any('file1.txt:1:' in call for call in calls)
+            assert any('file2.txt:1:' in call for call in calls)
 
     def test_grep_nonexistent_path(self):
         """Тест: grep для несуществующего пути выдаёт ошибку."""
-        with patch('os.path.exists', return_value=False), \
+        with patch.object(self.advanced_commands.fs_cache, 'exists', return_value=False), \
                 patch('os.path.abspath', return_value="/test/dir/nonexistent"), \
                 patch('os.path.join', return_value="/test/dir/nonexistent"), \
                 patch('builtins.print') as mock_print:
@@ -96,19 +94,150 @@ class TestGrepCommand:
             assert 'Error' in error_call
             self.logger.log_error.assert_called_once()
 
-    def test_grep_regex_pattern(self):
+    def test_grep_regex_pattern(self, temp_dir):
         """Тест: grep поддерживает регулярные выражения."""
-        file_content = "test123\ntest456\nabc789"
+        self._write(temp_dir, "test.txt", "test123\ntest456\nabc789")
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', return_value="/test/dir/test.txt"), \
-                patch('os.path.join', return_value="/test/dir/test.txt"), \
-                patch('os.path.isfile', return_value=True), \
-                patch('builtins.open', mock_open(read_data=file_content)), \
-                patch('builtins.print') as mock_print:
+        with patch('builtins.print') as mock_print:
             self.advanced_commands.grep(r"test\d+", "test.txt")
 
             # Должны найтись test123 и test456, но не abc789
             calls = [str(call) for call in mock_print.call_args_list]
             matching_calls = [c for c in calls if 'test' in c]
             assert len(matching_calls) >= 2
+            assert not any('abc789' in call for call in calls)
+
+    def test_grep_anchors_apply_per_line(self, temp_dir):
+        """Тест: '^' и '$' работают для каждой строки, а не всего файла."""
+        self._write(temp_dir, "test.txt", "foo bar\nbar foo\nbar\n")
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("^bar$", "test.txt")
+
+            calls = [c[0][0] for c in mock_print.call_args_list]
+            assert calls == [f"{temp_dir / 'test.txt'}:3: bar"]
+
+    def test_grep_match_does_not_span_lines(self, temp_dir):
+        """Тест: совпадение через перевод строки не засчитывается."""
+        self._write(temp_dir, "test.txt", "alpha\nbeta\n")
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep(r"alpha\sbeta", "test.txt")
+
+            calls = [str(call) for call in mock_print.call_args_list]
+            assert any('No matches' in call for call in calls)
+
+    def test_grep_line_numbers_far_into_file(self, temp_dir):
+        """Тест: номера строк верны после большого участка без совпадений."""
+        content = "filler line\n" * 200000 + "needle here\n"
+        self._write(temp_dir, "big.log", content)
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("needle", "big.log")
+
+            mock_print.assert_called_once_with(f"{temp_dir / 'big.log'}:200001: needle here")
+
+    def test_grep_binary_file_matches(self, temp_dir):
+        """Тест: для бинарного файла выводится 'Binary file ... matches'."""
+        self._write(temp_dir, "data.bin", b"\x00\x01needle\x02\nneedle")
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("needle", "data.bin")
+
+            mock_print.assert_called_once_with(f"Binary file {temp_dir / 'data.bin'} matches")
+
+    def test_grep_empty_file(self, temp_dir):
+        """Тест: пустой файл не вызывает ошибок mmap."""
+        self._write(temp_dir, "empty.txt", "")
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("anything", "empty.txt")
+
+            calls = [str(call) for call in mock_print.call_args_list]
+            assert any('No matches' in call for call in calls)
+            self.logger.log_error.assert_not_called()
+
+    def test_compile_matcher_literal_fast_path(self):
+        """Тест: шаблон без метасимволов ищется как литерал bytes."""
+        assert compile_matcher("ERROR") == b"ERROR"
+        assert not isinstance(compile_matcher("ERR.R"), bytes)
+        assert not isinstance(compile_matcher("error", ignore_case=True), bytes)
+        assert not isinstance(compile_matcher("привет"), bytes)
+        assert compile_matcher(r"def \w+\(self").literal == b"(self"
+
+    def test_compile_matcher_bytes_regex(self):
+        """Тест: ASCII-шаблоны, в том числе с -i, ищутся bytes-регулярным выражением."""
+        for pattern, ignore_case in [("ERR[0-9]+", False), ("error", True), ("^a+$", True)]:
+            matcher = compile_matcher(pattern, ignore_case)
+            assert isinstance(matcher, re.Pattern) and isinstance(matcher.pattern, bytes)
+        assert not isinstance(compile_matcher("h.llo"), re.Pattern)
+        assert not isinstance(compile_matcher(r"\w+"), re.Pattern)
+        assert not isinstance(compile_matcher("[^a]"), re.Pattern)
+
+    def test_grep_ignore_case_bytes_regex(self, temp_dir):
+        """Тест: -i с ASCII-шаблоном находит строки без декодирования и не склеивает строки."""
+        self._write(temp_dir, "test.txt", "Error: one\nok\nалфавит ERROR two\nalpha\nbeta\n")
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("^error|error two$", "test.txt", ignore_case=True)
+            self.advanced_commands.grep("alpha[ \n]beta", "test.txt")
+
+        calls = [c[0][0] for c in mock_print.call_args_list]
+        path = temp_dir / 'test.txt'
+        assert calls == [f"{path}:1: Error: one", f"{path}:3: алфавит ERROR two",
+                         "No matches found for pattern: alpha[ \n]beta"]
+
+    @pytest.mark.parametrize("pattern, ignore_case, expected", [
+        ("привет", True, ["1: ПРИВЕТ мир", "3: привет"]),
+        ("h.llo", False, ["2: héllo", "4: hello"]),
+        ("^h[é]llo$", False, ["2: héllo"]),
+        (r"\w+ мир", False, ["1: ПРИВЕТ мир"]),
+    ])
+    def test_grep_non_ascii(self, temp_dir, pattern, ignore_case, expected):
+        """Тест: '.', классы символов и -i работают с не-ASCII текстом."""
+        path = self._write(temp_dir, "utf8.txt", "ПРИВЕТ мир\nhéllo\nпривет\nhello\n")
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep(pattern, "utf8.txt", ignore_case=ignore_case)
+
+        assert [c[0][0] for c in mock_print.call_args_list] == \
+            [f"{path}:{line}" for line in expected]
+
+    def test_grep_recursive_parallel_stable_order(self, temp_dir):
+        """Тест: grep -r с пулом выводит результаты в порядке обхода."""
+        for i in range(20):
+            sub = temp_dir / f"dir{i % 3}"
+            sub.mkdir(exist_ok=True)
+            (sub / f"file{i:02d}.log").write_text(f"ERROR {i}\nok\n", encoding='utf-8')
+
+        expected = [item.path for item in walk(str(temp_dir), dirs=False)]
+
+        self.advanced_commands.current_dir = str(temp_dir)
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("ERROR", ".", recursive=True, workers=4)
+
+        printed = [c[0][0] for c in mock_print.call_args_list if not c[1].get('file')]
+        assert [line.split(':')[0] for line in printed] == expected
+
+    def test_grep_recursive_reports_throughput(self, temp_dir):
+        """Тест: grep -r сообщает files/s и bytes/s."""
+        (temp_dir / "a.txt").write_text("needle\n", encoding='utf-8')
+        self.advanced_commands.current_dir = str(temp_dir)
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("needle", ".", recursive=True, workers=2)
+
+        stats = [c[0][0] for c in mock_print.call_args_list if c[1].get('file')]
+        assert len(stats) == 1
+        assert 'files/s' in stats[0] and 'MiB/s' in stats[0]
+
+    def test_grep_recursive_process_pool(self, temp_dir):
+        """Тест: grep -r работает с пулом процессов."""
+        (temp_dir / "a.txt").write_text("alpha\nbeta\n", encoding='utf-8')
+        self.advanced_commands.current_dir = str(temp_dir)
+
+        with patch('builtins.print') as mock_print:
+            self.advanced_commands.grep("beta", ".", recursive=True, workers=2, pool='process')
+
+        calls = [str(call) for call in mock_print.call_args_list]
+        assert any('a.txt:2: beta' in call for call in calls)
@@ -1,9 +1,10 @@
 """Тесты для команды history."""
 
-import pytest
+import os
 from unittest.mock import Mock, patch
 
 from src.commands.advanced import AdvancedCommands
+from src.constants import HISTORY_COMPACT_THRESHOLD, HISTORY_FILE, MAX_HISTORY_SIZE
 from src.logger import ShellLogger
 
 
@@ -40,26 +41,15 @@ class TestHistoryCommand:
             calls = [str(call) for call in mock_print.call_args_list]
             assert any('History' in call for call in calls)
 
-    def test_history_filters_undo_entries(self):
-        """Тест: history не показывает служебные записи для undo."""
-        self.advanced_commands.history = [
-            "ls",
-            "cp|/test/source|/test/dest",  # Служебная запись
-            "cd Documents",
-            "mv|/test/old|/test/new"  # Служебная запись
-        ]
+    def test_history_shows_commands_with_pipes(self):
+        """Тест: history выводит команды с '|' как есть, без фильтрации."""
+        self.advanced_commands.history = ["ls", 'grep "a|b" file.txt']
 
         with patch('builtins.print') as mock_print:
             self.advanced_commands.show_history()
 
-            # Служебные записи не должны показываться
             calls = [str(call) for call in mock_print.call_args_list]
-            command_calls = [c for c in calls if ':' in c and any(cmd in c for cmd in ['ls', 'cd'])]
-            assert any('ls' in call for call in command_calls)
-            assert any('cd Documents' in call for call in command_calls)
-            # Служебные записи с | не должны показываться
-            assert not any('cp|' in call for call in command_calls)
-            assert not any('mv|' in call for call in command_calls)
+            assert any('grep "a|b" file.txt' in call for call in calls)
 
     def test_history_limits_to_100(self):
         """Тест: history показывает максимум 100 последних команд."""
@@ -84,3 +74,92 @@ class TestHistoryCommand:
             calls = [str(call) for call in mock_print.call_args_list]
             # Проверяем что есть нумерация (1:, 2:, 3:)
             assert any('1:' in call or '1 ' in call for call in calls)
+
+
+class TestHistoryJournal:
+    """Тесты для журнала истории с дозаписью."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+
+    def test_add_to_history_appends_single_record(self):
+        """Тест: add_to_history дописывает одну строку, не переписывая файл."""
+        commands = AdvancedCommands(self.logger)
+        commands.add_to_history("ls")
+
+        with patch.object(commands._history_journal, 'rewrite') as mock_rewrite, \
+                patch('os.write', wraps=os.write) as mock_write:
+            commands.add_to_history("pwd")
+
+            mock_rewrite.assert_not_called()
+            mock_write.assert_called_once()
+
+        with open(HISTORY_FILE, encoding='utf-8') as f:
+            assert f.read() == "ls\npwd\n"
+
+    def test_history_restored_from_journal(self):
+        """Тест: история восстанавливается из журнала при запуске."""
+        commands = AdvancedCommands(self.logger)
+        for cmd in ["ls", "cd Documents", "cat file.txt"]:
+            commands.add_to_history(cmd)
+        commands._history_journal.close()
+
+        restored = AdvancedCommands(self.logger)
+        assert restored.history == ["ls", "cd Documents", "cat file.txt"]
+
+    def test_load_reads_only_needed_tail(self):
+        """Тест: при загрузке берутся только последние MAX_HISTORY_SIZE записей."""
+        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
+            for i in range(MAX_HISTORY_SIZE * 3):
+                f.write(f"command_{i}\n")
+
+        commands = AdvancedCommands(self.logger)
+        assert len(commands.history) == MAX_HISTORY_SIZE
+        assert commands.history[0] == f"command_{MAX_HISTORY_SIZE * 2}"
+        assert commands.history[-1] == f"command_{MAX_HISTORY_SIZE * 3 - 1}"
+
+    def test_journal_compacted_past_threshold(self):
+        """Тест: журнал сжимается только после превышения порога."""
+        commands = AdvancedCommands(self.logger)
+        for i in range(HISTORY_COMPACT_THRESHOLD):
+            commands.add_to_history(f"command_{i}")
+
+        with open(HISTORY_FILE, encoding='utf-8') as f:
+            assert len(f.readlines()) == HISTORY_COMPACT_THRESHOLD
+
+        commands.add_to_history("last")
+
+        with open(HISTORY_FILE, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert len(lines) == MAX_HISTORY_SIZE
+        assert lines[-1] == "last"
+
+    def test_loaded_journal_counted_for_compaction(self):
+        """Тест: порог сжатия учитывает все записи файла, а не только прочитанный хвост."""
+        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
+            for i in range(HISTORY_COMPACT_THRESHOLD):
+                f.write(f"command_{i}\n")
+
+        commands = AdvancedCommands(self.logger)
+        commands.add_to_history("last")
+
+        with open(HISTORY_FILE, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert len(lines) == MAX_HISTORY_SIZE
+        assert lines[-1] == "last"
+
+    def test_compaction_after_chdir(self, tmp_path, monkeypatch):
+        """Тест: сжатие после смены директории перезаписывает исходный журнал."""
+        commands = AdvancedCommands(self.logger)
+        journal_path = os.path.abspath(HISTORY_FILE)
+        other = tmp_path / "other"
+        other.mkdir()
+        monkeypatch.chdir(other)
+
+        for i in range(HISTORY_COMPACT_THRESHOLD + 1):
+            commands.add_to_history(f"command_{i}")
+
+        with open(journal_path, encoding='utf-8') as f:
+            assert len(f.read().splitlines()) == MAX_HISTORY_SIZE
+        assert os.listdir(other) == []
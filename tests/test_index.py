@@ -0,0 +1,184 @@
+"""Тесты для триграммного индекса и команды index."""
+
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands.advanced import AdvancedCommands
+from src.commands.search import required_literals
+from src.commands.trigram import TrigramIndex, file_trigrams, pattern_trigrams
+from src.constants import INDEX_FILE
+from src.logger import ShellLogger
+
+
+def _trigram(text):
+    """Числовое значение одной триграммы."""
+    a, b, c = text.encode()
+    return (a << 16) | (b << 8) | c
+
+
+class TestRequiredLiterals:
+    """Тесты извлечения обязательных литералов из шаблона."""
+
+    @pytest.mark.parametrize("pattern, expected", [
+        ("ERROR", ["ERROR"]),
+        (r"foo\.bar", ["foo.bar"]),
+        ("ab+c", ["ab", "bc"]),
+        ("colou?r", ["colo", "r"]),
+        ("err.*timeout", ["err", "timeout"]),
+        (r"def \w+\(self", ["def ", "(self"]),
+        ("x[abc]yz", ["x", "yz"]),
+        ("(abc)?def", ["def"]),
+        ("a{0,3}bcd", ["bcd"]),
+        ("^start", ["start"]),
+    ])
+    def test_literals(self, pattern, expected):
+        """Тест: литералы, которые входят в любое совпадение."""
+        assert required_literals(pattern) == expected
+
+    @pytest.mark.parametrize("pattern", ["foo|bar", "(?i)error", "(?x) a b c"])
+    def test_no_narrowing(self, pattern):
+        """Тест: альтернатива и флаги отключают сужение."""
+        assert required_literals(pattern) == []
+
+    def test_trigrams_lowercase(self):
+        """Тест: триграммы шаблона в нижнем регистре."""
+        assert pattern_trigrams("ERRor") == {_trigram("err"), _trigram("rro"), _trigram("ror")}
+        assert pattern_trigrams("ab") == set()
+
+
+class TestTrigramIndex:
+    """Тесты TrigramIndex."""
+
+    def _make_tree(self, root):
+        """Дерево из трёх файлов, шаблон 'timeout' есть только в одном."""
+        (root / "logs").mkdir()
+        (root / "logs" / "a.log").write_text("connection TIMEOUT\n")
+        (root / "logs" / "b.log").write_text("all good\n")
+        (root / "c.txt").write_text("nothing here\n")
+
+    def test_file_trigrams_chunk_boundary(self, tmp_path):
+        """Тест: триграммы на границе блоков не теряются."""
+        (tmp_path / "f").write_bytes(b"xxAB")
+        with patch('src.commands.trigram.INDEX_CHUNK_SIZE', 3):
+            trigrams = file_trigrams(str(tmp_path / "f"))
+        assert trigrams == {_trigram("xxa"), _trigram("xab")}
+
+        (tmp_path / "bin").write_bytes(b"\0\1\2\3")
+        assert file_trigrams(str(tmp_path / "bin")) is None
+
+    @patch('src.commands.trigram.INDEX_RACY_NS', 0)
+    def test_candidates_narrowed(self, tmp_path):
+        """Тест: читаются только файлы со всеми триграммами шаблона."""
+        self._make_tree(tmp_path)
+        index = TrigramIndex(str(tmp_path))
+        assert index.update() == (3, 3, 0)
+
+        logs = tmp_path / "logs"
+        assert list(index.candidates(str(tmp_path), "timeout")) == [str(logs / "a.log")]
+        assert index.skipped == 2
+        assert len(list(index.candidates(str(tmp_path), "ti"))) == 3
+        assert list(index.candidates(str(logs), "good")) == [str(logs / "b.log")]
+        index.close()
+
+    @patch('src.commands.trigram.INDEX_RACY_NS', 0)
+    def test_incremental_update(self, tmp_path):
+        """Тест: повторное обновление читает только изменённые файлы."""
+        self._make_tree(tmp_path)
+        index = TrigramIndex(str(tmp_path))
+        index.update()
+
+        (tmp_path / "c.txt").write_text("now with timeout\n")
+        (tmp_path / "logs" / "b.log").unlink()
+        (tmp_path / "d.txt").write_text("new\n")
+        with patch('src.commands.trigram.file_trigrams', wraps=file_trigrams) as mock_read:
+            assert index.update() == (3, 2, 1)
+        assert sorted(os.path.basename(call.args[0]) for call in mock_read.call_args_list) == \
+            ["c.txt", "d.txt"]
+        assert sorted(index.candidates(str(tmp_path), "timeout")) == sorted(
+            [str(tmp_path / "c.txt"), str(tmp_path / "logs" / "a.log")])
+        index.close()
+
+    @patch('src.commands.trigram.INDEX_RACY_NS', 0)
+    def test_stale_entries_are_searched(self, tmp_path):
+        """Тест: файл, изменённый после индексации, читается, даже если индекс не обновлён."""
+        self._make_tree(tmp_path)
+        index = TrigramIndex(str(tmp_path))
+        index.update()
+
+        (tmp_path / "c.txt").write_text("late timeout\n")
+        (tmp_path / "e.txt").write_text("fresh timeout\n")
+
+        assert sorted(index.candidates(str(tmp_path), "timeout")) == sorted(
+            [str(tmp_path / "c.txt"), str(tmp_path / "e.txt"), str(tmp_path / "logs" / "a.log")])
+        index.close()
+
+    def test_racy_entries_not_trusted(self, tmp_path):
+        """Тест: файл, изменённый незадолго до индексации, не отсекается."""
+        self._make_tree(tmp_path)
+        index = TrigramIndex(str(tmp_path))
+        index.update()
+        assert len(list(index.candidates(str(tmp_path), "timeout"))) == 3
+        index.close()
+
+
+class TestIndexCommand:
+    """Тесты команды index и grep с индексом."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.advanced_commands = AdvancedCommands(self.logger)
+
+    @patch('src.commands.trigram.INDEX_RACY_NS', 0)
+    def test_grep_uses_index(self, tmp_path, capsys):
+        """Тест: grep -r с индексом находит то же и сообщает о пропущенных файлах."""
+        for i in range(10):
+            (tmp_path / f"f{i}.txt").write_text("ERROR here\n" if i % 5 == 0 else "fine\n")
+        self.advanced_commands.current_dir = str(tmp_path)
+
+        self.advanced_commands.grep("ERROR", ".", recursive=True, workers=2)
+        without_index = capsys.readouterr().out
+
+        self.advanced_commands.build_index()
+        assert "Indexed 10 files" in capsys.readouterr().out
+        assert os.path.exists(tmp_path / INDEX_FILE)
+
+        self.advanced_commands.grep("ERROR", ".", recursive=True, workers=2)
+        captured = capsys.readouterr()
+        assert captured.out == without_index
+        assert "8 files skipped by index" in captured.err
+
+        self.advanced_commands.grep("error", ".", recursive=True, ignore_case=True, workers=2)
+        assert captured.out == capsys.readouterr().out
+
+    @patch('src.commands.trigram.INDEX_RACY_NS', 0)
+    def test_grep_ignore_case_non_ascii_with_index(self, tmp_path, capsys):
+        """Тест: индекс не отсекает файл для -i с не-ASCII шаблоном другого регистра."""
+        d = tmp_path / "d"
+        d.mkdir()
+        (d / "a.txt").write_text("привет мир\n", encoding='utf-8')
+        (d / "b.txt").write_text("hello\n", encoding='utf-8')
+        self.advanced_commands.current_dir = str(tmp_path)
+
+        self.advanced_commands.build_index("d")
+        capsys.readouterr()
+        self.advanced_commands.grep("ПРИВЕТ", "d", recursive=True, ignore_case=True, workers=2)
+        captured = capsys.readouterr()
+        assert captured.out == f"{d / 'a.txt'}:1: привет мир\n"
+        assert "0 files skipped by index" in captured.err
+
+        assert pattern_trigrams("ПРИВЕТ", ignore_case=True) == set()
+        assert pattern_trigrams("ПРИВЕТ.*err", ignore_case=True) == {_trigram("err")}
+
+    def test_drop_index(self, tmp_path, capsys):
+        """Тест: --drop удаляет индекс, без индекса - ошибка."""
+        self.advanced_commands.current_dir = str(tmp_path)
+        self.advanced_commands.build_index()
+        self.advanced_commands.build_index(drop=True)
+        assert not os.path.exists(tmp_path / INDEX_FILE)
+
+        self.advanced_commands.build_index(drop=True)
+        assert "No index" in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()
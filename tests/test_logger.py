@@ -0,0 +1,221 @@
+"""Тесты для логгера."""
+
+import gzip
+import json
+import logging
+import os
+import queue
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.logger import BatchingQueueListener, BoundedQueueHandler, ShellLogger
+from src.logquery import parse_time
+from src.shell import Shell
+
+
+class TestShellLogger:
+    """Тесты синхронного и асинхронного логирования."""
+
+    def _read(self, path):
+        """Строки файла лога."""
+        return path.read_text(encoding='utf-8').splitlines()
+
+    def test_sync_mode_writes_immediately(self, tmp_path):
+        """Тест: в синхронном режиме запись сразу попадает в файл."""
+        logger = ShellLogger(str(tmp_path / "sync.log"), async_mode=False)
+        logger.log_success("ls")
+        assert self._read(tmp_path / "sync.log")[0].endswith("SUCCESS: ls")
+        logger.close()
+
+    def test_async_mode_writes_in_order_on_close(self, tmp_path):
+        """Тест: после close все записи лежат в файле в исходном порядке."""
+        logger = ShellLogger(str(tmp_path / "async.log"))
+        for i in range(500):
+            logger.log_command(f"cmd {i}")
+        logger.log_error("boom")
+        logger.close()
+
+        lines = self._read(tmp_path / "async.log")
+        assert len(lines) == 501
+        assert lines[0].endswith("cmd 0")
+        assert lines[-1].endswith("ERROR: boom")
+        assert logger.error_count == 1
+
+    def test_flush_waits_for_queue(self, tmp_path):
+        """Тест: flush возвращается, когда записи уже в файле."""
+        logger = ShellLogger(str(tmp_path / "async.log"))
+        logger.log_success("cp a b")
+        logger.flush()
+        assert self._read(tmp_path / "async.log")[0].endswith("SUCCESS: cp a b")
+        logger.close()
+
+    def test_block_policy_with_small_queue(self, tmp_path):
+        """Тест: политика block не теряет записи и останавливается при заполненной очереди."""
+        logger = ShellLogger(str(tmp_path / "async.log"), queue_size=2, overflow='block')
+        for i in range(200):
+            logger.log_command(f"cmd {i}")
+        logger.close()
+        assert len(self._read(tmp_path / "async.log")) == 200
+        assert logger.dropped == 0
+
+    def test_drop_policy_counts_dropped(self):
+        """Тест: политика drop отбрасывает записи при заполненной очереди."""
+        handler = BoundedQueueHandler(queue.Queue(1), policy='drop')
+        record = logging.LogRecord('t', logging.INFO, __file__, 0, "msg", None, None)
+        handler.emit(record)
+        handler.emit(record)
+        assert handler.dropped == 1
+        assert handler.queue.qsize() == 1
+
+    def test_dropped_records_reported_on_close(self, tmp_path):
+        """Тест: при закрытии в лог пишется число отброшенных записей."""
+        logger = ShellLogger(str(tmp_path / "async.log"), queue_size=1, overflow='drop')
+        logger._queue_handler.dropped = 3
+        logger.close()
+        assert "3 log records dropped" in self._read(tmp_path / "async.log")[-1]
+
+    def test_unknown_policy(self):
+        """Тест: неизвестная политика переполнения - ошибка."""
+        with pytest.raises(ValueError):
+            BoundedQueueHandler(queue.Queue(1), policy='spill')
+
+    def test_buffer_flushed_once_per_batch(self):
+        """Тест: буфер сбрасывается, когда очередь опустела, а не после каждой записи."""
+        log_queue = queue.Queue()
+        handler = Mock(spec=logging.Handler)
+        handler.level = logging.NOTSET
+        for i in range(100):
+            log_queue.put(logging.LogRecord('t', logging.INFO, __file__, 0, f"m{i}", None, None))
+
+        listener = BatchingQueueListener(log_queue, handler)
+        listener.start()
+        listener.stop()
+
+        assert handler.handle.call_count == 100
+        assert handler.flush.call_count <= 1
+
+    def test_log_after_close_is_written(self, tmp_path):
+        """Тест: записи после close пишутся синхронно и не теряются."""
+        logger = ShellLogger(str(tmp_path / "async.log"))
+        logger.close()
+        logger.log_success("late")
+        logger.close()
+        assert self._read(tmp_path / "async.log")[-1].endswith("SUCCESS: late")
+
+    def test_close_unregisters_exit_hook(self, tmp_path):
+        """Тест: close снимает обработчик atexit, закрытые логгеры не копятся."""
+        with patch('atexit.register') as mock_register, \
+                patch('atexit.unregister') as mock_unregister:
+            logger = ShellLogger(str(tmp_path / "async.log"))
+            logger.close()
+            logger.close()
+
+        mock_register.assert_called_once_with(logger.close)
+        mock_unregister.assert_called_once_with(logger.close)
+
+    def test_shell_flushes_log_on_eof(self):
+        """Тест: при EOF shell записывает лог на диск."""
+        shell = Shell()
+        with patch('builtins.input', side_effect=["pwd", EOFError]), \
+                patch('builtins.print'):
+            shell.run()
+
+        with open(shell.logger.log_file, encoding='utf-8') as f:
+            assert any(line.rstrip().endswith("pwd") for line in f)
+
+
+class TestStructuredLog:
+    """Тесты JSON-лога и ротации."""
+
+    def _records(self, path):
+        """Записи JSON-лога."""
+        return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+    def test_json_operation_record(self, tmp_path):
+        """Тест: в стиле json на команду пишется одна запись со всеми полями."""
+        logger = ShellLogger(str(tmp_path / "ops.log"), style='json')
+        operation = logger.begin_operation("/work")
+        operation.command, operation.args = "cp", ["a", "b"]
+        logger.log_command("cp a b")
+        logger.add_bytes(10)
+        logger.add_bytes(5)
+        logger.log_success("cp a b")
+        logger.end_operation()
+        logger.close()
+
+        [record] = self._records(tmp_path / "ops.log")
+        assert record['command'] == "cp"
+        assert record['args'] == ["a", "b"]
+        assert record['cwd'] == "/work"
+        assert record['status'] == "ok"
+        assert record['bytes_processed'] == 15
+        assert record['error'] is None
+        assert record['duration_ms'] >= 0
+        assert parse_time(record['time'])
+
+    def test_json_error_status(self, tmp_path):
+        """Тест: ошибка команды попадает в поле error записи операции."""
+        logger = ShellLogger(str(tmp_path / "ops.log"), style='json', async_mode=False)
+        logger.begin_operation("/work").command = "cat"
+        logger.log_error("Path not found: x")
+        logger.end_operation()
+        logger.log_error("Failed to load history")
+
+        first, second = self._records(tmp_path / "ops.log")
+        assert (first['command'], first['status']) == ("cat", "error")
+        assert first['error'] == "Path not found: x"
+        assert second['status'] == "error" and 'command' not in second
+        assert logger.error_count == 2
+        logger.close()
+
+    def test_shell_writes_json_records(self, tmp_path):
+        """Тест: shell пишет запись на каждую команду, включая неизвестные."""
+        shell = Shell(logger=ShellLogger(str(tmp_path / "ops.log"), style='json'))
+        (tmp_path / "f.txt").write_text("12345")
+        shell.commands.current_dir = str(tmp_path)
+        with patch('builtins.print'), patch('sys.stdout'):
+            shell.execute_command("cat f.txt")
+            shell.execute_command("bogus")
+        shell.close()
+
+        cat, bogus = self._records(tmp_path / "ops.log")
+        assert (cat['command'], cat['bytes_processed'], cat['status']) == ("cat", 5, "ok")
+        assert (bogus['command'], bogus['status']) == ("bogus", "error")
+
+    def test_rotation_by_size_with_gzip(self, tmp_path):
+        """Тест: при превышении размера файл сдвигается в сжатый сегмент."""
+        log_file = tmp_path / "r.log"
+        logger = ShellLogger(str(log_file), async_mode=False, max_bytes=200,
+                             backup_count=2, compress=True)
+        for i in range(30):
+            logger.log_success(f"operation number {i:03d}")
+        logger.close()
+
+        assert log_file.stat().st_size <= 200
+        current = log_file.read_text(encoding='utf-8').splitlines()
+        with gzip.open(f"{log_file}.1.gz", 'rt', encoding='utf-8') as f:
+            rotated = f.read().splitlines()
+        first_current = int(current[0].split()[-1])
+        assert int(rotated[-1].split()[-1]) == first_current - 1
+        assert os.path.exists(f"{log_file}.2.gz")
+        assert not os.path.exists(f"{log_file}.3.gz")
+
+    def test_rotation_by_time(self, tmp_path):
+        """Тест: по истечении периода файл ротируется без сжатия."""
+        log_file = tmp_path / "t.log"
+        logger = ShellLogger(str(log_file), async_mode=False, max_bytes=0,
+                             rotate_interval=60, compress=False)
+        logger.log_success("first")
+        with patch('time.time', return_value=time.time() + 120):
+            logger.log_success("second")
+        logger.close()
+
+        assert (tmp_path / "t.log.1").read_text().strip().endswith("first")
+        assert log_file.read_text().strip().endswith("second")
+
+    def test_unknown_style(self, tmp_path):
+        """Тест: неизвестный стиль лога - ошибка."""
+        with pytest.raises(ValueError):
+            ShellLogger(str(tmp_path / "x.log"), style='xml')
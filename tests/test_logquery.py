@@ -0,0 +1,119 @@
+"""Тесты для выборки из структурированного лога."""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src import logquery
+from src.logquery import main, parse_time, query, seek_since, segments
+
+
+def _line(moment, command, status='ok'):
+    """Строка JSON-лога."""
+    return json.dumps({'time': moment.isoformat(timespec='milliseconds'), 'command': command,
+                       'args': [], 'cwd': '/', 'status': status, 'duration_ms': 1.0,
+                       'bytes_processed': 0, 'error': None if status == 'ok' else 'boom'}) + '\n'
+
+
+class TestLogQuery:
+    """Тесты logquery."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.start = datetime(2026, 1, 1, 12, 0).astimezone()
+
+    def _write_log(self, path, count, offset=0, commands=('ls', 'cp', 'cat')):
+        """Лог с записями раз в минуту."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(offset, offset + count):
+                f.write(_line(self.start + timedelta(minutes=i), commands[i % len(commands)],
+                              'error' if i % 10 == 0 else 'ok'))
+
+    def test_filter_by_command_and_status(self, tmp_path):
+        """Тест: фильтры по имени команды и статусу."""
+        self._write_log(tmp_path / "shell.log", 30)
+        records = list(query(str(tmp_path / "shell.log"), commands=['cp']))
+        assert len(records) == 10 and all(r['command'] == 'cp' for r in records)
+
+        errors = list(query(str(tmp_path / "shell.log"), status='error'))
+        expected = [self.start + timedelta(minutes=i) for i in (0, 10, 20)]
+        assert [r['time'] for r in errors] == [
+            moment.isoformat(timespec='milliseconds') for moment in expected]
+
+    def test_time_range(self, tmp_path):
+        """Тест: границы since и until включительно."""
+        self._write_log(tmp_path / "shell.log", 100)
+        records = list(query(str(tmp_path / "shell.log"),
+                             since=self.start + timedelta(minutes=40),
+                             until=self.start + timedelta(minutes=45)))
+        assert [parse_time(r['time']) for r in records] == [
+            self.start + timedelta(minutes=i) for i in range(40, 46)]
+
+    def test_seek_since_reads_few_lines(self, tmp_path):
+        """Тест: начало диапазона находится бинарным поиском."""
+        self._write_log(tmp_path / "shell.log", 5000)
+        with open(tmp_path / "shell.log", 'rb') as f, \
+                patch('src.logquery._record_time', wraps=logquery._record_time) as mock_time:
+            seek_since(f, self.start + timedelta(minutes=1234))
+            first = json.loads(f.readline())
+        assert parse_time(first['time']) == self.start + timedelta(minutes=1234)
+        assert mock_time.call_count <= 32
+
+    def test_reads_rotated_segments_in_order(self, tmp_path):
+        """Тест: сжатые и несжатые сегменты читаются от старых к новым."""
+        log_file = tmp_path / "shell.log"
+        self._write_log(tmp_path / "old", 10, offset=0)
+        with open(tmp_path / "old", 'rb') as source, gzip.open(f"{log_file}.2.gz", 'wb') as target:
+            target.write(source.read())
+        self._write_log(f"{log_file}.1", 10, offset=10)
+        self._write_log(log_file, 10, offset=20)
+
+        assert segments(str(log_file)) == [f"{log_file}.2.gz", f"{log_file}.1", str(log_file)]
+        records = list(query(str(log_file)))
+        assert len(records) == 30
+        assert parse_time(records[-1]['time']) == self.start + timedelta(minutes=29)
+
+    def test_skips_segments_older_than_since(self, tmp_path):
+        """Тест: сегмент, изменённый раньше since, не открывается."""
+        log_file = tmp_path / "shell.log"
+        self._write_log(f"{log_file}.1", 10, offset=0)
+        old = (self.start + timedelta(minutes=9)).timestamp()
+        os.utime(f"{log_file}.1", (old, old))
+        self._write_log(log_file, 10, offset=10)
+
+        with patch('builtins.open', wraps=open) as mock_open:
+            records = list(query(str(log_file), since=self.start + timedelta(minutes=15)))
+        opened = [call.args[0] for call in mock_open.call_args_list]
+        assert f"{log_file}.1" not in opened
+        assert len(records) == 5
+
+    def test_skips_text_lines(self, tmp_path):
+        """Тест: строки текстового лога пропускаются."""
+        (tmp_path / "shell.log").write_text("[2026-01-01 12:00:00] SUCCESS: ls\n" +
+                                            _line(self.start, 'ls'))
+        assert len(list(query(str(tmp_path / "shell.log")))) == 1
+
+    def test_seek_since_with_text_lines(self, tmp_path):
+        """Тест: строки не в формате JSON не уводят бинарный поиск за нужную запись."""
+        moments = [self.start + timedelta(minutes=i) for i in range(200)]
+        with open(tmp_path / "shell.log", 'w', encoding='utf-8') as f:
+            for i, moment in enumerate(moments):
+                f.write(_line(moment, 'ls'))
+                if i % 3 == 0:
+                    f.write(f"[{moment:%Y-%m-%d %H:%M:%S}] SUCCESS: text record {i}\n" * 5)
+                if i % 7 == 0:
+                    f.write('{"time": "2026-01-01T1\n')
+
+        for minute in (0, 1, 50, 101, 199):
+            records = list(query(str(tmp_path / "shell.log"),
+                                 since=self.start + timedelta(minutes=minute)))
+            assert [parse_time(r['time']) for r in records] == moments[minute:]
+
+    def test_main_prints_json_lines(self, tmp_path, capsys):
+        """Тест: CLI выводит записи по одной JSON-строке."""
+        self._write_log(tmp_path / "shell.log", 6)
+        assert main([str(tmp_path / "shell.log"), '--command', 'cat']) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line)['command'] for line in lines] == ['cat', 'cat']
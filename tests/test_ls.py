@@ -1,11 +1,10 @@
 """Тесты для команды ls."""
 
-import pytest
 import os
-from unittest.mock import Mock, patch, call
-from pathlib import Path
 from datetime import datetime
-import stat as stat_module
+from unittest.mock import Mock, patch
+
+import pytest
 
 from src.commands.filesystem import FileSystemCommands
 from src.logger import ShellLogger
@@ -20,62 +19,87 @@ class TestLsCommand:
         self.fs_commands = FileSystemCommands(self.logger)
         self.fs_commands.current_dir = "/test/dir"
 
-    def test_ls_current_directory_simple(self):
+    @pytest.fixture
+    def directory(self, tmp_path):
+        """Отдельный каталог: в tmp_path уже лежит корзина .trash."""
+        path = tmp_path / "listing"
+        path.mkdir()
+        return path
+
+    def _listing(self, capsys):
+        """Строки стандартного вывода."""
+        return capsys.readouterr().out.splitlines()
+
+    def test_ls_current_directory_simple(self, directory, capsys):
         """Тест: ls без аргументов выводит содержимое текущей директории."""
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
-                patch('os.listdir', return_value=['file2.txt', 'file1.txt', 'folder1']), \
-                patch('builtins.print') as mock_print:
-            self.fs_commands.ls()
+        (directory / "file2.txt").write_text("2")
+        (directory / "file1.txt").write_text("1")
+        (directory / "folder1").mkdir()
+        self.fs_commands.current_dir = str(directory)
 
-            # Проверяем что файлы выведены в отсортированном порядке
-            calls = [call[0][0] for call in mock_print.call_args_list]
-            assert calls == ['file1.txt', 'file2.txt', 'folder1']
-            self.logger.log_success.assert_called_once()
+        self.fs_commands.ls()
 
-    def test_ls_with_path_argument(self):
-        """Тест: ls с указанием пути."""
-        target_path = "/test/dir/Documents"
+        # Проверяем что файлы выведены в отсортированном порядке
+        assert self._listing(capsys) == ['file1.txt', 'file2.txt', 'folder1']
+        self.logger.log_success.assert_called_once()
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
-                patch('os.path.abspath') as mock_abspath, \
-                patch('os.path.expanduser', return_value=target_path), \
-                patch('os.listdir', return_value=['doc1.txt', 'doc2.pdf']), \
-                patch('builtins.print') as mock_print:
-            mock_abspath.return_value = target_path
+    def test_ls_with_path_argument(self, directory, capsys):
+        """Тест: ls с указанием пути."""
+        docs = directory / "Documents"
+        docs.mkdir()
+        (docs / "doc2.pdf").write_text("")
+        (docs / "doc1.txt").write_text("")
 
-            self.fs_commands.ls("Documents")
+        self.fs_commands.ls(str(docs))
 
-            # Проверяем что путь обработался правильно
-            calls = [call[0][0] for call in mock_print.call_args_list]
-            assert calls == ['doc1.txt', 'doc2.pdf']
+        assert self._listing(capsys) == ['doc1.txt', 'doc2.pdf']
 
-    def test_ls_long_format(self):
+    def test_ls_long_format(self, directory, capsys):
         """Тест: ls -l показывает детальную информацию."""
-        mock_stat = Mock()
-        mock_stat.st_size = 1024
-        mock_stat.st_mtime = datetime(2023, 1, 15, 10, 30).timestamp()
-        mock_stat.st_mode = 0o100644  # Обычный файл
-
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
-                patch('os.listdir', return_value=['test.txt']), \
-                patch('os.path.join', return_value='/test/dir/test.txt'), \
-                patch('os.stat', return_value=mock_stat), \
-                patch('stat.filemode', return_value='-rw-r--r--'), \
-                patch('builtins.print') as mock_print:
+        (directory / "test.txt").write_bytes(b"x" * 1024)
+        os.chmod(directory / "test.txt", 0o644)
+        os.utime(directory / "test.txt", (datetime(2023, 1, 15, 10, 30).timestamp(),) * 2)
+        (directory / "sub").mkdir()
+        self.fs_commands.current_dir = str(directory)
+
+        self.fs_commands.ls(detailed=True)
+
+        lines = self._listing(capsys)
+        # Проверяем что вывелась шапка таблицы
+        assert 'Name' in lines[0] and 'Size' in lines[0]
+        assert lines[2].split()[0] == 'sub' and lines[2].endswith('[DIR]')
+        fields = lines[3].split()
+        assert fields[:5] == ['test.txt', '1024', '2023-01-15', '10:30:00', '-rw-r--r--']
+
+    def test_ls_stats_each_entry_once(self, directory, capsys):
+        """Тест: ls -l не вызывает os.stat и os.path.isdir для каждой записи."""
+        for i in range(20):
+            (directory / f"f{i}").write_text("data")
+        self.fs_commands.current_dir = str(directory)
+
+        with patch('os.stat', wraps=os.stat) as mock_stat, \
+                patch.object(self.fs_commands.fs_cache, 'isdir', wraps=os.path.isdir) as mock_isdir:
             self.fs_commands.ls(detailed=True)
 
-            # Проверяем что вывелась детальная информация
-            assert mock_print.call_count >= 1
-            # Проверяем что вывелась шапка таблицы
-            first_call = mock_print.call_args_list[0][0][0]
-            assert 'Name' in first_call and 'Size' in first_call
+        # Только проверки самого каталога, записи берут stat из DirEntry
+        assert mock_stat.call_count <= 2
+        assert mock_isdir.call_count == 1
+        assert len(self._listing(capsys)) == 22
+
+    def test_ls_single_write(self, directory):
+        """Тест: весь вывод пишется одним вызовом write."""
+        for name in ("a", "b", "c"):
+            (directory / name).write_text("")
+        self.fs_commands.current_dir = str(directory)
+
+        with patch('sys.stdout') as mock_stdout:
+            self.fs_commands.ls()
+
+        mock_stdout.write.assert_called_once_with("a\nb\nc\n")
 
     def test_ls_nonexistent_path(self):
         """Тест: ls для несуществующего пути выдаёт ошибку."""
-        with patch('os.path.exists', return_value=False), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=False), \
                 patch('os.path.abspath', return_value='/nonexistent'), \
                 patch('os.path.expanduser', return_value='/nonexistent'), \
                 patch('builtins.print') as mock_print:
@@ -88,8 +112,8 @@ class TestLsCommand:
 
     def test_ls_not_a_directory(self):
         """Тест: ls для файла (не директории) выдаёт ошибку."""
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=False), \
+        with patch.object(self.fs_commands.fs_cache, 'exists', return_value=True), \
+                patch.object(self.fs_commands.fs_cache, 'isdir', return_value=False), \
                 patch('os.path.abspath', return_value='/test/file.txt'), \
                 patch('os.path.expanduser', return_value='/test/file.txt'), \
                 patch('builtins.print') as mock_print:
@@ -99,27 +123,70 @@ class TestLsCommand:
             assert 'Error' in error_call
             assert 'directory' in error_call.lower()
 
-    def test_ls_empty_directory(self):
+    def test_ls_empty_directory(self, directory, capsys):
         """Тест: ls для пустой директории не выводит файлов."""
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
-                patch('os.listdir', return_value=[]), \
-                patch('builtins.print') as mock_print:
-            self.fs_commands.ls()
+        self.fs_commands.current_dir = str(directory)
+
+        self.fs_commands.ls()
 
-            # print не должен вызываться для пустой директории (кроме заголовка в -l режиме)
-            assert mock_print.call_count == 0
+        assert capsys.readouterr().out == ''
 
-    def test_ls_sorting_case_insensitive(self):
+    def test_ls_sorting_case_insensitive(self, directory, capsys):
         """Тест: ls сортирует файлы без учёта регистра."""
-        files = ['Zebra.txt', 'apple.txt', 'Banana.txt', 'cherry.txt']
+        for name in ['Zebra.txt', 'apple.txt', 'Banana.txt', 'cherry.txt']:
+            (directory / name).write_text("")
+        self.fs_commands.current_dir = str(directory)
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.isdir', return_value=True), \
-                patch('os.listdir', return_value=files), \
-                patch('builtins.print') as mock_print:
-            self.fs_commands.ls()
+        self.fs_commands.ls()
+
+        assert self._listing(capsys) == ['apple.txt', 'Banana.txt', 'cherry.txt', 'Zebra.txt']
+
+    def test_ls_sort_by_size(self, directory, capsys):
+        """Тест: --sort=size выводит крупные файлы первыми."""
+        (directory / "small").write_bytes(b"x")
+        (directory / "large").write_bytes(b"x" * 100)
+        (directory / "medium").write_bytes(b"x" * 10)
+        self.fs_commands.current_dir = str(directory)
+
+        self.fs_commands.ls(sort='size')
+
+        assert self._listing(capsys) == ['large', 'medium', 'small']
+
+    def test_ls_sort_by_mtime(self, directory, capsys):
+        """Тест: --sort=mtime выводит новые файлы первыми."""
+        for i, name in enumerate(["old", "newest", "middle"]):
+            (directory / name).write_text("")
+        os.utime(directory / "old", (1_000_000_000, 1_000_000_000))
+        os.utime(directory / "middle", (1_100_000_000, 1_100_000_000))
+        os.utime(directory / "newest", (1_200_000_000, 1_200_000_000))
+        self.fs_commands.current_dir = str(directory)
+
+        self.fs_commands.ls(detailed=True, sort='mtime')
+
+        names = [line.split()[0] for line in self._listing(capsys)[2:]]
+        assert names == ['newest', 'middle', 'old']
+
+    def test_ls_unknown_sort_key(self, directory):
+        """Тест: неизвестный ключ сортировки - ошибка."""
+        self.fs_commands.current_dir = str(directory)
+
+        with patch('builtins.print') as mock_print:
+            self.fs_commands.ls(sort='color')
+
+        assert 'Error' in mock_print.call_args[0][0]
+        self.logger.log_error.assert_called_once()
+
+    @pytest.mark.parametrize("detailed", [False, True])
+    def test_ls_hides_dotfiles_unless_all(self, directory, capsys, detailed):
+        """Тест: записи с '.' скрыты по умолчанию и показываются с -a."""
+        for name in ['.hidden', 'visible.txt']:
+            (directory / name).write_text("")
+        self.fs_commands.current_dir = str(directory)
+        skip = 2 if detailed else 0
+
+        self.fs_commands.ls(detailed=detailed)
+        assert [line.split()[0] for line in self._listing(capsys)[skip:]] == ['visible.txt']
 
-            calls = [call[0][0] for call in mock_print.call_args_list]
-            expected = ['apple.txt', 'Banana.txt', 'cherry.txt', 'Zebra.txt']
-            assert calls == expected
+        self.fs_commands.ls(detailed=detailed, show_all=True)
+        assert [line.split()[0] for line in self._listing(capsys)[skip:]] == \
+            ['.hidden', 'visible.txt']
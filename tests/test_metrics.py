@@ -0,0 +1,129 @@
+"""Тесты для метрик команд и команды stats."""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands.advanced import AdvancedCommands
+from src.logger import ShellLogger
+from src.metrics import MetricsCollector, percentile
+from src.shell import Shell
+
+
+class TestMetricsCollector:
+    """Тесты MetricsCollector."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.metrics = MetricsCollector()
+
+    def test_percentile_nearest_rank(self):
+        """Тест: перцентиль методом ближайшего ранга."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([7], 99) == 7
+        assert percentile([], 50) == 0.0
+
+    def test_measure_records_counters(self):
+        """Тест: счётчики команды попадают в её измерение и сбрасываются."""
+        with self.metrics.measure("cp") as result:
+            self.metrics.add(files=2, read=10, written=10)
+            self.metrics.add(files=1, read=5, written=5)
+        sample = result['sample']
+        assert (sample.command, sample.files) == ("cp", 3)
+        assert (sample.bytes_read, sample.bytes_written) == (15, 15)
+        assert sample.ok and sample.wall_ms >= 0 and sample.cpu_ms >= 0
+
+        with self.metrics.measure("ls") as result:
+            pass
+        assert result['sample'].files == 0
+
+    def test_measure_marks_failures(self):
+        """Тест: исключение и ok=False считаются ошибками."""
+        with self.metrics.measure("cat") as result:
+            result['ok'] = False
+        with pytest.raises(RuntimeError):
+            with self.metrics.measure("cat"):
+                raise RuntimeError("boom")
+
+        assert self.metrics.summary()['cat']['errors'] == 2
+
+    def test_summary_aggregates(self):
+        """Тест: агрегаты по командам."""
+        for _ in range(3):
+            with self.metrics.measure("grep"):
+                self.metrics.add(files=4, read=100)
+        stats = self.metrics.summary()['grep']
+        assert stats['count'] == 3
+        assert stats['files'] == 12
+        assert stats['bytes_read'] == 300
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+
+    def test_max_samples(self):
+        """Тест: хранятся только последние измерения."""
+        metrics = MetricsCollector(max_samples=2)
+        for command in ("ls", "cd", "pwd"):
+            with metrics.measure(command):
+                pass
+        assert list(metrics.summary()) == ["cd", "pwd"]
+
+    def test_export(self, tmp_path):
+        """Тест: выгрузка метрик в JSON-файл."""
+        with self.metrics.measure("ls"):
+            self.metrics.add(files=5)
+        self.metrics.export(str(tmp_path / "metrics.json"))
+
+        data = json.loads((tmp_path / "metrics.json").read_text(encoding='utf-8'))
+        assert data['commands']['ls']['files'] == 5
+        assert data['samples'][0]['command'] == "ls"
+        assert not (tmp_path / "metrics.json.tmp").exists()
+
+
+class TestStatsCommand:
+    """Тесты команды stats."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.advanced_commands = AdvancedCommands(self.logger)
+
+    def test_stats_table(self, capsys):
+        """Тест: stats выводит строку на каждую команду."""
+        with self.advanced_commands.metrics.measure("cp"):
+            self.advanced_commands.metrics.add(files=1, read=2048, written=2048)
+        self.advanced_commands.show_stats()
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split()[:3] == ["Command", "Count", "Errors"]
+        row = lines[2].split()
+        assert row[:3] == ["cp", "1", "0"]
+        assert row[-2:] == ["2.0K", "2.0K"]
+
+    def test_stats_export_and_reset(self, tmp_path):
+        """Тест: --export пишет файл, --reset очищает метрики."""
+        self.advanced_commands.current_dir = str(tmp_path)
+        with self.advanced_commands.metrics.measure("ls"):
+            pass
+
+        with patch('builtins.print'), patch('sys.stdout'):
+            self.advanced_commands.show_stats(export="m.json", reset=True)
+
+        assert 'ls' in json.loads((tmp_path / "m.json").read_text(encoding='utf-8'))['commands']
+        assert self.advanced_commands.metrics.summary() == {}
+
+    def test_shell_measures_commands(self, tmp_path):
+        """Тест: shell замеряет каждую команду и учитывает файлы и байты."""
+        shell = Shell(logger=ShellLogger(str(tmp_path / "ops.log"), async_mode=False))
+        (tmp_path / "a.txt").write_text("hello")
+        shell.commands.current_dir = str(tmp_path)
+        with patch('builtins.print'), patch('sys.stdout'):
+            shell.execute_command("cp a.txt b.txt")
+            shell.execute_command("cat missing.txt")
+        shell.close()
+
+        summary = shell.commands.metrics.summary()
+        assert (summary['cp']['files'], summary['cp']['bytes_written']) == (1, 5)
+        assert summary['cat']['errors'] == 1
@@ -1,8 +1,5 @@
 """Тесты для команды mv."""
 
-import pytest
-import os
-import shutil
 from unittest.mock import Mock, patch
 
 from src.commands.filesystem import FileSystemCommands
@@ -32,8 +29,8 @@ class TestMvCommand:
             self.fs_commands.mv("old.txt", "new.txt")
 
             mock_move.assert_called_once_with(src, dst)
-            assert len(self.fs_commands.history) == 1
-            assert self.fs_commands.history[0].startswith('mv|')
+            assert len(self.fs_commands.undo_journal) == 1
+            assert self.fs_commands.undo_journal.peek().op == 'mv'
             success_msg = mock_print.call_args[0][0]
             assert 'Moved' in success_msg or 'SUCCESS' in success_msg
 
@@ -50,7 +47,7 @@ class TestMvCommand:
             self.fs_commands.mv("file.txt", "Documents")
 
             mock_move.assert_called_once_with(src, dst)
-            assert len(self.fs_commands.history) == 1
+            assert len(self.fs_commands.undo_journal) == 1
 
     def test_mv_directory(self):
         """Тест: перемещение директории."""
@@ -65,7 +62,7 @@ class TestMvCommand:
             self.fs_commands.mv("old_folder", "new_folder")
 
             mock_move.assert_called_once_with(src, dst)
-            assert len(self.fs_commands.history) == 1
+            assert len(self.fs_commands.undo_journal) == 1
 
     def test_mv_nonexistent_source(self):
         """Тест: перемещение несуществующего файла выдаёт ошибку."""
@@ -77,7 +74,7 @@ class TestMvCommand:
 
             error_msg = mock_print.call_args[0][0]
             assert 'Error' in error_msg
-            assert len(self.fs_commands.history) == 0
+            assert len(self.fs_commands.undo_journal) == 0
             self.logger.log_error.assert_called_once()
 
     def test_mv_creates_undo_entry(self):
@@ -92,10 +89,8 @@ class TestMvCommand:
                 patch('builtins.print'):
             self.fs_commands.mv("source.txt", "destination.txt")
 
-            assert len(self.fs_commands.history) == 1
-            undo_entry = self.fs_commands.history[0]
-            assert undo_entry.startswith('mv|')
-            parts = undo_entry.split('|')
-            assert len(parts) == 3
-            assert parts[1] == src
-            assert parts[2] == dst
+            assert len(self.fs_commands.undo_journal) == 1
+            record = self.fs_commands.undo_journal.peek()
+            assert record.op == 'mv'
+            assert record.src == src
+            assert record.dst == dst
@@ -0,0 +1,128 @@
+"""Тесты для разбора командной строки."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands.handlers import create_default_registry
+from src.commands.registry import CommandSpec, OptionSpec
+from src.parser import CommandParser, ParseError
+
+
+class TestCommandParser:
+    """Тесты для парсера команд."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.registry = create_default_registry()
+        self.parser = CommandParser(self.registry)
+
+    def test_separate_flags(self):
+        """Тест: отдельные флаги распознаются в любом месте строки."""
+        command, args, options = self.parser.parse("grep ERROR logs -r -i")
+
+        assert command == 'grep'
+        assert args == ['ERROR', 'logs']
+        assert options == {'recursive': True, 'ignore_case': True}
+
+    def test_combined_short_flags(self):
+        """Тест: склеенные короткие флаги '-ri' и '-la'."""
+        _, _, grep_options = self.parser.parse("grep -ri ERROR logs")
+        _, _, ls_options = self.parser.parse("ls -la")
+
+        assert grep_options == {'recursive': True, 'ignore_case': True}
+        assert ls_options == {'detailed': True, 'all': True}
+
+    def test_long_options(self):
+        """Тест: длинные опции и значения через '=' и через пробел."""
+        _, args, options = self.parser.parse("grep --recursive --jobs=8 --pool process x .")
+
+        assert args == ['x', '.']
+        assert options == {'recursive': True, 'jobs': 8, 'pool': 'process'}
+
+    def test_short_option_with_value(self):
+        """Тест: значение короткой опции слитно и отдельным токеном."""
+        _, _, attached = self.parser.parse("grep -rj4 x .")
+        _, _, separate = self.parser.parse("grep -j 4 x .")
+
+        assert attached == {'recursive': True, 'jobs': 4}
+        assert separate == {'jobs': 4}
+
+    def test_double_dash_ends_options(self):
+        """Тест: после '--' всё считается аргументами."""
+        _, args, options = self.parser.parse("grep -r -- -pattern- .")
+
+        assert args == ['-pattern-', '.']
+        assert options == {'recursive': True}
+
+    def test_quoted_paths_with_spaces(self):
+        """Тест: пути с пробелами в кавычках."""
+        _, args, _ = self.parser.parse("cp 'my file.txt' \"backup dir/\"")
+
+        assert args == ['my file.txt', 'backup dir/']
+
+    def test_unknown_option_is_error(self):
+        """Тест: неизвестная опция не отбрасывается молча."""
+        with pytest.raises(ParseError, match='unknown option -z'):
+            self.parser.parse("ls -z")
+
+        with pytest.raises(ParseError, match='unknown option --nope'):
+            self.parser.parse("cp --nope a b")
+
+    def test_invalid_option_value(self):
+        """Тест: неверное значение опции."""
+        with pytest.raises(ParseError):
+            self.parser.parse("grep --jobs=many x .")
+
+        with pytest.raises(ParseError, match='choose from'):
+            self.parser.parse("grep --pool=fiber x .")
+
+        with pytest.raises(ParseError, match='requires a value'):
+            self.parser.parse("grep x . -j")
+
+    def test_unclosed_quote(self):
+        """Тест: незакрытая кавычка - ошибка разбора."""
+        with pytest.raises(ParseError):
+            self.parser.parse("cat 'file.txt")
+
+    def test_empty_line(self):
+        """Тест: пустая строка."""
+        assert self.parser.parse("   ") == (None, [], {})
+
+    def test_results_are_cached(self):
+        """Тест: повторная строка берётся из LRU-кэша."""
+        self.parser.parse("ls -l")
+        with patch('shlex.split') as mock_split:
+            self.parser.parse("ls -l")
+            mock_split.assert_not_called()
+
+        assert self.parser.cache_info().hits == 1
+
+    def test_cached_result_not_shared(self):
+        """Тест: изменение результата не портит кэш."""
+        _, args, options = self.parser.parse("cp -r a b")
+        args.append('c')
+        options['recursive'] = False
+
+        assert self.parser.parse("cp -r a b") == ('cp', ['a', 'b'], {'recursive': True})
+
+    def test_registry_change_invalidates_cache(self):
+        """Тест: новая команда в реестре учитывается при разборе."""
+        assert self.parser.parse("hello -v") == ('hello', ['-v'], {})
+
+        self.registry.register(CommandSpec('hello', Mock(),
+                                           options=(OptionSpec('verbose', short='v'),)))
+
+        assert self.parser.parse("hello -v") == ('hello', [], {'verbose': True})
+
+    def test_shell_reports_parse_error(self):
+        """Тест: shell выводит ошибку разбора и не выполняет команду."""
+        from src.shell import Shell
+
+        shell = Shell()
+        with patch.object(shell.commands, 'ls') as mock_ls, \
+                patch('builtins.print') as mock_print:
+            shell.execute_command("ls -q")
+
+            mock_ls.assert_not_called()
+            assert 'Error' in mock_print.call_args[0][0]
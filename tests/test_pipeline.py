@@ -0,0 +1,118 @@
+"""Тесты для конвейеров команд ('|')."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from src.commands.filesystem import FileSystemCommands
+from src.logger import ShellLogger
+from src.parser import split_pipeline
+from src.shell import Shell
+
+
+class TestSplitPipeline:
+    """Тесты разбиения строки на стадии."""
+
+    @pytest.mark.parametrize("line, expected", [
+        ("ls", ["ls"]),
+        ("cat a | grep x|head 2", ["cat a", "grep x", "head 2"]),
+        ("grep 'a|b' f | head", ["grep 'a|b' f", "head"]),
+        ("grep \"a|b\" f", ["grep \"a|b\" f"]),
+        (r"grep a\|b f", [r"grep a\|b f"]),
+    ])
+    def test_split(self, line, expected):
+        """Тест: '|' вне кавычек разделяет стадии."""
+        assert split_pipeline(line) == expected
+
+
+class TestPipeline:
+    """Тесты выполнения конвейеров."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.logger.error_count = 0
+        self.shell = Shell(logger=self.logger)
+
+    def _write_log(self, path, count):
+        """Лог из count строк, каждая третья - ERROR."""
+        with open(path, 'w') as f:
+            for i in range(count):
+                f.write(f"line {i} {'ERROR' if i % 3 == 0 else 'ok'}\n")
+
+    def test_cat_grep_head(self, tmp_path, capsys):
+        """Тест: cat | grep | head выводит первые совпадения."""
+        self._write_log(tmp_path / "big.log", 100)
+        self.shell.commands.current_dir = str(tmp_path)
+
+        assert self.shell.execute_command("cat big.log | grep ERROR | head 3")
+        assert capsys.readouterr().out == "line 0 ERROR\nline 3 ERROR\nline 6 ERROR\n"
+
+    def test_head_stops_upstream(self, tmp_path, capsys):
+        """Тест: после head файл не дочитывается, все стадии закрываются."""
+        self._write_log(tmp_path / "big.log", 200000)
+        self.shell.commands.current_dir = str(tmp_path)
+
+        self.shell.execute_command("cat big.log | grep -i error | head -n 2")
+
+        assert capsys.readouterr().out == "line 0 ERROR\nline 3 ERROR\n"
+        sample = self.shell.commands.metrics.samples[-1]
+        assert sample.command == "cat|grep|head"
+        assert 0 < sample.bytes_read < 1024
+
+    def test_grep_regex_filter_and_ls(self, tmp_path, capsys):
+        """Тест: grep фильтрует строки ls, шаблон с '|' в кавычках."""
+        work = tmp_path / "work"
+        work.mkdir()
+        for name in ("a.txt", "b.log", "c.txt"):
+            (work / name).write_text("x")
+
+        self.shell.execute_command(f"ls {work} | grep 'a|b'")
+        assert capsys.readouterr().out == "a.txt\nb.log\n"
+
+    def test_grep_recursive_closed_early(self, tmp_path, capsys):
+        """Тест: grep -r в конвейере останавливается вместе с head."""
+        work = tmp_path / "work"
+        work.mkdir()
+        for i in range(20):
+            (work / f"f{i:02d}.txt").write_text("needle\n")
+        self.shell.commands.current_dir = str(work)
+
+        assert self.shell.execute_command("grep -r -j 2 needle . | head 1")
+        assert capsys.readouterr().out == f"{work / 'f00.txt'}:1: needle\n"
+
+    def test_errors(self, tmp_path, capsys):
+        """Тест: команда без поддержки конвейера, пустая стадия и ошибка стадии."""
+        self.shell.commands.current_dir = str(tmp_path)
+
+        assert not self.shell.execute_command("ls | cd x")
+        assert "cannot be used in a pipeline" in capsys.readouterr().out
+
+        assert not self.shell.execute_command("ls |")
+        assert "Empty command" in capsys.readouterr().out
+
+        self.logger.log_error.side_effect = lambda message: setattr(
+            self.logger, 'error_count', self.logger.error_count + 1)
+        assert not self.shell.execute_command("cat missing.txt | head")
+        assert "Path not found" in capsys.readouterr().out
+
+
+class TestHeadCommand:
+    """Тесты для команды head."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.fs_commands = FileSystemCommands(self.logger)
+
+    def test_head_file(self, tmp_path, capsys):
+        """Тест: head выводит первые строки файла."""
+        (tmp_path / "f.txt").write_text("1\n2\n3\n")
+        self.fs_commands.current_dir = str(tmp_path)
+
+        self.fs_commands.head("f.txt", 2)
+        assert capsys.readouterr().out == "1\n2\n"
+
+        self.fs_commands.head("f.txt", -1)
+        assert "Invalid line count" in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()
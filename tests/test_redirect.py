@@ -0,0 +1,116 @@
+"""Тесты для перенаправления вывода ('>', '>>', '2>')."""
+
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+from src.logger import ShellLogger
+from src.parser import ParseError, Redirection, split_redirections
+from src.redirect import redirect_output
+from src.shell import Shell
+
+
+class TestSplitRedirections:
+    """Тесты выделения перенаправлений из строки."""
+
+    @pytest.mark.parametrize("line, command, redirection", [
+        ("ls", "ls", Redirection()),
+        ("ls > out.txt", "ls", Redirection("out.txt")),
+        ("ls -l >>out.txt", "ls -l", Redirection("out.txt", True)),
+        ("grep -r x . > o 2> e", "grep -r x .", Redirection("o", False, "e", False)),
+        ("grep x f 2>>e", "grep x f", Redirection(None, False, "e", True)),
+        ('cat "a>b" > "my out.txt"', 'cat "a>b"', Redirection("my out.txt")),
+        ("cat file2>x", "cat file2", Redirection("x")),
+        ("cat a | grep x > o", "cat a | grep x", Redirection("o")),
+    ])
+    def test_split(self, line, command, redirection):
+        """Тест: операторы вне кавычек и имена файлов выделяются."""
+        assert split_redirections(line) == (command, redirection)
+
+    @pytest.mark.parametrize("line", ["ls >", "ls 2> ", "ls > o | grep x"])
+    def test_errors(self, line):
+        """Тест: нет имени файла или stdout перенаправлен не в последней стадии."""
+        with pytest.raises(ParseError):
+            split_redirections(line)
+
+
+class TestRedirect:
+    """Тесты выполнения команд с перенаправлением."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.logger.error_count = 0
+        self.shell = Shell(logger=self.logger)
+
+    def _work_dir(self, tmp_path):
+        """Рабочий каталог без служебных файлов shell."""
+        work = tmp_path / "work"
+        work.mkdir()
+        self.shell.commands.current_dir = str(work)
+        return work
+
+    def test_stdout_truncate_and_append(self, tmp_path, capsys):
+        """Тест: '>' перезаписывает файл, '>>' дописывает, терминал не получает вывода."""
+        work = self._work_dir(tmp_path)
+        (work / "a.txt").write_text("a")
+
+        self.shell.execute_command("ls > out.txt")
+        self.shell.execute_command("ls >> out.txt")
+        assert (work / "out.txt").read_text() == "a.txt\nout.txt\na.txt\nout.txt\n"
+        self.shell.execute_command("pwd > out.txt")
+        assert (work / "out.txt").read_text() == f"{work}\n"
+        assert capsys.readouterr().out == ""
+
+    def test_cat_binary_exact(self, tmp_path):
+        """Тест: cat в файл копирует байты без изменений."""
+        work = self._work_dir(tmp_path)
+        data = bytes(range(256)) * 4096 + b"tail without newline"
+        (work / "data.bin").write_bytes(data)
+
+        self.shell.execute_command("cat data.bin > copy.bin")
+        self.shell.execute_command("cat data.bin >> copy.bin")
+        assert (work / "copy.bin").read_bytes() == data + b"\n" + data + b"\n"
+
+    def test_stderr_and_pipeline(self, tmp_path, capsys):
+        """Тест: '2>' получает статистику grep -r, конвейер пишет в файл."""
+        work = self._work_dir(tmp_path)
+        (work / "d").mkdir()
+        (work / "d" / "log.txt").write_text("ok\nERROR one\nERROR two\n")
+
+        self.shell.execute_command("grep -r ERROR d > found.txt 2> stats.txt")
+        assert (work / "found.txt").read_text().count("ERROR") == 2
+        assert (work / "stats.txt").read_text().startswith("Searched 1 files")
+
+        self.shell.execute_command("cat d/log.txt | grep ERROR | head 1 > first.txt")
+        assert (work / "first.txt").read_text() == "ERROR one\n"
+        assert capsys.readouterr().err == ""
+
+    def test_cache_sees_new_file(self, tmp_path, capsys):
+        """Тест: созданный перенаправлением файл сразу виден в ls."""
+        self._work_dir(tmp_path)
+        self.shell.execute_command("ls")
+        self.shell.execute_command("pwd > new.txt")
+        capsys.readouterr()
+        self.shell.execute_command("ls")
+        assert capsys.readouterr().out == "new.txt\n"
+
+    def test_open_error(self, tmp_path, capsys):
+        """Тест: ошибка открытия файла сообщается, вывод не теряется."""
+        self._work_dir(tmp_path)
+        self.logger.log_error.side_effect = lambda message: setattr(
+            self.logger, 'error_count', self.logger.error_count + 1)
+        assert not self.shell.execute_command("pwd > missing/out.txt")
+        assert "No such file or directory" in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()
+
+    def test_streams_restored_on_error(self, tmp_path):
+        """Тест: исключение внутри блока не оставляет sys.stdout подменённым."""
+        stdout = sys.stdout
+        with pytest.raises(RuntimeError):
+            with redirect_output(Redirection(str(tmp_path / "o.txt")), str(tmp_path)):
+                print("partial")
+                raise RuntimeError("boom")
+        assert sys.stdout is stdout
+        assert (tmp_path / "o.txt").read_text() == "partial\n"
@@ -0,0 +1,97 @@
+"""Тесты для реестра команд."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands.handlers import create_default_registry
+from src.commands.registry import CommandRegistry, CommandSpec, OptionSpec
+from src.shell import Shell
+
+
+class TestCommandRegistry:
+    """Тесты для реестра команд и диспетчеризации."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.shell = Shell()
+
+    def test_default_registry_contains_builtins(self):
+        """Тест: встроенные команды зарегистрированы."""
+        registry = create_default_registry()
+        for name in ['ls', 'cd', 'cat', 'cp', 'mv', 'rm', 'zip', 'unzip',
+                     'tar', 'untar', 'grep', 'history', 'undo', 'pwd', 'exit']:
+            assert name in registry
+
+    def test_dispatch_calls_handler(self):
+        """Тест: команда вызывает свой метод через реестр."""
+        with patch.object(self.shell.commands, 'cp') as mock_cp:
+            self.shell.execute_command("cp a.txt b.txt -r")
+
+            mock_cp.assert_called_once_with("a.txt", "b.txt", True, workers=None)
+
+    def test_missing_arguments_message_from_spec(self):
+        """Тест: сообщение о нехватке аргументов строится из описания команды."""
+        with patch.object(self.shell.commands, 'cp') as mock_cp, \
+                patch('builtins.print') as mock_print:
+            self.shell.execute_command("cp a.txt")
+
+            mock_cp.assert_not_called()
+            msg = mock_print.call_args[0][0]
+            assert msg.startswith("Error: cp requires source and destination")
+            assert "cp <source> <destination> [-r]" in msg
+
+    def test_unknown_command(self):
+        """Тест: неизвестная команда выдаёт ошибку."""
+        with patch('builtins.print') as mock_print:
+            self.shell.execute_command("frobnicate")
+
+            assert 'Unknown command' in mock_print.call_args[0][0]
+
+    def test_history_and_undo_not_recorded(self):
+        """Тест: history и undo не попадают в историю команд."""
+        with patch('builtins.print'):
+            self.shell.execute_command("pwd")
+            self.shell.execute_command("history")
+            self.shell.execute_command("undo")
+
+        assert self.shell.commands.history == ["pwd"]
+
+    def test_plugin_registration_without_editing_shell(self):
+        """Тест: плагин регистрирует команду через реестр shell."""
+        handler = Mock()
+        self.shell.registry.register(CommandSpec('hello', handler, args=('name',)))
+
+        self.shell.execute_command("hello world")
+
+        handler.assert_called_once_with(self.shell, ['world'], {})
+
+    def test_decorator_registration(self):
+        """Тест: декоратор command регистрирует обработчик."""
+        registry = CommandRegistry()
+
+        @registry.command('greet', optional_args=('name',))
+        def greet(shell, args, options):
+            pass
+
+        assert registry.get('greet').handler is greet
+        assert registry.get('greet').usage == 'greet [name]'
+
+    def test_duplicate_registration_rejected(self):
+        """Тест: повторная регистрация имени запрещена."""
+        registry = create_default_registry()
+        with pytest.raises(ValueError):
+            registry.register(CommandSpec('ls', Mock()))
+
+    def test_usage_includes_options(self):
+        """Тест: справка включает опции команды."""
+        spec = CommandSpec('x', Mock(), args=('a',),
+                           options=(OptionSpec('verbose', long='verbose'),))
+        assert spec.usage == 'x <a> [--verbose]'
+
+    def test_exit_stops_shell(self):
+        """Тест: exit останавливает цикл shell."""
+        with patch('builtins.print'):
+            self.shell.execute_command("exit")
+
+        assert self.shell.running is False
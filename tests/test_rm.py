@@ -1,9 +1,6 @@
 """Тесты для команды rm."""
 
-import pytest
-import os
-import shutil
-from unittest.mock import Mock, patch, call
+from unittest.mock import Mock, patch
 
 from src.commands.filesystem import FileSystemCommands
 from src.logger import ShellLogger
@@ -20,43 +17,20 @@ class TestRmCommand:
         self.fs_commands.trash_dir = ".trash"
         self.fs_commands.history = []
 
-    def test_rm_file_moves_to_trash(self):
+    def test_rm_file_moves_to_trash(self, tmp_path):
         """Тест: удаление файла перемещает его в корзину."""
-        target = "/test/dir/file.txt"
-        trash_dir = "/test/dir/.trash"
-        trash_file = "/test/dir/.trash/file.txt"
-
-        with patch('os.path.exists') as mock_exists, \
-                patch('os.path.abspath', return_value=target), \
-                patch('os.path.join') as mock_join, \
-                patch('os.path.dirname', return_value="/test"), \
-                patch('os.path.isdir', return_value=False), \
-                patch('os.path.basename', return_value='file.txt'), \
-                patch('os.makedirs'), \
-                patch('shutil.move') as mock_move, \
-                patch('builtins.print') as mock_print:
-
-            # Первый вызов - проверка файла, второй - проверка корзины, третий - проверка trash_file
-            mock_exists.side_effect = [True, True, False]
-
-            def join_side_effect(*args):
-                if len(args) == 2:
-                    if args[1] == 'file.txt':
-                        return target
-                    elif args[1] == '.trash':
-                        return trash_dir
-                    elif 'file.txt' in str(args):
-                        return trash_file
-                return '/'.join(args)
-
-            mock_join.side_effect = join_side_effect
+        (tmp_path / "file.txt").write_text("data")
+        self.fs_commands.current_dir = str(tmp_path)
 
+        with patch('builtins.print'):
             self.fs_commands.rm("file.txt")
 
-            # Файл должен переместиться в корзину
-            mock_move.assert_called_once()
-            assert len(self.fs_commands.history) == 1
-            assert self.fs_commands.history[0].startswith('rm|')
+        assert not (tmp_path / "file.txt").exists()
+        [entry] = self.fs_commands.trash.entries()
+        assert entry.original == str(tmp_path / "file.txt")
+        assert (tmp_path / ".trash" / entry.location).read_text() == "data"
+        assert len(self.fs_commands.undo_journal) == 1
+        assert self.fs_commands.undo_journal.peek().op == 'rm'
 
     def test_rm_directory_without_recursive(self):
         """Тест: удаление директории без -r выдаёт ошибку."""
@@ -73,43 +47,24 @@ class TestRmCommand:
             error_msg = mock_print.call_args[0][0]
             assert 'Error' in error_msg
             assert 'recursive' in error_msg.lower() or '-r' in error_msg
-            assert len(self.fs_commands.history) == 0
+            assert len(self.fs_commands.undo_journal) == 0
 
-    def test_rm_directory_with_recursive_and_confirmation(self):
+    def test_rm_directory_with_recursive_and_confirmation(self, tmp_path):
         """Тест: удаление директории с -r требует подтверждения."""
-        target = "/test/dir/folder"
-        trash_dir = "/test/dir/.trash"
-        trash_folder = "/test/dir/.trash/folder"
+        (tmp_path / "folder").mkdir()
+        (tmp_path / "folder" / "a.txt").write_text("a")
+        self.fs_commands.current_dir = str(tmp_path)
 
-        with patch('os.path.exists') as mock_exists, \
-                patch('os.path.abspath', return_value=target), \
-                patch('os.path.join') as mock_join, \
-                patch('os.path.dirname', return_value="/test"), \
-                patch('os.path.isdir', return_value=True), \
-                patch('os.path.basename', return_value='folder'), \
-                patch('os.makedirs'), \
-                patch('builtins.input', return_value='y'), \
-                patch('shutil.move') as mock_move, \
+        with patch('builtins.input', return_value='y') as mock_input, \
                 patch('builtins.print'):
-
-            mock_exists.side_effect = [True, True, False]
-
-            def join_side_effect(*args):
-                if len(args) == 2:
-                    if args[1] == 'folder':
-                        return target
-                    elif args[1] == '.trash':
-                        return trash_dir
-                    elif 'folder' in str(args):
-                        return trash_folder
-                return '/'.join(args)
-
-            mock_join.side_effect = join_side_effect
-
             self.fs_commands.rm("folder", recursive=True)
 
-            mock_move.assert_called_once()
-            assert len(self.fs_commands.history) == 1
+        mock_input.assert_called_once()
+        assert not (tmp_path / "folder").exists()
+        [entry] = self.fs_commands.trash.entries()
+        assert entry.is_dir
+        assert (tmp_path / ".trash" / entry.location / "a.txt").read_text() == "a"
+        assert len(self.fs_commands.undo_journal) == 1
 
     def test_rm_directory_cancelled(self):
         """Тест: отмена удаления директории при вводе 'n'."""
@@ -125,7 +80,7 @@ class TestRmCommand:
             self.fs_commands.rm("important_folder", recursive=True)
 
             assert any('Cancelled' in str(call) for call in mock_print.call_args_list)
-            assert len(self.fs_commands.history) == 0
+            assert len(self.fs_commands.undo_journal) == 0
 
     def test_rm_nonexistent_file(self):
         """Тест: удаление несуществующего файла выдаёт ошибку."""
@@ -138,7 +93,7 @@ class TestRmCommand:
 
             error_msg = mock_print.call_args[0][0]
             assert 'Error' in error_msg
-            assert len(self.fs_commands.history) == 0
+            assert len(self.fs_commands.undo_journal) == 0
             self.logger.log_error.assert_called_once()
 
     def test_rm_root_directory_protection(self):
@@ -152,42 +107,30 @@ class TestRmCommand:
             assert 'Error' in error_msg
             assert 'root' in error_msg.lower() or 'cannot remove' in error_msg.lower()
 
-    def test_rm_creates_undo_entry(self):
-        """Тест: rm создаёт правильную запись для undo."""
-        target = "/test/dir/deleteme.txt"
-        trash_dir = "/test/dir/.trash"
-        trash_file = "/test/dir/.trash/deleteme.txt"
-
-        with patch('os.path.exists') as mock_exists, \
-                patch('os.path.abspath', return_value=target), \
-                patch('os.path.join') as mock_join, \
-                patch('os.path.dirname', return_value="/test"), \
-                patch('os.path.isdir', return_value=False), \
-                patch('os.path.basename', return_value='deleteme.txt'), \
-                patch('os.makedirs'), \
-                patch('shutil.move'), \
-                patch('builtins.print'):
-
-            mock_exists.side_effect = [True, True, False]
-
-            def join_side_effect(*args):
-                if len(args) == 2:
-                    if args[1] == 'deleteme.txt':
-                        return target
-                    elif args[1] == '.trash':
-                        return trash_dir
-                    elif 'deleteme.txt' in str(args):
-                        return trash_file
-                return '/'.join(args)
-
-            mock_join.side_effect = join_side_effect
+    def test_rm_creates_undo_entry(self, tmp_path):
+        """Тест: rm создаёт запись undo со ссылкой на запись корзины."""
+        (tmp_path / "deleteme.txt").write_text("x")
+        self.fs_commands.current_dir = str(tmp_path)
 
+        with patch('builtins.print'):
             self.fs_commands.rm("deleteme.txt")
 
-            assert len(self.fs_commands.history) == 1
-            undo_entry = self.fs_commands.history[0]
-            assert undo_entry.startswith('rm|')
-            parts = undo_entry.split('|')
-            assert len(parts) == 3
-            assert parts[1] == target
-
+        assert len(self.fs_commands.undo_journal) == 1
+        record = self.fs_commands.undo_journal.peek()
+        assert record.op == 'rm'
+        assert record.src == str(tmp_path / "deleteme.txt")
+        assert self.fs_commands.trash.get(record.dst).original == record.src
+
+    def test_rm_same_name_twice(self, tmp_path):
+        """Тест: повторное удаление файла с тем же именем не затирает первую запись."""
+        self.fs_commands.current_dir = str(tmp_path)
+
+        with patch('builtins.print'):
+            for content in ("first", "second"):
+                (tmp_path / "f.txt").write_text(content)
+                self.fs_commands.rm("f.txt")
+
+        entries = self.fs_commands.trash.entries()
+        assert len(entries) == 2
+        assert sorted((tmp_path / ".trash" / entry.location).read_text()
+                      for entry in entries) == ["first", "second"]
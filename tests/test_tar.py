@@ -1,11 +1,16 @@
 """Тесты для команды tar."""
 
-import pytest
+import gzip
 import os
 import tarfile
-from unittest.mock import Mock, patch, MagicMock
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+import pytest
 
 from src.commands.archive import ArchiveCommands
+from src.commands.compress import ParallelBlockWriter
+from src.commands.snapshot import Manifest, diff_states, manifest_path, scan_state
 from src.logger import ShellLogger
 
 
@@ -18,51 +23,33 @@ class TestTarCommand:
         self.archive_commands = ArchiveCommands(self.logger)
         self.archive_commands.current_dir = "/test/dir"
 
-    def test_tar_folder(self):
+    def test_tar_folder(self, tmp_path, capsys):
         """Тест: создание tar.gz архива из папки."""
-        folder_path = "/test/dir/myfolder"
-        archive_path = "/test/dir/archive.tar.gz"
-
-        mock_tar = MagicMock()
-
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', side_effect=[folder_path, archive_path]), \
-                patch('os.path.join', side_effect=[folder_path, archive_path]), \
-                patch('os.path.basename', return_value='myfolder'), \
-                patch('tarfile.open', return_value=mock_tar), \
-                patch('builtins.print') as mock_print:
-            mock_tar.__enter__ = Mock(return_value=mock_tar)
-            mock_tar.__exit__ = Mock(return_value=False)
-
-            self.archive_commands.tar_folder("myfolder", "archive.tar.gz")
-
-            # Проверяем что tarfile.open вызван с правильными параметрами
-            tarfile.open.assert_called_once_with(archive_path, 'w:gz')
-            # Папка должна быть добавлена в архив
-            mock_tar.add.assert_called_once_with(folder_path, arcname='myfolder')
-            success_msg = mock_print.call_args[0][0]
-            assert 'Created' in success_msg or 'SUCCESS' in success_msg
-
-    def test_tar_single_file(self):
+        folder = tmp_path / "myfolder"
+        (folder / "sub").mkdir(parents=True)
+        (folder / "a.txt").write_text("alpha")
+        (folder / "sub" / "b.bin").write_bytes(os.urandom(50_000))
+        self.archive_commands.current_dir = str(tmp_path)
+
+        self.archive_commands.tar_folder("myfolder", "archive.tar.gz", workers=4)
+
+        with tarfile.open(tmp_path / "archive.tar.gz", 'r:gz') as tar:
+            names = tar.getnames()
+            assert sorted(names) == ["myfolder", "myfolder/a.txt", "myfolder/sub",
+                                     "myfolder/sub/b.bin"]
+            packed = tar.extractfile("myfolder/sub/b.bin").read()
+            assert packed == (folder / "sub" / "b.bin").read_bytes()
+        assert 'Created' in capsys.readouterr().out
+
+    def test_tar_single_file(self, tmp_path):
         """Тест: создание tar.gz архива из файла."""
-        file_path = "/test/dir/file.txt"
-        archive_path = "/test/dir/file.tar.gz"
-
-        mock_tar = MagicMock()
+        (tmp_path / "file.txt").write_text("data")
+        self.archive_commands.current_dir = str(tmp_path)
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', side_effect=[file_path, archive_path]), \
-                patch('os.path.join', side_effect=[file_path, archive_path]), \
-                patch('os.path.basename', return_value='file.txt'), \
-                patch('tarfile.open', return_value=mock_tar), \
-                patch('builtins.print'):
-            mock_tar.__enter__ = Mock(return_value=mock_tar)
-            mock_tar.__exit__ = Mock(return_value=False)
+        self.archive_commands.tar_folder("file.txt", "file.tar.gz")
 
-            self.archive_commands.tar_folder("file.txt", "file.tar.gz")
-
-            # Файл должен быть добавлен
-            mock_tar.add.assert_called_once()
+        with tarfile.open(tmp_path / "file.tar.gz", 'r:gz') as tar:
+            assert tar.getnames() == ["file.txt"]
 
     def test_tar_nonexistent_folder(self):
         """Тест: создание tar архива из несуществующей папки выдаёт ошибку."""
@@ -75,3 +62,167 @@ class TestTarCommand:
             error_msg = mock_print.call_args[0][0]
             assert 'Error' in error_msg
             self.logger.log_error.assert_called_once()
+
+
+class TestParallelBlockWriter:
+    """Тесты блочного параллельного gzip."""
+
+    def test_output_is_multi_member_gzip(self):
+        """Тест: данные разбиваются на gzip-члены и читаются обратно без потерь."""
+        data = os.urandom(10_000) + b"text" * 20_000
+        out = BytesIO()
+
+        with ParallelBlockWriter(out, workers=4, block_size=8192) as gz:
+            for i in range(0, len(data), 3000):
+                gz.write(data[i:i + 3000])
+
+        compressed = out.getvalue()
+        assert compressed.count(b"\x1f\x8b\x08") >= len(data) // 8192
+        assert gzip.decompress(compressed) == data
+
+    def test_empty_stream_is_valid_gzip(self):
+        """Тест: пустой поток даёт корректный gzip-файл."""
+        out = BytesIO()
+
+        ParallelBlockWriter(out, workers=2).close()
+
+        assert gzip.decompress(out.getvalue()) == b""
+
+
+class TestTarCodecs:
+    """Тесты выбора кодека tar и автоопределения формата в untar."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.archive_commands = ArchiveCommands(self.logger)
+
+    @pytest.mark.parametrize("codec, mode, magic", [
+        ("stored", "r:", b""),
+        ("deflate", "r:gz", b"\x1f\x8b"),
+        ("bzip2", "r:bz2", b"BZh"),
+        ("xz", "r:xz", b"\xfd7zXZ"),
+    ])
+    def test_tar_codec_roundtrip(self, tmp_path, codec, mode, magic):
+        """Тест: архив в выбранном формате распаковывается untar без указания формата."""
+        folder = tmp_path / "src" / "data"
+        folder.mkdir(parents=True)
+        (folder / "file.txt").write_text("payload " * 5000)
+        self.archive_commands.current_dir = str(tmp_path / "src")
+
+        self.archive_commands.tar_folder("data", str(tmp_path / "out.tar"), codec=codec, level=3)
+
+        assert (tmp_path / "out.tar").read_bytes().startswith(magic)
+        with tarfile.open(tmp_path / "out.tar", mode) as tar:
+            assert "data/file.txt" in tar.getnames()
+
+        restore = tmp_path / "restore"
+        restore.mkdir()
+        self.archive_commands.current_dir = str(restore)
+        self.archive_commands.untar_archive(str(tmp_path / "out.tar"))
+
+        assert (restore / "data" / "file.txt").read_text() == "payload " * 5000
+        self.logger.log_error.assert_not_called()
+
+    def test_unknown_codec(self, tmp_path, capsys):
+        """Тест: неизвестный кодек - ошибка."""
+        (tmp_path / "data").mkdir()
+        self.archive_commands.current_dir = str(tmp_path)
+
+        self.archive_commands.tar_folder("data", "out.tar", codec="zstd")
+
+        assert 'Unknown codec' in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()
+
+
+class TestIncrementalTar:
+    """Тесты инкрементальных архивов с манифестами снимков."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.archive_commands = ArchiveCommands(self.logger)
+
+    def _make_tree(self, root):
+        """Исходное дерево для архивации."""
+        folder = root / "data"
+        (folder / "sub").mkdir(parents=True)
+        (folder / "keep.txt").write_text("keep")
+        (folder / "edit.txt").write_text("v1")
+        (folder / "sub" / "gone.txt").write_text("gone")
+        self.archive_commands.current_dir = str(root)
+        return folder
+
+    def test_plain_archive_has_no_manifest(self, tmp_path):
+        """Тест: обычный tar не оставляет файлов рядом с архивом."""
+        self._make_tree(tmp_path)
+
+        self.archive_commands.tar_folder("data", "plain.tar.gz")
+
+        assert (tmp_path / "plain.tar.gz").exists()
+        assert not os.path.exists(manifest_path(str(tmp_path / "plain.tar.gz")))
+
+    def test_full_archive_writes_manifest(self, tmp_path):
+        """Тест: полный архив с snapshot сохраняет манифест со всеми путями."""
+        self._make_tree(tmp_path)
+
+        self.archive_commands.tar_folder("data", "full.tar.gz", snapshot=True)
+
+        manifest = Manifest.load(manifest_path(str(tmp_path / "full.tar.gz")))
+        assert manifest.base is None
+        assert set(manifest.entries) == {"data", "data/keep.txt", "data/edit.txt",
+                                         "data/sub", "data/sub/gone.txt"}
+        assert manifest.entries["data/sub"].is_dir
+
+    def test_incremental_packs_only_changes(self, tmp_path):
+        """Тест: приращение содержит только изменённые и новые пути, удаления - в манифесте."""
+        folder = self._make_tree(tmp_path)
+        self.archive_commands.tar_folder("data", "full.tar.gz", snapshot=True)
+
+        (folder / "edit.txt").write_text("version 2")
+        (folder / "new.txt").write_text("new")
+        (folder / "sub" / "gone.txt").unlink()
+
+        self.archive_commands.tar_folder("data", "inc1.tar.gz", incremental="full.tar.gz")
+
+        with tarfile.open(tmp_path / "inc1.tar.gz") as tar:
+            assert sorted(tar.getnames()) == ["data/edit.txt", "data/new.txt"]
+        manifest = Manifest.load(manifest_path(str(tmp_path / "inc1.tar.gz")))
+        assert manifest.base == "full.tar.gz"
+        assert manifest.deleted == ["data/sub/gone.txt"]
+        assert "data/new.txt" in manifest.entries
+        self.logger.log_error.assert_not_called()
+
+    def test_incremental_without_base_manifest(self, tmp_path, capsys):
+        """Тест: база без манифеста - ошибка, архив не создаётся."""
+        self._make_tree(tmp_path)
+
+        self.archive_commands.tar_folder("data", "inc.tar.gz", incremental="missing.tar.gz")
+
+        assert 'manifest not found' in capsys.readouterr().out
+        assert not (tmp_path / "inc.tar.gz").exists()
+
+    def test_hash_skips_touched_files(self, tmp_path):
+        """Тест: с --hash файл с новым mtime, но прежним содержимым не упаковывается."""
+        folder = self._make_tree(tmp_path)
+        self.archive_commands.tar_folder("data", "full.tar.gz", use_hash=True, snapshot=True)
+
+        os.utime(folder / "keep.txt", (2_000_000_000, 2_000_000_000))
+
+        self.archive_commands.tar_folder("data", "inc.tar.gz", incremental="full.tar.gz",
+                                         use_hash=True)
+
+        with tarfile.open(tmp_path / "inc.tar.gz") as tar:
+            assert tar.getnames() == []
+
+    def test_diff_states(self, tmp_path):
+        """Тест: сравнение снимков по size/mtime/inode."""
+        folder = self._make_tree(tmp_path)
+        base = scan_state(str(folder), "data")
+        (folder / "edit.txt").write_text("changed content")
+        (folder / "sub" / "new_dir").mkdir()
+
+        changed, deleted = diff_states(base, scan_state(str(folder), "data"))
+
+        assert changed == ["data/edit.txt", "data/sub/new_dir"]
+        assert deleted == []
@@ -0,0 +1,72 @@
+"""Тесты для команды tarls."""
+
+import tarfile
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands.archive import ArchiveCommands
+from src.logger import ShellLogger
+
+
+class TestTarlsCommand:
+    """Тесты для команды tarls."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.archive_commands = ArchiveCommands(self.logger)
+
+    def _make_archive(self, tmp_path, name="a.tar.gz"):
+        """Архив из небольшого дерева."""
+        folder = tmp_path / "data"
+        (folder / "sub").mkdir(parents=True)
+        (folder / "a.txt").write_text("a" * 10)
+        (folder / "sub" / "b.log").write_text("b")
+        (folder / "link").symlink_to("a.txt")
+        self.archive_commands.current_dir = str(tmp_path)
+        self.archive_commands.tar_folder("data", name)
+
+    @pytest.mark.parametrize("codec", ["stored", "deflate"])
+    def test_tarls_lists_members(self, tmp_path, capsys, codec):
+        """Тест: выводятся тип, права, размер и имя каждого элемента."""
+        folder = tmp_path / "data"
+        folder.mkdir()
+        (folder / "a.txt").write_text("a" * 10)
+        (folder / "link").symlink_to("a.txt")
+        self.archive_commands.current_dir = str(tmp_path)
+        self.archive_commands.tar_folder("data", "a.tar", codec=codec)
+        capsys.readouterr()
+
+        self.archive_commands.list_tar("a.tar")
+
+        lines = capsys.readouterr().out.splitlines()
+        by_name = {line.split()[4]: line for line in lines[:-2]}
+        assert by_name["data"].startswith("d")
+        assert by_name["data/a.txt"].split()[1] == "10"
+        assert by_name["data/link"].startswith("l") and by_name["data/link"].endswith("-> a.txt")
+        assert lines[-1].endswith("3 members")
+
+    def test_tarls_does_not_extract(self, tmp_path, capsys):
+        """Тест: данные не извлекаются и не пишутся на диск."""
+        self._make_archive(tmp_path)
+        capsys.readouterr()
+
+        with patch.object(tarfile.TarFile, 'extractfile') as mock_extract, \
+                patch.object(tarfile.TarFile, 'extractall') as mock_extractall:
+            self.archive_commands.list_tar("a.tar.gz")
+
+        mock_extract.assert_not_called()
+        mock_extractall.assert_not_called()
+        assert "data/sub/b.log" in capsys.readouterr().out
+
+    def test_tarls_with_glob(self, tmp_path, capsys):
+        """Тест: шаблон ограничивает список."""
+        self._make_archive(tmp_path)
+        capsys.readouterr()
+
+        self.archive_commands.list_tar("a.tar.gz", ["*.log"])
+
+        out = capsys.readouterr().out
+        assert "data/sub/b.log" in out
+        assert "a.txt" not in out
@@ -0,0 +1,356 @@
+"""Тесты для корзины и команды trash."""
+
+import errno
+import os
+import stat
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands.filesystem import FileSystemCommands
+from src.constants import TRASH_INDEX_FILE
+from src.logger import ShellLogger
+from src.trash import TrashStore, find_mount_root, parse_size
+
+
+class TestTrashStore:
+    """Тесты хранилища корзины."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.root = os.path.abspath("trash")
+        self.store = TrashStore(self.root)
+
+    def _file(self, tmp_path, name, data):
+        """Создание файла с содержимым."""
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return str(path)
+
+    def test_index_persists(self, tmp_path):
+        """Тест: записи восстанавливаются из индекса новым объектом."""
+        entry = self.store.add(self._file(tmp_path, "a.txt", b"a"))
+        self.store.close()
+
+        reopened = TrashStore(self.root)
+        assert reopened.get(entry.id) == entry
+        assert [e.id for e in reopened.entries()] == [entry.id]
+
+    def test_identical_files_share_data(self, tmp_path):
+        """Тест: одинаковые файлы хранятся один раз."""
+        first = self.store.add(self._file(tmp_path, "a.txt", b"same" * 100))
+        second = self.store.add(self._file(tmp_path, "dir/b.txt", b"same" * 100))
+
+        assert first.location == second.location
+        assert len(os.listdir(os.path.join(self.root, "items"))) == 1
+        assert self.store.usage() == 400
+
+    def test_hash_only_on_size_match(self, tmp_path):
+        """Тест: хэш не вычисляется, если в корзине нет файлов того же размера."""
+        with patch('src.trash._file_digest') as mock_digest:
+            self.store.add(self._file(tmp_path, "a.txt", b"a"))
+            self.store.add(self._file(tmp_path, "b.txt", b"bb"))
+        mock_digest.assert_not_called()
+
+    def test_same_size_different_content(self, tmp_path):
+        """Тест: файлы одного размера с разным содержимым хранятся отдельно."""
+        first = self.store.add(self._file(tmp_path, "a.txt", b"aaaa"))
+        second = self.store.add(self._file(tmp_path, "b.txt", b"bbbb"))
+        assert first.location != second.location
+
+    def test_restore_shared_keeps_other_entry(self, tmp_path):
+        """Тест: восстановление дубликата не ломает вторую запись."""
+        a = self._file(tmp_path, "a.txt", b"data")
+        b = self._file(tmp_path, "b.txt", b"data")
+        first = self.store.add(a)
+        second = self.store.add(b)
+
+        self.store.restore(first.id)
+        self.store.restore(second.id)
+
+        assert open(a, 'rb').read() == b"data"
+        assert open(b, 'rb').read() == b"data"
+        assert self.store.entries() == []
+        assert os.listdir(os.path.join(self.root, "items")) == []
+
+    @pytest.mark.parametrize("restore_order", [(0, 1), (1, 0)])
+    def test_restore_duplicate_keeps_own_metadata(self, tmp_path, restore_order):
+        """Тест: дубликат восстанавливается со своими правами и временем изменения."""
+        paths = [self._file(tmp_path, "a.txt", b"data"), self._file(tmp_path, "b.txt", b"data")]
+        os.chmod(paths[0], 0o644)
+        os.chmod(paths[1], 0o600)
+        os.utime(paths[0], ns=(1_000_000_000_000_000_000, 1_000_000_000_000_000_000))
+        os.utime(paths[1], ns=(1_200_000_000_000_000_000, 1_200_000_000_000_000_000))
+        entries = [self.store.add(path) for path in paths]
+        assert entries[0].location == entries[1].location
+
+        for i in restore_order:
+            self.store.restore(entries[i].id)
+
+        assert stat.S_IMODE(os.stat(paths[0]).st_mode) == 0o644
+        assert stat.S_IMODE(os.stat(paths[1]).st_mode) == 0o600
+        assert os.stat(paths[0]).st_mtime_ns == 1_000_000_000_000_000_000
+        assert os.stat(paths[1]).st_mtime_ns == 1_200_000_000_000_000_000
+
+    def test_index_without_metadata_loads(self, tmp_path):
+        """Тест: записи индекса старого формата (без прав и времени) читаются."""
+        self.store.close()
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, TRASH_INDEX_FILE), 'w', encoding='utf-8') as f:
+            f.write('["add", "abc", "/x/a.txt", 1.0, "items/abc", false, 4, null]\n')
+
+        entry = TrashStore(self.root).get("abc")
+        assert entry is not None and entry.mode is None and entry.mtime_ns is None
+
+    def test_restore_refuses_to_overwrite(self, tmp_path):
+        """Тест: восстановление на занятое место - ошибка."""
+        path = self._file(tmp_path, "a.txt", b"old")
+        entry = self.store.add(path)
+        self._file(tmp_path, "a.txt", b"new")
+
+        with pytest.raises(FileExistsError):
+            self.store.restore(entry.id)
+        assert self.store.get(entry.id) is not None
+
+    def test_purge_frees_shared_data_once(self, tmp_path):
+        """Тест: общие данные удаляются вместе с последней ссылкой."""
+        first = self.store.add(self._file(tmp_path, "a.txt", b"x" * 10))
+        second = self.store.add(self._file(tmp_path, "b.txt", b"x" * 10))
+
+        assert self.store.purge([first.id]) == (1, 0)
+        assert self.store.purge([second.id]) == (1, 10)
+        assert os.listdir(os.path.join(self.root, "items")) == []
+
+    def test_expire_by_age_and_quota(self, tmp_path):
+        """Тест: expire удаляет старые записи, затем самые старые до квоты."""
+        with patch('time.time', return_value=time.time() - 10 * 86400):
+            old = self.store.add(self._file(tmp_path, "old.txt", b"o" * 100))
+        middle = self.store.add(self._file(tmp_path, "mid.txt", b"m" * 200))
+        new = self.store.add(self._file(tmp_path, "new.txt", b"n" * 300))
+
+        assert self.store.expire(max_age=7 * 86400) == (1, 100)
+        assert self.store.get(old.id) is None
+
+        assert self.store.expire(max_size=400) == (1, 200)
+        assert self.store.get(middle.id) is None
+        assert self.store.get(new.id) is not None
+
+    def test_directory_size(self, tmp_path):
+        """Тест: размер каталога считается по содержимому."""
+        self._file(tmp_path, "d/a", b"a" * 5)
+        self._file(tmp_path, "d/sub/b", b"b" * 7)
+        entry = self.store.add(str(tmp_path / "d"))
+        assert entry.is_dir
+        assert self.store.entry_size(entry) == 12
+
+    def test_directories_not_deduplicated(self, tmp_path):
+        """Тест: каталоги не попадают в индекс по размеру и не сравниваются по хэшу."""
+        (tmp_path / "d").mkdir()
+        directory = self.store.add(str(tmp_path / "d"))
+        with patch('src.trash._file_digest') as mock_digest:
+            self.store.add(self._file(tmp_path, "empty", b""))
+        mock_digest.assert_not_called()
+
+        self.store.close()
+        reopened = TrashStore(self.root)
+        assert reopened.get(directory.id).size is None
+        assert directory.id not in [i for ids in reopened._by_size.values() for i in ids]
+
+    def test_index_compaction(self, tmp_path):
+        """Тест: индекс сжимается, когда в нём много мёртвых записей."""
+        with patch('src.trash.TRASH_COMPACT_SLACK', 4):
+            for i in range(10):
+                entry = self.store.add(self._file(tmp_path, f"f{i}", str(i).encode()))
+                self.store.purge([entry.id])
+            kept = self.store.add(self._file(tmp_path, "kept", b"k"))
+        self.store.close()
+
+        with open(os.path.join(self.root, TRASH_INDEX_FILE)) as f:
+            assert len(f.readlines()) <= 6
+        assert [e.id for e in TrashStore(self.root).entries()] == [kept.id]
+
+    def test_parse_size(self):
+        """Тест: разбор размеров с суффиксами."""
+        assert parse_size("500") == 500
+        assert parse_size("10K") == 10 * 1024
+        assert parse_size("1.5M") == int(1.5 * 1024 ** 2)
+        assert parse_size("2GiB") == 2 * 1024 ** 3
+        with pytest.raises(ValueError):
+            parse_size("big")
+
+
+class TestTrashCommand:
+    """Тесты для команды trash."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.fs_commands = FileSystemCommands(self.logger)
+
+    def _remove(self, tmp_path, name, data):
+        """Создание файла и удаление его через rm."""
+        (tmp_path / name).write_text(data)
+        self.fs_commands.current_dir = str(tmp_path)
+        with patch('builtins.print'):
+            self.fs_commands.rm(name)
+
+    def test_trash_list(self, tmp_path, capsys):
+        """Тест: список показывает исходные пути и итог."""
+        self._remove(tmp_path, "a.txt", "aaa")
+        self._remove(tmp_path, "b.txt", "bbbb")
+
+        self.fs_commands.manage_trash('list')
+
+        out = capsys.readouterr().out
+        assert str(tmp_path / "a.txt") in out
+        assert str(tmp_path / "b.txt") in out
+        assert "2 entries, 7B on disk" in out
+
+    def test_trash_purge_all(self, tmp_path, capsys):
+        """Тест: purge без id очищает корзину."""
+        self._remove(tmp_path, "a.txt", "aaa")
+
+        self.fs_commands.manage_trash('purge')
+
+        assert "Purged 1 entries, freed 3B" in capsys.readouterr().out
+        assert self.fs_commands.trash.entries() == []
+
+    def test_trash_purge_unknown_id(self, capsys):
+        """Тест: неизвестный id - ошибка."""
+        self.fs_commands.manage_trash('purge', ['nope'])
+
+        assert "No such trash entry: nope" in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()
+
+    def test_trash_expire_requires_limit(self, capsys):
+        """Тест: expire без --days и --max-size - ошибка."""
+        self.fs_commands.manage_trash('expire')
+        assert 'Error' in capsys.readouterr().out
+
+    def test_trash_expire_quota(self, tmp_path, capsys):
+        """Тест: expire --max-size оставляет самые новые записи."""
+        self._remove(tmp_path, "a.txt", "a" * 10)
+        self._remove(tmp_path, "b.txt", "b" * 20)
+
+        self.fs_commands.manage_trash('expire', max_size=25)
+
+        assert "Expired 1 entries" in capsys.readouterr().out
+        [entry] = self.fs_commands.trash.entries()
+        assert entry.original == str(tmp_path / "b.txt")
+
+    def test_trash_unknown_action(self, capsys):
+        """Тест: неизвестное действие - ошибка."""
+        self.fs_commands.manage_trash('shred')
+        assert 'Unknown trash action: shred' in capsys.readouterr().out
+
+
+class TestTrashManager:
+    """Тесты выбора корзины по файловой системе."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.fs_commands = FileSystemCommands(self.logger)
+
+    def _devices(self, mount):
+        """Подмена номеров устройств: всё внутри mount - устройство 2."""
+        def device_of(path):
+            os.lstat(path)
+            return 2 if os.path.commonpath([str(mount), path]) == str(mount) else 1
+        return patch('src.trash.device_of', side_effect=device_of)
+
+    def _read_only(self, mount):
+        """Подмена os.makedirs: внутри mount каталоги не создаются."""
+        makedirs = os.makedirs
+
+        def fake_makedirs(path, *args, **kwargs):
+            if os.path.commonpath([str(mount), str(path)]) == str(mount):
+                raise PermissionError("read-only")
+            return makedirs(path, *args, **kwargs)
+        return patch('os.makedirs', side_effect=fake_makedirs)
+
+    def test_find_mount_root(self, tmp_path):
+        """Тест: подъём по каталогам останавливается на границе устройства."""
+        mount = tmp_path / "mnt"
+        (mount / "a" / "b").mkdir(parents=True)
+        with self._devices(mount):
+            assert find_mount_root(str(mount / "a" / "b")) == str(mount)
+
+    def test_same_device_uses_home_trash(self, tmp_path):
+        """Тест: на устройстве основной корзины используется она."""
+        (tmp_path / "a.txt").write_text("a")
+        store, same_device = self.fs_commands.trash.store_for(str(tmp_path / "a.txt"))
+        assert store is self.fs_commands.trash.home
+        assert same_device
+
+    def test_other_device_uses_mount_trash(self, tmp_path):
+        """Тест: объект на другом устройстве переименовывается в .trash точки монтирования."""
+        mount = tmp_path / "mnt"
+        (mount / "data").mkdir(parents=True)
+        (mount / "data" / "f.txt").write_text("f")
+        self.fs_commands.current_dir = str(mount / "data")
+
+        with self._devices(mount), \
+                patch('shutil.move') as mock_move, \
+                patch('builtins.input') as mock_input, \
+                patch('builtins.print'):
+            self.fs_commands.rm("f.txt")
+
+        mock_move.assert_not_called()
+        mock_input.assert_not_called()
+        [entry] = self.fs_commands.trash.entries()
+        assert (mount / ".trash" / entry.location).read_text() == "f"
+
+        self.fs_commands.close()
+        restarted = FileSystemCommands(self.logger)
+        assert restarted.trash.get(entry.id) == entry
+
+    def test_cross_device_fallback_asks(self, tmp_path, capsys):
+        """Тест: без корзины на устройстве выводится предупреждение с размером и запрос."""
+        mount = tmp_path / "mnt"
+        mount.mkdir()
+        (mount / "big.bin").write_bytes(b"x" * 2048)
+        self.fs_commands.current_dir = str(mount)
+
+        with self._devices(mount), \
+                self._read_only(mount), \
+                patch('builtins.input', return_value='n'):
+            self.fs_commands.rm("big.bin")
+
+        out = capsys.readouterr().out
+        assert "Warning" in out and "2.0K" in out
+        assert "Cancelled" in out
+        assert (mount / "big.bin").exists()
+        assert self.fs_commands.trash.entries() == []
+
+    def test_cross_device_copy_after_confirmation(self, tmp_path):
+        """Тест: после подтверждения объект копируется в основную корзину."""
+        mount = tmp_path / "mnt"
+        mount.mkdir()
+        (mount / "f.txt").write_text("f")
+        self.fs_commands.current_dir = str(mount)
+
+        with self._devices(mount), \
+                self._read_only(mount), \
+                patch('builtins.input', return_value='y'), \
+                patch('builtins.print'):
+            self.fs_commands.rm("f.txt")
+
+        [entry] = self.fs_commands.trash.home.entries()
+        assert not (mount / "f.txt").exists()
+        assert (tmp_path / ".trash" / entry.location).read_text() == "f"
+
+    def test_store_add_exdev_falls_back_to_copy(self, tmp_path):
+        """Тест: ошибка EXDEV при rename - копирование через shutil.move."""
+        (tmp_path / "a.txt").write_text("a")
+        store = TrashStore(str(tmp_path / "t"))
+        exdev = OSError(errno.EXDEV, "Invalid cross-device link")
+
+        with patch('os.rename', side_effect=exdev), \
+                patch('shutil.move') as mock_move:
+            entry = store.add(str(tmp_path / "a.txt"))
+
+        mock_move.assert_called_once_with(str(tmp_path / "a.txt"),
+                                          os.path.join(store.root, entry.location))
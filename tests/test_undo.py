@@ -1,12 +1,11 @@
 """Тесты для команды undo."""
 
-import pytest
-import os
-import shutil
 from unittest.mock import Mock, patch
 
 from src.commands.advanced import AdvancedCommands
+from src.constants import MAX_UNDO_SIZE, UNDO_COMPACT_THRESHOLD, UNDO_FILE
 from src.logger import ShellLogger
+from src.undo import UndoJournal, UndoRecord
 
 
 class TestUndoCommand:
@@ -18,12 +17,13 @@ class TestUndoCommand:
         self.advanced_commands = AdvancedCommands(self.logger)
         self.advanced_commands.current_dir = "/test/dir"
         self.advanced_commands.history = []
+        self.journal = self.advanced_commands.undo_journal
 
     def test_undo_cp_removes_copy(self):
         """Тест: undo после cp удаляет скопированный файл."""
         src = "/test/dir/original.txt"
         dst = "/test/dir/copy.txt"
-        self.advanced_commands.history = [f"cp|{src}|{dst}"]
+        self.journal.push('cp', src, dst)
 
         with patch('os.path.exists', return_value=True), \
                 patch('os.path.isdir', return_value=False), \
@@ -33,7 +33,7 @@ class TestUndoCommand:
 
             # Скопированный файл должен быть удалён
             mock_remove.assert_called_once_with(dst)
-            assert len(self.advanced_commands.history) == 0
+            assert len(self.journal) == 0
             success_msg = str(mock_print.call_args_list)
             assert 'Undone' in success_msg or 'removed' in success_msg
 
@@ -41,7 +41,7 @@ class TestUndoCommand:
         """Тест: undo после mv перемещает файл обратно."""
         src = "/test/dir/old.txt"
         dst = "/test/dir/new.txt"
-        self.advanced_commands.history = [f"mv|{src}|{dst}"]
+        self.journal.push('mv', src, dst)
 
         with patch('os.path.exists', return_value=True), \
                 patch('shutil.move') as mock_move, \
@@ -50,30 +50,41 @@ class TestUndoCommand:
 
             # Файл должен переместиться обратно
             mock_move.assert_called_once_with(dst, src)
-            assert len(self.advanced_commands.history) == 0
+            assert len(self.journal) == 0
             success_msg = str(mock_print.call_args_list)
             assert 'Undone' in success_msg or 'moved back' in success_msg
 
-    def test_undo_rm_restores_from_trash(self):
-        """Тест: undo после rm восстанавливает файл из корзины."""
-        original = "/test/dir/deleted.txt"
-        trash = "/test/dir/.trash/deleted.txt"
-        self.advanced_commands.history = [f"rm|{original}|{trash}"]
+    def test_undo_rm_restores_from_trash(self, tmp_path):
+        """Тест: undo после rm находит запись в индексе корзины и восстанавливает файл."""
+        original = tmp_path / "deleted.txt"
+        original.write_text("data")
+        entry = self.advanced_commands.trash.add(str(original))
+        self.journal.push('rm', str(original), entry.id)
 
-        with patch('os.path.exists', return_value=True), \
-                patch('shutil.move') as mock_move, \
-                patch('builtins.print') as mock_print:
+        with patch('builtins.print') as mock_print:
             self.advanced_commands.undo()
 
-            # Файл должен переместиться из корзины обратно
-            mock_move.assert_called_once_with(trash, original)
-            assert len(self.advanced_commands.history) == 0
+            assert original.read_text() == "data"
+            assert self.advanced_commands.trash.get(entry.id) is None
+            assert len(self.journal) == 0
             success_msg = str(mock_print.call_args_list)
             assert 'Undone' in success_msg or 'restored' in success_msg
 
+    def test_undo_rm_legacy_trash_path(self, tmp_path):
+        """Тест: старая запись undo с путём в корзине вместо id всё ещё отменяется."""
+        original = tmp_path / "deleted.txt"
+        trash = tmp_path / ".trash" / "deleted.txt"
+        trash.write_text("old")
+        self.journal.push('rm', str(original), str(trash))
+
+        with patch('builtins.print'):
+            self.advanced_commands.undo()
+
+        assert original.read_text() == "old"
+        assert not trash.exists()
+
     def test_undo_empty_history(self):
         """Тест: undo без истории выводит сообщение."""
-        self.advanced_commands.history = []
 
         with patch('builtins.print') as mock_print:
             self.advanced_commands.undo()
@@ -82,31 +93,28 @@ class TestUndoCommand:
             msg = mock_print.call_args[0][0]
             assert 'Nothing to undo' in msg
 
-    def test_undo_skips_regular_commands(self):
-        """Тест: undo пропускает обычные команды и находит последнюю отменяемую."""
-        self.advanced_commands.history = [
-            "cp|/test/file1|/test/copy1",
-            "ls",
-            "pwd",
-            "cd Documents",
-            "mv|/test/file2|/test/moved"
-        ]
+    def test_undo_ignores_regular_commands(self):
+        """Тест: undo отменяет последнюю операцию и не трогает историю команд."""
+        self.advanced_commands.history = ["ls", "pwd", "cd Documents"]
+        self.journal.push('cp', "/test/file1", "/test/copy1")
+        self.journal.push('mv', "/test/file2", "/test/moved")
 
         with patch('os.path.exists', return_value=True), \
-                patch('shutil.move'), \
+                patch('shutil.move') as mock_move, \
                 patch('builtins.print'):
             self.advanced_commands.undo()
 
-            # Должна отменится последняя mv команда
-            # В истории должно остаться 4 записи (mv удалена)
-            assert len(self.advanced_commands.history) == 4
-            assert "mv|" not in self.advanced_commands.history[-1]
+            # Должна отмениться последняя mv команда
+            mock_move.assert_called_once_with("/test/moved", "/test/file2")
+            assert len(self.journal) == 1
+            assert self.journal.peek().op == 'cp'
+            assert self.advanced_commands.history == ["ls", "pwd", "cd Documents"]
 
     def test_undo_file_not_found(self):
         """Тест: undo когда файл уже не существует."""
         src = "/test/dir/original.txt"
         dst = "/test/dir/copy.txt"
-        self.advanced_commands.history = [f"cp|{src}|{dst}"]
+        self.journal.push('cp', src, dst)
 
         with patch('os.path.exists', return_value=False), \
                 patch('builtins.print') as mock_print:
@@ -120,7 +128,7 @@ class TestUndoCommand:
         """Тест: undo после cp -r удаляет скопированную директорию."""
         src = "/test/dir/original_folder"
         dst = "/test/dir/copy_folder"
-        self.advanced_commands.history = [f"cp|{src}|{dst}"]
+        self.journal.push('cp', src, dst)
 
         with patch('os.path.exists', return_value=True), \
                 patch('os.path.isdir', return_value=True), \
@@ -130,4 +138,81 @@ class TestUndoCommand:
 
             # Скопированная папка должна быть удалена
             mock_rmtree.assert_called_once_with(dst)
-            assert len(self.advanced_commands.history) == 0
+            assert len(self.journal) == 0
+
+    def test_undo_path_with_pipe(self):
+        """Тест: символ '|' в пути не портит запись undo."""
+        src = "/test/dir/a|b.txt"
+        dst = "/test/dir/c|d.txt"
+        self.journal.push('mv', src, dst)
+
+        with patch('os.path.exists', return_value=True), \
+                patch('shutil.move') as mock_move, \
+                patch('builtins.print'):
+            self.advanced_commands.undo()
+
+            mock_move.assert_called_once_with(dst, src)
+
+
+class TestUndoJournal:
+    """Тесты для журнала отменяемых операций."""
+
+    def test_journal_persists_across_restarts(self):
+        """Тест: операции и их отмены восстанавливаются из файла."""
+        journal = UndoJournal()
+        journal.push('cp', "/x/a", "/x/b")
+        journal.push('mv', "/x/c|1", "/x/d")
+        journal.push('rm', "/x/e", "/x/.trash/e")
+        assert journal.pop() == UndoRecord('rm', "/x/e", "/x/.trash/e")
+        journal.close()
+
+        restored = UndoJournal()
+        restored.load()
+        assert list(restored) == [
+            UndoRecord('cp', "/x/a", "/x/b"),
+            UndoRecord('mv', "/x/c|1", "/x/d"),
+        ]
+
+    def test_pop_empty_journal(self):
+        """Тест: pop пустого журнала возвращает None."""
+        assert UndoJournal().pop() is None
+
+    def test_journal_compaction(self):
+        """Тест: файл журнала сжимается после порога записей."""
+        journal = UndoJournal()
+        for i in range(UNDO_COMPACT_THRESHOLD):
+            journal.push('cp', f"/x/{i}", f"/y/{i}")
+            journal.pop()
+        journal.push('cp', "/x/last", "/y/last")
+        journal.close()
+
+        with open(UNDO_FILE, encoding='utf-8') as f:
+            assert len(f.readlines()) <= MAX_UNDO_SIZE
+
+        restored = UndoJournal()
+        restored.load()
+        assert list(restored) == [UndoRecord('cp', "/x/last", "/y/last")]
+
+    def test_loaded_journal_counted_for_compaction(self):
+        """Тест: порог сжатия учитывает все записи файла после загрузки."""
+        journal = UndoJournal()
+        for i in range(UNDO_COMPACT_THRESHOLD):
+            journal.push('cp', f"/x/{i}", f"/y/{i}")
+        journal.close()
+
+        restored = UndoJournal()
+        restored.load()
+        restored.push('cp', "/x/last", "/y/last")
+        restored.close()
+
+        with open(UNDO_FILE, encoding='utf-8') as f:
+            assert len(f.readlines()) <= MAX_UNDO_SIZE
+
+    def test_history_does_not_contain_undo_records(self):
+        """Тест: записи undo не попадают в историю команд."""
+        commands = AdvancedCommands(Mock(spec=ShellLogger))
+        commands.add_to_history("cp a b")
+        commands.add_undo_record('cp', "/x/a", "/x/b")
+
+        assert commands.history == ["cp a b"]
+        assert len(commands.undo_journal) == 1
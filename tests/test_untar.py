@@ -1,9 +1,6 @@
 """Тесты для команды untar."""
 
-import pytest
-import os
-import tarfile
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import MagicMock, Mock, patch
 
 from src.commands.archive import ArchiveCommands
 from src.logger import ShellLogger
@@ -28,6 +25,7 @@ class TestUntarCommand:
                 patch('os.path.abspath', return_value=archive_path), \
                 patch('os.path.join', return_value=archive_path), \
                 patch('tarfile.open', return_value=mock_tar), \
+                patch('os.path.getsize', return_value=0), \
                 patch('builtins.print') as mock_print:
             mock_tar.__enter__ = Mock(return_value=mock_tar)
             mock_tar.__exit__ = Mock(return_value=False)
@@ -37,6 +35,7 @@ class TestUntarCommand:
             # extractall должен быть вызван с фильтром
             mock_tar.extractall.assert_called_once_with(
                 self.archive_commands.current_dir,
+                members=None,
                 filter='data'
             )
             success_msg = mock_print.call_args[0][0]
@@ -64,6 +63,7 @@ class TestUntarCommand:
                 patch('os.path.abspath', return_value=archive_path), \
                 patch('os.path.join', return_value=archive_path), \
                 patch('tarfile.open', return_value=mock_tar), \
+                patch('os.path.getsize', return_value=0), \
                 patch('builtins.print'):
             mock_tar.__enter__ = Mock(return_value=mock_tar)
             mock_tar.__exit__ = Mock(return_value=False)
@@ -74,3 +74,80 @@ class TestUntarCommand:
             call_args = mock_tar.extractall.call_args
             assert call_args[0][0] == "/test/dir"
             assert call_args[1]['filter'] == 'data'
+
+
+class TestUntarChain:
+    """Тесты восстановления цепочки полного архива и приращений."""
+
+    def test_untar_chain_restores_latest_state(self, tmp_path):
+        """Тест: --chain восстанавливает состояние на момент последнего приращения."""
+        logger = Mock(spec=ShellLogger)
+        commands = ArchiveCommands(logger)
+        source = tmp_path / "src"
+        folder = source / "data"
+        (folder / "sub").mkdir(parents=True)
+        (folder / "a.txt").write_text("a1")
+        (folder / "sub" / "b.txt").write_text("b")
+        commands.current_dir = str(source)
+        commands.tar_folder("data", str(tmp_path / "full.tar.gz"), snapshot=True)
+
+        (folder / "a.txt").write_text("a2")
+        (folder / "sub" / "b.txt").unlink()
+        commands.tar_folder("data", str(tmp_path / "inc1.tar.gz"),
+                            incremental=str(tmp_path / "full.tar.gz"))
+
+        (folder / "c.txt").write_text("c")
+        commands.tar_folder("data", str(tmp_path / "inc2.tar.gz"),
+                            incremental=str(tmp_path / "inc1.tar.gz"))
+
+        restore = tmp_path / "restore"
+        restore.mkdir()
+        commands.current_dir = str(restore)
+        commands.untar_archive(str(tmp_path / "inc2.tar.gz"), chain=True)
+
+        assert (restore / "data" / "a.txt").read_text() == "a2"
+        assert (restore / "data" / "c.txt").read_text() == "c"
+        assert not (restore / "data" / "sub" / "b.txt").exists()
+        logger.log_error.assert_not_called()
+
+    def test_untar_without_chain_extracts_only_increment(self, tmp_path):
+        """Тест: без --chain распаковывается только указанный архив."""
+        commands = ArchiveCommands(Mock(spec=ShellLogger))
+        folder = tmp_path / "src" / "data"
+        folder.mkdir(parents=True)
+        (folder / "old.txt").write_text("old")
+        commands.current_dir = str(tmp_path / "src")
+        commands.tar_folder("data", str(tmp_path / "full.tar.gz"), snapshot=True)
+        (folder / "new.txt").write_text("new")
+        commands.tar_folder("data", str(tmp_path / "inc.tar.gz"),
+                            incremental=str(tmp_path / "full.tar.gz"))
+
+        restore = tmp_path / "restore"
+        restore.mkdir()
+        commands.current_dir = str(restore)
+        commands.untar_archive(str(tmp_path / "inc.tar.gz"))
+
+        assert (restore / "data" / "new.txt").exists()
+        assert not (restore / "data" / "old.txt").exists()
+
+
+class TestUntarSelected:
+    """Тесты извлечения отдельных элементов TAR."""
+
+    def test_untar_selected_members(self, tmp_path):
+        """Тест: извлекается только выбранный файл."""
+        commands = ArchiveCommands(Mock(spec=ShellLogger))
+        folder = tmp_path / "src" / "data"
+        folder.mkdir(parents=True)
+        (folder / "one.txt").write_text("1")
+        (folder / "two.bin").write_text("2")
+        commands.current_dir = str(tmp_path / "src")
+        commands.tar_folder("data", str(tmp_path / "a.tar.gz"))
+
+        restore = tmp_path / "restore"
+        restore.mkdir()
+        commands.current_dir = str(restore)
+        commands.untar_archive(str(tmp_path / "a.tar.gz"), members=["*.txt"])
+
+        assert (restore / "data" / "one.txt").read_text() == "1"
+        assert not (restore / "data" / "two.bin").exists()
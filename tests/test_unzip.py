@@ -1,11 +1,15 @@
 """Тесты для команды unzip."""
 
-import pytest
 import os
+import shutil
 import zipfile
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
+
+import pytest
 
+from src.commands import extract
 from src.commands.archive import ArchiveCommands
+from src.commands.extract import ParallelUnzipper, safe_member_path
 from src.logger import ShellLogger
 
 
@@ -18,26 +22,26 @@ class TestUnzipCommand:
         self.archive_commands = ArchiveCommands(self.logger)
         self.archive_commands.current_dir = "/test/dir"
 
-    def test_unzip_archive(self):
-        """Тест: распаковка zip архива."""
-        archive_path = "/test/dir/archive.zip"
+    def _make_archive(self, path, members):
+        """Создание архива из словаря имя -> содержимое."""
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for name, data in members.items():
+                zipf.writestr(name, data)
 
-        mock_zipf = MagicMock()
-
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', return_value=archive_path), \
-                patch('os.path.join', return_value=archive_path), \
-                patch('zipfile.ZipFile', return_value=mock_zipf), \
-                patch('builtins.print') as mock_print:
-            mock_zipf.__enter__ = Mock(return_value=mock_zipf)
-            mock_zipf.__exit__ = Mock(return_value=False)
+    def test_unzip_archive(self, tmp_path, capsys):
+        """Тест: распаковка zip архива."""
+        members = {f"dir{i % 5}/file{i}.txt": f"content {i}" * (i + 1) for i in range(200)}
+        members["empty_dir/"] = ""
+        self._make_archive(tmp_path / "archive.zip", members)
+        self.archive_commands.current_dir = str(tmp_path)
 
-            self.archive_commands.unzip_archive("archive.zip")
+        self.archive_commands.unzip_archive("archive.zip", workers=8)
 
-            # extractall должен быть вызван
-            mock_zipf.extractall.assert_called_once_with(self.archive_commands.current_dir)
-            success_msg = mock_print.call_args[0][0]
-            assert 'Extracted' in success_msg or 'SUCCESS' in success_msg
+        for name, data in members.items():
+            if not name.endswith('/'):
+                assert (tmp_path / name).read_text() == data
+        assert (tmp_path / "empty_dir").is_dir()
+        assert 'Extracted' in capsys.readouterr().out
 
     def test_unzip_nonexistent_archive(self):
         """Тест: распаковка несуществующего архива выдаёт ошибку."""
@@ -51,23 +55,139 @@ class TestUnzipCommand:
             assert 'Error' in error_msg
             self.logger.log_error.assert_called_once()
 
-    def test_unzip_to_current_directory(self):
+    def test_unzip_to_current_directory(self, tmp_path):
         """Тест: unzip распаковывает в текущую директорию."""
-        archive_path = "/test/dir/test.zip"
+        self._make_archive(tmp_path / "test.zip", {"a.txt": "a"})
+        target = tmp_path / "target"
+        target.mkdir()
+        self.archive_commands.current_dir = str(target)
+
+        self.archive_commands.unzip_archive(str(tmp_path / "test.zip"))
+
+        assert (target / "a.txt").read_text() == "a"
+
+    def test_unzip_keeps_members_inside_target(self, tmp_path):
+        """Тест: '..' и абсолютные пути в именах не выводят файлы за пределы каталога."""
+        self._make_archive(tmp_path / "evil.zip", {
+            "../escape.txt": "x",
+            "/abs/path.txt": "y",
+            "ok/../../deep.txt": "z",
+        })
+        target = tmp_path / "target"
+        target.mkdir()
+        self.archive_commands.current_dir = str(target)
+
+        self.archive_commands.unzip_archive(str(tmp_path / "evil.zip"))
+
+        assert not (tmp_path / "escape.txt").exists()
+        assert (target / "escape.txt").read_text() == "x"
+        assert (target / "abs" / "path.txt").read_text() == "y"
+        assert (target / "ok" / "deep.txt").read_text() == "z"
+
+    def test_unzip_corrupt_archive(self, tmp_path, capsys):
+        """Тест: повреждённый архив - ошибка."""
+        (tmp_path / "bad.zip").write_bytes(b"not a zip")
+        self.archive_commands.current_dir = str(tmp_path)
+
+        self.archive_commands.unzip_archive("bad.zip")
+
+        assert 'Error' in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()
+
+
+class TestParallelUnzipper:
+    """Тесты параллельного распаковщика."""
+
+    def test_safe_member_path_matches_zipfile(self, tmp_path):
+        """Тест: пути совпадают с теми, что выбирает ZipFile.extract."""
+        names = ["a/b.txt", "../x.txt", "/etc/passwd", "./c/./d.txt", "e/../f.txt"]
+        with zipfile.ZipFile(tmp_path / "t.zip", 'w') as zipf:
+            for name in names:
+                zipf.writestr(name, "data")
+        with zipfile.ZipFile(tmp_path / "t.zip") as zipf:
+            for member in zipf.infolist():
+                expected = zipf.extract(member, tmp_path / "ref")
+                assert safe_member_path(member, str(tmp_path / "ref")) == expected
+
+    def test_windows_name_sanitized_like_zipfile(self):
+        """Тест: очистка имён для Windows совпадает с ZipFile.extract."""
+        assert extract._sanitize_windows_name('a:b\\c?.\\.\\d*', '\\') == 'a_b\\c_\\d_'
+        assert extract._sanitize_windows_name('x/y../z', '/') == 'x/y/z'
+
+    def test_large_member_streams_through_buffer(self, tmp_path):
+        """Тест: большой элемент копируется кусками размера буфера."""
+        data = os.urandom(512 * 1024)
+        with zipfile.ZipFile(tmp_path / "big.zip", 'w') as zipf:
+            zipf.writestr("big.bin", data)
+
+        with patch('shutil.copyfileobj', wraps=shutil.copyfileobj) as mock_copy:
+            count = ParallelUnzipper(str(tmp_path / "big.zip"), workers=2,
+                                     buffer_size=64 * 1024).extract(str(tmp_path / "out"))
+
+        assert count == 1
+        assert mock_copy.call_args[0][2] == 64 * 1024
+        assert (tmp_path / "out" / "big.bin").read_bytes() == data
+
+    def test_central_directory_parsed_once(self, tmp_path):
+        """Тест: архив открывается и центральный каталог читается один раз на все потоки."""
+        with zipfile.ZipFile(tmp_path / "many.zip", 'w') as zipf:
+            for i in range(100):
+                zipf.writestr(f"f{i}.txt", str(i) * 1000)
+
+        with patch('zipfile.ZipFile', wraps=zipfile.ZipFile) as mock_zipfile:
+            ParallelUnzipper(str(tmp_path / "many.zip"), workers=4).extract(str(tmp_path / "out"))
+
+        assert mock_zipfile.call_count == 1
+        assert sorted(os.listdir(tmp_path / "out")) == sorted(f"f{i}.txt" for i in range(100))
+        for i in range(100):
+            assert (tmp_path / "out" / f"f{i}.txt").read_text() == str(i) * 1000
+
+    @pytest.mark.filterwarnings("ignore:Duplicate name")
+    def test_duplicate_names_last_wins(self, tmp_path):
+        """Тест: из элементов с одинаковым именем распаковывается последний."""
+        with zipfile.ZipFile(tmp_path / "dup.zip", 'w') as zipf:
+            for i in range(20):
+                zipf.writestr("dup.txt", f"version {i}" * 1000)
+            zipf.writestr("other.txt", "other")
+
+        count = ParallelUnzipper(str(tmp_path / "dup.zip"), workers=8).extract(
+            str(tmp_path / "out"))
+
+        assert count == 2
+        assert (tmp_path / "out" / "dup.txt").read_text() == "version 19" * 1000
+
+
+class TestUnzipSelected:
+    """Тесты извлечения отдельных элементов ZIP."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.archive_commands = ArchiveCommands(self.logger)
+
+    def test_unzip_selected_members(self, tmp_path):
+        """Тест: извлекаются только элементы, подходящие под имя, каталог или шаблон."""
+        with zipfile.ZipFile(tmp_path / "a.zip", 'w') as zipf:
+            for name in ["docs/a.md", "docs/b.txt", "src/main.py", "src/util.py", "README"]:
+                zipf.writestr(name, name)
+        target = tmp_path / "out"
+        target.mkdir()
+        self.archive_commands.current_dir = str(target)
+
+        self.archive_commands.unzip_archive(str(tmp_path / "a.zip"), members=["docs", "src/m*.py"])
 
-        mock_zipf = MagicMock()
+        extracted = sorted(str(p.relative_to(target)) for p in target.rglob("*") if p.is_file())
+        assert extracted == ["docs/a.md", "docs/b.txt", "src/main.py"]
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', return_value=archive_path), \
-                patch('os.path.join', return_value=archive_path), \
-                patch('zipfile.ZipFile', return_value=mock_zipf), \
-                patch('builtins.print'):
-            mock_zipf.__enter__ = Mock(return_value=mock_zipf)
-            mock_zipf.__exit__ = Mock(return_value=False)
+    def test_unzip_unmatched_member(self, tmp_path, capsys):
+        """Тест: имя без совпадений - ошибка, ничего не извлекается."""
+        with zipfile.ZipFile(tmp_path / "a.zip", 'w') as zipf:
+            zipf.writestr("a.txt", "a")
+        target = tmp_path / "out"
+        target.mkdir()
+        self.archive_commands.current_dir = str(target)
 
-            self.archive_commands.unzip_archive("test.zip")
+        self.archive_commands.unzip_archive(str(tmp_path / "a.zip"), members=["a.txt", "b.txt"])
 
-            # Проверяем что extractall вызван с правильной директорией
-            mock_zipf.extractall.assert_called_once()
-            call_args = mock_zipf.extractall.call_args[0]
-            assert call_args[0] == "/test/dir"
+        assert 'No archive members match: b.txt' in capsys.readouterr().out
+        assert list(target.iterdir()) == []
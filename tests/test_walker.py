@@ -0,0 +1,123 @@
+"""Тесты для общего обхода деревьев каталогов."""
+
+import os
+import zipfile
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.commands import walker
+from src.commands.archive import ArchiveCommands
+from src.commands.walker import walk
+from src.logger import ShellLogger
+
+
+class TestWalk:
+    """Тесты walk()."""
+
+    def _make_tree(self, root):
+        """Дерево: a.txt, b/c.txt, b/d/e.log, f/g.txt."""
+        (root / "b" / "d").mkdir(parents=True)
+        (root / "f").mkdir()
+        (root / "a.txt").write_text("a")
+        (root / "b" / "c.txt").write_text("cc")
+        (root / "b" / "d" / "e.log").write_text("eee")
+        (root / "f" / "g.txt").write_text("g")
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_preorder_with_sorted_entries(self, tmp_path, workers):
+        """Тест: каталог выдаётся раньше содержимого, записи каталога - по именам."""
+        self._make_tree(tmp_path)
+        rels = [item.rel for item in walk(str(tmp_path), workers=workers)]
+        b_d = os.path.join("b", "d")
+        b_d_e = os.path.join("b", "d", "e.log")
+
+        assert sorted(rels) == sorted(["a.txt", "b", os.path.join("b", "c.txt"), b_d, b_d_e,
+                                       "f", os.path.join("f", "g.txt")])
+        assert rels.index("b") < rels.index(b_d) < rels.index(b_d_e)
+        assert rels[:3] == ["a.txt", "b", "f"]
+
+    def test_include_and_exclude(self, tmp_path):
+        """Тест: include отбирает файлы, exclude отсекает поддерево без чтения."""
+        self._make_tree(tmp_path)
+        with patch('src.commands.walker._scan_dir', wraps=walker._scan_dir) as mock_scan:
+            rels = [item.rel for item in walk(str(tmp_path), dirs=False, workers=1,
+                                              include=lambda item: item.name.endswith('.txt'),
+                                              exclude=lambda item: item.name == 'd')]
+
+        assert rels == ["a.txt", os.path.join("b", "c.txt"), os.path.join("f", "g.txt")]
+        scanned = [call.args[0] for call in mock_scan.call_args_list]
+        assert str(tmp_path / "b" / "d") not in scanned
+
+    def test_stat_reused(self, tmp_path):
+        """Тест: stat записи берётся из кэша DirEntry."""
+        self._make_tree(tmp_path)
+        items = list(walk(str(tmp_path), dirs=False, prefetch_stat=True))
+        with patch('os.stat') as mock_stat, patch('os.lstat') as mock_lstat:
+            sizes = sorted(item.stat().st_size for item in items)
+        assert sizes == [1, 1, 2, 3]
+        mock_stat.assert_not_called()
+        mock_lstat.assert_not_called()
+
+    def test_symlink_loop_detected(self, tmp_path):
+        """Тест: петля ссылок на предка не зацикливает обход."""
+        self._make_tree(tmp_path)
+        (tmp_path / "b" / "d" / "up").symlink_to(tmp_path / "b")
+
+        followed = [item.rel for item in walk(str(tmp_path), follow_symlinks=True)]
+        assert os.path.join("b", "d", "up") not in followed
+        assert len(followed) == 7
+
+        plain = [item for item in walk(str(tmp_path))]
+        link = [item for item in plain if item.name == "up"][0]
+        assert link.is_symlink() and not link.is_dir()
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_symlink_to_sibling_followed(self, tmp_path, workers):
+        """Тест: каталог, доступный по ссылке без петли, обходится по обоим путям."""
+        (tmp_path / "real").mkdir()
+        (tmp_path / "real" / "f.txt").write_text("f")
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+
+        rels = [item.rel for item in walk(str(tmp_path), follow_symlinks=True, workers=workers)]
+
+        assert sorted(rels) == ["link", os.path.join("link", "f.txt"),
+                                "real", os.path.join("real", "f.txt")]
+
+    def test_file_root_and_errors(self, tmp_path):
+        """Тест: корень-файл даёт пустой обход, ошибки чтения передаются onerror."""
+        (tmp_path / "file.txt").write_text("x")
+        assert list(walk(str(tmp_path / "file.txt"))) == []
+
+        errors = []
+        with patch('os.scandir', side_effect=PermissionError("denied")):
+            assert list(walk(str(tmp_path), onerror=errors.append)) == []
+            with pytest.raises(PermissionError):
+                list(walk(str(tmp_path)))
+        assert len(errors) == 1
+
+    def test_generator_stops_early(self, tmp_path):
+        """Тест: обход ленивый, незавершённый генератор закрывается без ошибок."""
+        for i in range(50):
+            (tmp_path / f"d{i:02d}").mkdir()
+        it = walk(str(tmp_path), workers=4)
+        assert next(it).rel == "d00"
+        it.close()
+
+
+class TestWalkConsumers:
+    """Тесты команд, использующих walk()."""
+
+    def test_zip_skips_own_archive(self, tmp_path):
+        """Тест: архив, создаваемый внутри папки, не попадает сам в себя."""
+        folder = tmp_path / "data"
+        folder.mkdir()
+        (folder / "a.txt").write_text("a")
+        archive_commands = ArchiveCommands(Mock(spec=ShellLogger))
+        archive_commands.current_dir = str(tmp_path)
+
+        with patch('builtins.print'):
+            archive_commands.zip_folder("data", "data/out.zip")
+
+        with zipfile.ZipFile(folder / "out.zip") as zipf:
+            assert zipf.namelist() == ["data/a.txt"]
@@ -1,11 +1,14 @@
 """Тесты для команды zip."""
 
-import pytest
 import os
 import zipfile
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
+
+import pytest
 
+from src.commands import compress
 from src.commands.archive import ArchiveCommands
+from src.commands.compress import zip_members_parallel
 from src.logger import ShellLogger
 
 
@@ -18,57 +21,33 @@ class TestZipCommand:
         self.archive_commands = ArchiveCommands(self.logger)
         self.archive_commands.current_dir = "/test/dir"
 
-    def test_zip_single_file(self):
+    def test_zip_single_file(self, tmp_path, capsys):
         """Тест: создание zip архива из одного файла."""
-        folder_path = "/test/dir/file.txt"
-        archive_path = "/test/dir/archive.zip"
+        (tmp_path / "file.txt").write_text("hello")
+        self.archive_commands.current_dir = str(tmp_path)
 
-        mock_zipf = MagicMock()
+        self.archive_commands.zip_folder("file.txt", "archive.zip")
 
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', side_effect=[folder_path, archive_path]), \
-                patch('os.path.join', side_effect=[folder_path, archive_path]), \
-                patch('os.path.isfile', return_value=True), \
-                patch('os.path.basename', return_value='file.txt'), \
-                patch('zipfile.ZipFile', return_value=mock_zipf) as mock_zip_class, \
-                patch('builtins.print') as mock_print:
-            mock_zipf.__enter__ = Mock(return_value=mock_zipf)
-            mock_zipf.__exit__ = Mock(return_value=False)
+        with zipfile.ZipFile(tmp_path / "archive.zip") as zipf:
+            assert zipf.namelist() == ["file.txt"]
+            assert zipf.read("file.txt") == b"hello"
+            assert zipf.getinfo("file.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert 'Created' in capsys.readouterr().out
 
-            self.archive_commands.zip_folder("file.txt", "archive.zip")
+    def test_zip_folder(self, tmp_path):
+        """Тест: создание zip архива из папки."""
+        folder = tmp_path / "myfolder"
+        (folder / "sub").mkdir(parents=True)
+        (folder / "file1.txt").write_text("one")
+        (folder / "sub" / "file2.txt").write_text("two" * 1000)
+        self.archive_commands.current_dir = str(tmp_path)
 
-            # Проверяем что ZipFile был создан
-            mock_zip_class.assert_called_once_with(archive_path, 'w', zipfile.ZIP_DEFLATED)
-            # Файл должен быть добавлен в архив
-            mock_zipf.write.assert_called_once()
-            success_msg = mock_print.call_args[0][0]
-            assert 'Created' in success_msg or 'SUCCESS' in success_msg
+        self.archive_commands.zip_folder("myfolder", "archive.zip", workers=4)
 
-    def test_zip_folder(self):
-        """Тест: создание zip архива из папки."""
-        folder_path = "/test/dir/myfolder"
-        archive_path = "/test/dir/archive.zip"
-
-        mock_zipf = MagicMock()
-
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', side_effect=[folder_path, archive_path]), \
-                patch('os.path.join', side_effect=[folder_path, archive_path, "/test/dir/myfolder/file1.txt"]), \
-                patch('os.path.isfile', return_value=False), \
-                patch('os.walk', return_value=[
-                    ("/test/dir/myfolder", [], ["file1.txt", "file2.txt"])
-                ]), \
-                patch('os.path.relpath', side_effect=lambda path, start: "myfolder/file1.txt"), \
-                patch('os.path.dirname', return_value="/test/dir"), \
-                patch('zipfile.ZipFile', return_value=mock_zipf), \
-                patch('builtins.print'):
-            mock_zipf.__enter__ = Mock(return_value=mock_zipf)
-            mock_zipf.__exit__ = Mock(return_value=False)
-
-            self.archive_commands.zip_folder("myfolder", "archive.zip")
-
-            # Файлы из папки должны быть добавлены
-            assert mock_zipf.write.call_count >= 1
+        with zipfile.ZipFile(tmp_path / "archive.zip") as zipf:
+            assert zipf.testzip() is None
+            assert sorted(zipf.namelist()) == ["myfolder/file1.txt", "myfolder/sub/file2.txt"]
+            assert zipf.read("myfolder/sub/file2.txt") == b"two" * 1000
 
     def test_zip_nonexistent_folder(self):
         """Тест: создание архива из несуществующей папки выдаёт ошибку."""
@@ -82,27 +61,159 @@ class TestZipCommand:
             assert 'Error' in error_msg
             self.logger.log_error.assert_called_once()
 
-    def test_zip_empty_folder(self):
+    def test_zip_empty_folder(self, tmp_path, capsys):
         """Тест: создание архива из пустой папки."""
-        folder_path = "/test/dir/empty_folder"
-        archive_path = "/test/dir/empty.zip"
-
-        mock_zipf = MagicMock()
-
-        with patch('os.path.exists', return_value=True), \
-                patch('os.path.abspath', side_effect=[folder_path, archive_path]), \
-                patch('os.path.join', side_effect=[folder_path, archive_path]), \
-                patch('os.path.isfile', return_value=False), \
-                patch('os.walk', return_value=[
-                    ("/test/dir/empty_folder", [], [])  # Пустая папка
-                ]), \
-                patch('zipfile.ZipFile', return_value=mock_zipf), \
-                patch('builtins.print') as mock_print:
-            mock_zipf.__enter__ = Mock(return_value=mock_zipf)
-            mock_zipf.__exit__ = Mock(return_value=False)
+        (tmp_path / "empty_folder").mkdir()
+        self.archive_commands.current_dir = str(tmp_path)
+
+        self.archive_commands.zip_folder("empty_folder", "empty.zip")
+
+        # Архив должен создаться, даже если папка пустая
+        with zipfile.ZipFile(tmp_path / "empty.zip") as zipf:
+            assert zipf.namelist() == []
+        assert 'Created' in capsys.readouterr().out
+
+
+class TestParallelZip:
+    """Тесты параллельного сжатия элементов ZIP."""
+
+    def test_members_written_in_order(self, tmp_path):
+        """Тест: элементы пишутся в порядке перечисления независимо от потоков."""
+        members = []
+        for i in range(50):
+            path = tmp_path / f"f{i:02d}.bin"
+            path.write_bytes(os.urandom(i * 100) + b"a" * 5000)
+            members.append((str(path), path.name))
+
+        with open(tmp_path / "out.zip", 'wb') as f:
+            infos = zip_members_parallel(f, members, workers=8)
+
+        assert [info.filename for info in infos] == [name for _, name in members]
+        with zipfile.ZipFile(tmp_path / "out.zip") as zipf:
+            assert zipf.namelist() == [name for _, name in members]
+            assert zipf.testzip() is None
+            for path, name in members:
+                with open(path, 'rb') as f:
+                    assert zipf.read(name) == f.read()
+
+    def test_large_member_written_serially(self, tmp_path):
+        """Тест: файлы больше порога пишутся в главном потоке без сжатия в памяти."""
+        small = tmp_path / "small.txt"
+        large = tmp_path / "large.txt"
+        small.write_text("small")
+        large.write_text("large" * 100)
+
+        with patch('src.commands.compress.ARCHIVE_MAX_PARALLEL_MEMBER', 100), \
+                patch('src.commands.compress.compress_member',
+                      wraps=compress.compress_member) as mock_compress, \
+                open(tmp_path / "out.zip", 'wb') as f:
+            zip_members_parallel(f, [(str(small), "small.txt"), (str(large), "large.txt")],
+                                 workers=2)
+
+        mock_compress.assert_called_once()
+        assert mock_compress.call_args[0][:2] == (str(small), "small.txt")
+        with zipfile.ZipFile(tmp_path / "out.zip") as zipf:
+            assert zipf.namelist() == ["small.txt", "large.txt"]
+            assert zipf.read("large.txt") == b"large" * 100
+
+    @pytest.mark.parametrize("codec", ["stored", "deflate", "bzip2", "lzma"])
+    def test_parallel_archive_matches_sequential(self, tmp_path, codec):
+        """Тест: параллельный архив побайтово совпадает с последовательным ZipFile.write."""
+        members = []
+        for i in range(6):
+            path = tmp_path / f"f{i}.txt"
+            path.write_bytes(b"line %d\n" % i * (50 if i % 2 else 500))
+            members.append((str(path), path.name))
+        compress_type = compress.ZIP_CODECS[codec]
+
+        with patch('src.commands.compress.ARCHIVE_MAX_PARALLEL_MEMBER', 1000), \
+                open(tmp_path / "parallel.zip", 'wb') as f:
+            zip_members_parallel(f, members, workers=3, compress_type=compress_type)
+        with zipfile.ZipFile(tmp_path / "sequential.zip", 'w', compress_type) as zipf:
+            for path, name in members:
+                zipf.write(path, name)
+
+        with zipfile.ZipFile(tmp_path / "parallel.zip") as zipf:
+            assert zipf.testzip() is None
+        assert (tmp_path / "parallel.zip").read_bytes() == \
+            (tmp_path / "sequential.zip").read_bytes()
+
+    def test_falls_back_without_zipfile_state(self, tmp_path):
+        """Тест: без ожидаемых атрибутов ZipFile элементы пишутся последовательно."""
+        path = tmp_path / "a.txt"
+        path.write_text("data")
+
+        with patch('src.commands.compress.ZIPFILE_WRITE_STATE', ('missing_attribute',)), \
+                patch('src.commands.compress.compress_member') as mock_compress, \
+                open(tmp_path / "out.zip", 'wb') as f:
+            zip_members_parallel(f, [(str(path), "a.txt")], workers=2)
+
+        mock_compress.assert_not_called()
+        with zipfile.ZipFile(tmp_path / "out.zip") as zipf:
+            assert zipf.testzip() is None
+            assert zipf.read("a.txt") == b"data"
+
+
+class TestZipCodecs:
+    """Тесты выбора кодека и уровня сжатия ZIP."""
 
-            self.archive_commands.zip_folder("empty_folder", "empty.zip")
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.archive_commands = ArchiveCommands(self.logger)
 
-            # Архив должен создаться, даже если папка пустая
-            success_msg = mock_print.call_args[0][0]
-            assert 'Created' in success_msg or 'SUCCESS' in success_msg
+    def _make_folder(self, root):
+        """Папка с текстом и уже сжатым файлом."""
+        folder = root / "data"
+        folder.mkdir()
+        (folder / "text.txt").write_text("lorem ipsum " * 2000)
+        (folder / "photo.JPG").write_bytes(b"jpeg" * 2000)
+        self.archive_commands.current_dir = str(root)
+        return folder
+
+    @pytest.mark.parametrize("codec, compress_type", [
+        ("stored", zipfile.ZIP_STORED),
+        ("deflate", zipfile.ZIP_DEFLATED),
+        ("bzip2", zipfile.ZIP_BZIP2),
+        ("lzma", zipfile.ZIP_LZMA),
+        ("xz", zipfile.ZIP_LZMA),
+    ])
+    def test_zip_codec(self, tmp_path, codec, compress_type):
+        """Тест: выбранный кодек применяется и архив читается обратно."""
+        self._make_folder(tmp_path)
+
+        self.archive_commands.zip_folder("data", "out.zip", codec=codec, level=1, workers=2)
+
+        with zipfile.ZipFile(tmp_path / "out.zip") as zipf:
+            assert zipf.testzip() is None
+            assert zipf.getinfo("data/text.txt").compress_type == compress_type
+            assert zipf.read("data/text.txt") == b"lorem ipsum " * 2000
+
+    def test_compressed_inputs_are_stored(self, tmp_path):
+        """Тест: уже сжатые файлы сохраняются без повторного сжатия."""
+        self._make_folder(tmp_path)
+
+        self.archive_commands.zip_folder("data", "out.zip", codec="lzma")
+
+        with zipfile.ZipFile(tmp_path / "out.zip") as zipf:
+            assert zipf.getinfo("data/photo.JPG").compress_type == zipfile.ZIP_STORED
+            assert zipf.read("data/photo.JPG") == b"jpeg" * 2000
+
+    def test_level_changes_ratio(self, tmp_path):
+        """Тест: уровень 9 сжимает не хуже уровня 1."""
+        self._make_folder(tmp_path)
+
+        self.archive_commands.zip_folder("data", "fast.zip", level=1)
+        self.archive_commands.zip_folder("data", "best.zip", level=9)
+
+        assert (tmp_path / "best.zip").stat().st_size <= (tmp_path / "fast.zip").stat().st_size
+
+    def test_invalid_level(self, tmp_path, capsys):
+        """Тест: уровень вне 1-9 - ошибка."""
+        self._make_folder(tmp_path)
+
+        self.archive_commands.zip_folder("data", "out.zip", level=12)
+
+        assert 'Error' in capsys.readouterr().out
+        assert not (tmp_path / "out.zip").exists()
+        self.logger.log_error.assert_called_once()
@@ -0,0 +1,75 @@
+"""Тесты для команды zipls."""
+
+import zipfile
+from unittest.mock import Mock, patch
+
+from src.commands.archive import ArchiveCommands
+from src.logger import ShellLogger
+
+
+class TestZiplsCommand:
+    """Тесты для команды zipls."""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом."""
+        self.logger = Mock(spec=ShellLogger)
+        self.archive_commands = ArchiveCommands(self.logger)
+
+    def _make_archive(self, tmp_path):
+        """Архив с несколькими элементами."""
+        with zipfile.ZipFile(tmp_path / "a.zip", 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr("docs/readme.md", "# readme" * 100)
+            zipf.writestr("docs/guide.txt", "guide")
+            zipf.writestr("src/main.py", "print()")
+        self.archive_commands.current_dir = str(tmp_path)
+
+    def test_zipls_lists_members(self, tmp_path, capsys):
+        """Тест: выводятся все элементы с размерами и итог."""
+        self._make_archive(tmp_path)
+
+        self.archive_commands.list_zip("a.zip")
+
+        lines = capsys.readouterr().out.splitlines()
+        assert 'Name' in lines[0]
+        names = [line.split()[-1] for line in lines[2:-2]]
+        assert names == ["docs/readme.md", "docs/guide.txt", "src/main.py"]
+        assert lines[2].split()[0] == "800"
+        assert lines[-1].endswith("3 members")
+
+    def test_zipls_does_not_decompress(self, tmp_path, capsys):
+        """Тест: для списка данные элементов не читаются."""
+        self._make_archive(tmp_path)
+
+        with patch.object(zipfile.ZipFile, 'open') as mock_open:
+            self.archive_commands.list_zip("a.zip")
+
+        mock_open.assert_not_called()
+        assert "src/main.py" in capsys.readouterr().out
+
+    def test_zipls_with_glob(self, tmp_path, capsys):
+        """Тест: шаблон ограничивает список."""
+        self._make_archive(tmp_path)
+
+        self.archive_commands.list_zip("a.zip", ["docs/*.md", "src"])
+
+        out = capsys.readouterr().out
+        assert "docs/readme.md" in out and "src/main.py" in out
+        assert "guide.txt" not in out
+
+    def test_zipls_no_match(self, tmp_path, capsys):
+        """Тест: шаблон без совпадений - ошибка."""
+        self._make_archive(tmp_path)
+
+        self.archive_commands.list_zip("a.zip", ["*.exe"])
+
+        assert 'No archive members match: *.exe' in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()
+
+    def test_zipls_nonexistent_archive(self, tmp_path, capsys):
+        """Тест: несуществующий архив - ошибка."""
+        self.archive_commands.current_dir = str(tmp_path)
+
+        self.archive_commands.list_zip("missing.zip")
+
+        assert 'Error' in capsys.readouterr().out
+        self.logger.log_error.assert_called_once()